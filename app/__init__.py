@@ -1,21 +1,21 @@
 # In app/__init__.py
+# Load the environment first: modules below read their settings at import time
+from app import config
 from app.routes import auth, users, supplements, intake_logs, symptom_logs, interactions, alerts, reports, tracker_supplements_lists
-from app.models import init_db, TokenBlacklist
+from app.models import TokenBlacklist
+from app.models.init_db import init_indexes
+from app.models.symptom_log import SymptomCategoryManager
+from app.utils.startup import StartupTasks
 from app.utils.error_handlers import register_error_handlers, APIError, handle_api_error
 from flask import Flask, jsonify, redirect
 from flask_jwt_extended import JWTManager
-from app.swagger import swagger_template, swagger_ui_blueprint
 import os
-from dotenv import load_dotenv
 from flask_cors import CORS
 
-# Load environment variables
-load_dotenv()
-
 def create_app():
     app = Flask(__name__)
     CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}})
-    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'fallback_secret_key')
+    app.config['JWT_SECRET_KEY'] = config.JWT_SECRET_KEY
     jwt = JWTManager(app)
     
     # JWT configuration to check for blacklisted tokens
@@ -42,26 +42,38 @@ def create_app():
     app.register_blueprint(reports.bp)
     app.register_blueprint(tracker_supplements_lists.bp)
     
-    # Register Swagger UI blueprint
-    app.register_blueprint(swagger_ui_blueprint)
-    
     # Register error handlers
     register_error_handlers(app)
     
     # Register custom error handler for APIError
     app.errorhandler(APIError)(handle_api_error)
     
-    # Create a route for the Swagger JSON
-    @app.route('/static/swagger.json')
-    def swagger():
-        return jsonify(swagger_template)
+    # The Swagger UI and its spec are only imported when enabled
+    if config.SWAGGER_ENABLED:
+        from app.swagger import swagger_template, swagger_ui_blueprint
+        app.register_blueprint(swagger_ui_blueprint)
+
+        # Create a route for the Swagger JSON
+        @app.route('/static/swagger.json')
+        def swagger():
+            return jsonify(swagger_template)
+
+        # Add a basic route for the root path that redirects to the Swagger UI
+        @app.route('/')
+        def index():
+            return redirect('/api/docs')
 
-    with app.app_context():
-        init_db()
+    # Serve right away; indexes are ensured and reference data seeded in the background
+    tasks = [('indexes', init_indexes)]
+    if os.getenv('SEED_SYMPTOMS_ON_STARTUP', '1') == '1':
+        tasks.append(('seed', SymptomCategoryManager.initialize_symptom_data))
+    # Test apps run no startup thread; the tasks would retry against a missing database forever
+    app.extensions['startup'] = StartupTasks(app, tasks).start('deferred' if config.TESTING else None)
 
-    # Add a basic route for the root path that redirects to the Swagger UI
-    @app.route('/')
-    def index():
-        return redirect('/api/docs')
+    # Readiness probe: 503 until every startup task has succeeded
+    @app.route('/readyz')
+    def readyz():
+        startup = app.extensions['startup']
+        return jsonify(startup.to_dict()), 200 if startup.ready else 503
 
-    return app
\ No newline at end of file
+    return app
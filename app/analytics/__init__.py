@@ -0,0 +1,10 @@
+"""
+Report analytics: shared preprocessing of logs (ReportFrame) and the
+NumPy engine used to compute report sections in batch, including the
+supplement-symptom correlation statistics and the downsampled
+chart series.
+"""
+from app.analytics.frame import ReportFrame
+from app.analytics import engine, correlation, series
+
+__all__ = ['ReportFrame', 'engine', 'correlation', 'series']
@@ -0,0 +1,178 @@
+import math
+import os
+import time
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from app.utils.concurrency import PoolBusy
+
+# Permutations run for each report and how many go into one pool task
+CORRELATION_PERMUTATIONS = int(os.getenv('CORRELATION_PERMUTATIONS', '1000'))
+PERMUTATION_CHUNK = 100
+# Seconds the permutation test may take; p-values use the permutations finished by then
+CORRELATION_TIME_BUDGET_SECONDS = float(os.getenv('CORRELATION_TIME_BUDGET_SECONDS', '2'))
+# Fixed seed, so a report is reproducible for the same data (and safe to cache)
+PERMUTATION_SEED = 20250419
+
+
+def day_matrices(frame):
+    """
+    Per-day intake and symptom matrices over the days a ReportFrame covers.
+    Returns:
+        tuple: (intake bool [days, supplements], severity int [days, symptom types]), one row per
+        calendar day from the first to the last logged day. Severity is the day's highest ordinal
+        severity code (0 when the symptom wasn't logged or was logged as 'none').
+    """
+    groups, days = frame.day_pairs
+    symptom_days = np.array(frame.symptom_day, dtype=np.float64)  # None becomes NaN
+    dated = ~np.isnan(symptom_days)
+    symptom_days = symptom_days[dated].astype(np.int64)
+    symptom_types = np.array(frame.symptom_type, dtype=np.int64)[dated]
+    codes = np.array(frame.symptom_code, dtype=np.int64)[dated]
+
+    logged = np.concatenate((days, symptom_days))
+    if not len(logged):
+        return np.zeros((0, len(frame.supplements)), dtype=bool), np.zeros((0, len(frame.symptom_types)), dtype=np.int64)
+    first = int(logged.min())
+    span = int(logged.max()) - first + 1
+
+    intake = np.zeros((span, len(frame.supplements)), dtype=bool)
+    intake[days - first, groups] = True
+    severity = np.zeros((span, len(frame.symptom_types)), dtype=np.int64)
+    np.maximum.at(severity, (symptom_days - first, symptom_types), codes)
+    return intake, severity
+
+
+def lagged_exposure(intake: np.ndarray, lag_days: int) -> np.ndarray:
+    """Mark each day on which a supplement was taken that day or up to lag_days days before"""
+    taken = np.cumsum(intake, axis=0, dtype=np.int64)
+    earlier = np.zeros_like(taken)
+    earlier[lag_days + 1:] = taken[:-(lag_days + 1)] if lag_days + 1 < len(taken) else 0
+    return (taken - earlier) > 0
+
+
+def contingency(exposure: np.ndarray, outcome: np.ndarray):
+    """
+    2x2 tables for every (supplement, symptom) pair at once.
+    Args:
+        exposure: bool [days, supplements]; outcome: bool [days, symptoms].
+    Returns:
+        tuple: (both, exposure only, outcome only, neither) day counts, each [supplements, symptoms].
+    """
+    exposure = exposure.astype(np.float64)
+    outcome = outcome.astype(np.float64)
+    both = exposure.T @ outcome
+    exposed = exposure.sum(axis=0)[:, None]
+    occurred = outcome.sum(axis=0)[None, :]
+    exposure_only = exposed - both
+    outcome_only = occurred - both
+    neither = len(exposure) - both - exposure_only - outcome_only
+    return both, exposure_only, outcome_only, neither
+
+
+def _column_correlation(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Pearson correlation of every column of x with every column of y (NaN for constant columns)"""
+    x = x - x.mean(axis=0)
+    y = y - y.mean(axis=0)
+    norms = np.sqrt((x * x).sum(axis=0))[:, None] * np.sqrt((y * y).sum(axis=0))[None, :]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (x.T @ y) / norms
+
+
+_chi_square_p = np.frompyfunc(lambda chi_square: math.erfc(math.sqrt(chi_square / 2)), 1, 1)
+
+
+def pair_statistics(exposure: np.ndarray, severity: np.ndarray) -> dict:
+    """
+    Association statistics for every (supplement, symptom) pair.
+    Args:
+        exposure: bool [days, supplements] from lagged_exposure.
+        severity: int [days, symptoms] from day_matrices.
+    Returns:
+        dict: [supplements, symptoms] arrays - 'both', 'exposedDays', 'symptomDays', 'phi' (the
+        correlation of the 2x2 table), 'chiSquare' and its 1-degree-of-freedom 'chiSquarePValue',
+        'oddsRatio' (with 0.5 added to every cell) and 'severityCorrelation' (exposure vs ordinal
+        severity). Undefined values (a supplement taken every day, a symptom never logged) are NaN.
+    """
+    outcome = severity > 0
+    both, exposure_only, outcome_only, neither = contingency(exposure, outcome)
+    phi = _column_correlation(exposure.astype(np.float64), outcome.astype(np.float64))
+    chi_square = len(exposure) * phi ** 2
+    chi_square_p = np.full(chi_square.shape, np.nan)
+    defined = ~np.isnan(chi_square)
+    chi_square_p[defined] = _chi_square_p(chi_square[defined]).astype(np.float64)
+    return {
+        'both': both,
+        'exposedDays': both + exposure_only,
+        'symptomDays': both + outcome_only,
+        'phi': phi,
+        'chiSquare': chi_square,
+        'chiSquarePValue': chi_square_p,
+        'oddsRatio': ((both + 0.5) * (neither + 0.5)) / ((exposure_only + 0.5) * (outcome_only + 0.5)),
+        'severityCorrelation': _column_correlation(exposure.astype(np.float64), severity.astype(np.float64))
+    }
+
+
+def count_exceedances(exposure: np.ndarray, outcome: np.ndarray, count: int, seed: int) -> np.ndarray:
+    """
+    Run `count` day permutations of the outcome and count, per pair, how often the joint count
+    is at least as far from its expectation as observed. Shuffling days keeps both margins of every
+    2x2 table, so this is a Monte Carlo version of Fisher's exact test (two-sided).
+    """
+    rng = np.random.default_rng(seed)
+    exposure_t = exposure.T.astype(np.float64)
+    outcome = outcome.astype(np.float64)
+    expected = exposure_t.sum(axis=1)[:, None] * outcome.sum(axis=0)[None, :] / len(outcome)
+    observed = np.abs(exposure_t @ outcome - expected) - 1e-9
+    exceed = np.zeros(observed.shape, dtype=np.int64)
+    for _ in range(count):
+        exceed += np.abs(exposure_t @ outcome[rng.permutation(len(outcome))] - expected) >= observed
+    return exceed
+
+
+def permutation_p_values(exposure: np.ndarray, outcome: np.ndarray, permutations: int = None,
+                         time_budget: float = None, pool=None):
+    """
+    Permutation p-values for every (supplement, symptom) pair.
+    Permutations are split into chunks run on `pool` (a concurrent.futures executor; in this process
+    when None). Chunks not finished within the time budget, or that a saturated pool had no room
+    for (PoolBusy), are dropped.
+    Returns:
+        tuple: (p-values [supplements, symptoms] or None when no chunk finished, permutations run).
+    """
+    permutations = CORRELATION_PERMUTATIONS if permutations is None else permutations
+    time_budget = CORRELATION_TIME_BUDGET_SECONDS if time_budget is None else time_budget
+    chunks = [min(PERMUTATION_CHUNK, permutations - start) for start in range(0, permutations, PERMUTATION_CHUNK)]
+    seeds = [PERMUTATION_SEED + index for index in range(len(chunks))]
+    exceed = np.zeros((exposure.shape[1], outcome.shape[1]), dtype=np.int64)
+    done = 0
+
+    deadline = time.perf_counter() + time_budget
+    if pool is not None:
+        futures = {}
+        try:
+            for count, seed in zip(chunks, seeds):
+                futures[pool.submit(count_exceedances, exposure, outcome, count, seed)] = count
+        except PoolBusy:
+            pass  # The pool is saturated by other requests; keep the chunks already queued
+        except (BrokenProcessPool, RuntimeError):
+            pool = None  # A dead or shut down pool; run the chunks here instead
+
+    if pool is None:
+        for count, seed in zip(chunks, seeds):
+            if time.perf_counter() > deadline:
+                break
+            exceed += count_exceedances(exposure, outcome, count, seed)
+            done += count
+    else:
+        finished, pending = wait(futures, timeout=max(0, deadline - time.perf_counter()))
+        for future in pending:
+            future.cancel()
+        for future in finished:
+            if future.exception() is None:
+                exceed += future.result()
+                done += futures[future]
+
+    if not done:
+        return None, 0
+    return (exceed + 1) / (done + 1), done
@@ -0,0 +1,186 @@
+import numpy as np
+
+# date(1970, 1, 1).toordinal(): the epoch of NumPy's datetime64
+EPOCH_ORDINAL = 719163
+
+
+def month_numbers(days: np.ndarray) -> np.ndarray:
+    """Months since 1970-01 for an array of day ordinals"""
+    return (days - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def month_label(month: int) -> str:
+    """Format a month number from month_numbers as YYYY-MM"""
+    return f"{1970 + month // 12}-{month % 12 + 1:02d}"
+
+
+def iso_days(days) -> list:
+    """Format day ordinals as YYYY-MM-DD strings"""
+    days = np.asarray(days, dtype=np.int64)
+    return np.datetime_as_string((days - EPOCH_ORDINAL).astype('datetime64[D]')).tolist()
+
+
+def runs(groups: np.ndarray, days: np.ndarray):
+    """
+    Split (group, day) pairs sorted by group then day (no duplicates) into runs of consecutive days.
+    Returns:
+        tuple: (group, first day, last day) arrays with one entry per run.
+    """
+    if not len(days):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    breaks = (np.diff(days) != 1) | (np.diff(groups) != 0)
+    starts = np.concatenate(([0], np.flatnonzero(breaks) + 1))
+    ends = np.concatenate((starts[1:] - 1, [len(days) - 1]))
+    return groups[starts], days[starts], days[ends]
+
+
+def streaks(groups: np.ndarray, days: np.ndarray, group_count: int, today: int):
+    """
+    Current and longest streak for every group.
+    Args:
+        groups, days: Unique (group, day ordinal) pairs sorted by group then day.
+        group_count (int): Number of groups (result length).
+        today (int): Today's ordinal; a group's current streak is the run containing it.
+    Returns:
+        tuple: (current, longest) int arrays indexed by group.
+    """
+    run_group, run_first, run_last = runs(groups, days)
+    longest = np.zeros(group_count, dtype=np.int64)
+    np.maximum.at(longest, run_group, run_last - run_first + 1)
+    current = np.zeros(group_count, dtype=np.int64)
+    active = (run_first <= today) & (today <= run_last)
+    current[run_group[active]] = today - run_first[active] + 1
+    return current, longest
+
+
+def day_spans(groups: np.ndarray, days: np.ndarray, group_count: int):
+    """
+    Unique-day count, first day and last day for every group.
+    Args:
+        groups, days: Unique (group, day ordinal) pairs sorted by group then day.
+        group_count (int): Number of groups (result length).
+    Returns:
+        tuple: (count, first, last) int arrays indexed by group (first/last are 0 for empty groups).
+    """
+    count = np.bincount(groups, minlength=group_count).astype(np.int64)
+    first = np.zeros(group_count, dtype=np.int64)
+    last = np.zeros(group_count, dtype=np.int64)
+    if len(days):
+        present, starts = np.unique(groups, return_index=True)
+        first[present] = days[starts]
+        last[present] = days[np.concatenate((starts[1:], [len(days)])) - 1]
+    return count, first, last
+
+
+def monthly_totals(groups: np.ndarray, days: np.ndarray, weights: np.ndarray):
+    """
+    Intake totals per (month, group) from per-log rows.
+    Args:
+        groups, days: Group index and day ordinal of each log, in log order.
+        weights: Intake count of each log.
+    Returns:
+        tuple: (month, group, count, unique days) arrays, one entry per (month, group)
+        present, ordered by month and then by the group's first log in that month.
+    """
+    if not len(days):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    months = month_numbers(days)
+    group_count = int(groups.max()) + 1
+    keys, first_rows, inverse = np.unique(months * group_count + groups, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    totals = np.bincount(inverse, weights=weights, minlength=len(keys))
+    day_keys = np.unique(inverse * (int(days.max()) + 1) + days) // (int(days.max()) + 1)
+    unique_days = np.bincount(day_keys, minlength=len(keys))
+
+    key_months = keys // group_count
+    order = np.lexsort((first_rows, key_months))
+    return key_months[order], (keys % group_count)[order], totals[order], unique_days[order]
+
+
+def severity_trends(groups: np.ndarray, days: np.ndarray, codes: np.ndarray, group_count: int, window: int = 7,
+                    weights: np.ndarray = None):
+    """
+    Severity statistics for every group in one pass.
+    Args:
+        groups, days: Group index and day ordinal of each row, sorted by group then day.
+        codes: Ordinal severity code of each row.
+        group_count (int): Number of groups (result length).
+        window (int): Days covered by the rolling mean, ending on each row's day.
+        weights: Logs each row stands for (rows grouped by day and severity); 1 per row by default.
+    Returns:
+        tuple: (count, mean, slope, span) arrays indexed by group - the log count, the least-squares
+        slope of severity per day (0 with fewer than two distinct days) and days from first to
+        last log - and the rolling mean of each row's group over the window ending on its day.
+    """
+    codes = codes.astype(np.float64)
+    weights = np.ones(len(codes)) if weights is None else weights.astype(np.float64)
+    count = np.bincount(groups, weights=weights, minlength=group_count).astype(np.int64)
+    if not len(days):
+        empty = np.zeros(group_count)
+        return count, empty, empty, np.zeros(group_count, dtype=np.int64), np.zeros(0)
+
+    # Regress on days since each group's first log to keep the sums small
+    present, starts = np.unique(groups, return_index=True)
+    first = np.zeros(group_count, dtype=np.int64)
+    last = np.zeros(group_count, dtype=np.int64)
+    first[present] = days[starts]
+    last[present] = days[np.concatenate((starts[1:], [len(days)])) - 1]
+    x = (days - first[groups]).astype(np.float64)
+    sum_x = np.bincount(groups, weights=weights * x, minlength=group_count)
+    sum_y = np.bincount(groups, weights=weights * codes, minlength=group_count)
+    sum_xx = np.bincount(groups, weights=weights * x * x, minlength=group_count)
+    sum_xy = np.bincount(groups, weights=weights * x * codes, minlength=group_count)
+    denominator = count * sum_xx - sum_x ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, sum_y / count, 0.0)
+        slope = np.where(denominator > 0, (count * sum_xy - sum_x * sum_y) / denominator, 0.0)
+
+    # Rolling mean: rows of the same group within [day - window + 1, day], found on a combined key
+    stride = int(days.max() - days.min()) + window + 1
+    keys = groups * stride + (days - days.min())
+    starts = np.searchsorted(keys, keys - (window - 1), side='left')
+    positions = np.arange(1, len(keys) + 1)
+    totals = np.concatenate(([0.0], np.cumsum(weights * codes)))
+    logs = np.concatenate(([0.0], np.cumsum(weights)))
+    rolling = (totals[positions] - totals[starts]) / (logs[positions] - logs[starts])
+    return count, mean, slope, last - first, rolling
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling of a series sorted by x.
+    Args:
+        x, y: Coordinates of the points.
+        threshold (int): Number of points to keep (at least 3).
+    Returns:
+        np.ndarray: Sorted indices of the kept points - the first and last point, and from
+        every bucket in between the point forming the largest triangle with the point kept
+        before it and the average of the next bucket. All indices when the series is short enough.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # threshold - 2 buckets over the inner points, followed by the last point as its own bucket
+    edges = np.concatenate((np.linspace(1, count - 1, threshold - 1).astype(np.int64), [count]))
+    sums_x = np.concatenate(([0.0], np.cumsum(x)))
+    sums_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = np.diff(edges)
+    mean_x = (sums_x[edges[1:]] - sums_x[edges[:-1]]) / sizes
+    mean_y = (sums_y[edges[1:]] - sums_y[edges[:-1]]) / sizes
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        low, high = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        areas = np.abs((ax - mean_x[bucket + 1]) * (y[low:high] - ay)
+                       - (ax - x[low:high]) * (mean_y[bucket + 1] - ay))
+        previous = low + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
@@ -0,0 +1,328 @@
+from app.db.constants import REPORT_DETAIL_LIMIT
+from app.db.utils import severity_code
+from bson.objectid import ObjectId
+from collections import Counter
+from datetime import date, datetime
+from functools import cached_property
+from itertools import chain
+import numpy as np
+from app.analytics import engine
+
+
+# Days covered by a symptom's rolling severity average
+TREND_WINDOW_DAYS = 7
+# Dated logs needed before a symptom gets a trend, and the change over its logged span,
+# relative to its average severity, that counts as increasing or decreasing
+TREND_MIN_LOGS = 3
+TREND_MIN_CHANGE = 0.1
+
+
+def _field(log, *names):
+    """Return the first attribute in `names` that the log has"""
+    for name in names:
+        if hasattr(log, name):
+            return getattr(log, name)
+    return None
+
+
+def _supplement_id(log):
+    supplement_id = _field(log, 'supplement_id', 'tracked_supplement_id')
+    return str(supplement_id) if isinstance(supplement_id, ObjectId) else supplement_id
+
+
+def _symptom_type(log):
+    symptom_type = _field(log, 'symptom_type', 'symptom_id')
+    return str(symptom_type) if isinstance(symptom_type, ObjectId) else symptom_type
+
+
+class _Row:
+    """A log-shaped row rebuilt from aggregation results"""
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class ReportFrame:
+    """
+    Intake and symptom logs parsed and grouped once for report generation.
+
+    Logs are stored column-wise: each row holds the log's day as a date
+    ordinal (None when its timestamp can't be parsed), the index of its
+    supplement or symptom type and the raw values the report sections use.
+    Per-supplement and per-symptom row lists and the sorted unique intake days
+    are built up front, so report sections never re-parse timestamps or
+    re-group logs.
+
+    Report helpers expect intake logs with supplement_id, supplement_name,
+    timestamp, dosage and timing, and symptom logs with symptom_type,
+    timestamp and severity; the IntakeLog and SymptomLog model attributes
+    (tracked_supplement_id, intake_date, dosage_taken, symptom_id, date) are
+    used when those are missing.
+
+    Frames built with from_aggregates hold one intake row per supplement and
+    day, and one symptom row per symptom, day and severity, each weighted by
+    its log count (intake_count, symptom_count) instead of one per log;
+    per-log intake values then come from supplement_stats. Symptom notes are
+    only kept for each symptom's last REPORT_DETAIL_LIMIT rows, the ones the
+    summary lists.
+    """
+
+    def __init__(self, intake_logs=(), symptom_logs=()):
+        self._days = {}
+
+        # Lookup tables: index -> supplement id / symptom type
+        self.supplements = []
+        self.supplement_names = []
+        self.symptom_types = []
+        supplement_index = {}
+        symptom_index = {}
+
+        # Intake columns
+        self.intake_supplement = []
+        self.intake_day = []
+        self.intake_timestamp = []
+        self.intake_count = []
+        self.intake_dosage = []
+        self.intake_timing = []
+        self.intake_notes = []
+        self.intake_rows = []
+
+        for log in intake_logs:
+            supplement_id = _supplement_id(log)
+            index = supplement_index.get(supplement_id)
+            if index is None:
+                index = supplement_index[supplement_id] = len(self.supplements)
+                self.supplements.append(supplement_id)
+                self.supplement_names.append(
+                    log.supplement_name if hasattr(log, 'supplement_name') else 'Unknown'
+                )
+                self.intake_rows.append([])
+            timestamp = _field(log, 'timestamp', 'intake_date')
+            self.intake_rows[index].append(len(self.intake_supplement))
+            self.intake_supplement.append(index)
+            self.intake_day.append(self._parse_day(timestamp))
+            self.intake_timestamp.append(timestamp)
+            self.intake_count.append(getattr(log, 'count', 1))
+            self.intake_dosage.append(_field(log, 'dosage', 'dosage_taken'))
+            self.intake_timing.append(_field(log, 'timing'))
+            self.intake_notes.append(_field(log, 'notes'))
+
+        # Symptom columns
+        self.symptom_type = []
+        self.symptom_day = []
+        self.symptom_timestamp = []
+        self.symptom_severity = []
+        self.symptom_code = []
+        self.symptom_notes = []
+        self.symptom_count = []
+        self.symptom_rows = []
+
+        for log in symptom_logs:
+            symptom_type = _symptom_type(log)
+            index = symptom_index.get(symptom_type)
+            if index is None:
+                index = symptom_index[symptom_type] = len(self.symptom_types)
+                self.symptom_types.append(symptom_type)
+                self.symptom_rows.append([])
+            timestamp = _field(log, 'timestamp', 'date')
+            severity = _field(log, 'severity')
+            self.symptom_rows[index].append(len(self.symptom_type))
+            self.symptom_type.append(index)
+            self.symptom_day.append(self._parse_day(timestamp))
+            self.symptom_timestamp.append(timestamp)
+            self.symptom_severity.append(severity)
+            self.symptom_code.append(severity_code(severity) if severity else 0)
+            self.symptom_notes.append(_field(log, 'notes'))
+            self.symptom_count.append(getattr(log, 'count', 1))
+            rows = self.symptom_rows[index]
+            if len(rows) > REPORT_DETAIL_LIMIT:
+                self.symptom_notes[rows[-REPORT_DETAIL_LIMIT - 1]] = None
+
+        # Sorted unique intake days, overall and per supplement
+        self.supplement_days = [
+            sorted({self.intake_day[row] for row in rows} - {None}) for rows in self.intake_rows
+        ]
+        self.intake_days = sorted(set(self.intake_day) - {None})
+
+    @cached_property
+    def day_pairs(self):
+        """Unique (supplement index, day ordinal) pairs as NumPy arrays, sorted by supplement then day"""
+        lengths = [len(days) for days in self.supplement_days]
+        groups = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        days = np.fromiter(chain.from_iterable(self.supplement_days), dtype=np.int64, count=sum(lengths))
+        return groups, days
+
+    @cached_property
+    def dated_intake(self):
+        """(supplement index, day ordinal, count) NumPy arrays for intake rows with a parsable day, in log order"""
+        days = np.array(self.intake_day, dtype=np.float64)  # None becomes NaN
+        dated = ~np.isnan(days)
+        return (
+            np.array(self.intake_supplement, dtype=np.int64)[dated],
+            days[dated].astype(np.int64),
+            np.array(self.intake_count, dtype=np.float64)[dated]
+        )
+
+    @cached_property
+    def dated_symptoms(self):
+        """(symptom index, day ordinal, severity code, log count) NumPy arrays for symptom rows with a
+        parsable day, sorted by symptom then day (log order within a day)"""
+        days = np.array(self.symptom_day, dtype=np.float64)  # None becomes NaN
+        dated = ~np.isnan(days)
+        types = np.array(self.symptom_type, dtype=np.int64)[dated]
+        days = days[dated].astype(np.int64)
+        codes = np.array(self.symptom_code, dtype=np.int64)[dated]
+        counts = np.array(self.symptom_count, dtype=np.int64)[dated]
+        order = np.lexsort((days, types))
+        return types[order], days[order], codes[order], counts[order]
+
+    @cached_property
+    def symptom_trends(self):
+        """
+        Severity trend of every symptom index from one vectorized pass over the dated logs:
+        dated log count, average severity code, least-squares slope per week, the trend
+        ('increasing', 'decreasing' or 'stable'; None with fewer than TREND_MIN_LOGS logs) and
+        the TREND_WINDOW_DAYS rolling average on each logged day.
+        """
+        types, days, codes, counts = self.dated_symptoms
+        count, mean, slope, span, rolling = engine.severity_trends(
+            types, days, codes, len(self.symptom_types), TREND_WINDOW_DAYS, counts
+        )
+        change = slope * span
+
+        # One rolling value per (symptom, day): the last log of the day covers all of them
+        last_of_day = np.ones(len(days), dtype=bool)
+        last_of_day[:-1] = (types[1:] != types[:-1]) | (days[1:] != days[:-1])
+        rolling_days = engine.iso_days(days[last_of_day])
+        rolling_types = types[last_of_day].tolist()
+        rolling_values = np.round(rolling[last_of_day], 2).tolist()
+        series = [[] for _ in self.symptom_types]
+        for symptom, day, value in zip(rolling_types, rolling_days, rolling_values):
+            series[symptom].append({'date': day, 'severity': value})
+
+        trends = []
+        for index in range(len(self.symptom_types)):
+            trend = None
+            if count[index] >= TREND_MIN_LOGS:
+                if change[index] > TREND_MIN_CHANGE * mean[index]:
+                    trend = 'increasing'
+                elif change[index] < -TREND_MIN_CHANGE * mean[index]:
+                    trend = 'decreasing'
+                else:
+                    trend = 'stable'
+            trends.append({
+                'count': int(count[index]),
+                'averageSeverity': round(float(mean[index]), 2) if count[index] else None,
+                'slopePerWeek': round(float(slope[index]) * 7, 3),
+                'trend': trend,
+                'rollingAverage': series[index]
+            })
+        return trends
+
+    @cached_property
+    def named_supplements(self):
+        """Boolean mask over supplement indexes: True where the supplement id is set"""
+        return np.array([bool(supp_id) for supp_id in self.supplements], dtype=bool)
+
+    @cached_property
+    def supplement_stats(self):
+        """
+        Per-log intake values for every supplement index, shaped like the 'supplements'
+        documents of IntakeLog.get_report_aggregates: count, dates and the set dosages,
+        timings and notes in log order, plus the number of set timings and the most common
+        dosage and timing.
+        """
+        stats = []
+        for rows in self.intake_rows:
+            dosages = [self.intake_dosage[row] for row in rows if self.intake_dosage[row]]
+            timings = [self.intake_timing[row] for row in rows if self.intake_timing[row]]
+            # most_common keeps the first value seen on ties
+            dosage_mode = Counter(dosages).most_common(1)
+            timing_mode = Counter(timings).most_common(1)
+            stats.append({
+                'count': len(rows),
+                'dates': [self.intake_timestamp[row] for row in rows],
+                'dosages': dosages,
+                'timings': timings,
+                'timing_count': len(timings),
+                'notes': [self.intake_notes[row] for row in rows if self.intake_notes[row]],
+                'most_common_dosage': dosage_mode[0][0] if dosage_mode else None,
+                'most_common_timing': timing_mode[0][0] if timing_mode else None,
+                'most_common_timing_count': timing_mode[0][1] if timing_mode else 0
+            })
+        return stats
+
+    @classmethod
+    def from_aggregates(cls, intake_aggregates=None, symptom_aggregates=()):
+        """
+        Build a frame from IntakeLog.get_report_aggregates and SymptomLog.get_report_aggregates
+        results, so the report sections run on what the database already grouped. The day
+        rows decide which supplements the frame has; they need not match the 'supplements'
+        documents, which are read at a different time.
+        """
+        intake_aggregates = intake_aggregates or {}
+        supplements = {_supplement_id(_Row(supplement_id=doc.get('supplement_id'))): doc
+                       for doc in intake_aggregates.get('supplements', [])}
+
+        # Day and symptom rows are consumed as they're read, so a streamed cursor is never held in full
+        intake_rows = (
+            _Row(
+                supplement_id=supplement_id,
+                supplement_name=supplements.get(supplement_id, {}).get('name'),
+                timestamp=doc.get('day'),
+                count=doc.get('count', 1)
+            )
+            for doc in intake_aggregates.get('days', [])
+            for supplement_id in [_supplement_id(_Row(supplement_id=doc.get('supplement_id')))]
+        )
+        symptom_rows = (
+            _Row(
+                symptom_type=_symptom_type(_Row(symptom_type=doc.get('symptom_id'))),
+                timestamp=doc.get('day'),
+                severity=doc.get('severity', 'average'),
+                notes=doc.get('notes', ''),
+                count=doc.get('count', 1)
+            )
+            for doc in symptom_aggregates
+        )
+
+        frame = cls(intake_rows, symptom_rows)
+        # A supplement first logged after the 'supplements' aggregation was read only has day
+        # rows; it gets its count from them and no dates, values or modes
+        frame.supplement_stats = [
+            supplements.get(supp_id) or {
+                'supplement_id': supp_id, 'name': None,
+                'count': int(sum(frame.intake_count[row] for row in frame.intake_rows[index])),
+                'dates': [], 'dosages': [], 'timings': [], 'timing_count': 0, 'notes': [],
+                'most_common_dosage': None, 'most_common_timing': None, 'most_common_timing_count': 0
+            }
+            for index, supp_id in enumerate(frame.supplements)
+        ]
+        return frame
+
+    @staticmethod
+    def of(intake_logs=(), symptom_logs=()):
+        """Return the frame if one was passed in place of either log list, otherwise build one"""
+        for logs in (intake_logs, symptom_logs):
+            if isinstance(logs, ReportFrame):
+                return logs
+        return ReportFrame(intake_logs, symptom_logs)
+
+    def _parse_day(self, timestamp):
+        """Parse an ISO timestamp to a date ordinal, once per distinct timestamp"""
+        try:
+            return self._days[timestamp]
+        except KeyError:
+            pass
+        except TypeError:
+            return None
+        try:
+            day = datetime.fromisoformat(timestamp).date().toordinal()
+        except (ValueError, TypeError):
+            day = None
+        self._days[timestamp] = day
+        return day
+
+    @staticmethod
+    def as_date(day: int) -> date:
+        """Convert a day ordinal back to a date"""
+        return date.fromordinal(day)
@@ -0,0 +1,72 @@
+"""
+Per-supplement and per-symptom daily time series for charts, read from
+DailyRollups and downsampled with LTTB so long ranges stay a few hundred points.
+"""
+from datetime import date, datetime, timedelta
+import numpy as np
+from app.analytics import engine
+
+# Points per series returned when the client does not ask for a count, and the most it may ask for
+SERIES_DEFAULT_POINTS = 500
+SERIES_MAX_POINTS = 2000
+# Range covered when `from` is not given
+SERIES_DEFAULT_DAYS = 365
+
+
+def parse_series_args(args):
+    """
+    Read the `from`, `to` and `points` query parameters.
+    Args:
+        args: The request query arguments.
+    Returns:
+        tuple: (from day, to day, points) with the days as YYYY-MM-DD strings.
+    Raises:
+        ValueError: If a date or the point count is invalid.
+    """
+    try:
+        end = datetime.strptime(args.get('to') or date.today().isoformat(), '%Y-%m-%d').date()
+        start = args.get('from')
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else end - timedelta(days=SERIES_DEFAULT_DAYS)
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    if start > end:
+        raise ValueError("from must not be after to")
+
+    points = args.get('points', SERIES_DEFAULT_POINTS)
+    try:
+        points = int(points)
+    except ValueError:
+        raise ValueError("points must be an integer")
+    if points < 3 or points > SERIES_MAX_POINTS:
+        raise ValueError(f"points must be between 3 and {SERIES_MAX_POINTS}")
+    return start.isoformat(), end.isoformat(), points
+
+
+def rollup_series(rollups, field: str, value, points: int) -> dict:
+    """
+    Daily series of every key of a rollup field, each reduced to at most `points` days.
+    Args:
+        rollups (list): DailyRollup objects, oldest first.
+        field (str): The rollup field holding the per-key values ('intake' or 'symptoms').
+        value: Function mapping a key's daily entry to the number whose shape is preserved.
+        points (int): Maximum days kept per series.
+    Returns:
+        dict: {key: (days, entries, logged days)} with the kept days and their entries.
+    """
+    days, entries = {}, {}
+    for rollup in rollups:
+        for key, entry in (getattr(rollup, field) or {}).items():
+            days.setdefault(key, []).append(rollup.date)
+            entries.setdefault(key, []).append(entry)
+
+    series = {}
+    for key, key_days in days.items():
+        key_entries = entries[key]
+        if len(key_days) > points:
+            x = np.array([date.fromisoformat(day).toordinal() for day in key_days], dtype=np.int64)
+            y = np.array([value(entry) for entry in key_entries], dtype=np.float64)
+            kept = engine.lttb(x, y, points).tolist()
+            series[key] = ([key_days[i] for i in kept], [key_entries[i] for i in kept], len(key_days))
+        else:
+            series[key] = (key_days, key_entries, len(key_days))
+    return series
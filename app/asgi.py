@@ -0,0 +1,52 @@
+from app import create_app
+from app.db.async_db import close_async_client
+from app.routes import async_reads
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Match
+import contextlib
+import os
+
+# Threads of the Flask app behind the ASGI server, for every request without an async route
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '10'))
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(app):
+    yield
+    close_async_client()
+
+
+class AsgiApp:
+    """
+    The app for ASGI servers: GET requests to the hot read endpoints are served by
+    the async routes in app/routes/async_reads.py on the event loop; everything
+    else (writes, other reads, CORS preflights) goes to the Flask app, run on a
+    thread pool. `flask_app` is the wrapped Flask app, for the pre-fork hooks.
+    """
+    def __init__(self, flask_app=None):
+        self.flask_app = flask_app or create_app()
+        self.reads = Starlette(
+            routes=async_reads.routes,
+            middleware=[Middleware(CORSMiddleware, allow_origins=['http://localhost:3000'])],
+            exception_handlers={Exception: async_reads.internal_server_error},
+            lifespan=_lifespan
+        )
+        self.wsgi = WSGIMiddleware(self.flask_app, workers=ASGI_WSGI_THREADS)
+
+    def _is_async_route(self, scope) -> bool:
+        return scope['type'] == 'http' and any(
+            route.matches(scope)[0] == Match.FULL for route in self.reads.routes
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan' or self._is_async_route(scope):
+            await self.reads(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+
+def create_asgi_app(flask_app=None):
+    return AsgiApp(flask_app)
@@ -1,16 +1,21 @@
 import os
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables once, before any module reads them (imported first by app/__init__.py)
 load_dotenv()
 
 # Flask app configuration
 DEBUG = os.getenv('DEBUG', 'False') == 'True'
+# Set for the test suite (tests/conftest.py): apps start no background startup thread
+TESTING = os.getenv('TESTING', 'False') == 'True'
 SECRET_KEY = os.getenv('SECRET_KEY', 'development-key')
 
 # MongoDB configuration
-MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/tyv')
 DB_NAME = os.getenv('DB_NAME', 'tyv')
 
 # JWT configuration
-JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'development-jwt-key')
+JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'fallback_secret_key')
+
+# Serve the Swagger UI at /api/docs (and its spec at /static/swagger.json)
+SWAGGER_ENABLED = os.getenv('SWAGGER_ENABLED', '1') == '1'
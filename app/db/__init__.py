@@ -1,17 +1,19 @@
 from .db import get_database, get_collection
-from .utils import hash_password, check_password
+from .utils import hash_password, check_password, severity_code
 from .constants import (
     USERS_COLLECTION, SUPPLEMENTS_COLLECTION, INTAKE_LOGS_COLLECTION,
-    SYMPTOM_LOGS_COLLECTION, INTERACTIONS_COLLECTION,
+    SYMPTOM_LOGS_COLLECTION, INTERACTIONS_COLLECTION, DAILY_ROLLUPS_COLLECTION,
+    SEVERITY_LEVELS,
     USER_FIELDS, SUPPLEMENT_FIELDS, INTAKE_LOG_FIELDS,
     SYMPTOM_LOG_FIELDS, INTERACTION_FIELDS
 )
 
 __all__ = [
     'get_database', 'get_collection',
-    'hash_password', 'check_password',
+    'hash_password', 'check_password', 'severity_code',
     'USERS_COLLECTION', 'SUPPLEMENTS_COLLECTION', 'INTAKE_LOGS_COLLECTION',
-    'SYMPTOM_LOGS_COLLECTION', 'INTERACTIONS_COLLECTION',
+    'SYMPTOM_LOGS_COLLECTION', 'INTERACTIONS_COLLECTION', 'DAILY_ROLLUPS_COLLECTION',
+    'SEVERITY_LEVELS',
     'USER_FIELDS', 'SUPPLEMENT_FIELDS', 'INTAKE_LOG_FIELDS',
     'SYMPTOM_LOG_FIELDS', 'INTERACTION_FIELDS'
 ]
\ No newline at end of file
@@ -0,0 +1,36 @@
+from app.config import MONGO_URI, DB_NAME
+from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# One client per process and event loop; a Motor client is bound to the loop it was created on
+_client = None
+_client_key = None
+
+
+def get_async_database():
+    """
+    Returns the async (Motor) database for the running event loop.
+    The client is created on first use in each process and loop and shared by
+    every request on that loop afterwards. Unlike get_database(), it is not
+    pinged: the first query reports an unreachable server.
+    Must be called from a coroutine.
+    """
+    global _client, _client_key
+    key = (os.getpid(), id(asyncio.get_running_loop()))
+    if _client is None or _client_key != key:
+        _client = AsyncIOMotorClient(MONGO_URI)
+        _client_key = key
+        logger.info("Created async MongoDB client")
+    return _client[DB_NAME]
+
+
+def close_async_client():
+    """Close this process's async client (on ASGI shutdown); the next call creates a new one"""
+    global _client, _client_key
+    if _client is not None and _client_key[0] == os.getpid():
+        _client.close()
+    _client, _client_key = None, None
@@ -4,6 +4,16 @@ SUPPLEMENTS_COLLECTION = "Supplements"
 INTAKE_LOGS_COLLECTION = "IntakeLogs"
 SYMPTOM_LOGS_COLLECTION = "SymptomLogs"
 INTERACTIONS_COLLECTION = "Interactions"
+DAILY_ROLLUPS_COLLECTION = "DailyRollups"
+
+# Symptom severities, in increasing order (the index is the ordinal severity code)
+SEVERITY_LEVELS = ["none", "mild", "average", "severe"]
+
+# Most recent per-log values (dates, dosages, notes, correlation details) listed in a report section
+REPORT_DETAIL_LIMIT = 100
+
+# Symptom logs accepted by one PUT /api/symptom-logs/day/<date> request
+MAX_DAY_SYMPTOMS = 100
 
 # Schema fields for each collection
 USER_FIELDS = {
@@ -1,39 +1,62 @@
+from app.config import MONGO_URI, DB_NAME
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
-import os
-from dotenv import load_dotenv
 import logging
+import os
+import threading
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
-# MongoDB connection settings
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/tyv")
-DB_NAME = os.getenv("DB_NAME", "tyv")
+# One client (and connection pool) per process; MongoClient is thread-safe but not fork-safe
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
 
 def get_database():
     """
     Returns a database connection.
-    Creates a new connection for each call (safe for Flask multi-threaded apps).
+    The process's MongoClient is created (and pinged) on first use and shared by
+    every call afterwards (safe for Flask multi-threaded apps). A process forked
+    from one that already connected creates its own client.
     Raises an exception if the connection fails.
     """
-    try:
-        client = MongoClient(MONGO_URI)
-        # Test the connection
-        client.admin.command('ping')
-        logger.info("Successfully connected to MongoDB")
-        db = client[DB_NAME]
-        return db
-    except ConnectionFailure as e:
-        logger.error(f"Failed to connect to MongoDB: {e}")
-        raise RuntimeError("Could not connect to MongoDB") from e
-    except Exception as e:
-        logger.error(f"Unexpected error while connecting to MongoDB: {e}")
-        raise RuntimeError("Unexpected error during MongoDB connection") from e
+    global _client, _client_pid
+    client = _client
+    if client is not None and _client_pid == os.getpid():
+        return client[DB_NAME]
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            try:
+                client = MongoClient(MONGO_URI)
+                # Test the connection
+                client.admin.command('ping')
+                logger.info("Successfully connected to MongoDB")
+            except ConnectionFailure as e:
+                logger.error(f"Failed to connect to MongoDB: {e}")
+                raise RuntimeError("Could not connect to MongoDB") from e
+            except Exception as e:
+                logger.error(f"Unexpected error while connecting to MongoDB: {e}")
+                raise RuntimeError("Unexpected error during MongoDB connection") from e
+            _client, _client_pid = client, os.getpid()
+        return _client[DB_NAME]
+
+def reset_client(close: bool = False):
+    """
+    Drop this process's client so the next get_database() connects again.
+    Called in each worker after a fork: the inherited client's sockets and monitor
+    threads belong to the parent and must not be used. It is not closed there,
+    since closing it would end sessions the parent still owns.
+    Args:
+        close (bool): Close the client first; a pre-fork master does this so no
+                      monitor threads are running when it forks.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if close and _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client, _client_pid = None, None
 
 def get_collection(collection_name):
     """
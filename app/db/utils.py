@@ -1,6 +1,6 @@
-import bcrypt
 from datetime import datetime
 import time
+from app.db.constants import SEVERITY_LEVELS
 
 def hash_password(password: str) -> str:
     """
@@ -10,6 +10,7 @@ def hash_password(password: str) -> str:
     Returns:
         str: The hashed password.
     """
+    import bcrypt
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 def check_password(password: str, hashed: str) -> bool:
@@ -21,6 +22,7 @@ def check_password(password: str, hashed: str) -> bool:
     Returns:
         bool: True if the password matches, False otherwise.
     """
+    import bcrypt
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
 def generate_unique_id(prefix: str) -> str:
@@ -47,4 +49,42 @@ def validate_date(date_str: str, date_format: str = "%Y-%m-%d") -> bool:
         datetime.strptime(date_str, date_format)
         return True
     except ValueError:
-        return False
\ No newline at end of file
+        return False
+
+def severity_code(severity) -> int:
+    """
+    Map a symptom severity to its ordinal code.
+    Args:
+        severity: A label from SEVERITY_LEVELS (e.g., 'mild') or an already numeric severity.
+    Returns:
+        int: 0 for 'none' up to 3 for 'severe' (0 for unknown labels).
+    """
+    if isinstance(severity, (int, float)):
+        return int(severity)
+    try:
+        return SEVERITY_LEVELS.index(severity)
+    except ValueError:
+        return 0
+
+def keyset_query(query: dict, date_field: str, after=None) -> dict:
+    """
+    Restrict a query to documents that sort after a (date, _id) position.
+    Args:
+        query (dict): The base MongoDB filter.
+        date_field (str): The date field used as the primary sort key.
+        after (tuple): (date, ObjectId) of the last document already returned, or None.
+    Returns:
+        dict: The filter to use for the next page.
+    """
+    if not after:
+        return query
+    after_date, after_id = after
+    return {
+        '$and': [
+            query,
+            {'$or': [
+                {date_field: {'$gt': after_date}},
+                {date_field: after_date, '_id': {'$gt': after_id}}
+            ]}
+        ]
+    }
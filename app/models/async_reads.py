@@ -0,0 +1,208 @@
+"""
+Async (Motor) versions of the model reads behind the hot read endpoints, for the
+ASGI app in app/asgi.py. Each class mirrors the method names and return values
+of the synchronous model it is named after, and builds its queries with that
+model's helpers, so both paths read the same documents the same way. Writes
+stay on the synchronous models.
+"""
+from app.db.async_db import get_async_database as get_async_db
+from app.db.constants import REPORT_DETAIL_LIMIT
+from app.models.daily_rollup import DailyRollup, _day
+from app.models.intake_log import IntakeLog, _report_pipelines, _supplements_with_modes
+from app.models.report_cache import ReportCache, REPORT_CACHE_BACKEND
+from app.models.streak_state import StreakState
+from app.models.symptom_log import SymptomLog
+from app.models.tracker_supplement_list import TrackerSupplementList
+from app.models.user import User
+from bson.objectid import ObjectId
+from datetime import datetime, timezone
+from starlette.concurrency import run_in_threadpool
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncUser:
+    @staticmethod
+    async def find_by_id(_id):
+        user = await get_async_db().Users.find_one({'_id': _id, 'deletedAt': None})
+        return User(user) if user else None
+
+
+class AsyncTokenBlacklist:
+    @staticmethod
+    async def is_blacklisted(jti: str) -> bool:
+        token = await get_async_db().TokenBlacklist.find_one({'jti': jti}, {'_id': 1})
+        return token is not None
+
+
+class AsyncTrackerSupplementList:
+    @staticmethod
+    async def find_by_user_id(user_id: str):
+        """Find a TrackerSupplementList by user ID."""
+        tracker_supplement_list = await get_async_db().TrackerSupplementList.find_one({'user_id': ObjectId(user_id)})
+        return TrackerSupplementList(tracker_supplement_list) if tracker_supplement_list else None
+
+    @staticmethod
+    async def create_for_user(user_id: str):
+        """Create a new TrackerSupplementList for a user (a rare write, run on the synchronous model)."""
+        return await run_in_threadpool(TrackerSupplementList.create_for_user, user_id)
+
+
+class AsyncIntakeLog:
+    @staticmethod
+    async def find_by_date_range(user_id: str, start_date: str, end_date: str, limit: int = None, after=None):
+        """Find intake logs within a date range for a user"""
+        try:
+            cursor = IntakeLog._find_page(get_async_db(), {
+                'user_id': ObjectId(user_id),
+                'intake_date': {'$gte': start_date, '$lte': end_date},
+                'deleted_at': None
+            }, limit, after)
+            return [IntakeLog(log) for log in await cursor.to_list(length=None)]
+        except Exception as e:
+            raise ValueError(f"Error finding intake logs by date range: {e}")
+
+    @staticmethod
+    async def get_report_aggregates(user_id: str, start_date: str, end_date: str,
+                                    detail_limit: int = REPORT_DETAIL_LIMIT):
+        """IntakeLog.get_report_aggregates, with the day rows read into a list"""
+        db = get_async_db()
+        try:
+            pipelines = _report_pipelines({
+                'user_id': ObjectId(user_id),
+                'intake_date': {'$gte': start_date, '$lte': end_date},
+                'deleted_at': None
+            }, detail_limit)
+            results = {name: await db.IntakeLogs.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+                       for name, pipeline in pipelines.items()}
+            supplements = list(_supplements_with_modes(
+                results['supplements'], results['dosage_modes'], results['timing_modes']
+            ))
+            return {'supplements': supplements, 'days': results['days']}
+        except Exception as e:
+            raise ValueError(f"Error aggregating intake logs for report: {e}")
+
+
+class AsyncSymptomLog:
+    @staticmethod
+    async def find_by_date(user_id: str, date: str):
+        """Find all symptom logs for a user on a specific date"""
+        try:
+            if isinstance(user_id, str):
+                user_id = ObjectId(user_id)
+
+            cursor = get_async_db().SymptomLogs.find({
+                'user_id': user_id,
+                'date': date,
+                'deleted_at': None
+            })
+            return [SymptomLog(log) for log in await cursor.to_list(length=None)]
+        except Exception as e:
+            raise ValueError(f"Error finding symptom logs for date: {e}")
+
+    @staticmethod
+    async def get_report_aggregates(user_id: str, start_date: str, end_date: str):
+        """SymptomLog.get_report_aggregates, read into a list"""
+        try:
+            if isinstance(user_id, str):
+                user_id = ObjectId(user_id)
+
+            pipeline = SymptomLog._report_pipeline({
+                'user_id': user_id,
+                'date': {'$gte': start_date, '$lte': end_date},
+                'deleted_at': None
+            })
+            return await get_async_db().SymptomLogs.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+        except Exception as e:
+            raise ValueError(f"Error aggregating symptom logs for report: {e}")
+
+
+class AsyncDailyRollup:
+    @staticmethod
+    async def find_by_date_range(user_id: str, start_date: str, end_date: str):
+        """Find a user's rollups between two days (inclusive), oldest first"""
+        try:
+            if isinstance(user_id, str):
+                user_id = ObjectId(user_id)
+
+            cursor = get_async_db().DailyRollups.find({
+                'user_id': user_id,
+                'date': {'$gte': _day(start_date), '$lte': _day(end_date)}
+            }).sort('date', 1)
+            return [DailyRollup(rollup) for rollup in await cursor.to_list(length=None)]
+        except Exception as e:
+            raise ValueError(f"Error finding daily rollups: {e}")
+
+
+class AsyncStreakState:
+    @staticmethod
+    async def find_by_user_id(user_id: str):
+        """Find a user's streak state; building a missing one runs on the synchronous model"""
+        try:
+            if isinstance(user_id, str):
+                user_id = ObjectId(user_id)
+
+            state = await get_async_db().StreakStates.find_one({'user_id': user_id})
+        except Exception as e:
+            raise ValueError(f"Error finding streak state: {e}")
+        if state:
+            return StreakState(state)
+        return await run_in_threadpool(StreakState.find_by_user_id, user_id)
+
+
+class AsyncReportCache:
+    """ReportCache lookups for the async path; entries live in the same LRU and shared collection"""
+
+    @staticmethod
+    async def get_version(user_id) -> int:
+        """Current data version of a user (0 before their first write)"""
+        state = await get_async_db().ReportVersions.find_one({'user_id': ReportCache._user_id(user_id)}, {'version': 1})
+        return state.get('version', 0) if state else 0
+
+    @staticmethod
+    async def get(user_id, report_range: str, section: str, version: int):
+        """ReportCache.get; the shared backend is read without blocking the event loop"""
+        key = ReportCache._key(user_id, report_range, section, version)
+        value = ReportCache._memory.get(key)
+        if value is not None:
+            ReportCache._count('hits')
+            return value
+
+        if REPORT_CACHE_BACKEND == 'mongo':
+            try:
+                entry = await get_async_db().ReportCache.find_one({'_id': key}, {'value': 1})
+            except Exception as e:
+                logger.error(f"Failed to read shared report cache: {e}")
+                entry = None
+            if entry is not None:
+                ReportCache._count('sharedHits')
+                ReportCache._memory.set(key, entry['value'])
+                return entry['value']
+
+        ReportCache._count('misses')
+        return None
+
+    @staticmethod
+    async def set(user_id, report_range: str, section: str, version: int, value):
+        """ReportCache.set (arguments as for get)"""
+        key = ReportCache._key(user_id, report_range, section, version)
+        ReportCache._memory.set(key, value)
+        if REPORT_CACHE_BACKEND == 'mongo':
+            try:
+                await get_async_db().ReportCache.replace_one(
+                    {'_id': key},
+                    {'_id': key, 'value': value, 'created_at': datetime.now(timezone.utc)},
+                    upsert=True
+                )
+            except Exception as e:
+                logger.error(f"Failed to write shared report cache: {e}")
+
+    @staticmethod
+    async def get_or_compute(user_id, report_range: str, section: str, version: int, compute):
+        """Return a cached report section, awaiting `compute()` and storing it on a miss"""
+        value = await AsyncReportCache.get(user_id, report_range, section, version)
+        if value is None:
+            value = await compute()
+            await AsyncReportCache.set(user_id, report_range, section, version, value)
+        return value
@@ -0,0 +1,350 @@
+from app.db.db import get_database as get_db
+from app.db.utils import severity_code
+from app.models.presence_bitmap import PresenceBitmap, INTAKE, SYMPTOMS, supplement_field
+from app.models.report_cache import ReportCache
+from app.models.streak_state import StreakState
+from bson.objectid import ObjectId
+from datetime import date, datetime, timedelta, timezone
+from pymongo import DeleteMany, UpdateOne
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _as_number(value) -> float:
+    """Coerce a dosage to a number so it can be summed with $inc"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _day(value) -> str:
+    """Normalize an ISO date or timestamp to its YYYY-MM-DD day"""
+    return str(value)[:10] if value else None
+
+
+def _next_day(day: str) -> str:
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+class DailyRollup:
+    """
+    Per-user, per-day totals kept in the DailyRollups collection.
+
+    Each document holds the intake count and dosage total for every tracked
+    supplement taken that day, and the highest severity logged for every
+    symptom. Documents are maintained incrementally by IntakeLog and
+    SymptomLog writes, so reports can read one small document per day instead
+    of every raw log. Days whose incremental update failed are recorded in
+    RollupRepairs and rebuilt from the logs by repair().
+    """
+
+    def __init__(self, rollup_data: dict):
+        self._id = rollup_data.get('_id')
+        self.user_id = rollup_data.get('user_id')
+        self.date = rollup_data.get('date')
+        self.intake = rollup_data.get('intake', {})
+        self.symptoms = rollup_data.get('symptoms', {})
+        self.updated_at = rollup_data.get('updated_at')
+
+    def to_dict(self):
+        """Convert daily rollup to dictionary"""
+        return {
+            "_id": str(self._id) if self._id else None,
+            "user_id": str(self.user_id) if self.user_id else None,
+            "date": self.date,
+            "intake": self.intake,
+            "symptoms": self.symptoms,
+            "updated_at": self.updated_at
+        }
+
+    @staticmethod
+    def _mark_for_repair(user_id, day: str, db):
+        """Record a day whose rollup or bitmap update failed, so repair() rebuilds it"""
+        try:
+            db.RollupRepairs.update_one(
+                {'user_id': user_id, 'date': day},
+                {'$set': {'failed_at': datetime.now(timezone.utc).isoformat()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to record rollup repair for {day}: {e}")
+
+    @staticmethod
+    def record_intake(intake_log: dict, sign: int = 1, db=None):
+        """
+        Add (sign=1) or remove (sign=-1) an intake log from its day's rollup.
+        Args:
+            intake_log (dict): The stored intake log document.
+            sign (int): 1 when the log was written, -1 when it was removed.
+            db: An open database handle to reuse.
+        """
+        day = _day(intake_log.get('intake_date'))
+        supplement_id = intake_log.get('tracked_supplement_id')
+        if not day or not supplement_id or not intake_log.get('user_id'):
+            return
+        db = db or get_db()
+        key = f"intake.{supplement_id}"
+        try:
+            update = {
+                '$inc': {
+                    f"{key}.count": sign,
+                    f"{key}.dosage": sign * _as_number(intake_log.get('dosage_taken'))
+                },
+                '$set': {'updated_at': datetime.now(timezone.utc).isoformat()}
+            }
+            if sign > 0:
+                update['$set'][f"{key}.name"] = intake_log.get('supplement_name')
+                update['$set'][f"{key}.unit"] = intake_log.get('unit')
+            db.DailyRollups.update_one(
+                {'user_id': intake_log['user_id'], 'date': day},
+                update,
+                upsert=sign > 0
+            )
+            if sign > 0:
+                PresenceBitmap.record(intake_log['user_id'], day,
+                                      {INTAKE: True, supplement_field(supplement_id): True}, db=db)
+            else:
+                # Drop supplements that no longer have any intake that day
+                removed = db.DailyRollups.update_one(
+                    {'user_id': intake_log['user_id'], 'date': day, f"{key}.count": {'$lte': 0}},
+                    {'$unset': {key: ""}}
+                )
+                if removed.modified_count:
+                    rollup = db.DailyRollups.find_one({'user_id': intake_log['user_id'], 'date': day}, {'intake': 1})
+                    PresenceBitmap.record(intake_log['user_id'], day, {
+                        supplement_field(supplement_id): False,
+                        INTAKE: bool(rollup and rollup.get('intake'))
+                    }, db=db)
+        except Exception as e:
+            logger.error(f"Failed to update intake rollup for {day}: {e}")
+            DailyRollup._mark_for_repair(intake_log['user_id'], day, db)
+
+    @staticmethod
+    def _record_symptom_presence(user_id, day: str, db):
+        """Set or clear the day's active-symptom bit from the rollup's severities after they changed"""
+        rollup = db.DailyRollups.find_one({'user_id': user_id, 'date': day}, {'symptoms': 1})
+        active = any(code > 0 for code in ((rollup or {}).get('symptoms') or {}).values())
+        PresenceBitmap.record(user_id, day, {SYMPTOMS: active}, db=db)
+
+    @staticmethod
+    def record_symptom(symptom_log: dict, replace: bool = False, db=None):
+        """
+        Fold a symptom log's severity into its day's rollup.
+        Args:
+            symptom_log (dict): The stored symptom log document.
+            replace (bool): Overwrite the stored severity instead of keeping the maximum
+                (used when an existing log's severity was changed).
+            db: An open database handle to reuse.
+        """
+        day = _day(symptom_log.get('date'))
+        symptom_id = symptom_log.get('symptom_id')
+        if not day or not symptom_id or not symptom_log.get('user_id'):
+            return
+        db = db or get_db()
+        now = datetime.now(timezone.utc).isoformat()
+        code = severity_code(symptom_log.get('severity'))
+        if replace:
+            update = {'$set': {f"symptoms.{symptom_id}": code, 'updated_at': now}}
+        else:
+            update = {'$max': {f"symptoms.{symptom_id}": code}, '$set': {'updated_at': now}}
+        try:
+            db.DailyRollups.update_one(
+                {'user_id': symptom_log['user_id'], 'date': day},
+                update,
+                upsert=True
+            )
+            if replace:
+                DailyRollup._record_symptom_presence(symptom_log['user_id'], day, db)
+            elif code > 0:
+                PresenceBitmap.record(symptom_log['user_id'], day, {SYMPTOMS: True}, db=db)
+        except Exception as e:
+            logger.error(f"Failed to update symptom rollup for {day}: {e}")
+            DailyRollup._mark_for_repair(symptom_log['user_id'], day, db)
+
+    @staticmethod
+    def record_symptom_day(user_id, day: str, severities: dict, db=None):
+        """
+        Overwrite the severities of several symptoms of one day with a single upsert.
+        Args:
+            user_id: The user's ObjectId.
+            day (str): The YYYY-MM-DD day.
+            severities (dict): {symptom_id: severity label} of the day's logs.
+            db: An open database handle to reuse.
+        """
+        day = _day(day)
+        if not day or not user_id or not severities:
+            return
+        db = db or get_db()
+        update = {f"symptoms.{symptom_id}": severity_code(severity) for symptom_id, severity in severities.items()}
+        update['updated_at'] = datetime.now(timezone.utc).isoformat()
+        try:
+            db.DailyRollups.update_one({'user_id': user_id, 'date': day}, {'$set': update}, upsert=True)
+            DailyRollup._record_symptom_presence(user_id, day, db)
+        except Exception as e:
+            logger.error(f"Failed to update symptom rollup for {day}: {e}")
+            DailyRollup._mark_for_repair(user_id, day, db)
+
+    @staticmethod
+    def remove_symptom(symptom_log: dict, db=None):
+        """Remove a deleted symptom log from its day's rollup"""
+        day = _day(symptom_log.get('date'))
+        symptom_id = symptom_log.get('symptom_id')
+        if not day or not symptom_id or not symptom_log.get('user_id'):
+            return
+        db = db or get_db()
+        try:
+            db.DailyRollups.update_one(
+                {'user_id': symptom_log['user_id'], 'date': day},
+                {
+                    '$unset': {f"symptoms.{symptom_id}": ""},
+                    '$set': {'updated_at': datetime.now(timezone.utc).isoformat()}
+                }
+            )
+            DailyRollup._record_symptom_presence(symptom_log['user_id'], day, db)
+        except Exception as e:
+            logger.error(f"Failed to update symptom rollup for {day}: {e}")
+            DailyRollup._mark_for_repair(symptom_log['user_id'], day, db)
+
+    @staticmethod
+    def find_by_date_range(user_id: str, start_date: str, end_date: str):
+        """Find a user's rollups between two days (inclusive), oldest first"""
+        db = get_db()
+        try:
+            if isinstance(user_id, str):
+                user_id = ObjectId(user_id)
+
+            rollups = db.DailyRollups.find({
+                'user_id': user_id,
+                'date': {'$gte': _day(start_date), '$lte': _day(end_date)}
+            }).sort('date', 1)
+            return [DailyRollup(rollup) for rollup in rollups]
+        except Exception as e:
+            raise ValueError(f"Error finding daily rollups: {e}")
+
+    @staticmethod
+    def _build_days(db, user_id, day: str = None) -> dict:
+        """A user's rollup contents computed from their logs, as {day: rollup} (only `day`'s when given)"""
+        def _match(field):
+            match = {'user_id': user_id, 'deleted_at': None}
+            if day:
+                match[field] = {'$gte': day, '$lt': _next_day(day)}
+            return match
+
+        days = {}
+        intake_pipeline = [
+            {'$match': _match('intake_date')},
+            {'$group': {
+                '_id': {
+                    'date': {'$substrCP': ['$intake_date', 0, 10]},
+                    'supplement_id': '$tracked_supplement_id'
+                },
+                'count': {'$sum': 1},
+                'dosage': {'$sum': {'$convert': {'input': '$dosage_taken', 'to': 'double',
+                                                  'onError': 0, 'onNull': 0}}},
+                'name': {'$last': '$supplement_name'},
+                'unit': {'$last': '$unit'}
+            }}
+        ]
+        for row in db.IntakeLogs.aggregate(intake_pipeline, allowDiskUse=True):
+            key = row['_id']
+            rollup = days.setdefault(key['date'], {'intake': {}, 'symptoms': {}})
+            rollup['intake'][str(key['supplement_id'])] = {
+                'count': row['count'],
+                'dosage': row['dosage'],
+                'name': row['name'],
+                'unit': row['unit']
+            }
+
+        for log in db.SymptomLogs.find(_match('date'), {'date': 1, 'symptom_id': 1, 'severity': 1}):
+            symptoms = days.setdefault(_day(log['date']), {'intake': {}, 'symptoms': {}})['symptoms']
+            symptom_id = str(log['symptom_id'])
+            symptoms[symptom_id] = max(symptoms.get(symptom_id, 0), severity_code(log.get('severity')))
+        return days
+
+    @staticmethod
+    def _rebuild_user(db, user_id, day: str = None) -> int:
+        """
+        Recompute one user's rollups (or one day of them) with a single bulk write: an
+        upsert per day with logs, and a delete of the days left without any. Days written
+        by the write path since the rebuild started are not deleted.
+        """
+        started = datetime.now(timezone.utc).isoformat()
+        days = DailyRollup._build_days(db, user_id, day)
+        stale_dates = {'$nin': list(days)}
+        if day:
+            stale_dates['$eq'] = day
+        operations = [
+            UpdateOne(
+                {'user_id': user_id, 'date': rollup_day},
+                {'$set': {'intake': rollup['intake'], 'symptoms': rollup['symptoms'],
+                          'updated_at': datetime.now(timezone.utc).isoformat()}},
+                upsert=True
+            )
+            for rollup_day, rollup in days.items()
+        ]
+        operations.append(DeleteMany({'user_id': user_id, 'date': stale_dates,
+                                      'updated_at': {'$not': {'$gte': started}}}))
+        db.DailyRollups.bulk_write(operations, ordered=False)
+        return len(days)
+
+    @staticmethod
+    def _user_ids(db) -> set:
+        """Ids of every user with logs or rollups"""
+        user_ids = set()
+        for collection, match in ((db.IntakeLogs, {'deleted_at': None}), (db.SymptomLogs, {'deleted_at': None}),
+                                  (db.DailyRollups, {})):
+            pipeline = [{'$match': match}, {'$group': {'_id': '$user_id'}}]
+            user_ids.update(row['_id'] for row in collection.aggregate(pipeline, allowDiskUse=True))
+        user_ids.discard(None)
+        return user_ids
+
+    @staticmethod
+    def rebuild(user_id: str = None):
+        """
+        Recompute rollups from the raw IntakeLogs and SymptomLogs, one user at a time.
+        Each user's rollups are updated in place, so reads never find them missing, and
+        only one user's days are held in memory.
+        Args:
+            user_id (str): Only rebuild this user's rollups (all users when omitted).
+        Returns:
+            int: The number of rollup documents written.
+        """
+        db = get_db()
+        if user_id:
+            user_ids = [ObjectId(user_id) if isinstance(user_id, str) else user_id]
+        else:
+            user_ids = DailyRollup._user_ids(db)
+        return sum(DailyRollup._rebuild_user(db, uid) for uid in user_ids)
+
+    @staticmethod
+    def repair(limit: int = None) -> int:
+        """
+        Rebuild the days recorded in RollupRepairs from the logs, then the affected users'
+        bitmaps, and drop their streak states and cached reports, which may have been built
+        from the wrong totals. A day that fails again while it's repaired stays recorded.
+        Args:
+            limit (int): Repair at most this many days (oldest failures first).
+        Returns:
+            int: The number of days repaired.
+        """
+        db = get_db()
+        entries = db.RollupRepairs.find({}).sort('failed_at', 1)
+        if limit:
+            entries = entries.limit(limit)
+        users = {}
+        for entry in entries:
+            users.setdefault(entry['user_id'], []).append(entry)
+
+        repaired = 0
+        for user_id, user_entries in users.items():
+            for entry in user_entries:
+                DailyRollup._rebuild_user(db, user_id, entry['date'])
+            PresenceBitmap.rebuild(user_id)
+            StreakState.reset(user_id)
+            ReportCache.invalidate(user_id)
+            for entry in user_entries:
+                db.RollupRepairs.delete_one({'_id': entry['_id'], 'failed_at': entry['failed_at']})
+            repaired += len(user_entries)
+        return repaired
@@ -1,74 +1,165 @@
-from app.models.user import User
-from app.models.supplement import Supplement
-from app.models.intake_log import IntakeLog
-from app.models.symptom_log import SymptomLog
-from app.models.interaction import Interaction
-from app.models.tracker_supplement_list import TrackerSupplementList
+from app.models.symptom_log import SymptomCategoryManager
+from app.models.report_cache import REPORT_CACHE_TTL_SECONDS
 
 from app.db.db import get_database as get_db
+from pymongo.errors import OperationFailure
 import logging
 
 logger = logging.getLogger(__name__)
 
-def init_indexes():
+# Every index the app relies on, as (collection, keys, options); the only place indexes are defined
+INDEXES = [
+    ('Users', 'userId', {'unique': True}),
+    ('Users', 'email', {'unique': True}),
+    ('TokenBlacklist', 'jti', {'unique': True}),
+    # Blacklisted tokens are removed once they expire
+    ('TokenBlacklist', 'expiresAt', {'expireAfterSeconds': 0}),
+    ('TrackerSupplementList', 'userId', {'unique': True}),
+    ('Supplements', 'supplementId', {'unique': True}),
+    ('Supplements', 'name', {'unique': True}),
+    ('Interactions', 'interactionId', {'unique': True}),
+    ('IntakeLogs', 'intakeLogId', {'unique': True}),
+    ('IntakeLogs', 'userId', {}),
+    ('IntakeLogs', 'trackedSupplementId', {}),
+    ('SymptomLogs', 'userId', {}),
+    ('SymptomLogs', 'trackedSupplementId', {}),
+
+    # Compound indexes backing keyset pagination of log listings
+    ('IntakeLogs', [('user_id', 1), ('intake_date', 1), ('_id', 1)], {}),
+    ('IntakeLogs', [('user_id', 1), ('tracked_supplement_id', 1), ('intake_date', 1), ('_id', 1)], {}),
+    ('SymptomLogs', [('user_id', 1), ('date', 1), ('_id', 1)], {}),
+
+    # Per-day symptom summaries select the day's active logs on the index keys
+    ('SymptomLogs', [('user_id', 1), ('date', 1), ('severity', 1)], {}),
+
+    # One active symptom log per user, symptom and day
+    ('SymptomLogs', [('user_id', 1), ('symptom_id', 1), ('date', 1)], {
+        'unique': True,
+        'partialFilterExpression': {'deleted_at': {'$type': 'null'}},
+        'name': 'user_symptom_date_active'
+    }),
+
+    # The keys of the symptom seed upserts
+    ('SymptomCategories', 'name', {'unique': True}),
+    ('Symptoms', 'symptomId', {'unique': True}),
+
+    # One rollup document per user and day, one presence bitmap document per user and year
+    ('DailyRollups', [('user_id', 1), ('date', 1)], {'unique': True}),
+    ('PresenceBitmaps', [('user_id', 1), ('year', 1)], {'unique': True}),
+    ('RollupRepairs', [('user_id', 1), ('date', 1)], {'unique': True}),
+
+    # One streak state document per user
+    ('StreakStates', 'user_id', {'unique': True}),
+
+    # One report data version per user; shared report cache entries expire on their own
+    ('ReportVersions', 'user_id', {'unique': True}),
+    ('ReportCache', 'created_at', {'expireAfterSeconds': REPORT_CACHE_TTL_SECONDS}),
+
+    # One pre-generated report per user, report type and period
+    ('ReportSnapshots', [('report_type', 1), ('period_end', 1), ('user_id', 1)], {'unique': True}),
+]
+
+
+def _index_keys(keys) -> tuple:
+    if isinstance(keys, str):
+        keys = [(keys, 1)]
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction)
+                 for field, direction in keys)
+
+
+def _index_options(options: dict) -> dict:
+    """The options that change what an index enforces, as index_information() reports them"""
+    compared = {
+        'unique': bool(options.get('unique')),
+        'sparse': bool(options.get('sparse')),
+        'partialFilterExpression': dict(options.get('partialFilterExpression') or {})
+    }
+    if options.get('expireAfterSeconds') is not None:
+        compared['expireAfterSeconds'] = int(options['expireAfterSeconds'])
+    return compared
+
+
+def _ttl_changed(current: dict, wanted: dict) -> bool:
+    """Whether two TTL indexes only differ in their expiry"""
+    if 'expireAfterSeconds' not in current or 'expireAfterSeconds' not in wanted:
+        return False
+    return dict(current, expireAfterSeconds=None) == dict(wanted, expireAfterSeconds=None)
+
+
+def ensure_indexes(db=None, indexes: list = None, collections: list = None) -> dict:
+    """
+    Create the indexes that do not exist yet.
+    Each collection's existing indexes are listed once, and an index whose keys
+    and options already exist is skipped, so a restart only costs one listing per
+    collection. A TTL index whose expiry changed is updated in place (collMod); an
+    index whose keys exist with other options (unique, sparse, partial filter) is
+    logged and counted as failed rather than created, since MongoDB would reject it
+    with IndexOptionsConflict on every attempt - it has to be dropped by hand.
+    Args:
+        db: An open database handle to reuse.
+        indexes (list): (collection, keys, options) tuples (INDEXES by default).
+        collections (list): Only ensure the indexes of these collections.
+    Returns:
+        dict: The number of indexes `created`, `updated`, `skipped` and `failed`.
+    """
+    db = db or get_db()
+    counts = {'created': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+    existing = {}
+    for collection, keys, options in INDEXES if indexes is None else indexes:
+        if collections is not None and collection not in collections:
+            continue
+        if collection not in existing:
+            existing[collection] = {_index_keys(index['key']): _index_options(index)
+                                    for index in db[collection].index_information().values()}
+        key = _index_keys(keys)
+        wanted = _index_options(options)
+        current = existing[collection].get(key)
+        try:
+            if current is None:
+                db[collection].create_index(list(key), **options)
+                counts['created'] += 1
+            elif current == wanted:
+                counts['skipped'] += 1
+            elif _ttl_changed(current, wanted):
+                db.command('collMod', collection, index={
+                    'keyPattern': dict(key), 'expireAfterSeconds': wanted['expireAfterSeconds']
+                })
+                counts['updated'] += 1
+            else:
+                logger.error(f"Index {key} on {collection} exists with options {current}, expected {wanted}; "
+                             f"drop it to have it rebuilt")
+                counts['failed'] += 1
+                continue
+            existing[collection][key] = wanted
+        except OperationFailure as e:
+            # e.g. existing duplicates that must be merged before a unique index can be built
+            logger.error(f"Could not create index {key} on {collection}: {e}")
+            counts['failed'] += 1
+    return counts
+
+
+def init_indexes(db=None, collections: list = None) -> dict:
     """
-    Initialize all collection indexes for MongoDB.
-    This should be called during application startup.
+    Ensure the indexes (the startup task and the scripts' setup).
+    Raises:
+        RuntimeError: When an index could not be built or updated, so the app isn't
+            reported ready (and the startup task retries) until it's fixed.
     """
-    User.create_indexes()
-    Supplement.create_indexes()
-    IntakeLog.create_indexes()
-    SymptomLog.create_indexes()
-    Interaction.create_indexes()
-    TrackerSupplementList.create_indexes()
-    
-    print("MongoDB indexes created successfully.")
-
-def init_db():
-    """Initialize the database collections and indexes."""
+    counts = ensure_indexes(db, collections=collections)
+    logger.info(f"Indexes ready: {counts['created']} created, {counts['updated']} updated, "
+                f"{counts['skipped']} already present, {counts['failed']} failed")
+    if counts['failed']:
+        raise RuntimeError(f"{counts['failed']} index(es) could not be built; see the log")
+    return counts
+
+
+def init_db(db=None):
+    """Ensure the collections' indexes and seed the reference data."""
     logger.info("Initializing database...")
-    db = get_db()
-    
-    # Create collections if they don't exist
-    if 'Users' not in db.list_collection_names():
-        db.create_collection('Users')
-        db.Users.create_index('email', unique=True)
-        db.Users.create_index('userId', unique=True)
-        logger.info("Created Users collection and indexes")
-    
-    # Create TokenBlacklist collection if it doesn't exist
-    if 'TokenBlacklist' not in db.list_collection_names():
-        db.create_collection('TokenBlacklist')
-        db.TokenBlacklist.create_index('jti', unique=True)
-        # Add expiration index for automatic cleanup
-        db.TokenBlacklist.create_index('expiresAt', expireAfterSeconds=0)
-        logger.info("Created TokenBlacklist collection and indexes")
-        
-    # Create Tracker Supplement List collection if it doesn't exist
-    if 'TrackerSupplementList' not in db.list_collection_names():
-        db.create_collection('TrackerSupplementList')
-        db.TrackerSupplementList.create_index('userId', unique=True)
-        logger.info("Created TrackerSupplementList collection and indexes")
-        
-    # Create other collections if they don't exist
-    if 'Supplements' not in db.list_collection_names():
-        db.create_collection('Supplements')
-        db.Supplements.create_index('name', unique=True)
-        logger.info("Created Supplements collection and indexes")
-    
-    if 'IntakeLogs' not in db.list_collection_names():
-        db.create_collection('IntakeLogs')
-        db.IntakeLogs.create_index('userId')
-        db.IntakeLogs.create_index('trackedSupplementId')
-        logger.info("Created IntakeLogs collection and indexes")
-        
-    if 'SymptomLogs' not in db.list_collection_names():
-        db.create_collection('SymptomLogs')
-        db.create_collection('Symptoms')
-        db.create_collection('SymptomCategories')
-        db.SymptomLogs.create_index('userId')
-        db.SymptomLogs.create_index('trackedSupplementId')
-        logger.info("Created SymptomLogs collection and indexes")
-    
-    
-    logger.info("Database initialization complete") 
\ No newline at end of file
+    db = db or get_db()
+
+    init_indexes(db)
+
+    SymptomCategoryManager.initialize_symptom_data(db=db)
+
+    logger.info("Database initialization complete")
@@ -1,8 +1,120 @@
 from app.db.db import get_database as get_db
+from app.db.utils import keyset_query
+from app.db.constants import REPORT_DETAIL_LIMIT
+from app.models.daily_rollup import DailyRollup
+from app.models.streak_state import StreakState
+from app.models.report_cache import ReportCache
 from bson.objectid import ObjectId
 from datetime import datetime, timezone
 import uuid
 
+# Values the report helpers treat as unset when collecting dosages, timings and notes
+UNSET_VALUES = [None, '', 0, False]
+
+
+def _set_values(values: str) -> dict:
+    """Aggregation expression dropping unset values from a pushed array"""
+    return {'$filter': {'input': values, 'cond': {'$not': [{'$in': ['$$this', UNSET_VALUES]}]}}}
+
+
+def _mode_pipeline(match: dict, field: str) -> list:
+    """Pipeline finding each user's and supplement's most common set value of a field, ties going to the first one logged"""
+    return [
+        {'$match': {**match, field: {'$nin': UNSET_VALUES}}},
+        {'$group': {
+            '_id': {'user_id': '$user_id', 'supplement_id': '$tracked_supplement_id', 'value': f'${field}'},
+            'count': {'$sum': 1},
+            'first': {'$min': '$_id'}
+        }},
+        {'$sort': {'count': -1, 'first': 1}},
+        {'$group': {
+            '_id': {'user_id': '$_id.user_id', 'supplement_id': '$_id.supplement_id'},
+            'value': {'$first': '$_id.value'},
+            'count': {'$first': '$count'}
+        }}
+    ]
+
+
+def _report_pipelines(match: dict, detail_limit: int) -> dict:
+    """
+    Report aggregations over the intake logs matched by `match`, grouped by user as well
+    so a single query can serve many users. Each is run as its own streamed aggregation
+    rather than as facets of one result document, which would hold every matched user's
+    supplements and hit MongoDB's 16MB document limit on large batches.
+    Returns:
+        dict: Pipelines returning the 'supplements' documents, the 'dosage_modes' and
+        'timing_modes' of each user and supplement, and the per-day rows ('days').
+    """
+    supplements_pipeline = [
+        {'$match': match},
+        {'$sort': {'_id': 1}},
+        {'$group': {
+            '_id': {'user_id': '$user_id', 'supplement_id': '$tracked_supplement_id'},
+            'first': {'$min': '$_id'},
+            'name': {'$first': '$supplement_name'},
+            'count': {'$sum': 1},
+            'dates': {'$push': '$intake_date'},
+            'dosages': {'$push': '$dosage_taken'},
+            'timings': {'$push': '$timing'},
+            'notes': {'$push': '$notes'}
+        }},
+        {'$sort': {'first': 1}},
+        {'$project': {
+            '_id': 0,
+            'user_id': '$_id.user_id',
+            'supplement_id': '$_id.supplement_id',
+            'name': 1,
+            'count': 1,
+            'dates': {'$slice': ['$dates', -detail_limit]},
+            'dosages': {'$slice': [_set_values('$dosages'), -detail_limit]},
+            'timings': {'$slice': [_set_values('$timings'), -detail_limit]},
+            'timing_count': {'$size': _set_values('$timings')},
+            'notes': {'$slice': [_set_values('$notes'), -detail_limit]}
+        }}
+    ]
+    # Day rows grow with the range, so they're streamed rather than held per supplement
+    days_pipeline = [
+        {'$match': match},
+        {'$group': {
+            '_id': {
+                'user_id': '$user_id',
+                'supplement_id': '$tracked_supplement_id',
+                'day': {'$substrCP': ['$intake_date', 0, 10]}
+            },
+            'count': {'$sum': 1},
+            'first': {'$min': '$_id'}
+        }},
+        {'$sort': {'first': 1}},
+        {'$project': {
+            '_id': 0,
+            'user_id': '$_id.user_id',
+            'supplement_id': '$_id.supplement_id',
+            'day': '$_id.day',
+            'count': 1
+        }}
+    ]
+    return {
+        'supplements': supplements_pipeline,
+        'dosage_modes': _mode_pipeline(match, 'dosage_taken'),
+        'timing_modes': _mode_pipeline(match, 'timing'),
+        'days': days_pipeline
+    }
+
+
+def _supplements_with_modes(supplements, dosage_modes, timing_modes):
+    """Attach the most common dosage and timing to each supplement document, as they're read"""
+    dosage_modes = {(mode['_id']['user_id'], mode['_id']['supplement_id']): mode for mode in dosage_modes}
+    timing_modes = {(mode['_id']['user_id'], mode['_id']['supplement_id']): mode for mode in timing_modes}
+    for supplement in supplements:
+        key = (supplement.get('user_id'), supplement.get('supplement_id'))
+        dosage = dosage_modes.get(key)
+        timing = timing_modes.get(key)
+        supplement['most_common_dosage'] = dosage['value'] if dosage else None
+        supplement['most_common_timing'] = timing['value'] if timing else None
+        supplement['most_common_timing_count'] = timing['count'] if timing else 0
+        yield supplement
+
+
 class IntakeLog:
     REQUIRED_FIELDS = ['user_id', 'tracked_supplement_id', 'intake_date']
 
@@ -94,6 +206,13 @@ class IntakeLog:
         
         if not result.inserted_id:
             raise ValueError("Failed to create intake log")
+        
+        # Keep the per-day rollup in step with the new log
+        DailyRollup.record_intake(intake_log_data, db=db)
+        StreakState.record_day(intake_log_data['user_id'], intake_log_data.get('intake_date'),
+                               intake_log_data['tracked_supplement_id'],
+                               intake_log_data.get('supplement_name'), db=db)
+        ReportCache.bump_version(intake_log_data['user_id'], db=db)
             
         # Get the created intake log with its ID
         created_log = db.IntakeLogs.find_one({"_id": result.inserted_id})
@@ -110,39 +229,50 @@ class IntakeLog:
             raise ValueError(f"Error finding intake log: {e}")
 
     @staticmethod
-    def find_by_user_id(user_id: str):
+    def _find_page(db, query: dict, limit: int = None, after=None):
+        """Run a log query, paging by (intake_date, _id) when a limit is given"""
+        if not limit:
+            return db.IntakeLogs.find(query)
+        return db.IntakeLogs.find(keyset_query(query, 'intake_date', after)) \
+            .sort([('intake_date', 1), ('_id', 1)]) \
+            .limit(limit)
+
+    @staticmethod
+    def find_by_user_id(user_id: str, limit: int = None, after=None):
         """Find all intake logs for a user"""
         db = get_db()
         try:
-            intake_logs = db.IntakeLogs.find({'user_id': ObjectId(user_id), 'deleted_at': None})
+            intake_logs = IntakeLog._find_page(
+                db, {'user_id': ObjectId(user_id), 'deleted_at': None}, limit, after
+            )
             return [IntakeLog(log) for log in intake_logs]
         except Exception as e:
             raise ValueError(f"Error finding intake logs: {e}")
 
     @staticmethod
-    def find_by_date_range(user_id: str, start_date: str, end_date: str):
+    def find_by_date_range(user_id: str, start_date: str, end_date: str, limit: int = None, after=None):
         """Find intake logs within a date range for a user"""
         db = get_db()
         try:
-            intake_logs = db.IntakeLogs.find({
+            intake_logs = IntakeLog._find_page(db, {
                 'user_id': ObjectId(user_id),
                 'intake_date': {'$gte': start_date, '$lte': end_date},
                 'deleted_at': None
-            })
+            }, limit, after)
             return [IntakeLog(log) for log in intake_logs]
         except Exception as e:
             raise ValueError(f"Error finding intake logs by date range: {e}")
 
     @staticmethod
-    def find_by_supplement_id(user_id: str, tracked_supplement_id: str):
+    def find_by_supplement_id(user_id: str, tracked_supplement_id: str, limit: int = None, after=None):
         """Find intake logs for a specific supplement"""
         db = get_db()
         try:
-            intake_logs = db.IntakeLogs.find({
+            intake_logs = IntakeLog._find_page(db, {
                 'user_id': ObjectId(user_id),
                 'tracked_supplement_id': ObjectId(tracked_supplement_id),
                 'deleted_at': None
-            })
+            }, limit, after)
             return [IntakeLog(log) for log in intake_logs]
         except Exception as e:
             raise ValueError(f"Error finding intake logs by supplement: {e}")
@@ -170,6 +300,17 @@ class IntakeLog:
             
             # Return the updated log
             updated_log = db.IntakeLogs.find_one({'_id': ObjectId(log_id)})
+            
+            # Move the log between rollups if its day or dosage changed
+            if 'intake_date' in update_dict or 'dosage_taken' in update_dict:
+                DailyRollup.record_intake(existing_log, sign=-1, db=db)
+                DailyRollup.record_intake(updated_log, db=db)
+            if 'intake_date' in update_dict:
+                for log in (existing_log, updated_log):
+                    StreakState.record_day(log['user_id'], log.get('intake_date'),
+                                           log.get('tracked_supplement_id'), log.get('supplement_name'), db=db)
+            if update_dict:
+                ReportCache.bump_version(existing_log.get('user_id'), db=db)
             return IntakeLog(updated_log)
         except Exception as e:
             raise ValueError(f"Error updating intake log: {e}")
@@ -180,12 +321,16 @@ class IntakeLog:
         db = get_db()
         try:
             # Attempt to delete the log
-            result = db.IntakeLogs.delete_one({'_id': ObjectId(log_id)})
+            deleted_log = db.IntakeLogs.find_one_and_delete({'_id': ObjectId(log_id)})
             
             # Check if a document was deleted
-            if result.deleted_count == 0:
+            if not deleted_log:
                 raise ValueError("Intake log not found or already deleted")
             
+            DailyRollup.record_intake(deleted_log, sign=-1, db=db)
+            StreakState.record_day(deleted_log.get('user_id'), deleted_log.get('intake_date'),
+                                   deleted_log.get('tracked_supplement_id'), deleted_log.get('supplement_name'), db=db)
+            ReportCache.bump_version(deleted_log.get('user_id'), db=db)
             return True
         except Exception as e:
             raise ValueError(f"Error performing hard delete on intake log: {e}")
@@ -229,4 +374,65 @@ class IntakeLog:
             summary = list(db.IntakeLogs.aggregate(pipeline))
             return summary
         except Exception as e:
-            raise ValueError(f"Error generating intake summary: {e}")
\ No newline at end of file
+            raise ValueError(f"Error generating intake summary: {e}")
+
+    @staticmethod
+    def get_report_aggregates(user_id: str, start_date: str, end_date: str, detail_limit: int = REPORT_DETAIL_LIMIT):
+        """
+        Group a user's intake logs within a date range for report generation.
+        Returns:
+            dict: 'supplements' - one document per supplement, ordered by its first log, with its
+                  name, log count, the last `detail_limit` intake dates and set dosages, timings
+                  and notes in log order, the number of set timings, and its most common dosage
+                  and timing (with how often that timing was logged);
+                  'days' - a cursor over one document per supplement and YYYY-MM-DD day with the
+                  number of logs, ordered by the day's first log. It is read lazily, once, after
+                  the supplements, so it can include supplements first logged in between;
+                  ReportFrame.from_aggregates gives those empty stats.
+        """
+        db = get_db()
+        try:
+            pipelines = _report_pipelines({
+                'user_id': ObjectId(user_id),
+                'intake_date': {'$gte': start_date, '$lte': end_date},
+                'deleted_at': None
+            }, detail_limit)
+            results = {name: db.IntakeLogs.aggregate(pipeline, allowDiskUse=True)
+                       for name, pipeline in pipelines.items()}
+            supplements = list(_supplements_with_modes(
+                results['supplements'], results['dosage_modes'], results['timing_modes']
+            ))
+            return {'supplements': supplements, 'days': results['days']}
+        except Exception as e:
+            raise ValueError(f"Error aggregating intake logs for report: {e}")
+
+    @staticmethod
+    def get_report_aggregates_for_users(user_ids: list, start_date: str, end_date: str,
+                                        detail_limit: int = REPORT_DETAIL_LIMIT) -> dict:
+        """
+        get_report_aggregates for many users with one pair of range queries (for batch reports).
+        Returns:
+            dict: User ObjectId -> {'supplements': [...], 'days': [...]} shaped as in
+                  get_report_aggregates (with the day rows as a list); users without intake
+                  logs in the range are left out.
+        """
+        db = get_db()
+        try:
+            pipelines = _report_pipelines({
+                'user_id': {'$in': [ObjectId(user_id) for user_id in user_ids]},
+                'intake_date': {'$gte': start_date, '$lte': end_date},
+                'deleted_at': None
+            }, detail_limit)
+            aggregate = lambda name: db.IntakeLogs.aggregate(pipelines[name], allowDiskUse=True)
+
+            # Supplement documents are streamed; only the small mode documents are read up front
+            aggregates = {}
+            supplements = _supplements_with_modes(aggregate('supplements'), aggregate('dosage_modes'),
+                                                  aggregate('timing_modes'))
+            for supplement in supplements:
+                aggregates.setdefault(supplement['user_id'], {'supplements': [], 'days': []})['supplements'].append(supplement)
+            for day in aggregate('days'):
+                aggregates.setdefault(day['user_id'], {'supplements': [], 'days': []})['days'].append(day)
+            return aggregates
+        except Exception as e:
+            raise ValueError(f"Error aggregating intake logs for reports: {e}")
@@ -1,4 +1,5 @@
 from app.db.db import get_database as get_db
+from app.models.reference_data import InteractionGraph
 from bson.objectid import ObjectId
 from datetime import datetime
 
@@ -106,6 +107,8 @@ class Interaction:
         if not result.inserted_id:
             raise ValueError("Failed to create interaction")
             
+        InteractionGraph.invalidate()
+
         # Return the created interaction
         created_data = interaction_data.copy()
         created_data['_id'] = result.inserted_id
@@ -165,6 +168,7 @@ class Interaction:
             
             # Update in database
             db.Interactions.update_one({'_id': _id}, {'$set': update_data})
+            InteractionGraph.invalidate()
             
             # Return updated interaction
             updated = db.Interactions.find_one({'_id': _id})
@@ -192,11 +196,13 @@ class Interaction:
                     {'_id': _id},
                     {'$set': {'deletedAt': datetime.now().isoformat()}}
                 )
+                InteractionGraph.invalidate()
                 updated = db.Interactions.find_one({'_id': _id})
                 return Interaction(updated)
             else:
                 # Hard delete
                 db.Interactions.delete_one({'_id': _id})
+                InteractionGraph.invalidate()
                 return Interaction(existing)
         except Exception as e:
             raise ValueError(f"Error deleting interaction: {e}")
@@ -0,0 +1,297 @@
+from app.db.db import get_database as get_db
+from bson.int64 import Int64
+from bson.objectid import ObjectId
+from datetime import date, datetime, timedelta, timezone
+from pymongo import ReplaceOne
+import base64
+
+# A year's 366 days are stored as 6 words of 61 bits, so every word is a positive int64 for $bit
+WORD_BITS = 61
+WORDS = 6
+WORD_MASK = (1 << WORD_BITS) - 1
+
+# Bitmap fields: any intake, any active (non-'none') symptom, and intake of one tracked supplement
+INTAKE = 'intake'
+SYMPTOMS = 'symptoms'
+
+
+def supplement_field(supplement_id) -> str:
+    return f"supplements.{supplement_id}"
+
+
+def _year_length(year: int) -> int:
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+def _day_index(day: date) -> int:
+    return (day - date(day.year, 1, 1)).days
+
+
+def to_int(words) -> int:
+    """Join a stored {w0..w5} word document into one integer (bit i = day i of the year)"""
+    words = words or {}
+    return sum(int(words.get(f"w{i}", 0)) << (WORD_BITS * i) for i in range(WORDS))
+
+
+def to_words(bits: int) -> dict:
+    return {f"w{i}": Int64((bits >> (WORD_BITS * i)) & WORD_MASK) for i in range(WORDS)}
+
+
+def day_list(bits: int, year: int) -> list:
+    """The days (YYYY-MM-DD) whose bits are set, in order"""
+    first = date(year, 1, 1)
+    days = []
+    while bits:
+        lowest = bits & -bits
+        days.append((first + timedelta(days=lowest.bit_length() - 1)).isoformat())
+        bits ^= lowest
+    return days
+
+
+def to_base64(bits: int) -> str:
+    """The bitmap as 46 little-endian bytes (bit i of the year = day i), base64-encoded"""
+    return base64.b64encode(bits.to_bytes((WORD_BITS * WORDS + 7) // 8, 'little')).decode('ascii')
+
+
+def _field_words(document: dict, field: str) -> dict:
+    for part in field.split('.'):
+        document = (document or {}).get(part)
+    return document
+
+
+class PresenceBitmap:
+    """
+    Per-user, per-year day bitmaps kept in the PresenceBitmaps collection.
+
+    Each document holds one bit per day of the year for "has intake", "has an
+    active symptom" and "has intake of supplement X". DailyRollup writes keep
+    them current with $bit updates, so calendars, dates-with-symptoms and
+    streak walks read one small document per year and work with shifts and
+    popcounts instead of scanning logs.
+    """
+
+    @staticmethod
+    def record(user_id, day, changes: dict, db=None):
+        """
+        Set or clear a day's bits with one $bit upsert.
+        Args:
+            user_id: The user's ObjectId.
+            day: The day (date, YYYY-MM-DD or an ISO timestamp).
+            changes (dict): {field: present} for INTAKE, SYMPTOMS or supplement_field(id).
+            db: An open database handle to reuse.
+        Raises:
+            Exception: When the update fails; DailyRollup records the day for repair.
+        """
+        if not user_id or not day or not changes:
+            return
+        if not isinstance(day, date):
+            day = date.fromisoformat(str(day)[:10])
+        word, bit = divmod(_day_index(day), WORD_BITS)
+        operations = {
+            f"{field}.w{word}": {'or': Int64(1 << bit)} if present else {'and': Int64(WORD_MASK ^ (1 << bit))}
+            for field, present in changes.items()
+        }
+        db = db or get_db()
+        db.PresenceBitmaps.update_one(
+            {'user_id': user_id, 'year': day.year},
+            {'$bit': operations, '$set': {'updated_at': datetime.now(timezone.utc).isoformat()}},
+            upsert=True
+        )
+
+    @staticmethod
+    def bits(user_id, year: int, field: str = INTAKE, db=None) -> int:
+        """A field's bitmap for one year (0 when nothing was logged)"""
+        db = db or get_db()
+        document = db.PresenceBitmaps.find_one({'user_id': user_id, 'year': year}, {field: 1})
+        return to_int(_field_words(document, field))
+
+    @staticmethod
+    def find_years(user_id, fields: list = None) -> dict:
+        """Every year's bitmap document of a user as {year: document}, optionally projected"""
+        db = get_db()
+        try:
+            if isinstance(user_id, str):
+                user_id = ObjectId(user_id)
+            projection = {field: 1 for field in fields} if fields else None
+            if projection:
+                projection['year'] = 1
+            return {document['year']: document
+                    for document in db.PresenceBitmaps.find({'user_id': user_id}, projection).sort('year', 1)}
+        except Exception as e:
+            raise ValueError(f"Error finding presence bitmaps: {e}")
+
+    @staticmethod
+    def days(user_id, field: str = INTAKE) -> list:
+        """Every day (YYYY-MM-DD) with the field's bit set, oldest first"""
+        years = PresenceBitmap.find_years(user_id, [field])
+        return [day for year, document in years.items() for day in day_list(to_int(_field_words(document, field)), year)]
+
+    @staticmethod
+    def calendar(user_id, year: int) -> dict:
+        """
+        One year of a user's calendar.
+        Returns:
+            dict: For intake, symptoms and each tracked supplement, the number of `days`
+            with its bit set and the base64 `bitmap` (bit i = day i of the year).
+        """
+        db = get_db()
+        try:
+            if isinstance(user_id, str):
+                user_id = ObjectId(user_id)
+            document = db.PresenceBitmaps.find_one({'user_id': user_id, 'year': year}) or {}
+        except Exception as e:
+            raise ValueError(f"Error finding presence bitmaps: {e}")
+
+        def _entry(words):
+            bits = to_int(words)
+            return {'days': bits.bit_count(), 'bitmap': to_base64(bits)}
+
+        return {
+            'year': year,
+            'daysInYear': _year_length(year),
+            'intake': _entry(document.get(INTAKE)),
+            'symptoms': _entry(document.get(SYMPTOMS)),
+            'supplements': {
+                supplement_id: _entry(words) for supplement_id, words in document.get('supplements', {}).items()
+            }
+        }
+
+    @staticmethod
+    def has_day(user_id, day: date, field: str = INTAKE, db=None) -> bool:
+        return bool(PresenceBitmap.bits(user_id, day.year, field, db) >> _day_index(day) & 1)
+
+    @staticmethod
+    def walk(user_id, day: date, step: int, field: str = INTAKE, db=None) -> date:
+        """
+        Follow consecutive set days from `day` (inclusive) backwards (step -1) or forwards (step 1).
+        Returns:
+            date: The last set day reached, or None if `day` itself is not set.
+        """
+        db = db or get_db()
+        reached = None
+        year, index = day.year, _day_index(day)
+        while True:
+            bits = PresenceBitmap.bits(user_id, year, field, db)
+            length = _year_length(year)
+            if step < 0:
+                # Unset days up to and including `index`; the run starts after the latest one
+                gaps = ~bits & ((1 << (index + 1)) - 1)
+                if gaps >> index & 1:
+                    return reached
+                if gaps:
+                    return date(year, 1, 1) + timedelta(days=gaps.bit_length())
+                reached = date(year, 1, 1)
+                year -= 1
+                index = _year_length(year) - 1
+            else:
+                # Unset days from `index` on; the run ends before the earliest one
+                gaps = (~bits & ((1 << length) - 1)) >> index
+                if gaps & 1:
+                    return reached
+                if gaps:
+                    return date(year, 1, 1) + timedelta(days=index + (gaps & -gaps).bit_length() - 2)
+                reached = date(year, 12, 31)
+                year += 1
+                index = 0
+
+    @staticmethod
+    def runs(user_id, field: str = INTAKE, db=None):
+        """
+        Every run of consecutive set days as (first day, last day), oldest first.
+        The year documents are read one at a time, and runs crossing New Year are joined.
+        """
+        db = db or get_db()
+        start = end = None
+        for document in db.PresenceBitmaps.find({'user_id': user_id}, {field: 1, 'year': 1}).sort('year', 1):
+            first = date(document['year'], 1, 1)
+            bits = to_int(_field_words(document, field))
+            index = 0
+            while bits >> index:
+                rest = bits >> index
+                index += (rest & -rest).bit_length() - 1
+                rest = bits >> index
+                # The number of trailing ones is the length of the run starting at `index`
+                length = (~rest & (rest + 1)).bit_length() - 1
+                run_start, run_end = first + timedelta(days=index), first + timedelta(days=index + length - 1)
+                if end is not None and run_start == end + timedelta(days=1):
+                    end = run_end
+                else:
+                    if end is not None:
+                        yield start, end
+                    start, end = run_start, run_end
+                index += length
+        if end is not None:
+            yield start, end
+
+    @staticmethod
+    def latest_before(user_id, day: date, field: str = INTAKE, db=None) -> date:
+        """The last set day before `day`, or None"""
+        db = db or get_db()
+        earlier = PresenceBitmap.bits(user_id, day.year, field, db) & ((1 << _day_index(day)) - 1)
+        if earlier:
+            return date(day.year, 1, 1) + timedelta(days=earlier.bit_length() - 1)
+        for document in db.PresenceBitmaps.find({'user_id': user_id, 'year': {'$lt': day.year}},
+                                                {field: 1, 'year': 1}).sort('year', -1):
+            bits = to_int(_field_words(document, field))
+            if bits:
+                return date(document['year'], 1, 1) + timedelta(days=bits.bit_length() - 1)
+        return None
+
+    @staticmethod
+    def _write_user(db, user_id, years: dict) -> int:
+        """Replace one user's bitmaps for `years` in one bulk write"""
+        now = datetime.now(timezone.utc).isoformat()
+        operations = [
+            ReplaceOne({'user_id': user_id, 'year': year}, {
+                'user_id': user_id,
+                'year': year,
+                INTAKE: to_words(bitmaps[INTAKE]),
+                SYMPTOMS: to_words(bitmaps[SYMPTOMS]),
+                'supplements': {supp_id: to_words(bits) for supp_id, bits in bitmaps['supplements'].items()},
+                'updated_at': now
+            }, upsert=True)
+            for year, bitmaps in years.items()
+        ]
+        db.PresenceBitmaps.bulk_write(operations, ordered=False)
+        return len(years)
+
+    @staticmethod
+    def rebuild(user_id: str = None) -> int:
+        """
+        Recompute bitmaps from the DailyRollups, one user at a time: the rollups are read
+        in user order and each user's bitmaps are replaced in place once all their days are
+        read. Bitmaps of years left without rollups are deleted at the end, unless the
+        write path updated them since the rebuild started.
+        Args:
+            user_id (str): Only rebuild this user's bitmaps (all users when omitted).
+        Returns:
+            int: The number of bitmap documents written.
+        """
+        db = get_db()
+        query = {}
+        if user_id:
+            query['user_id'] = ObjectId(user_id) if isinstance(user_id, str) else user_id
+
+        started = datetime.now(timezone.utc).isoformat()
+        written, owner, years = 0, None, {}
+        rollups = db.DailyRollups.find(query, {'user_id': 1, 'date': 1, 'intake': 1, 'symptoms': 1})
+        for rollup in rollups.sort([('user_id', 1), ('date', 1)]):
+            if rollup['user_id'] != owner:
+                if owner is not None:
+                    written += PresenceBitmap._write_user(db, owner, years)
+                owner, years = rollup['user_id'], {}
+            day = date.fromisoformat(rollup['date'])
+            bit = 1 << _day_index(day)
+            bitmaps = years.setdefault(day.year, {INTAKE: 0, SYMPTOMS: 0, 'supplements': {}})
+            supplements = [supp_id for supp_id, totals in (rollup.get('intake') or {}).items()
+                           if totals.get('count', 0) > 0]
+            if supplements:
+                bitmaps[INTAKE] |= bit
+            for supp_id in supplements:
+                bitmaps['supplements'][supp_id] = bitmaps['supplements'].get(supp_id, 0) | bit
+            if any(code > 0 for code in (rollup.get('symptoms') or {}).values()):
+                bitmaps[SYMPTOMS] |= bit
+        if owner is not None:
+            written += PresenceBitmap._write_user(db, owner, years)
+        db.PresenceBitmaps.delete_many(dict(query, updated_at={'$not': {'$gte': started}}))
+        return written
@@ -0,0 +1,97 @@
+from app.db.db import get_database as get_db
+import os
+import threading
+import time
+
+# How long a worker serves its copy of the supplement catalog and interaction graph before reloading
+REFERENCE_DATA_TTL_SECONDS = int(os.getenv('REFERENCE_DATA_TTL_SECONDS', '3600'))
+
+
+def _load_supplements() -> dict:
+    db = get_db()
+    return {str(supplement['_id']): supplement for supplement in db.Supplements.find()}
+
+
+def _load_interaction_graph() -> dict:
+    db = get_db()
+    graph = {}
+    for interaction in db.Interactions.find():
+        interaction['_id'] = str(interaction['_id'])
+        for supplement in interaction.get('supplements') or []:
+            supplement_id = supplement.get('supplementId')
+            if supplement_id:
+                edges = graph.setdefault(supplement_id, [])
+                # A supplement listed twice in one interaction is one edge
+                if not edges or edges[-1] is not interaction:
+                    edges.append(interaction)
+    return graph
+
+
+class _ReferenceData:
+    """
+    Process-local copy of a small, rarely written collection.
+
+    Subclasses pass their loader as a class argument
+    (`class Catalog(_ReferenceData, loader=...)`): a callable that reads the
+    collection once and returns the object served from memory. Copies are reloaded after
+    REFERENCE_DATA_TTL_SECONDS, or on the next get() after invalidate() (called
+    by the model's writes in this worker; other workers catch up on their TTL).
+    A pre-fork server loads them in the master so workers share them.
+    """
+
+    _data = None
+    _loaded_at = 0.0
+
+    def __init_subclass__(cls, loader, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._load = staticmethod(loader)
+        cls._lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        """
+        The current copy, loading it on first use or once it has expired.
+        Raises:
+            Exception: The database error, if the collection cannot be read.
+        """
+        data = cls._data
+        if data is not None and time.monotonic() - cls._loaded_at < REFERENCE_DATA_TTL_SECONDS:
+            return data
+        with cls._lock:
+            if cls._data is None or time.monotonic() - cls._loaded_at >= REFERENCE_DATA_TTL_SECONDS:
+                cls._data = cls._load()
+                cls._loaded_at = time.monotonic()
+            return cls._data
+
+    @classmethod
+    def invalidate(cls):
+        """Drop this worker's copy so the next request reloads it"""
+        with cls._lock:
+            cls._data = None
+
+
+class SupplementCatalog(_ReferenceData, loader=_load_supplements):
+    """The Supplements collection as {str(_id): supplement document}"""
+
+    @staticmethod
+    def names(ids) -> dict:
+        """
+        The names of the catalog's supplements among `ids` (str or ObjectId), keyed by str(_id).
+        Ids missing from the catalog are left out.
+        """
+        catalog = SupplementCatalog.get()
+        names = {}
+        for _id in ids:
+            supplement = catalog.get(str(_id)) if _id else None
+            if supplement is not None:
+                names[str(_id)] = supplement.get('name')
+        return names
+
+
+class InteractionGraph(_ReferenceData, loader=_load_interaction_graph):
+    """The Interactions collection indexed by supplement: {supplementId: [interaction documents]}"""
+
+    @staticmethod
+    def for_supplement(supplement_id: str) -> list:
+        """Every interaction involving the supplement, in collection order"""
+        return InteractionGraph.get().get(str(supplement_id), [])
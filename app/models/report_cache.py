@@ -0,0 +1,196 @@
+from app.db.db import get_database as get_db
+from bson.objectid import ObjectId
+from collections import OrderedDict
+from datetime import datetime, timezone
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Report sections kept in each worker's memory before the least recently used are evicted
+REPORT_CACHE_SIZE = int(os.getenv('REPORT_CACHE_SIZE', '512'))
+# 'memory' keeps results per worker; 'mongo' also shares them through the ReportCache collection
+REPORT_CACHE_BACKEND = os.getenv('REPORT_CACHE_BACKEND', 'memory')
+# How long shared entries live before MongoDB's TTL monitor removes them
+REPORT_CACHE_TTL_SECONDS = int(os.getenv('REPORT_CACHE_TTL_SECONDS', '86400'))
+
+
+class _LRUCache:
+    """A thread-safe, size-bounded mapping that evicts the least recently used entry"""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class ReportCache:
+    """
+    Cached report sections keyed by (user, range, section, data version).
+
+    Every intake, symptom and tracker write bumps the user's data version in
+    the ReportVersions collection, so entries for older versions are never
+    read again and simply age out of the LRU (and, with the shared backend,
+    out of the ReportCache collection). Reading the version is one indexed
+    lookup, which keeps workers consistent without any cross-worker messaging.
+    """
+
+    _memory = _LRUCache(REPORT_CACHE_SIZE)
+    _stats = {'hits': 0, 'sharedHits': 0, 'misses': 0}
+    _stats_lock = threading.Lock()
+
+    @staticmethod
+    def _user_id(user_id):
+        return ObjectId(user_id) if isinstance(user_id, str) else user_id
+
+    @staticmethod
+    def bump_version(user_id, db=None):
+        """Invalidate a user's cached reports after a write; errors are logged, not raised"""
+        if not user_id:
+            return
+        try:
+            db = db or get_db()
+            db.ReportVersions.update_one(
+                {'user_id': ReportCache._user_id(user_id)},
+                {'$inc': {'version': 1}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to bump report version for user {user_id}: {e}")
+
+    @staticmethod
+    def get_version(user_id, db=None) -> int:
+        """Current data version of a user (0 before their first write)"""
+        db = db or get_db()
+        state = db.ReportVersions.find_one({'user_id': ReportCache._user_id(user_id)}, {'version': 1})
+        return state.get('version', 0) if state else 0
+
+    @staticmethod
+    def get_versions(user_ids, db=None) -> dict:
+        """Current data versions of many users, keyed by the ids as given"""
+        db = db or get_db()
+        ids = {ReportCache._user_id(user_id): user_id for user_id in user_ids}
+        states = db.ReportVersions.find({'user_id': {'$in': list(ids)}}, {'user_id': 1, 'version': 1})
+        versions = {user_id: 0 for user_id in user_ids}
+        for state in states:
+            versions[ids[state['user_id']]] = state.get('version', 0)
+        return versions
+
+    @staticmethod
+    def invalidate(user_id=None):
+        """Invalidate one user's cached reports, or every stored version when user_id is None"""
+        if user_id:
+            ReportCache.bump_version(user_id)
+            return
+        db = get_db()
+        db.ReportVersions.update_many({}, {'$inc': {'version': 1}})
+        db.ReportCache.delete_many({})
+
+    @staticmethod
+    def _count(stat: str):
+        with ReportCache._stats_lock:
+            ReportCache._stats[stat] += 1
+
+    @staticmethod
+    def _key(user_id, report_range: str, section: str, version: int) -> str:
+        return f"{user_id}:{report_range}:{section}:{version}"
+
+    @staticmethod
+    def get(user_id, report_range: str, section: str, version: int):
+        """
+        Look up a cached report section, counting the hit or miss.
+        Args:
+            user_id: The report's user.
+            report_range (str): Range of the report, including anything else the result depends on.
+            section (str): Report section name.
+            version (int): The user's data version from get_version.
+        Returns:
+            The cached section, or None when it has to be computed.
+        """
+        key = ReportCache._key(user_id, report_range, section, version)
+        value = ReportCache._memory.get(key)
+        if value is not None:
+            ReportCache._count('hits')
+            return value
+
+        if REPORT_CACHE_BACKEND == 'mongo':
+            try:
+                entry = get_db().ReportCache.find_one({'_id': key}, {'value': 1})
+            except Exception as e:
+                logger.error(f"Failed to read shared report cache: {e}")
+                entry = None
+            if entry is not None:
+                ReportCache._count('sharedHits')
+                ReportCache._memory.set(key, entry['value'])
+                return entry['value']
+
+        ReportCache._count('misses')
+        return None
+
+    @staticmethod
+    def set(user_id, report_range: str, section: str, version: int, value):
+        """Store a computed report section (arguments as for get)"""
+        key = ReportCache._key(user_id, report_range, section, version)
+        ReportCache._memory.set(key, value)
+        if REPORT_CACHE_BACKEND == 'mongo':
+            try:
+                get_db().ReportCache.replace_one(
+                    {'_id': key},
+                    {'_id': key, 'value': value, 'created_at': datetime.now(timezone.utc)},
+                    upsert=True
+                )
+            except Exception as e:
+                logger.error(f"Failed to write shared report cache: {e}")
+
+    @staticmethod
+    def get_or_compute(user_id, report_range: str, section: str, version: int, compute):
+        """Return a cached report section, computing it with `compute()` and storing it on a miss"""
+        value = ReportCache.get(user_id, report_range, section, version)
+        if value is None:
+            value = compute()
+            ReportCache.set(user_id, report_range, section, version, value)
+        return value
+
+    @staticmethod
+    def stats() -> dict:
+        """Hit/miss counters and the size of this worker's cache"""
+        with ReportCache._stats_lock:
+            stats = dict(ReportCache._stats)
+        lookups = stats['hits'] + stats['sharedHits'] + stats['misses']
+        stats.update({
+            'hitRate': round((stats['hits'] + stats['sharedHits']) / lookups, 3) if lookups else 0.0,
+            'entries': len(ReportCache._memory.entries),
+            'maxEntries': ReportCache._memory.max_entries,
+            'evictions': ReportCache._memory.evictions,
+            'backend': REPORT_CACHE_BACKEND
+        })
+        return stats
+
+    @staticmethod
+    def clear():
+        """Drop this worker's cached sections and reset the counters"""
+        ReportCache._memory.clear()
+        ReportCache._memory.evictions = 0
+        with ReportCache._stats_lock:
+            for stat in ReportCache._stats:
+                ReportCache._stats[stat] = 0
@@ -0,0 +1,84 @@
+from app.db.db import get_database as get_db
+from bson.objectid import ObjectId
+from datetime import datetime, timezone
+from pymongo import ReplaceOne
+
+
+class ReportSnapshot:
+    """
+    Pre-generated report sections for one user, report type and period end day,
+    written in bulk by scripts/generate_reports.py for digests and cache warming.
+    Each snapshot records the user's data version it was computed from, so it can
+    be compared with ReportCache.get_version to tell whether it is still current.
+    """
+
+    def __init__(self, snapshot_data: dict):
+        self._id = snapshot_data.get('_id')
+        self.user_id = snapshot_data.get('user_id')
+        self.report_type = snapshot_data.get('report_type')
+        self.period_end = snapshot_data.get('period_end')
+        self.start_date = snapshot_data.get('start_date')
+        self.end_date = snapshot_data.get('end_date')
+        self.sections = snapshot_data.get('sections', {})
+        self.version = snapshot_data.get('version', 0)
+        self.generated_at = snapshot_data.get('generated_at')
+
+    def to_dict(self):
+        """Convert report snapshot to dictionary"""
+        return {
+            "_id": str(self._id) if self._id else None,
+            "user_id": str(self.user_id) if self.user_id else None,
+            "report_type": self.report_type,
+            "period_end": self.period_end,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "sections": self.sections,
+            "version": self.version,
+            "generated_at": self.generated_at
+        }
+
+    @staticmethod
+    def save_many(snapshots: list) -> int:
+        """
+        Upsert snapshots with a single unordered bulk write.
+        Args:
+            snapshots (list): Dicts with user_id, report_type, period_end, start_date,
+                              end_date, sections and version.
+        Returns:
+            int: The number of snapshots inserted or replaced.
+        """
+        if not snapshots:
+            return 0
+        now = datetime.now(timezone.utc).isoformat()
+        operations = []
+        for snapshot in snapshots:
+            user_id = snapshot['user_id']
+            document = dict(snapshot, user_id=ObjectId(user_id) if isinstance(user_id, str) else user_id,
+                            generated_at=now)
+            operations.append(ReplaceOne(
+                {'report_type': document['report_type'], 'period_end': document['period_end'],
+                 'user_id': document['user_id']},
+                document,
+                upsert=True
+            ))
+        result = get_db().ReportSnapshots.bulk_write(operations, ordered=False)
+        return result.upserted_count + result.modified_count
+
+    @staticmethod
+    def find_user_ids(report_type: str, period_end: str) -> set:
+        """Ids (as strings) of the users that already have a snapshot for this report type and period"""
+        db = get_db()
+        cursor = db.ReportSnapshots.find(
+            {'report_type': report_type, 'period_end': period_end}, {'user_id': 1, '_id': 0}
+        )
+        return {str(snapshot['user_id']) for snapshot in cursor}
+
+    @staticmethod
+    def find_latest(user_id, report_type: str = 'weekly'):
+        """Most recent snapshot of a user's report of this type, or None"""
+        db = get_db()
+        snapshot = db.ReportSnapshots.find_one(
+            {'user_id': ObjectId(user_id) if isinstance(user_id, str) else user_id, 'report_type': report_type},
+            sort=[('period_end', -1)]
+        )
+        return ReportSnapshot(snapshot) if snapshot else None
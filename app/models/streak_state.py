@@ -0,0 +1,318 @@
+from app.db.db import get_database as get_db
+from app.models.presence_bitmap import PresenceBitmap, INTAKE, supplement_field
+from bson.objectid import ObjectId
+from datetime import date, datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Attempts at the compare-and-set write before giving up on a concurrent update
+MAX_WRITE_ATTEMPTS = 3
+
+
+def _presence_query(user_id, supplement_id=None) -> dict:
+    """DailyRollups filter matching days with any intake (or intake of one supplement)"""
+    query = {'user_id': user_id}
+    if supplement_id is None:
+        query['intake'] = {'$exists': True, '$ne': {}}
+    else:
+        query[f"intake.{supplement_id}.count"] = {'$gt': 0}
+    return query
+
+
+def _bitmap_field(supplement_id=None) -> str:
+    """PresenceBitmaps field of days with any intake (or intake of one supplement)"""
+    return INTAKE if supplement_id is None else supplement_field(supplement_id)
+
+
+class _RunTracker:
+    """Accumulates consecutive-day runs from days fed in ascending order"""
+    def __init__(self):
+        self.last_day = None
+        self.current_run = 0
+        self.longest_run = 0
+        self.longest_end = None
+
+    def add(self, day: date):
+        if self.last_day is not None and day == self.last_day:
+            return
+        if self.last_day is not None and day == self.last_day + timedelta(days=1):
+            self.current_run += 1
+        else:
+            self.current_run = 1
+        self.last_day = day
+        if self.current_run > self.longest_run:
+            self.longest_run = self.current_run
+            self.longest_end = day
+
+    def state(self) -> dict:
+        if self.last_day is None:
+            return None
+        return {
+            'lastDay': self.last_day.isoformat(),
+            'currentRun': self.current_run,
+            'longestRun': self.longest_run,
+            'longestStart': (self.longest_end - timedelta(days=self.longest_run - 1)).isoformat(),
+            'longestEnd': self.longest_end.isoformat()
+        }
+
+
+class StreakState:
+    """
+    Lifetime intake streaks for a user, kept in the StreakStates collection.
+
+    The document stores, overall and per tracked supplement, the last day with
+    an intake, the length of the run ending on that day and the longest run
+    ever. Logging a new day updates it in O(1); edits and deletes of past days
+    only walk the run around the changed day (with shifts over the user's
+    PresenceBitmaps, one document per year). Removing a day of the longest run
+    finds the new longest one from the bitmaps' runs, read a year at a time.
+    """
+
+    def __init__(self, state_data: dict):
+        self._id = state_data.get('_id')
+        self.user_id = state_data.get('user_id')
+        self.overall = state_data.get('overall')
+        self.supplements = state_data.get('supplements', {})
+        self.version = state_data.get('version', 0)
+        self.updated_at = state_data.get('updated_at')
+
+    def to_report(self, today: date = None):
+        """Convert streak state to the /api/reports/streaks response shape"""
+        today = today or datetime.now().date()
+
+        def _current(state):
+            # A run only counts as current if it includes today
+            if state and state.get('lastDay') == today.isoformat():
+                return state['currentRun']
+            return 0
+
+        return {
+            'currentStreak': _current(self.overall),
+            'longestStreak': self.overall['longestRun'] if self.overall else 0,
+            'lastIntakeDate': self.overall['lastDay'] if self.overall else None,
+            'supplementStreaks': [
+                {
+                    'supplementId': supp_id,
+                    'supplementName': state.get('name') or 'Unknown',
+                    'currentStreak': _current(state),
+                    'longestStreak': state['longestRun'],
+                    'lastIntakeDate': state['lastDay']
+                }
+                for supp_id, state in self.supplements.items()
+            ]
+        }
+
+    @staticmethod
+    def _has_intake(db, user_id, day: date, supplement_id=None) -> bool:
+        return PresenceBitmap.has_day(user_id, day, _bitmap_field(supplement_id), db)
+
+    @staticmethod
+    def _walk(db, user_id, day: date, step: int, supplement_id=None) -> date:
+        """Follow consecutive intake days from `day` (inclusive) and return the last one reached"""
+        return PresenceBitmap.walk(user_id, day, step, _bitmap_field(supplement_id), db)
+
+    @staticmethod
+    def _latest_before(db, user_id, day: date, supplement_id=None) -> date:
+        return PresenceBitmap.latest_before(user_id, day, _bitmap_field(supplement_id), db)
+
+    @staticmethod
+    def _scan(db, user_id, supplement_id=None) -> dict:
+        """
+        Recompute one scope's state from the runs of the user's PresenceBitmaps, or from
+        their intake logs when the bitmaps have no days (logs written before they were kept)
+        """
+        longest = last = None
+        for run in PresenceBitmap.runs(user_id, _bitmap_field(supplement_id), db):
+            if longest is None or run[1] - run[0] > longest[1] - longest[0]:
+                longest = run
+            last = run
+        if last is None:
+            tracker = _RunTracker()
+            for day, intake in StreakState._days_from_logs(db, user_id):
+                if supplement_id is None or str(supplement_id) in intake:
+                    tracker.add(date.fromisoformat(day))
+            return tracker.state()
+        return {
+            'lastDay': last[1].isoformat(),
+            'currentRun': (last[1] - last[0]).days + 1,
+            'longestRun': (longest[1] - longest[0]).days + 1,
+            'longestStart': longest[0].isoformat(),
+            'longestEnd': longest[1].isoformat()
+        }
+
+    @staticmethod
+    def _next_state(db, user_id, state: dict, day: date, supplement_id=None) -> dict:
+        """Return the scope's state after intake on `day` was added or removed"""
+        last = date.fromisoformat(state['lastDay']) if state else None
+
+        if StreakState._has_intake(db, user_id, day, supplement_id):
+            if last is None:
+                iso = day.isoformat()
+                return {'lastDay': iso, 'currentRun': 1, 'longestRun': 1,
+                        'longestStart': iso, 'longestEnd': iso}
+            state = dict(state)
+            if day == last:
+                return state
+            if day > last:
+                # The common case: logging today (or a later day)
+                state['currentRun'] = state['currentRun'] + 1 if day == last + timedelta(days=1) else 1
+                state['lastDay'] = day.isoformat()
+                start, end = day - timedelta(days=state['currentRun'] - 1), day
+            else:
+                # A past day was filled in and may have joined two runs
+                start = StreakState._walk(db, user_id, day, -1, supplement_id)
+                end = StreakState._walk(db, user_id, day, 1, supplement_id)
+                if end == last:
+                    state['currentRun'] = (end - start).days + 1
+            length = (end - start).days + 1
+            if length > state['longestRun']:
+                state.update(longestRun=length, longestStart=start.isoformat(), longestEnd=end.isoformat())
+            return state
+
+        # Intake on `day` was removed
+        if last is None or day > last:
+            return state
+        if state['longestStart'] <= day.isoformat() <= state['longestEnd']:
+            return StreakState._scan(db, user_id, supplement_id)
+        state = dict(state)
+        if day == last:
+            previous = StreakState._latest_before(db, user_id, day, supplement_id)
+            if previous is None:
+                return None
+            start = StreakState._walk(db, user_id, previous, -1, supplement_id)
+            state['lastDay'] = previous.isoformat()
+            state['currentRun'] = (previous - start).days + 1
+        elif day > last - timedelta(days=state['currentRun']):
+            # The current run now starts after the removed day
+            state['currentRun'] = (last - day).days
+        return state
+
+    @staticmethod
+    def record_day(user_id, day: str, supplement_id=None, supplement_name: str = None, db=None):
+        """
+        Bring a user's streaks up to date after intake on `day` changed.
+        Call after the day's DailyRollup has been updated.
+        Args:
+            user_id: The user's ObjectId.
+            day (str): The affected day (YYYY-MM-DD or an ISO timestamp).
+            supplement_id: The tracked supplement whose intake changed.
+            supplement_name (str): Display name stored with the supplement's streak.
+            db: An open database handle to reuse.
+        """
+        if not user_id or not day:
+            return
+        db = db or get_db()
+        supp_key = str(supplement_id) if supplement_id else None
+        try:
+            day = date.fromisoformat(str(day)[:10])
+            for _ in range(MAX_WRITE_ATTEMPTS):
+                existing = db.StreakStates.find_one({'user_id': user_id})
+                if existing is None:
+                    # No state yet: build it from the rollups, which already include this change
+                    StreakState.rebuild(user_id, db=db)
+                    return
+                current = StreakState(existing)
+                overall = StreakState._next_state(db, user_id, current.overall, day)
+                update = {'overall': overall, 'updated_at': datetime.now(timezone.utc).isoformat()}
+                unset = {}
+                if supp_key:
+                    supp_state = StreakState._next_state(
+                        db, user_id, current.supplements.get(supp_key), day, supp_key
+                    )
+                    if supp_state is None:
+                        unset[f"supplements.{supp_key}"] = ""
+                    else:
+                        supp_state['name'] = supplement_name or current.supplements.get(supp_key, {}).get('name')
+                        update[f"supplements.{supp_key}"] = supp_state
+                operations = {'$set': update, '$inc': {'version': 1}}
+                if unset:
+                    operations['$unset'] = unset
+                result = db.StreakStates.update_one(
+                    {'_id': existing['_id'], 'version': current.version}, operations
+                )
+                if result.modified_count:
+                    return
+            logger.warning(f"Streak state for {user_id} changed concurrently; rebuilding")
+            StreakState.rebuild(user_id, db=db)
+        except Exception as e:
+            logger.error(f"Failed to update streak state for {user_id}: {e}")
+
+    @staticmethod
+    def _days_from_logs(db, user_id):
+        """Each day's intake per supplement read from the IntakeLogs, as (day, intake) in day order"""
+        pipeline = [
+            {'$match': {'user_id': user_id, 'deleted_at': None}},
+            {'$group': {
+                '_id': {'day': {'$substrCP': ['$intake_date', 0, 10]}, 'supplement_id': '$tracked_supplement_id'},
+                'count': {'$sum': 1},
+                'name': {'$last': '$supplement_name'}
+            }},
+            {'$sort': {'_id.day': 1}}
+        ]
+        for row in db.IntakeLogs.aggregate(pipeline, allowDiskUse=True):
+            key = row['_id']
+            yield key['day'], {str(key['supplement_id']): {'count': row['count'], 'name': row['name']}}
+
+    @staticmethod
+    def rebuild(user_id, db=None):
+        """
+        Recompute a user's streak state from their DailyRollups in one pass, or from their
+        intake logs when they have no rollups (e.g. logs written before the rollups were kept)
+        """
+        db = db or get_db()
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+
+        overall = _RunTracker()
+        supplements = {}
+        names = {}
+
+        def _add(days):
+            for day, intake in days:
+                day = date.fromisoformat(day)
+                overall.add(day)
+                for supp_id, totals in intake.items():
+                    if totals.get('count', 0) > 0:
+                        supplements.setdefault(supp_id, _RunTracker()).add(day)
+                        names[supp_id] = totals.get('name') or names.get(supp_id)
+
+        rollups = db.DailyRollups.find(_presence_query(user_id), {'date': 1, 'intake': 1}).sort('date', 1)
+        _add((rollup['date'], rollup.get('intake', {})) for rollup in rollups)
+        if overall.last_day is None:
+            _add(StreakState._days_from_logs(db, user_id))
+
+        state = {
+            'user_id': user_id,
+            'overall': overall.state(),
+            'supplements': {
+                supp_id: dict(tracker.state(), name=names.get(supp_id))
+                for supp_id, tracker in supplements.items()
+            },
+            'version': 0,
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }
+        db.StreakStates.replace_one({'user_id': user_id}, state, upsert=True)
+        return StreakState(state)
+
+    @staticmethod
+    def find_by_user_id(user_id: str):
+        """Find a user's streak state, building it on first use"""
+        db = get_db()
+        try:
+            if isinstance(user_id, str):
+                user_id = ObjectId(user_id)
+
+            state = db.StreakStates.find_one({'user_id': user_id})
+            return StreakState(state) if state else StreakState.rebuild(user_id, db=db)
+        except Exception as e:
+            raise ValueError(f"Error finding streak state: {e}")
+
+    @staticmethod
+    def reset(user_id: str = None):
+        """Drop stored streak states (one user or all) so they are rebuilt on next read"""
+        db = get_db()
+        if user_id:
+            db.StreakStates.delete_one({'user_id': ObjectId(user_id) if isinstance(user_id, str) else user_id})
+        else:
+            db.StreakStates.delete_many({})
@@ -1,4 +1,6 @@
 from app.db.db import get_database as get_db
+from app.models.reference_data import SupplementCatalog
+from bson.objectid import ObjectId
 from datetime import datetime
 
 class Supplement:
@@ -53,6 +55,33 @@ class Supplement:
         except Exception as e:
             raise ValueError(f"Error finding supplement by ID: {e}")
     
+    @staticmethod
+    def find_names_by_ids(ids):
+        """Look up the names of several supplements, keyed by str(_id): from the catalog, then one query for the rest"""
+        ids = [_id for _id in ids if _id]
+        try:
+            names = SupplementCatalog.names(ids)
+        except Exception:
+            # The query below looks all of them up instead
+            names = {}
+        lookup = []
+        for _id in ids:
+            if str(_id) in names:
+                continue
+            lookup.append(_id)
+            # Ids may be stored as strings or ObjectIds; match either form
+            if isinstance(_id, str) and len(_id) == 24 and ObjectId.is_valid(_id):
+                lookup.append(ObjectId(_id))
+        if not lookup:
+            return names
+        db = get_db()
+        try:
+            supplements = db.Supplements.find({'_id': {'$in': lookup}}, {'_id': 1, 'name': 1})
+            names.update({str(supplement['_id']): supplement.get('name') for supplement in supplements})
+            return names
+        except Exception as e:
+            raise ValueError(f"Error finding supplements by ID: {e}")
+    
     # Method to update an existing supplement
     @staticmethod
     def update(_id: str, supplement_data: dict):
@@ -77,6 +106,7 @@ class Supplement:
                 {'_id': _id},
                 {'$set': supplement_data}
             )
+            SupplementCatalog.invalidate()
         except Exception as e:
             raise ValueError(f"Error updating supplement: {e}")
         
@@ -93,6 +123,7 @@ class Supplement:
         else:
             # Perform a hard delete by removing the document
             result = db.Supplements.delete_one({'_id': _id})
+        SupplementCatalog.invalidate()
         return result.deleted_count > 0 if not soft_delete else result.modified_count > 0
     
     @staticmethod
@@ -0,0 +1,173 @@
+from app.db.db import get_database as get_db
+from bson.objectid import ObjectId
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# How long a worker serves its copy of the catalog before reloading it (picks up re-seeded catalogs)
+SYMPTOM_CATALOG_TTL_SECONDS = int(os.getenv('SYMPTOM_CATALOG_TTL_SECONDS', '3600'))
+
+# Symptom categories in display order: the seed data and the order of the per-day summaries
+SYMPTOM_CATEGORIES = [
+    {"name": "General", "id": "general", "icon": "🔍"},
+    {"name": "Mood", "id": "mood", "icon": "😊"},
+    {"name": "Sleep", "id": "sleep", "icon": "😴"},
+    {"name": "Digestive", "id": "digestive", "icon": "🍽️"},
+    {"name": "Appetite", "id": "appetite", "icon": "🥑"},
+    {"name": "Physical Activity", "id": "activity", "icon": "🏃‍♀️"}
+]
+
+# Symptoms seeded into each category. Bump SYMPTOM_SEED_VERSION when either list changes so the
+# next startup (or scripts/seed_symptoms.py) upserts the new seed.
+SYMPTOM_SEED_VERSION = 1
+SYMPTOM_SEED = [
+    # General
+    {"name": "Everything is fine", "icon": "👍", "category": "general"},
+    {"name": "Skin issues", "icon": "🤡", "category": "general"},
+    {"name": "Fatigue", "icon": "🫠", "category": "general"},
+    {"name": "Headache", "icon": "🤕", "category": "general"},
+    {"name": "Abdominal Pain", "icon": "😣", "category": "general"},
+    {"name": "Dizziness", "icon": "😵‍💫", "category": "general"},
+
+    # Mood
+    {"name": "Calm", "icon": "😌", "category": "mood"},
+    {"name": "Mood swings", "icon": "🔄", "category": "mood"},
+    {"name": "Happy", "icon": "😊", "category": "mood"},
+    {"name": "Energetic", "icon": "⚡", "category": "mood"},
+    {"name": "Irritated", "icon": "🥴", "category": "mood"},
+    {"name": "Depressed", "icon": "😓", "category": "mood"},
+    {"name": "Low energy", "icon": "🥱", "category": "mood"},
+    {"name": "Anxious", "icon": "😰", "category": "mood"},
+
+    # Sleep
+    {"name": "Insomnia", "icon": "😳", "category": "sleep"},
+    {"name": "Good sleep", "icon": "😴", "category": "sleep"},
+    {"name": "Restless", "icon": "🔄", "category": "sleep"},
+    {"name": "Tired", "icon": "🥱", "category": "sleep"},
+
+    # Digestive
+    {"name": "Bloating", "icon": "🎈", "category": "digestive"},
+    {"name": "Nausea", "icon": "🤢", "category": "digestive"},
+    {"name": "Constipation", "icon": "⏸️", "category": "digestive"},
+    {"name": "Diarrhea", "icon": "⏩", "category": "digestive"},
+
+    # Appetite
+    {"name": "Low", "icon": "🫢", "category": "appetite"},
+    {"name": "Normal", "icon": "🍽️", "category": "appetite"},
+    {"name": "High", "icon": "🍔", "category": "appetite"},
+
+    # Physical Activity
+    {"name": "Didn't exercise", "icon": "⭕️", "category": "activity"},
+    {"name": "Yoga", "icon": "🧘‍♀️", "category": "activity"},
+    {"name": "Gym", "icon": "🏋️", "category": "activity"},
+    {"name": "Swimming", "icon": "🏊‍♀️", "category": "activity"},
+    {"name": "Running", "icon": "🏃", "category": "activity"},
+    {"name": "Cycling", "icon": "🚴‍♀️", "category": "activity"},
+    {"name": "Team Sports", "icon": "⛹️‍♀️", "category": "activity"},
+    {"name": "Aerobics/Dancing", "icon": "💃", "category": "activity"}
+]
+
+
+def symptom_key(name: str) -> str:
+    """The stable symptomId of a seeded symptom"""
+    return name.lower().replace(" ", "_")
+
+
+def category_key(category: dict) -> str:
+    """The summary key ('general', 'mood', ...) of a SymptomCategories document"""
+    if category.get('id'):
+        return category['id']
+    # Categories seeded before the `id` field existed are matched on their name
+    name = (category.get('name') or '').lower()
+    for key, words in (('general', ('general',)), ('mood', ('mood',)), ('sleep', ('sleep',)),
+                       ('digestive', ('digestive',)), ('appetite', ('appetite',)),
+                       ('activity', ('activity', 'physical'))):
+        if any(word in name for word in words):
+            return key
+    return ""
+
+
+def _json_default(value):
+    return str(value) if isinstance(value, ObjectId) else value
+
+
+class _Catalog:
+    """One loaded copy of the catalog; never mutated after it is built"""
+    def __init__(self, symptoms: dict):
+        self.symptoms = symptoms
+        # The /symptoms response, serialized once per load
+        self.body = json.dumps({"symptoms": list(symptoms.values())}, default=_json_default,
+                               ensure_ascii=False).encode('utf-8')
+        self.version = hashlib.sha1(self.body).hexdigest()[:16]
+        self.loaded_at = time.monotonic()
+
+
+class SymptomCatalog:
+    """
+    Process-local copy of the symptom catalog (Symptoms joined with SymptomCategories).
+
+    The catalog is a small static seed, so each worker reads both collections
+    once and serves every request from memory. The version is a hash of the
+    serialized catalog and is used as the ETag of /api/symptom-logs/symptoms.
+    Copies are reloaded after SYMPTOM_CATALOG_TTL_SECONDS, or immediately after
+    invalidate() (called when the seed is written).
+    """
+
+    _catalog = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _load():
+        db = get_db()
+        categories = {category['_id']: category for category in db.SymptomCategories.find()}
+        symptoms = {}
+        for symptom in db.Symptoms.find({}, {'_id': 1, 'name': 1, 'icon': 1, 'categoryId': 1}):
+            category = categories.get(symptom.get('categoryId'))
+            if category is None:
+                # Same as the inner join this replaces: symptoms without a category are left out
+                continue
+            symptoms[str(symptom['_id'])] = {
+                "_id": symptom['_id'],
+                "name": symptom.get('name'),
+                "icon": symptom.get('icon'),
+                "categoryId": symptom.get('categoryId'),
+                "categoryName": category.get('name'),
+                "categoryIcon": category.get('icon'),
+                "categoryKey": category_key(category)
+            }
+        return _Catalog(symptoms)
+
+    @staticmethod
+    def get():
+        """
+        The current catalog, loading it on first use or once it has expired.
+        Returns:
+            _Catalog: with `symptoms` ({symptom id: details}), the serialized `body` and its `version`.
+        Raises:
+            ValueError: If the catalog cannot be loaded.
+        """
+        catalog = SymptomCatalog._catalog
+        if catalog is not None and time.monotonic() - catalog.loaded_at < SYMPTOM_CATALOG_TTL_SECONDS:
+            return catalog
+        with SymptomCatalog._lock:
+            catalog = SymptomCatalog._catalog
+            if catalog is None or time.monotonic() - catalog.loaded_at >= SYMPTOM_CATALOG_TTL_SECONDS:
+                try:
+                    catalog = SymptomCatalog._load()
+                except Exception as e:
+                    raise ValueError(f"Error getting symptom details: {e}")
+                # An empty catalog is not kept, so a worker started before the seed picks it up
+                SymptomCatalog._catalog = catalog if catalog.symptoms else None
+                logger.info(f"Loaded symptom catalog {catalog.version} ({len(catalog.symptoms)} symptoms)")
+            return catalog
+
+    @staticmethod
+    def invalidate():
+        """Drop this worker's copy so the next request reloads it"""
+        with SymptomCatalog._lock:
+            SymptomCatalog._catalog = None
@@ -1,11 +1,37 @@
 from app.db.db import get_database as get_db
+from app.db.utils import keyset_query, severity_code
+from app.db.constants import SEVERITY_LEVELS, MAX_DAY_SYMPTOMS
+from app.models.daily_rollup import DailyRollup
+from app.models.presence_bitmap import PresenceBitmap, SYMPTOMS
+from app.models.report_cache import ReportCache
+from app.models.symptom_catalog import (
+    SymptomCatalog, SYMPTOM_CATEGORIES, SYMPTOM_SEED, SYMPTOM_SEED_VERSION, symptom_key
+)
+from app.utils.concurrency import WriteCoalescer
 from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timezone
 from typing import List, Dict, Optional, Any, Union
+import atexit
+import logging
+import os
 import uuid
 
+logger = logging.getLogger(__name__)
+
+# Seconds a symptom's latest severity is held before it is written (0 writes every request immediately)
+SYMPTOM_WRITE_COALESCE_SECONDS = float(os.getenv('SYMPTOM_WRITE_COALESCE_SECONDS', '0'))
+
+# The buffer is per process: with several workers, a read served by another worker
+# would miss the user's pending saves, so coalescing is only used with one worker
+if SYMPTOM_WRITE_COALESCE_SECONDS > 0 and int(os.getenv('WEB_CONCURRENCY', '1')) > 1:
+    logger.warning("SYMPTOM_WRITE_COALESCE_SECONDS is ignored with more than one worker (WEB_CONCURRENCY)")
+    SYMPTOM_WRITE_COALESCE_SECONDS = 0
+
+
 class SymptomLog:
-    SEVERITY_LEVELS = ["none", "mild", "average", "severe"]
+    SEVERITY_LEVELS = SEVERITY_LEVELS
     REQUIRED_FIELDS = ['user_id', 'symptom_id', 'date', 'severity']
     
     def __init__(self, symptom_log_data: dict):
@@ -96,6 +122,8 @@ class SymptomLog:
             )
             # Return the updated log
             updated_log = db.SymptomLogs.find_one({"_id": existing_log["_id"]})
+            DailyRollup.record_symptom(updated_log, replace=True, db=db)
+            ReportCache.bump_version(updated_log.get('user_id'), db=db)
             return SymptomLog(updated_log)
         else:
             # Insert into database
@@ -103,11 +131,121 @@ class SymptomLog:
             
             if not result.inserted_id:
                 raise ValueError("Failed to create symptom log")
+            
+            DailyRollup.record_symptom(symptom_log_data, db=db)
+            ReportCache.bump_version(symptom_log_data['user_id'], db=db)
                 
             # Get the created symptom log with its ID
             created_log = db.SymptomLogs.find_one({"_id": result.inserted_id})
             return SymptomLog(created_log)
 
+    @staticmethod
+    def upsert_day(user_id: str, date: str, entries: list, notes: str = None):
+        """
+        Create or update all of a user's symptom logs for one day in a single unordered bulk write.
+        Logs are matched on (user_id, symptom_id, date), the key of the unique index on
+        active logs, so concurrent saves of the same day cannot create duplicates.
+        Args:
+            user_id (str): The user's ID.
+            date (str): The YYYY-MM-DD day.
+            entries (list): Dicts with symptom_id, severity and optional notes; a later entry
+                            for the same symptom replaces an earlier one.
+            notes (str): Notes for entries that have none of their own.
+        Returns:
+            dict: The number of logs `upserted` (created) and `modified`.
+        """
+        if not entries:
+            raise ValueError("At least one symptom is required")
+        if len(entries) > MAX_DAY_SYMPTOMS:
+            raise ValueError(f"At most {MAX_DAY_SYMPTOMS} symptoms can be saved for a day")
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+
+        # Validate every entry before writing any of them
+        logs = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                raise ValueError("Each symptom must be an object")
+            for field in ('symptom_id', 'severity'):
+                if not entry.get(field):
+                    raise ValueError(f"Missing required field: {field}")
+            if entry['severity'] not in SymptomLog.SEVERITY_LEVELS:
+                raise ValueError(f"Severity must be one of {SymptomLog.SEVERITY_LEVELS}")
+            try:
+                symptom_id = ObjectId(entry['symptom_id'])
+            except Exception:
+                raise ValueError(f"Invalid symptom_id: {entry['symptom_id']}")
+            logs[symptom_id] = {
+                'severity': entry['severity'],
+                'notes': entry.get('notes') if entry.get('notes') is not None else (notes or '')
+            }
+
+        db = get_db()
+        now = datetime.now(timezone.utc).isoformat()
+
+        def operations(symptom_ids):
+            return [
+                UpdateOne(
+                    {'user_id': user_id, 'symptom_id': symptom_id, 'date': date, 'deleted_at': None},
+                    {
+                        '$set': {**logs[symptom_id], 'updated_at': now},
+                        '$setOnInsert': {'symptomLogId': str(uuid.uuid4()), 'created_at': now}
+                    },
+                    upsert=True
+                )
+                for symptom_id in symptom_ids
+            ]
+
+        symptom_ids = list(logs)
+        try:
+            result = db.SymptomLogs.bulk_write(operations(symptom_ids), ordered=False)
+            counts = {'upserted': result.upserted_count, 'modified': result.modified_count}
+        except BulkWriteError as e:
+            # A concurrent save inserted the same log first; the retry updates it instead
+            duplicates = [error['index'] for error in e.details.get('writeErrors', []) if error.get('code') == 11000]
+            if len(duplicates) != len(e.details.get('writeErrors', [])):
+                raise ValueError(f"Error saving symptom logs: {e.details.get('writeErrors')}")
+            retry = db.SymptomLogs.bulk_write(operations([symptom_ids[i] for i in duplicates]), ordered=False)
+            counts = {'upserted': e.details.get('nUpserted', 0) + retry.upserted_count,
+                      'modified': e.details.get('nModified', 0) + retry.modified_count}
+        except Exception as e:
+            raise ValueError(f"Error saving symptom logs: {e}")
+
+        DailyRollup.record_symptom_day(user_id, date, {
+            str(symptom_id): log['severity'] for symptom_id, log in logs.items()
+        }, db=db)
+        ReportCache.bump_version(user_id, db=db)
+        return counts
+
+    @staticmethod
+    def queue(symptom_log_data: dict) -> dict:
+        """
+        Validate a symptom log and hold it in the write coalescer instead of writing it.
+        Later saves of the same user, symptom and day within the window replace it, and
+        only the last one is written (with upsert_day).
+        Returns:
+            dict: The pending log, as it will be stored.
+        """
+        if not symptom_log_data:
+            raise ValueError("Symptom log data is required")
+        symptom_log = SymptomLog({**symptom_log_data, 'notes': symptom_log_data.get('notes', '')})
+        symptom_log.validate_data()
+        try:
+            symptom_id = str(ObjectId(symptom_log.symptom_id))
+        except Exception:
+            raise ValueError(f"Invalid symptom_id: {symptom_log.symptom_id}")
+        user_id = str(symptom_log.user_id)
+
+        symptom_writes.submit((user_id, symptom_id, symptom_log.date),
+                              {'severity': symptom_log.severity, 'notes': symptom_log.notes})
+        return {
+            "user_id": user_id,
+            "symptom_id": symptom_id,
+            "date": symptom_log.date,
+            "severity": symptom_log.severity,
+            "notes": symptom_log.notes
+        }
+
     @staticmethod
     def find_by_id(log_id: str):
         """Find a symptom log by ID"""
@@ -122,14 +260,23 @@ class SymptomLog:
             raise ValueError(f"Error finding symptom log: {e}")
 
     @staticmethod
-    def find_by_user_id(user_id: str):
+    def _find_page(db, query: dict, limit: int = None, after=None):
+        """Run a log query, paging by (date, _id) when a limit is given"""
+        if not limit:
+            return db.SymptomLogs.find(query)
+        return db.SymptomLogs.find(keyset_query(query, 'date', after)) \
+            .sort([('date', 1), ('_id', 1)]) \
+            .limit(limit)
+
+    @staticmethod
+    def find_by_user_id(user_id: str, limit: int = None, after=None):
         """Find all symptom logs for a user"""
         db = get_db()
         try:
             if isinstance(user_id, str):
                 user_id = ObjectId(user_id)
                 
-            SymptomLogs = db.SymptomLogs.find({'user_id': user_id, 'deleted_at': None})
+            SymptomLogs = SymptomLog._find_page(db, {'user_id': user_id, 'deleted_at': None}, limit, after)
             return [SymptomLog(log) for log in SymptomLogs]
         except Exception as e:
             raise ValueError(f"Error finding symptom logs: {e}")
@@ -170,38 +317,119 @@ class SymptomLog:
             raise ValueError(f"Error finding active symptoms for date: {e}")
 
     @staticmethod
-    def find_by_date_range(user_id: str, start_date: str, end_date: str):
+    def find_by_date_range(user_id: str, start_date: str, end_date: str, limit: int = None, after=None):
         """Find symptom logs within a date range for a user"""
         db = get_db()
         try:
             if isinstance(user_id, str):
                 user_id = ObjectId(user_id)
                 
-            SymptomLogs = db.SymptomLogs.find({
+            SymptomLogs = SymptomLog._find_page(db, {
                 'user_id': user_id,
                 'date': {'$gte': start_date, '$lte': end_date},
                 'deleted_at': None
-            })
+            }, limit, after)
             return [SymptomLog(log) for log in SymptomLogs]
         except Exception as e:
             raise ValueError(f"Error finding symptom logs by date range: {e}")
 
     @staticmethod
-    def get_dates_with_symptoms(user_id: str):
-        """Get all dates where a user has logged active symptoms"""
+    def _report_pipeline(match: dict) -> list:
+        """
+        Group the symptom logs matched by `match` per user, symptom, day and severity, for the
+        report aggregations. Each group is one small document however many logs it holds, so
+        results are streamed rather than packed into one document per symptom; only the last
+        log's notes are kept.
+        """
+        return [
+            {'$match': match},
+            {'$sort': {'_id': 1}},
+            {'$group': {
+                '_id': {
+                    'user_id': '$user_id',
+                    'symptom_id': '$symptom_id',
+                    'day': {'$substrCP': ['$date', 0, 10]},
+                    'severity': '$severity'
+                },
+                'first': {'$min': '$_id'},
+                'count': {'$sum': 1},
+                'notes': {'$last': '$notes'}
+            }},
+            {'$sort': {'first': 1}},
+            {'$project': {
+                '_id': 0,
+                'user_id': '$_id.user_id',
+                'symptom_id': '$_id.symptom_id',
+                'day': '$_id.day',
+                'severity': '$_id.severity',
+                'count': 1,
+                'notes': 1
+            }}
+        ]
+
+    @staticmethod
+    def get_report_aggregates(user_id: str, start_date: str, end_date: str):
+        """
+        Group a user's symptom logs within a date range for report generation.
+        Returns:
+            A cursor over one document per symptom, YYYY-MM-DD day and severity with the number
+            of logs and the last one's notes, ordered by the group's first log (read it once,
+            in full).
+        """
         db = get_db()
         try:
             if isinstance(user_id, str):
                 user_id = ObjectId(user_id)
-                
+
+            pipeline = SymptomLog._report_pipeline({
+                'user_id': user_id,
+                'date': {'$gte': start_date, '$lte': end_date},
+                'deleted_at': None
+            })
+            return db.SymptomLogs.aggregate(pipeline, allowDiskUse=True)
+        except Exception as e:
+            raise ValueError(f"Error aggregating symptom logs for report: {e}")
+
+    @staticmethod
+    def get_report_aggregates_for_users(user_ids: list, start_date: str, end_date: str) -> dict:
+        """
+        get_report_aggregates for many users with one range query (for batch reports).
+        Returns:
+            dict: User ObjectId -> list of day documents as in get_report_aggregates;
+                  users without symptom logs in the range are left out.
+        """
+        db = get_db()
+        try:
+            pipeline = SymptomLog._report_pipeline({
+                'user_id': {'$in': [ObjectId(user_id) for user_id in user_ids]},
+                'date': {'$gte': start_date, '$lte': end_date},
+                'deleted_at': None
+            })
+            aggregates = {}
+            for symptom in db.SymptomLogs.aggregate(pipeline, allowDiskUse=True):
+                aggregates.setdefault(symptom['user_id'], []).append(symptom)
+            return aggregates
+        except Exception as e:
+            raise ValueError(f"Error aggregating symptom logs for reports: {e}")
+
+    @staticmethod
+    def get_dates_with_symptoms(user_id: str):
+        """
+        Get all dates where a user has logged active symptoms, from their presence bitmaps,
+        or from their logs when the bitmaps have none (e.g. logs written before they were kept)
+        """
+        try:
+            days = PresenceBitmap.days(user_id, SYMPTOMS)
+            if days:
+                return days
+            db = get_db()
             pipeline = [
-                {"$match": {"user_id": user_id, "severity": {"$ne": "none"}, "deleted_at": None}},
-                {"$group": {"_id": "$date"}},
-                {"$sort": {"_id": 1}}
+                {'$match': {'user_id': ObjectId(user_id) if isinstance(user_id, str) else user_id,
+                            'deleted_at': None}},
+                {'$group': {'_id': {'day': {'$substrCP': ['$date', 0, 10]}, 'severity': '$severity'}}}
             ]
-            
-            result = db.SymptomLogs.aggregate(pipeline)
-            return [doc["_id"] for doc in result]
+            return sorted({row['_id']['day'] for row in db.SymptomLogs.aggregate(pipeline)
+                           if severity_code(row['_id']['severity']) > 0})
         except Exception as e:
             raise ValueError(f"Error finding dates with symptoms: {e}")
 
@@ -231,6 +459,10 @@ class SymptomLog:
             
             # Return the updated log
             updated_log = db.SymptomLogs.find_one({'_id': log_id})
+            if 'severity' in update_dict:
+                DailyRollup.record_symptom(updated_log, replace=True, db=db)
+            if update_dict:
+                ReportCache.bump_version(existing_log.get('user_id'), db=db)
             return SymptomLog(updated_log)
         except Exception as e:
             raise ValueError(f"Error updating symptom log: {e}")
@@ -262,212 +494,156 @@ class SymptomLog:
                     'updated_at': now
                 }}
             )
+            DailyRollup.remove_symptom(existing_log, db=db)
+            ReportCache.bump_version(existing_log.get('user_id'), db=db)
             return True
         except Exception as e:
             raise ValueError(f"Error deleting symptom log: {e}")
 
     @staticmethod
     def get_symptom_details():
-        """Get all symptoms with their categories"""
-        db = get_db()
-        try:
-            pipeline = [
-                {
-                    "$lookup": {
-                        "from": "SymptomCategories",
-                        "localField": "categoryId",
-                        "foreignField": "_id",
-                        "as": "category"
-                    }
-                },
-                {
-                    "$unwind": "$category"
-                },
-                {
-                    "$project": {
-                        "_id": 1,
-                        "name": 1,
-                        "icon": 1,
-                        "categoryId": 1,
-                        "categoryName": "$category.name",
-                        "categoryIcon": "$category.icon"
-                    }
-                }
-            ]
-            
-            symptoms = list(db.Symptoms.aggregate(pipeline))
-            return {str(symptom["_id"]): symptom for symptom in symptoms}
-        except Exception as e:
-            raise ValueError(f"Error getting symptom details: {e}")
+        """Get all symptoms with their categories (from this worker's cached catalog)"""
+        return SymptomCatalog.get().symptoms
 
     @staticmethod
     def get_symptoms_summary(user_id: str, date: str):
-        """Get a summary of symptoms by category for a specific date"""
+        """
+        Get a summary of symptoms by category for a specific date.
+        The day's active logs are read once, projected to the summarized fields (the
+        severity filter is resolved on the (user_id, date, severity) index), and the
+        notes and category groups are collected in the same pass.
+        """
         db = get_db()
         try:
             if isinstance(user_id, str):
                 user_id = ObjectId(user_id)
-                
-            # Get active logs
-            active_logs = db.SymptomLogs.find({
-                'user_id': user_id,
-                'date': date,
-                'severity': {'$ne': 'none'},
-                'deleted_at': None
-            })
             
-            # Get symptom details
+            # Symptom details from the cached catalog
             symptoms = SymptomLog.get_symptom_details()
             
             # Group by category
             categories = {
-                "general": {"name": "General", "icon": "🔍", "symptoms": []},
-                "mood": {"name": "Mood", "icon": "😊", "symptoms": []},
-                "sleep": {"name": "Sleep", "icon": "😴", "symptoms": []},
-                "digestive": {"name": "Digestive", "icon": "🍽️", "symptoms": []},
-                "appetite": {"name": "Appetite", "icon": "🥑", "symptoms": []},
-                "activity": {"name": "Physical Activity", "icon": "🏃‍♀️", "symptoms": []}
+                category["id"]: {"name": category["name"], "icon": category["icon"], "symptoms": []}
+                for category in SYMPTOM_CATEGORIES
             }
-            
-            # Parse notes from any log
             notes = ""
-            for log in active_logs:
-                if log.get('notes'):
-                    notes = log['notes']
-                    break
             
-            # Reset cursor
-            active_logs = db.SymptomLogs.find({
-                'user_id': user_id,
-                'date': date,
-                'severity': {'$ne': 'none'},
-                'deleted_at': None
-            })
-            
-            # Populate categories with symptoms
+            active_logs = db.SymptomLogs.find(
+                {
+                    'user_id': user_id,
+                    'date': date,
+                    'severity': {'$ne': 'none'},
+                    'deleted_at': None
+                },
+                {'_id': 0, 'symptom_id': 1, 'severity': 1, 'notes': 1}
+            )
             for log in active_logs:
-                symptom_id = str(log['symptom_id'])
-                if symptom_id in symptoms:
-                    symptom_info = symptoms[symptom_id]
-                    category_name = symptom_info['categoryName'].lower()
-                    
-                    # Map category name to id if needed
-                    category_id = ""
-                    if "general" in category_name:
-                        category_id = "general"
-                    elif "mood" in category_name:
-                        category_id = "mood"
-                    elif "sleep" in category_name:
-                        category_id = "sleep"
-                    elif "digestive" in category_name:
-                        category_id = "digestive"
-                    elif "appetite" in category_name:
-                        category_id = "appetite"
-                    elif "activity" in category_name or "physical" in category_name:
-                        category_id = "activity"
-                    
-                    if category_id in categories:
-                        categories[category_id]["symptoms"].append({
-                            "id": symptom_id,
-                            "name": symptom_info['name'],
-                            "icon": symptom_info['icon'],
-                            "severity": log['severity']
-                        })
+                # Notes from the first log that has any
+                if not notes and log.get('notes'):
+                    notes = log['notes']
+                
+                symptom_id = str(log.get('symptom_id'))
+                symptom_info = symptoms.get(symptom_id)
+                if symptom_info and symptom_info.get('categoryKey') in categories:
+                    categories[symptom_info['categoryKey']]["symptoms"].append({
+                        "id": symptom_id,
+                        "name": symptom_info['name'],
+                        "icon": symptom_info['icon'],
+                        "severity": log['severity']
+                    })
             
             # Filter out empty categories
-            summary = {
+            return {
                 "categories": [cat for cat in categories.values() if cat["symptoms"]],
                 "notes": notes,
                 "date": date
             }
-            
-            return summary
         except Exception as e:
             raise ValueError(f"Error getting symptoms summary: {e}")
 
 
+
+def _flush_symptom_writes(writes: list) -> list:
+    """
+    Write coalesced symptom logs with one upsert_day per user and day.
+    Returns:
+        list: The writes of the days that failed, for the coalescer to retry.
+    """
+    days = {}
+    for write in writes:
+        (user_id, _, date), _ = write
+        days.setdefault((user_id, date), []).append(write)
+    failed = []
+    for (user_id, date), day_writes in days.items():
+        entries = [{'symptom_id': symptom_id, **value} for (_, symptom_id, _), value in day_writes]
+        try:
+            SymptomLog.upsert_day(user_id, date, entries)
+        except Exception as e:
+            logger.error(f"Failed to write {len(entries)} coalesced symptom logs for {date}, will retry: {e}")
+            failed.extend(day_writes)
+    return failed
+
+
+# Per-worker buffer of rapid symptom saves, flushed when the worker exits
+symptom_writes = WriteCoalescer(SYMPTOM_WRITE_COALESCE_SECONDS, _flush_symptom_writes)
+atexit.register(symptom_writes.close)
+
 class SymptomCategoryManager:
     @staticmethod
-    def initialize_symptom_data():
-        """Initialize the database with symptom categories and symptoms if it's empty"""
-        db = get_db()
-        
-        # Only initialize if symptom_categories collection is empty
-        if db.SymptomCategories.count_documents({}) == 0:
-            print("[DEBUG] Initializing symptom categories and symptoms...")
-            # Create symptom categories
-            categories = [
-                {"name": "General", "id": "general", "icon": "🔍"},
-                {"name": "Mood", "id": "mood", "icon": "😊"},
-                {"name": "Sleep", "id": "sleep", "icon": "😴"},
-                {"name": "Digestive", "id": "digestive", "icon": "🍽️"},
-                {"name": "Appetite", "id": "appetite", "icon": "🥑"},
-                {"name": "Physical Activity", "id": "activity", "icon": "🏃‍♀️"}
-            ]
-            
-            # Insert categories
-            category_ids = {}
-            for category in categories:
-                result = db.SymptomCategories.insert_one(category)
-                category_ids[category["id"]] = result.inserted_id
-                print(f"[DEBUG] Inserted category: {category['name']} with ID: {result.inserted_id}")
-            
-            # Define symptoms for each category
-            symptoms = [
-                # General
-                {"name": "Everything is fine", "icon": "👍", "categoryId": category_ids["general"]},
-                {"name": "Skin issues", "icon": "🤡", "categoryId": category_ids["general"]},
-                {"name": "Fatigue", "icon": "🫠", "categoryId": category_ids["general"]},
-                {"name": "Headache", "icon": "🤕", "categoryId": category_ids["general"]},
-                {"name": "Abdominal Pain", "icon": "😣", "categoryId": category_ids["general"]},
-                {"name": "Dizziness", "icon": "😵‍💫", "categoryId": category_ids["general"]},
-                
-                # Mood
-                {"name": "Calm", "icon": "😌", "categoryId": category_ids["mood"]},
-                {"name": "Mood swings", "icon": "🔄", "categoryId": category_ids["mood"]},
-                {"name": "Happy", "icon": "😊", "categoryId": category_ids["mood"]},
-                {"name": "Energetic", "icon": "⚡", "categoryId": category_ids["mood"]},
-                {"name": "Irritated", "icon": "🥴", "categoryId": category_ids["mood"]},
-                {"name": "Depressed", "icon": "😓", "categoryId": category_ids["mood"]},
-                {"name": "Low energy", "icon": "🥱", "categoryId": category_ids["mood"]},
-                {"name": "Anxious", "icon": "😰", "categoryId": category_ids["mood"]},
-                
-                # Sleep
-                {"name": "Insomnia", "icon": "😳", "categoryId": category_ids["sleep"]},
-                {"name": "Good sleep", "icon": "😴", "categoryId": category_ids["sleep"]},
-                {"name": "Restless", "icon": "🔄", "categoryId": category_ids["sleep"]},
-                {"name": "Tired", "icon": "🥱", "categoryId": category_ids["sleep"]},
-                
-                # Digestive
-                {"name": "Bloating", "icon": "🎈", "categoryId": category_ids["digestive"]},
-                {"name": "Nausea", "icon": "🤢", "categoryId": category_ids["digestive"]},
-                {"name": "Constipation", "icon": "⏸️", "categoryId": category_ids["digestive"]},
-                {"name": "Diarrhea", "icon": "⏩", "categoryId": category_ids["digestive"]},
-                
-                # Appetite
-                {"name": "Low", "icon": "🫢", "categoryId": category_ids["appetite"]},
-                {"name": "Normal", "icon": "🍽️", "categoryId": category_ids["appetite"]},
-                {"name": "High", "icon": "🍔", "categoryId": category_ids["appetite"]},
-                
-                # Physical Activity
-                {"name": "Didn't exercise", "icon": "⭕️", "categoryId": category_ids["activity"]},
-                {"name": "Yoga", "icon": "🧘‍♀️", "categoryId": category_ids["activity"]},
-                {"name": "Gym", "icon": "🏋️", "categoryId": category_ids["activity"]},
-                {"name": "Swimming", "icon": "🏊‍♀️", "categoryId": category_ids["activity"]},
-                {"name": "Running", "icon": "🏃", "categoryId": category_ids["activity"]},
-                {"name": "Cycling", "icon": "🚴‍♀️", "categoryId": category_ids["activity"]},
-                {"name": "Team Sports", "icon": "⛹️‍♀️", "categoryId": category_ids["activity"]},
-                {"name": "Aerobics/Dancing", "icon": "💃", "categoryId": category_ids["activity"]}
-            ]
-            
-            
-            # Insert symptoms
-            for symptom in symptoms:
-                symptom["symptomId"] = symptom["name"].lower().replace(" ", "_")
-                # Insert into database
-                result = db.Symptoms.insert_one(symptom)
-                print(f"[DEBUG] Inserted symptom: {symptom['name']} with ID: {result.inserted_id}")
-            
-            
-        else:
-            print("[DEBUG] Symptom categories and symptoms already initialized: ", db.SymptomCategories.count_documents({}))
+    def initialize_symptom_data(force: bool = False, db=None) -> bool:
+        """
+        Seed the symptom categories and symptoms, once per SYMPTOM_SEED_VERSION.
+        Categories are upserted by name and symptoms by symptomId in two bulk writes (the keys
+        of unique indexes in INDEXES), so re-running the seed (or running it from several
+        workers at once) never duplicates documents and keeps the _ids that logs refer to.
+        Args:
+            force (bool): Upsert the seed even if the stored seed version is current.
+            db: An open database handle to reuse.
+        Returns:
+            bool: True if the seed was written, False if it was already current.
+        """
+        db = db or get_db()
+        marker = db.SeedVersions.find_one({'_id': 'symptoms'}) or {}
+        if not force and marker.get('version', 0) >= SYMPTOM_SEED_VERSION:
+            return False
+
+        _bulk_upsert(db.SymptomCategories, [
+            UpdateOne({'name': category['name']}, {'$set': {'id': category['id'], 'icon': category['icon']}},
+                      upsert=True)
+            for category in SYMPTOM_CATEGORIES
+        ])
+        category_ids = {
+            category['name']: category['_id']
+            for category in db.SymptomCategories.find(
+                {'name': {'$in': [category['name'] for category in SYMPTOM_CATEGORIES]}}, {'name': 1})
+        }
+        categories = {category['id']: category_ids[category['name']] for category in SYMPTOM_CATEGORIES}
+
+        _bulk_upsert(db.Symptoms, [
+            UpdateOne({'symptomId': symptom_key(symptom['name'])},
+                      {'$set': {'name': symptom['name'], 'icon': symptom['icon'],
+                                'categoryId': categories[symptom['category']]}},
+                      upsert=True)
+            for symptom in SYMPTOM_SEED
+        ])
+
+        db.SeedVersions.update_one(
+            {'_id': 'symptoms'},
+            {'$set': {'version': SYMPTOM_SEED_VERSION, 'seeded_at': datetime.now(timezone.utc).isoformat()}},
+            upsert=True
+        )
+        logger.info(f"Seeded symptom catalog version {SYMPTOM_SEED_VERSION} "
+                    f"({len(SYMPTOM_CATEGORIES)} categories, {len(SYMPTOM_SEED)} symptoms)")
+
+        # Drop this worker's copy in case it was loaded before the seed
+        SymptomCatalog.invalidate()
+        return True
+
+
+def _bulk_upsert(collection, operations: list):
+    """Unordered bulk upsert that tolerates another worker inserting the same seed documents first"""
+    try:
+        collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+            raise
@@ -1,4 +1,5 @@
 from app.db.db import get_database as get_db
+from app.models.report_cache import ReportCache
 from bson.objectid import ObjectId
 from datetime import datetime
 
@@ -158,6 +159,7 @@ class TrackerSupplementList:
             {'user_id': ObjectId(user_id)},
             {'$push': {'tracked_supplements': tracked_supplement.to_dict()}}
         )
+        ReportCache.bump_version(user_id, db=db)
 
         # Return the updated list
         updated_list = db.TrackerSupplementList.find_one({'user_id': ObjectId(user_id)})
@@ -176,6 +178,7 @@ class TrackerSupplementList:
             {'user_id': ObjectId(user_id)},
             {'$pull': {'tracked_supplements': {'_id': supplement_id}}}
         )
+        ReportCache.bump_version(user_id, db=db)
 
         # Return the updated list
         updated_list = db.TrackerSupplementList.find_one({'user_id': ObjectId(user_id)})
@@ -191,6 +194,7 @@ class TrackerSupplementList:
             {'user_id': ObjectId(user_id), 'tracked_supplements._id': ObjectId(supplement_id)},
             {'$set': {'tracked_supplements.$': updated_data}}
         )
+        ReportCache.bump_version(user_id, db=db)
 
         # Return the updated list
         updated_list = db.TrackerSupplementList.find_one({'user_id': ObjectId(user_id)})
@@ -0,0 +1,327 @@
+"""
+Async versions of the hot read endpoints, served by the ASGI app (app/asgi.py).
+
+Each handler answers exactly like its Flask route (same path, status codes and
+JSON body) but awaits its queries through the Motor models in
+app/models/async_reads.py, so a worker keeps serving other requests while these
+wait on MongoDB. Only GET is served here; every other method and path falls
+through to the Flask app.
+
+GET /api/auth/me
+GET /api/intake_logs/today
+GET /api/symptom-logs/date/<date>
+GET /api/tracker_supplements_list/
+GET /api/reports/<user_id>
+GET /api/reports/streaks/<user_id>
+GET /api/reports/progress/<user_id>
+"""
+from app import config
+from app.analytics import ReportFrame
+from app.models.async_reads import (
+    AsyncUser, AsyncTokenBlacklist, AsyncTrackerSupplementList, AsyncIntakeLog,
+    AsyncSymptomLog, AsyncDailyRollup, AsyncStreakState, AsyncReportCache
+)
+from app.models.symptom_log import SymptomLog, symptom_writes
+from app.routes.reports import (
+    REPORT_SECTIONS, _report_params, _report_sections, _report_data, _calculate_progress, _rollup_intake_logs
+)
+from app.utils.concurrency import gather_all, FetchTimeout
+from bson.objectid import ObjectId
+from datetime import datetime, timedelta
+from flask import json
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+import jwt
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class FlaskJSONResponse(JSONResponse):
+    """JSON encoded like Flask's jsonify (compact, sorted keys, HTTP dates), so both paths return identical bodies"""
+    def render(self, content) -> bytes:
+        return f"{json.dumps(content, separators=(',', ':'))}\n".encode('utf-8')
+
+
+class AuthError(Exception):
+    """A rejected token, answered like flask_jwt_extended's default callbacks"""
+    def __init__(self, status_code: int, body: dict):
+        super().__init__(body)
+        self.status_code = status_code
+        self.body = body
+
+
+async def _jwt_identity(request) -> str:
+    """
+    The identity of the request's access token, checked like @jwt_required():
+    a Bearer token in the Authorization header, signed with JWT_SECRET_KEY,
+    unexpired, an access token, and not revoked.
+    Raises:
+        AuthError: With the status and body the Flask route would answer.
+    """
+    header = request.headers.get('Authorization', '').strip().strip(',')
+    if not header:
+        raise AuthError(401, {'msg': 'Missing Authorization Header'})
+    bearer = [value for value in header.split(',') if value.split() and value.split()[0] == 'Bearer']
+    if len(bearer) != 1:
+        raise AuthError(401, {'msg': "Missing 'Bearer' type in 'Authorization' header. "
+                                     "Expected 'Authorization: Bearer <JWT>'"})
+    parts = bearer[0].split()
+    if len(parts) != 2:
+        raise AuthError(422, {'msg': "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"})
+
+    try:
+        claims = jwt.decode(parts[1], config.JWT_SECRET_KEY, algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        raise AuthError(401, {'msg': 'Token has expired'})
+    except jwt.InvalidTokenError as e:
+        raise AuthError(422, {'msg': str(e)})
+    if 'sub' not in claims:
+        raise AuthError(422, {'msg': 'Missing claim: sub'})
+    if claims.get('type') != 'access':
+        raise AuthError(422, {'msg': 'Only non-refresh tokens are allowed'})
+    if await AsyncTokenBlacklist.is_blacklisted(claims.get('jti')):
+        raise AuthError(401, {'error': 'Token has been revoked', 'code': 'token_revoked'})
+
+    user_id = claims['sub']
+    await _flush_pending_symptom_writes(user_id)
+    return user_id
+
+
+async def _flush_pending_symptom_writes(user_id):
+    """The before_app_request hook of the symptom log routes: write the user's coalesced saves before reading"""
+    if not symptom_writes.has_pending():
+        return
+    try:
+        await run_in_threadpool(symptom_writes.flush, user_id)
+    except Exception as e:
+        logger.error(f"Failed to flush pending symptom writes for user {user_id}: {e}")
+
+
+async def _check_user_access(request) -> str:
+    """@check_user_access: users may only read their own resources, unless they are admins"""
+    current_user_id = await _jwt_identity(request)
+    if current_user_id != request.path_params['user_id']:
+        user = await AsyncUser.find_by_id(current_user_id)
+        if not (user and user.role == 'admin'):
+            raise AuthError(403, {'error': 'Access denied'})
+    return request.path_params['user_id']
+
+
+def _auth_error(e: AuthError):
+    return FlaskJSONResponse(e.body, e.status_code)
+
+
+async def internal_server_error(request, exc):
+    """The Flask app's handler for unhandled exceptions"""
+    return FlaskJSONResponse({
+        "error": "Internal Server Error",
+        "message": "An unexpected error occurred."
+    }, 500)
+
+
+async def get_current_user(request):
+    """Get the current authenticated user's details"""
+    try:
+        user_id = await _jwt_identity(request)
+    except AuthError as e:
+        return _auth_error(e)
+
+    user = await AsyncUser.find_by_id(ObjectId(user_id))
+    if not user:
+        return FlaskJSONResponse({"error": "User not found"}, 404)
+
+    return FlaskJSONResponse({
+        "_id": str(user._id),
+        "userId": user.user_id,
+        "name": user.name,
+        "email": user.email,
+        "age": user.age,
+        "gender": user.gender
+    })
+
+
+async def get_today_intake_logs(request):
+    """Get user's intake logs for today."""
+    try:
+        user_id = ObjectId(await _jwt_identity(request))
+        today = datetime.now().strftime("%Y-%m-%d")
+        logs = await AsyncIntakeLog.find_by_date_range(user_id, today, today)
+        return FlaskJSONResponse([log.to_dict() for log in logs])
+    except AuthError as e:
+        return _auth_error(e)
+    except ValueError as e:
+        return FlaskJSONResponse({"error": str(e)}, 400)
+    except Exception as e:
+        return FlaskJSONResponse({"error": f"Error retrieving today's intake logs: {str(e)}"}, 500)
+
+
+async def get_logs_for_date(request):
+    """Get all symptom logs for a specific date"""
+    date = request.path_params['date']
+    try:
+        user_id = await _jwt_identity(request)
+
+        # Validate date format (YYYY-MM-DD)
+        try:
+            datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            return FlaskJSONResponse({"error": "Invalid date format. Use YYYY-MM-DD"}, 400)
+
+        logs = await AsyncSymptomLog.find_by_date(user_id, date)
+        # A stale catalog is reloaded with pymongo, so keep that off the event loop
+        symptoms = await run_in_threadpool(SymptomLog.get_symptom_details)
+
+        # Enrich logs with symptom details
+        enriched_logs = []
+        for log in logs:
+            log_dict = log.to_dict()
+            symptom_id = log_dict['symptom_id']
+            if symptom_id in symptoms:
+                symptom_info = symptoms[symptom_id]
+                enriched_logs.append({
+                    "log_id": log_dict['_id'],
+                    "symptom_id": symptom_id,
+                    "symptom_name": symptom_info['name'],
+                    "symptom_icon": symptom_info['icon'],
+                    "category_name": symptom_info['categoryName'],
+                    "category_icon": symptom_info['categoryIcon'],
+                    "severity": log_dict['severity'],
+                    "notes": log_dict['notes'],
+                    "date": log_dict['date']
+                })
+
+        return FlaskJSONResponse({"logs": enriched_logs})
+    except AuthError as e:
+        return _auth_error(e)
+    except ValueError as e:
+        return FlaskJSONResponse({"error": str(e)}, 400)
+    except Exception as e:
+        logger.error(f"Error getting logs for date: {str(e)}")
+        return FlaskJSONResponse({"error": str(e)}, 500)
+
+
+async def get_or_create_user_tracker_supplement_list(request):
+    """Find the TrackerSupplementList for the current user. If not found, create a new one."""
+    try:
+        user_id = ObjectId(await _jwt_identity(request))
+        tracker_supplement_list = await AsyncTrackerSupplementList.find_by_user_id(user_id)
+        if not tracker_supplement_list:
+            tracker_supplement_list = await AsyncTrackerSupplementList.create_for_user(user_id)
+        return FlaskJSONResponse(tracker_supplement_list.to_dict())
+    except AuthError as e:
+        return _auth_error(e)
+    except Exception as e:
+        return FlaskJSONResponse({"error": str(e)}, 500)
+
+
+async def get_user_report(request):
+    """Get a report for a specific user"""
+    try:
+        user_id = await _check_user_access(request)
+        params = _report_params(request.query_params)
+
+        # Sections are cached per day and data version; any write by the user invalidates them
+        version = await AsyncReportCache.get_version(user_id)
+        results = {name: await AsyncReportCache.get(user_id, params['cache_range'], params['cache_keys'][name], version)
+                   for name in params['sections']}
+        missing = [name for name in params['sections'] if results[name] is None]
+        timings = [f'{name};desc="cached";dur=0' for name in params['sections'] if results[name] is not None]
+
+        if missing:
+            # Await only the data the missing sections need, concurrently
+            started = time.perf_counter()
+            fetches = {}
+            if any(REPORT_SECTIONS[name][0] for name in missing):
+                fetches['intake'] = AsyncIntakeLog.get_report_aggregates(user_id, params['start'], params['end'])
+            if any(REPORT_SECTIONS[name][1] for name in missing):
+                fetches['symptoms'] = AsyncSymptomLog.get_report_aggregates(user_id, params['start'], params['end'])
+            fetched = dict(zip(fetches, await gather_all(*fetches.values())))
+            timings.append(f"fetch;dur={(time.perf_counter() - started) * 1000:.1f}")
+
+            # The sections are CPU-bound: compute them off the event loop
+            computed, section_timings = await run_in_threadpool(
+                lambda: _report_sections(
+                    user_id, ReportFrame.from_aggregates(fetched.get('intake'), fetched.get('symptoms', ())),
+                    missing, params
+                )
+            )
+            for name in missing:
+                results[name] = computed[name]
+                await AsyncReportCache.set(user_id, params['cache_range'], params['cache_keys'][name], version,
+                                           results[name])
+            timings.extend(section_timings)
+
+        return FlaskJSONResponse(_report_data(user_id, params, results), 200, {'Server-Timing': ', '.join(timings)})
+    except AuthError as e:
+        return _auth_error(e)
+    except FetchTimeout as e:
+        return FlaskJSONResponse({"error": "Report data took too long to load", "details": str(e)}, 504)
+    except ValueError as e:
+        return FlaskJSONResponse({"error": str(e)}, 400)
+    except Exception as e:
+        return FlaskJSONResponse({"error": "Failed to generate report", "details": str(e)}, 500)
+
+
+async def get_user_streaks(request):
+    """Get streak information for a specific user"""
+    try:
+        user_id = await _check_user_access(request)
+
+        async def compute():
+            return (await AsyncStreakState.find_by_user_id(user_id)).to_report()
+
+        streaks = await AsyncReportCache.get_or_compute(
+            user_id, f"lifetime:{datetime.now().date().isoformat()}", 'streakState',
+            await AsyncReportCache.get_version(user_id), compute
+        )
+        return FlaskJSONResponse({
+            "userId": user_id,
+            "streaks": streaks
+        })
+    except AuthError as e:
+        return _auth_error(e)
+    except ValueError as e:
+        return FlaskJSONResponse({"error": str(e)}, 400)
+    except Exception as e:
+        return FlaskJSONResponse({"error": "Failed to calculate streaks", "details": str(e)}, 500)
+
+
+async def get_user_progress(request):
+    """Get progress information for a specific user"""
+    try:
+        user_id = await _check_user_access(request)
+        end_date = datetime.now()
+        start_str = (end_date - timedelta(days=365)).date().isoformat()
+        end_str = end_date.date().isoformat()
+
+        async def compute():
+            rollups = await AsyncDailyRollup.find_by_date_range(user_id, start_str, end_str)
+            return await run_in_threadpool(_calculate_progress, user_id, _rollup_intake_logs(rollups))
+
+        progress = await AsyncReportCache.get_or_compute(
+            user_id, f"yearly:{end_str}", 'rollupProgress', await AsyncReportCache.get_version(user_id), compute
+        )
+        return FlaskJSONResponse({
+            "userId": user_id,
+            "progress": progress
+        })
+    except AuthError as e:
+        return _auth_error(e)
+    except ValueError as e:
+        return FlaskJSONResponse({"error": str(e)}, 400)
+    except Exception as e:
+        return FlaskJSONResponse({"error": "Failed to calculate progress", "details": str(e)}, 500)
+
+
+routes = [
+    Route('/api/auth/me', get_current_user, methods=['GET']),
+    Route('/api/intake_logs/today', get_today_intake_logs, methods=['GET']),
+    Route('/api/symptom-logs/date/{date}', get_logs_for_date, methods=['GET']),
+    Route('/api/tracker_supplements_list/', get_or_create_user_tracker_supplement_list, methods=['GET']),
+    Route('/api/reports/streaks/{user_id}', get_user_streaks, methods=['GET']),
+    Route('/api/reports/progress/{user_id}', get_user_progress, methods=['GET']),
+    Route('/api/reports/{user_id}', get_user_report, methods=['GET']),
+]
@@ -46,14 +46,25 @@ token required
 GET http://10.228.244.25:5001/api/intake_logs/today - get today's intake logs
 token required
 
+GET http://10.228.244.25:5001/api/intake_logs/series?from=2024-04-19&to=2025-04-19&points=200&metric=dosage
+- daily dosage and count of each supplement, downsampled to at most `points` days
+token required
+
+GET http://10.228.244.25:5001/api/intake_logs/calendar?year=2025
+- days with intake, with active symptoms and per supplement, as counts and base64 day bitmaps
+token required
+
 
 '''
 from flask import Blueprint, request, jsonify, g, send_file
 from app.models.intake_log import IntakeLog
+from app.models.daily_rollup import DailyRollup
+from app.models.presence_bitmap import PresenceBitmap
+from app.analytics.series import parse_series_args, rollup_series
 from datetime import datetime, timedelta
 from bson.objectid import ObjectId
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.utils.pdf_utils import generate_supplement_pdf
+from app.utils.pagination import parse_pagination_args, next_cursor
 
 
 bp = Blueprint('intake_logs', __name__, url_prefix='/api/intake_logs')
@@ -96,6 +107,8 @@ def create_intake_log():
 def get_intake_logs():
     """
     Get user's intake logs with optional filters.
+    Pass `limit` (and the `after` cursor from the previous page's
+    X-Next-Cursor header) to page through long histories.
     """
     try:
         user_id = get_jwt_identity()
@@ -103,19 +116,24 @@ def get_intake_logs():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         supplement_id = request.args.get('supplement_id')
+        page = parse_pagination_args(request.args)
         
         # Apply filters if provided
         if start_date and end_date:
-            logs = IntakeLog.find_by_date_range(user_id, start_date, end_date)
+            logs = IntakeLog.find_by_date_range(user_id, start_date, end_date, **page)
         elif supplement_id:
-            logs = IntakeLog.find_by_supplement_id(user_id, supplement_id)
+            logs = IntakeLog.find_by_supplement_id(user_id, supplement_id, **page)
         else:
             # Default to last 7 days if no filters
             today = datetime.now().strftime("%Y-%m-%d")
             week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-            logs = IntakeLog.find_by_date_range(user_id, week_ago, today)
+            logs = IntakeLog.find_by_date_range(user_id, week_ago, today, **page)
         
-        return jsonify([log.to_dict() for log in logs]), 200
+        headers = {}
+        cursor = next_cursor(logs, page, 'intake_date')
+        if cursor:
+            headers['X-Next-Cursor'] = cursor
+        return jsonify([log.to_dict() for log in logs]), 200, headers
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
@@ -163,6 +181,70 @@ def get_intake_summary():
     except Exception as e:
         return jsonify({"error": f"Error retrieving intake summary: {str(e)}"}), 500
 
+@bp.route('/series', methods=['GET'])
+@jwt_required()
+def get_intake_series():
+    """
+    Get the daily intake of each supplement over a date range (the last year by default) for charts.
+    Series longer than `points` days are downsampled, preserving the shape of the `metric`
+    (dosage or count).
+    """
+    try:
+        user_id = get_jwt_identity()
+        start_date, end_date, points = parse_series_args(request.args)
+        metric = request.args.get('metric', 'dosage')
+        if metric not in ('dosage', 'count'):
+            return jsonify({"error": "metric must be 'dosage' or 'count'"}), 400
+
+        rollups = DailyRollup.find_by_date_range(user_id, start_date, end_date)
+        series = rollup_series(rollups, 'intake', lambda entry: entry.get(metric) or 0, points)
+        return jsonify({
+            "from": start_date,
+            "to": end_date,
+            "metric": metric,
+            "series": [
+                {
+                    "supplement_id": supplement_id,
+                    "name": entries[-1].get('name'),
+                    "unit": entries[-1].get('unit'),
+                    "days": logged_days,
+                    "points": [
+                        {"date": day, "dosage": entry.get('dosage', 0), "count": entry.get('count', 0)}
+                        for day, entry in zip(days, entries)
+                    ]
+                }
+                for supplement_id, (days, entries, logged_days) in series.items()
+            ]
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error retrieving intake series: {str(e)}"}), 500
+
+@bp.route('/calendar', methods=['GET'])
+@jwt_required()
+def get_intake_calendar():
+    """
+    Get a year of the user's calendar (the current year by default): for intake, active
+    symptoms and each tracked supplement, the number of days logged and a base64 bitmap
+    of 46 bytes in which bit i (little-endian) is set when day i of the year was logged.
+    """
+    try:
+        user_id = get_jwt_identity()
+        year = request.args.get('year', str(datetime.now().year))
+        try:
+            year = int(year)
+        except ValueError:
+            return jsonify({"error": "year must be an integer"}), 400
+        if year < 1970 or year > 9999:
+            return jsonify({"error": "year must be between 1970 and 9999"}), 400
+
+        return jsonify(PresenceBitmap.calendar(user_id, year)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error retrieving intake calendar: {str(e)}"}), 500
+
 @bp.route('/<log_id>', methods=['GET'])
 @jwt_required()
 def get_intake_log(log_id):
@@ -266,6 +348,8 @@ def download_user_intake_logs_pdf():
 
         wrapped_logs = [LogWrapper(log.to_dict()) for log in logs]
 
+        # reportlab is only imported by the first export
+        from app.utils.pdf_utils import generate_supplement_pdf
         pdf_buffer = generate_supplement_pdf(wrapped_logs)
         return send_file(pdf_buffer,
                          as_attachment=True,
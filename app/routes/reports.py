@@ -4,65 +4,76 @@ from app.models.user import User
 from app.models.intake_log import IntakeLog
 from app.models.symptom_log import SymptomLog
 from app.models.supplement import Supplement
-from app.middleware.auth import check_user_access
+from app.models.daily_rollup import DailyRollup
+from app.models.streak_state import StreakState
+from app.models.report_cache import ReportCache
+from app.middleware.auth import admin_required, check_user_access
+from app.analytics import ReportFrame, engine, correlation
+from app.db.constants import REPORT_DETAIL_LIMIT
+from app.utils.concurrency import fetch_all, compute_pool, FetchTimeout
+import numpy as np
 from datetime import datetime, timedelta
+import time
 from bson.objectid import ObjectId
 
 # Create the blueprint
 bp = Blueprint('reports', __name__, url_prefix='/api/reports')
 
+# Correlation defaults: symptoms up to CORRELATION_LAG_DAYS after an intake day count as
+# occurrences, and a pair needs CORRELATION_MIN_OCCURRENCES of them to be reported
+CORRELATION_LAG_DAYS = 2
+CORRELATION_MIN_OCCURRENCES = 3
+MAX_CORRELATION_LAG_DAYS = 30
+
+# Report sections and the data they need: name -> (intake logs, symptom logs)
+REPORT_SECTIONS = {
+    'intakeSummary': (True, False),
+    'symptomSummary': (False, True),
+    'correlations': (True, True),
+    'streaks': (True, False),
+    'progress': (True, False),
+    'recommendations': (True, True)
+}
+# Sections returned when the request doesn't list any (`sections=all` returns every section)
+DEFAULT_REPORT_SECTIONS = ['intakeSummary', 'symptomSummary', 'streaks']
+
 @bp.route('/<user_id>', methods=['GET'])
 @jwt_required()
 @check_user_access
 def get_user_report(user_id):
     """Get a report for a specific user"""
     try:
-        # Get report type from query parameters
-        report_type = request.args.get('range', 'weekly').lower()
-        
-        # Validate report type
-        valid_types = ['daily', 'weekly', 'monthly', 'yearly']
-        if report_type not in valid_types:
-            return jsonify({"error": f"Invalid report type. Must be one of: {', '.join(valid_types)}"}), 400
-        
-        # Get date range for report
-        end_date = datetime.now()
-        
-        if report_type == 'daily':
-            start_date = end_date - timedelta(days=1)
-        elif report_type == 'weekly':
-            start_date = end_date - timedelta(weeks=1)
-        elif report_type == 'monthly':
-            start_date = end_date - timedelta(days=30)
-        elif report_type == 'yearly':
-            start_date = end_date - timedelta(days=365)
-        
-        # Format dates for MongoDB query
-        start_str = start_date.isoformat()
-        end_str = end_date.isoformat()
-        
-        # Get intake logs for time period
-        intake_logs = IntakeLog.find_by_date_range(user_id, start_str, end_str)
-        
-        # Get symptom logs for time period
-        symptom_logs = SymptomLog.find_by_date_range(user_id, start_str, end_str)
-        
-        # Generate report data
-        report_data = {
-            "userId": user_id,
-            "reportType": report_type,
-            "startDate": start_str,
-            "endDate": end_str,
-            "intakeSummary": _generate_intake_summary(intake_logs),
-            "symptomSummary": _generate_symptom_summary(symptom_logs),
-            "correlations": _analyze_correlations(intake_logs, symptom_logs),
-            "streaks": _calculate_streaks(user_id, intake_logs),
-            "progress": _calculate_progress(user_id, intake_logs),
-            "recommendations": _generate_recommendations(user_id, intake_logs, symptom_logs)
-        }
-        
-        # Return report
-        return jsonify(report_data), 200
+        params = _report_params(request.args)
+        
+        # Sections are cached per day and data version; any write by the user invalidates them
+        version = ReportCache.get_version(user_id)
+        results = {name: ReportCache.get(user_id, params['cache_range'], params['cache_keys'][name], version)
+                   for name in params['sections']}
+        missing = [name for name in params['sections'] if results[name] is None]
+        timings = [f'{name};desc="cached";dur=0' for name in params['sections'] if results[name] is not None]
+        
+        if missing:
+            # Fetch only the data the missing sections need, concurrently
+            started = time.perf_counter()
+            fetches = {}
+            if any(REPORT_SECTIONS[name][0] for name in missing):
+                fetches['intake'] = lambda: IntakeLog.get_report_aggregates(user_id, params['start'], params['end'])
+            if any(REPORT_SECTIONS[name][1] for name in missing):
+                fetches['symptoms'] = lambda: SymptomLog.get_report_aggregates(user_id, params['start'], params['end'])
+            fetched = dict(zip(fetches, fetch_all(*fetches.values())))
+            frame = ReportFrame.from_aggregates(fetched.get('intake'), fetched.get('symptoms', ()))
+            timings.append(f"fetch;dur={(time.perf_counter() - started) * 1000:.1f}")
+            
+            computed, section_timings = _report_sections(user_id, frame, missing, params)
+            for name in missing:
+                results[name] = computed[name]
+                ReportCache.set(user_id, params['cache_range'], params['cache_keys'][name], version, results[name])
+            timings.extend(section_timings)
+        
+        # Return report, with the time spent on each section
+        return jsonify(_report_data(user_id, params, results)), 200, {'Server-Timing': ', '.join(timings)}
+    except FetchTimeout as e:
+        return jsonify({"error": "Report data took too long to load", "details": str(e)}), 504
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
@@ -74,19 +85,12 @@ def get_user_report(user_id):
 def get_user_streaks(user_id):
     """Get streak information for a specific user"""
     try:
-        # Get intake logs for the user (limit to last 365 days for performance)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=365)
-        
-        # Format dates for MongoDB query
-        start_str = start_date.isoformat()
-        end_str = end_date.isoformat()
-        
-        # Get intake logs
-        intake_logs = IntakeLog.find_by_date_range(user_id, start_str, end_str)
-        
-        # Calculate streaks
-        streaks = _calculate_streaks(user_id, intake_logs)
+        # Streaks are maintained on every intake write, so this is a single lookup
+        streaks = ReportCache.get_or_compute(
+            user_id, f"lifetime:{datetime.now().date().isoformat()}", 'streakState',
+            ReportCache.get_version(user_id),
+            lambda: StreakState.find_by_user_id(user_id).to_report()
+        )
         
         # Return streaks
         return jsonify({
@@ -104,19 +108,21 @@ def get_user_streaks(user_id):
 def get_user_progress(user_id):
     """Get progress information for a specific user"""
     try:
-        # Get intake logs for the user (limit to last 365 days for performance)
+        # Get daily intake totals for the user (limit to last 365 days for performance)
         end_date = datetime.now()
         start_date = end_date - timedelta(days=365)
         
         # Format dates for MongoDB query
-        start_str = start_date.isoformat()
-        end_str = end_date.isoformat()
+        start_str = start_date.date().isoformat()
+        end_str = end_date.date().isoformat()
         
-        # Get intake logs
-        intake_logs = IntakeLog.find_by_date_range(user_id, start_str, end_str)
-        
-        # Calculate progress
-        progress = _calculate_progress(user_id, intake_logs)
+        # Calculate progress from one rollup per day instead of every raw intake log
+        progress = ReportCache.get_or_compute(
+            user_id, f"yearly:{end_str}", 'rollupProgress', ReportCache.get_version(user_id),
+            lambda: _calculate_progress(
+                user_id, _rollup_intake_logs(DailyRollup.find_by_date_range(user_id, start_str, end_str))
+            )
+        )
         
         # Return progress
         return jsonify({
@@ -128,387 +134,386 @@ def get_user_progress(user_id):
     except Exception as e:
         return jsonify({"error": "Failed to calculate progress", "details": str(e)}), 500
 
+@bp.route('/cache/stats', methods=['GET'])
+@admin_required
+def get_report_cache_stats():
+    """Get hit/miss counters of this worker's report cache"""
+    return jsonify(ReportCache.stats()), 200
+
 # Helper functions for report generation
 
+def _int_arg(name, default, minimum, maximum=None, args=None):
+    """Read an optional integer query parameter, raising ValueError when it is out of range"""
+    value = (request.args if args is None else args).get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        bounds = f"between {minimum} and {maximum}" if maximum is not None else f"at least {minimum}"
+        raise ValueError(f"{name} must be {bounds}")
+    return value
+
+def _sections_arg(args=None):
+    """Read the comma-separated `sections` query parameter, raising ValueError for unknown sections"""
+    value = (request.args if args is None else args).get('sections')
+    if not value:
+        return list(DEFAULT_REPORT_SECTIONS)
+    if value == 'all':
+        return list(REPORT_SECTIONS)
+    sections = []
+    for name in value.split(','):
+        name = name.strip()
+        if name not in REPORT_SECTIONS:
+            raise ValueError(f"Invalid report section '{name}'. Must be one of: all, {', '.join(REPORT_SECTIONS)}")
+        if name not in sections:
+            sections.append(name)
+    return sections
+
+def _report_params(args):
+    """
+    Validate a report request's query parameters (shared with the async path in app/routes/async_reads.py).
+    Returns:
+        dict: report_type, lag_days, min_occurrences, the requested sections with their
+              cache_keys, the cache_range and the ISO start and end of the report.
+    Raises:
+        ValueError: If a parameter is invalid.
+    """
+    # Get report type from query parameters
+    report_type = args.get('range', 'weekly').lower()
+    
+    # Validate report type
+    valid_types = ['daily', 'weekly', 'monthly', 'yearly']
+    if report_type not in valid_types:
+        raise ValueError(f"Invalid report type. Must be one of: {', '.join(valid_types)}")
+    
+    # Correlation window and threshold
+    lag_days = _int_arg('lag_days', CORRELATION_LAG_DAYS, 0, MAX_CORRELATION_LAG_DAYS, args)
+    min_occurrences = _int_arg('min_occurrences', CORRELATION_MIN_OCCURRENCES, 1, args=args)
+    
+    # Get date range for report
+    end_date = datetime.now()
+    start_date = _report_start(report_type, end_date)
+    
+    # Requested sections; the cache key of correlations includes their parameters
+    sections = _sections_arg(args)
+    return {
+        'report_type': report_type,
+        'lag_days': lag_days,
+        'min_occurrences': min_occurrences,
+        'sections': sections,
+        'cache_keys': _section_cache_keys(sections, lag_days, min_occurrences),
+        'cache_range': f"{report_type}:{end_date.date().isoformat()}",
+        # Format dates for MongoDB query
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat()
+    }
+
+def _report_sections(user_id, frame, names, params):
+    """Compute the named report sections from a user's frame; returns ({name: section}, Server-Timing entries)"""
+    builders = _section_builders(user_id, frame, params['lag_days'], params['min_occurrences'])
+    sections, timings = {}, []
+    for name in names:
+        started = time.perf_counter()
+        sections[name] = builders[name]()
+        timings.append(f"{name};dur={(time.perf_counter() - started) * 1000:.1f}")
+    return sections, timings
+
+def _report_data(user_id, params, sections):
+    """The report response body"""
+    return {
+        "userId": user_id,
+        "reportType": params['report_type'],
+        "startDate": params['start'],
+        "endDate": params['end'],
+        **sections
+    }
+
+def _report_start(report_type, end_date):
+    """Start of the date range covered by a report of the given type ending at end_date"""
+    if report_type == 'daily':
+        return end_date - timedelta(days=1)
+    elif report_type == 'weekly':
+        return end_date - timedelta(weeks=1)
+    elif report_type == 'monthly':
+        return end_date - timedelta(days=30)
+    elif report_type == 'yearly':
+        return end_date - timedelta(days=365)
+    raise ValueError(f"Invalid report type: {report_type}")
+
+def _section_cache_keys(sections, lag_days=CORRELATION_LAG_DAYS, min_occurrences=CORRELATION_MIN_OCCURRENCES):
+    """ReportCache section keys; the correlations key includes their parameters"""
+    cache_keys = {name: name for name in sections}
+    if 'correlations' in cache_keys:
+        cache_keys['correlations'] = f"correlations:{lag_days}:{min_occurrences}"
+    return cache_keys
+
+def _section_builders(user_id, frame, lag_days=CORRELATION_LAG_DAYS, min_occurrences=CORRELATION_MIN_OCCURRENCES):
+    """Functions computing each report section from a user's frame"""
+    return {
+        'intakeSummary': lambda: _generate_intake_summary(frame),
+        'symptomSummary': lambda: _generate_symptom_summary(frame),
+        'correlations': lambda: _analyze_correlations(frame, lag_days=lag_days,
+                                                      min_occurrences=min_occurrences),
+        'streaks': lambda: _calculate_streaks(user_id, frame),
+        'progress': lambda: _calculate_progress(user_id, frame),
+        'recommendations': lambda: _generate_recommendations(user_id, frame)
+    }
+
+class _RollupIntake:
+    """A supplement's intake total for one day, shaped like an intake log for the helpers below"""
+    def __init__(self, day, supplement_id, totals):
+        self.supplement_id = supplement_id
+        self.supplement_name = totals.get('name') or 'Unknown'
+        self.timestamp = day
+        self.count = totals.get('count', 1)
+        self.dosage = None
+        self.timing = None
+        self.notes = None
+
+def _rollup_intake_logs(rollups):
+    """Expand DailyRollup documents into one intake entry per day and supplement"""
+    return [
+        _RollupIntake(rollup.date, supp_id, totals)
+        for rollup in rollups
+        for supp_id, totals in rollup.intake.items()
+        if totals.get('count', 0) > 0
+    ]
+
 def _generate_intake_summary(intake_logs):
     """Generate a summary of intake logs"""
-    # Group intake logs by supplement
-    supplements = {}
-    for log in intake_logs:
-        supp_id = log.supplement_id
-        if supp_id not in supplements:
-            supplements[supp_id] = {
-                'supplementId': supp_id,
-                'name': log.supplement_name if hasattr(log, 'supplement_name') else 'Unknown',
-                'count': 0,
-                'dates': [],
-                'dosages': [],
-                'timings': [],
-                'notes': []
-            }
-        
-        supplements[supp_id]['count'] += 1
-        supplements[supp_id]['dates'].append(log.timestamp)
+    frame = ReportFrame.of(intake_logs)
+    summary = []
+    
+    # One entry per supplement
+    for index, supp_id in enumerate(frame.supplements):
+        stats = frame.supplement_stats[index]
+        supplement = {
+            'supplementId': supp_id,
+            'name': frame.supplement_names[index],
+            'count': stats['count'],
+            'dates': stats['dates'][-REPORT_DETAIL_LIMIT:],
+            'dosages': stats['dosages'][-REPORT_DETAIL_LIMIT:],
+            'timings': stats['timings'][-REPORT_DETAIL_LIMIT:],
+            'notes': stats['notes'][-REPORT_DETAIL_LIMIT:],
+            'uniqueDays': len(frame.supplement_days[index])
+        }
         
-        if hasattr(log, 'dosage') and log.dosage:
-            supplements[supp_id]['dosages'].append(log.dosage)
-            
-        if hasattr(log, 'timing') and log.timing:
-            supplements[supp_id]['timings'].append(log.timing)
-            
-        if hasattr(log, 'notes') and log.notes:
-            supplements[supp_id]['notes'].append(log.notes)
-    
-    # Calculate total days and consistency for each supplement
-    for supp_id in supplements:
-        # Get unique dates
-        unique_dates = set()
-        for date_str in supplements[supp_id]['dates']:
-            try:
-                date = datetime.fromisoformat(date_str)
-                unique_dates.add(date.date())
-            except (ValueError, TypeError):
-                pass
-                
-        supplements[supp_id]['uniqueDays'] = len(unique_dates)
+        # Most common dosage and timing
+        if stats['dosages']:
+            supplement['mostCommonDosage'] = stats['most_common_dosage']
+        if stats['timings']:
+            supplement['mostCommonTiming'] = stats['most_common_timing']
         
-        # Calculate most common dosage
-        dosages = supplements[supp_id]['dosages']
-        if dosages:
-            # Count occurrences of each dosage
-            dosage_counts = {}
-            for dosage in dosages:
-                dosage_counts[dosage] = dosage_counts.get(dosage, 0) + 1
-                
-            # Find most common
-            most_common_dosage = max(dosage_counts.items(), key=lambda x: x[1])[0]
-            supplements[supp_id]['mostCommonDosage'] = most_common_dosage
-            
-        # Calculate most common timing
-        timings = supplements[supp_id]['timings']
-        if timings:
-            # Count occurrences of each timing
-            timing_counts = {}
-            for timing in timings:
-                timing_counts[timing] = timing_counts.get(timing, 0) + 1
-                
-            # Find most common
-            most_common_timing = max(timing_counts.items(), key=lambda x: x[1])[0]
-            supplements[supp_id]['mostCommonTiming'] = most_common_timing
-    
-    return list(supplements.values())
+        summary.append(supplement)
+    
+    return summary
 
 def _generate_symptom_summary(symptom_logs):
     """Generate a summary of symptom logs"""
-    # Group symptom logs by type
-    symptoms = {}
-    for log in symptom_logs:
-        symptom_type = log.symptom_type
-        if symptom_type not in symptoms:
-            symptoms[symptom_type] = {
-                'symptomType': symptom_type,
-                'count': 0,
-                'dates': [],
-                'severities': [],
-                'notes': []
-            }
+    frame = ReportFrame.of((), symptom_logs)
+    summary = []
+    
+    # One entry per symptom type
+    for index, symptom_type in enumerate(frame.symptom_types):
+        rows = frame.symptom_rows[index]
+        # Per-log values are listed for the most recent logs only
+        recent = rows[-REPORT_DETAIL_LIMIT:]
+        symptom = {
+            'symptomType': symptom_type,
+            'count': sum(frame.symptom_count[row] for row in rows),
+            'dates': [frame.symptom_timestamp[row] for row in recent],
+            'severities': [frame.symptom_severity[row] for row in recent if frame.symptom_severity[row]],
+            'notes': [frame.symptom_notes[row] for row in recent if frame.symptom_notes[row]]
+        }
         
-        symptoms[symptom_type]['count'] += 1
-        symptoms[symptom_type]['dates'].append(log.timestamp)
+        # Average severity and trend from the ordinal severity codes ('mild' -> 1, ...)
+        trend = frame.symptom_trends[index]
+        if trend['averageSeverity'] is not None:
+            symptom['averageSeverity'] = trend['averageSeverity']
+        if trend['trend']:
+            symptom['trend'] = trend['trend']
+            symptom['slopePerWeek'] = trend['slopePerWeek']
         
-        if hasattr(log, 'severity') and log.severity:
-            symptoms[symptom_type]['severities'].append(log.severity)
-            
-        if hasattr(log, 'notes') and log.notes:
-            symptoms[symptom_type]['notes'].append(log.notes)
-    
-    # Calculate averages and trends for each symptom
-    for symptom_type in symptoms:
-        # Calculate average severity
-        severities = symptoms[symptom_type]['severities']
-        if severities and all(isinstance(s, (int, float)) for s in severities):
-            avg_severity = sum(severities) / len(severities)
-            symptoms[symptom_type]['averageSeverity'] = round(avg_severity, 1)
-            
-        # Sort dates for trend analysis
-        dates = []
-        for date_str in symptoms[symptom_type]['dates']:
-            try:
-                date = datetime.fromisoformat(date_str)
-                dates.append(date)
-            except (ValueError, TypeError):
-                pass
-                
-        # Sort dates
-        dates.sort()
-        
-        # If we have severities that match dates, calculate trend
-        if len(dates) >= 3 and len(dates) == len(severities):
-            # Check if severity is increasing, decreasing, or stable
-            first_half = severities[:len(severities)//2]
-            second_half = severities[len(severities)//2:]
-            
-            avg_first = sum(first_half) / len(first_half)
-            avg_second = sum(second_half) / len(second_half)
-            
-            if avg_second > avg_first * 1.1:  # 10% increase
-                symptoms[symptom_type]['trend'] = 'increasing'
-            elif avg_second < avg_first * 0.9:  # 10% decrease
-                symptoms[symptom_type]['trend'] = 'decreasing'
-            else:
-                symptoms[symptom_type]['trend'] = 'stable'
-    
-    return list(symptoms.values())
+        summary.append(symptom)
+    
+    return summary
 
-def _analyze_correlations(intake_logs, symptom_logs):
+def _analyze_correlations(intake_logs, symptom_logs=(), lag_days=CORRELATION_LAG_DAYS,
+                          min_occurrences=CORRELATION_MIN_OCCURRENCES):
     """Analyze correlations between intake and symptoms"""
     # This is a simplified analysis
     # In a real implementation, this would use more sophisticated statistical methods
+    frame = ReportFrame.of(intake_logs, symptom_logs)
     
-    correlations = []
-    
-    # Group intake logs by supplement and day
-    supplement_days = {}
-    for log in intake_logs:
-        supp_id = log.supplement_id
-        try:
-            date = datetime.fromisoformat(log.timestamp).date()
-            if supp_id not in supplement_days:
-                supplement_days[supp_id] = set()
-            supplement_days[supp_id].add(date)
-        except (ValueError, TypeError, AttributeError):
-            pass
-    
-    # Group symptom logs by type and day
+    # Symptom occurrences by type, sorted by day (log order within a day)
     symptom_days = {}
-    for log in symptom_logs:
-        symptom_type = log.symptom_type
-        try:
-            date = datetime.fromisoformat(log.timestamp).date()
-            if symptom_type not in symptom_days:
-                symptom_days[symptom_type] = []
-            symptom_days[symptom_type].append((date, log.severity if hasattr(log, 'severity') else None))
-        except (ValueError, TypeError, AttributeError):
-            pass
-    
-    # Check for correlations
-    for supp_id, supp_dates in supplement_days.items():
-        for symptom_type, symptom_data in symptom_days.items():
-            # Check for symptom occurrences within 2 days of supplement intake
-            potential_correlations = []
-            
-            for date in supp_dates:
-                # Check for symptoms on the same day or within 2 days after
-                for symptom_date, severity in symptom_data:
-                    if date <= symptom_date <= date + timedelta(days=2):
-                        potential_correlations.append({
-                            'intakeDate': date.isoformat(),
-                            'symptomDate': symptom_date.isoformat(),
-                            'daysDifference': (symptom_date - date).days,
-                            'severity': severity
-                        })
+    for index, symptom_type in enumerate(frame.symptom_types):
+        rows = sorted(
+            (row for row in frame.symptom_rows[index] if frame.symptom_day[row] is not None),
+            key=lambda row: frame.symptom_day[row]
+        )
+        if rows:
+            days = np.array([frame.symptom_day[row] for row in rows], dtype=np.int64)
+            # Logs before each row, so occurrences count logs when rows are grouped per day
+            logs = np.concatenate(([0], np.cumsum([frame.symptom_count[row] for row in rows])))
+            symptom_days[symptom_type] = (days, engine.iso_days(days),
+                                          [frame.symptom_severity[row] for row in rows], logs)
+    
+    # Join each supplement's intake days with the symptom days falling in [day, day + lag_days]
+    significant = []
+    for index, supp_id in enumerate(frame.supplements):
+        supp_days = np.array(frame.supplement_days[index], dtype=np.int64)
+        if not len(supp_days):
+            continue
+        supp_dates = engine.iso_days(supp_days)
+        for symptom_type, (days, dates, severities, logs) in symptom_days.items():
+            firsts = np.searchsorted(days, supp_days, side='left')
+            lasts = np.searchsorted(days, supp_days + lag_days, side='right')
+            occurrences = int((logs[lasts] - logs[firsts]).sum())
             
             # If we have enough potential correlations, consider it significant
-            if len(potential_correlations) >= 3:
-                # Get supplement info
-                supplement = Supplement.find_by_id(supp_id) if supp_id else None
-                supplement_name = supplement.name if supplement else 'Unknown Supplement'
-                
-                correlation = {
-                    'supplementId': supp_id,
-                    'supplementName': supplement_name,
-                    'symptomType': symptom_type,
-                    'occurrences': len(potential_correlations),
-                    'details': potential_correlations
-                }
-                
-                correlations.append(correlation)
-    
-    return correlations
+            if occurrences < min_occurrences:
+                continue
+            
+            # Only the most recent occurrences are listed, collected from the last intake day back
+            potential_correlations = []
+            for intake_index in range(len(supp_days) - 1, -1, -1):
+                day = int(supp_days[intake_index])
+                for position in range(lasts[intake_index] - 1, firsts[intake_index] - 1, -1):
+                    if len(potential_correlations) == REPORT_DETAIL_LIMIT:
+                        break
+                    potential_correlations.append({
+                        'intakeDate': supp_dates[intake_index],
+                        'symptomDate': dates[position],
+                        'daysDifference': int(days[position]) - day,
+                        'severity': severities[position]
+                    })
+            potential_correlations.reverse()
+            significant.append((index, symptom_type, occurrences, potential_correlations))
+    
+    # Resolve supplement names in one lookup, falling back to the name on the logs
+    names = Supplement.find_names_by_ids({frame.supplements[index] for index, _, _, _ in significant})
+    statistics = _correlation_statistics(frame, lag_days) if significant else None
+    symptom_index = {symptom_type: index for index, symptom_type in enumerate(frame.symptom_types)}
+    
+    return [
+        {
+            'supplementId': frame.supplements[index],
+            'supplementName': names.get(str(frame.supplements[index]))
+                or frame.supplement_names[index] or 'Unknown Supplement',
+            'symptomType': symptom_type,
+            'occurrences': occurrences,
+            'details': potential_correlations,
+            'statistics': statistics(index, symptom_index[symptom_type])
+        }
+        for index, symptom_type, occurrences, potential_correlations in significant
+    ]
+
+def _correlation_statistics(frame, lag_days):
+    """
+    Day-level association statistics for every (supplement, symptom) pair of a frame.
+    A day counts as exposed when the supplement was taken that day or up to lag_days days
+    before, and as a symptom day when the symptom was logged with a severity above 'none'.
+    Returns:
+        function: (supplement index, symptom index) -> statistics dict for the report.
+    """
+    intake, severity = correlation.day_matrices(frame)
+    exposure = correlation.lagged_exposure(intake, lag_days)
+    pairs = correlation.pair_statistics(exposure, severity)
+    p_values, permutations = correlation.permutation_p_values(exposure, severity > 0, pool=compute_pool())
+    
+    def value(name, index, symptom):
+        number = float(pairs[name][index, symptom])
+        return None if np.isnan(number) else round(number, 4)
+    
+    def statistics(index, symptom):
+        return {
+            'days': len(intake),
+            'exposedDays': int(pairs['exposedDays'][index, symptom]),
+            'symptomDays': int(pairs['symptomDays'][index, symptom]),
+            'exposedSymptomDays': int(pairs['both'][index, symptom]),
+            'phi': value('phi', index, symptom),
+            'chiSquare': value('chiSquare', index, symptom),
+            'chiSquarePValue': value('chiSquarePValue', index, symptom),
+            'oddsRatio': value('oddsRatio', index, symptom),
+            'severityCorrelation': value('severityCorrelation', index, symptom),
+            'pValue': None if p_values is None else round(float(p_values[index, symptom]), 4),
+            'permutations': permutations
+        }
+    
+    return statistics
+
+def _as_count(total):
+    """Intake totals come back from NumPy as floats; keep whole numbers as ints"""
+    return int(total) if float(total).is_integer() else total
 
 def _calculate_streaks(user_id, intake_logs):
     """Calculate streaks for a user"""
-    # Group logs by date
-    date_logs = {}
-    for log in intake_logs:
-        try:
-            date = datetime.fromisoformat(log.timestamp).date()
-            if date not in date_logs:
-                date_logs[date] = []
-            date_logs[date].append(log)
-        except (ValueError, TypeError, AttributeError):
-            pass
-    
-    # Sort dates
-    sorted_dates = sorted(date_logs.keys())
-    
-    # Calculate current streak
-    current_streak = 0
-    today = datetime.now().date()
-    
-    # Check if there is a log for today
-    if today in date_logs:
-        current_streak = 1
-        
-        # Check previous days
-        check_date = today - timedelta(days=1)
-        while check_date in date_logs:
-            current_streak += 1
-            check_date -= timedelta(days=1)
-    
-    # Calculate longest streak
-    longest_streak = 0
-    current_run = 0
-    
-    for i in range(len(sorted_dates)):
-        if i == 0:
-            current_run = 1
-        else:
-            # Check if this date is consecutive with the previous one
-            prev_date = sorted_dates[i-1]
-            curr_date = sorted_dates[i]
-            
-            if (curr_date - prev_date).days == 1:
-                current_run += 1
-            else:
-                # Streak broken, reset
-                longest_streak = max(longest_streak, current_run)
-                current_run = 1
-    
-    # Check if the final run is the longest
-    longest_streak = max(longest_streak, current_run)
-    
-    # Calculate supplement streaks
-    supplement_streaks = {}
-    
-    for log in intake_logs:
-        supp_id = log.supplement_id
-        if not supp_id:
-            continue
-            
-        try:
-            date = datetime.fromisoformat(log.timestamp).date()
-            
-            if supp_id not in supplement_streaks:
-                supplement_streaks[supp_id] = {
-                    'supplementId': supp_id,
-                    'supplementName': log.supplement_name if hasattr(log, 'supplement_name') else 'Unknown',
-                    'dates': set(),
-                    'currentStreak': 0,
-                    'longestStreak': 0
-                }
-                
-            supplement_streaks[supp_id]['dates'].add(date)
-        except (ValueError, TypeError, AttributeError):
-            pass
-    
-    # Calculate streaks for each supplement
-    for supp_id, data in supplement_streaks.items():
-        # Sort dates
-        sorted_supp_dates = sorted(data['dates'])
-        
-        # Calculate current streak
-        current_supp_streak = 0
-        
-        # Check if there is a log for today
-        if today in data['dates']:
-            current_supp_streak = 1
-            
-            # Check previous days
-            check_date = today - timedelta(days=1)
-            while check_date in data['dates']:
-                current_supp_streak += 1
-                check_date -= timedelta(days=1)
-        
-        # Calculate longest streak
-        longest_supp_streak = 0
-        current_supp_run = 0
-        
-        for i in range(len(sorted_supp_dates)):
-            if i == 0:
-                current_supp_run = 1
-            else:
-                # Check if this date is consecutive with the previous one
-                prev_date = sorted_supp_dates[i-1]
-                curr_date = sorted_supp_dates[i]
-                
-                if (curr_date - prev_date).days == 1:
-                    current_supp_run += 1
-                else:
-                    # Streak broken, reset
-                    longest_supp_streak = max(longest_supp_streak, current_supp_run)
-                    current_supp_run = 1
-        
-        # Check if the final run is the longest
-        longest_supp_streak = max(longest_supp_streak, current_supp_run)
-        
-        # Update streak data
-        supplement_streaks[supp_id]['currentStreak'] = current_supp_streak
-        supplement_streaks[supp_id]['longestStreak'] = longest_supp_streak
-        supplement_streaks[supp_id]['dates'] = [d.isoformat() for d in sorted_supp_dates]
+    frame = ReportFrame.of(intake_logs)
+    today = datetime.now().date().toordinal()
+    
+    # Overall streaks treat every intake day as one group
+    overall_days = np.array(frame.intake_days, dtype=np.int64)
+    current, longest = engine.streaks(np.zeros(len(overall_days), dtype=np.int64), overall_days, 1, today)
+    
+    # Streaks for every supplement in one batch
+    groups, days = frame.day_pairs
+    supp_current, supp_longest = engine.streaks(groups, days, len(frame.supplements), today)
+    
+    supplement_streaks = [
+        {
+            'supplementId': supp_id,
+            'supplementName': frame.supplement_names[index],
+            'dates': engine.iso_days(frame.supplement_days[index]),
+            'currentStreak': int(supp_current[index]),
+            'longestStreak': int(supp_longest[index])
+        }
+        for index, supp_id in enumerate(frame.supplements)
+        if supp_id and frame.supplement_days[index]
+    ]
     
     return {
-        'currentStreak': current_streak,
-        'longestStreak': longest_streak,
-        'supplementStreaks': list(supplement_streaks.values())
+        'currentStreak': int(current[0]),
+        'longestStreak': int(longest[0]),
+        'supplementStreaks': supplement_streaks
     }
 
 def _calculate_progress(user_id, intake_logs):
     """Calculate progress for a user"""
-    # Group logs by supplement and month
-    monthly_logs = {}
+    frame = ReportFrame.of(intake_logs)
     
-    for log in intake_logs:
-        supp_id = log.supplement_id
-        if not supp_id:
-            continue
-            
-        try:
-            date = datetime.fromisoformat(log.timestamp)
-            month_key = f"{date.year}-{date.month:02d}"
-            
-            if month_key not in monthly_logs:
-                monthly_logs[month_key] = {}
-                
-            if supp_id not in monthly_logs[month_key]:
-                monthly_logs[month_key][supp_id] = {
-                    'supplementId': supp_id,
-                    'supplementName': log.supplement_name if hasattr(log, 'supplement_name') else 'Unknown',
-                    'count': 0,
-                    'dates': set()
-                }
-                
-            monthly_logs[month_key][supp_id]['count'] += 1
-            monthly_logs[month_key][supp_id]['dates'].add(date.date())
-        except (ValueError, TypeError, AttributeError):
-            pass
-    
-    # Calculate progress metrics
-    months = sorted(monthly_logs.keys())
+    # Totals per month and supplement, in one batch
+    groups, days, counts = frame.dated_intake
+    named = frame.named_supplements[groups]
+    months, supplements, totals, unique_days = engine.monthly_totals(groups[named], days[named], counts[named])
+    
+    # Calculate consistency (days taken / days in month)
+    days_in_month = 30  # Approximation
+    consistencies = (unique_days / days_in_month * 100).tolist()
+    months = months.tolist()
+    unique_days = unique_days.tolist()
+    totals = [_as_count(total) for total in totals.tolist()]
     
     # Calculate consistency for each supplement over time
     supplement_progress = {}
-    
-    for month in months:
-        for supp_id, data in monthly_logs[month].items():
-            if supp_id not in supplement_progress:
-                supplement_progress[supp_id] = {
-                    'supplementId': supp_id,
-                    'supplementName': data['supplementName'],
-                    'monthlyData': []
-                }
-                
-            # Calculate consistency (days taken / days in month)
-            year, month_num = map(int, month.split('-'))
-            days_in_month = 30  # Approximation
-            consistency = round(len(data['dates']) / days_in_month * 100, 1)
-            
-            supplement_progress[supp_id]['monthlyData'].append({
-                'month': month,
-                'count': data['count'],
-                'uniqueDays': len(data['dates']),
-                'consistency': consistency
-            })
+    for month, index, count, taken, consistency in zip(months, supplements.tolist(), totals, unique_days, consistencies):
+        supp_id = frame.supplements[index]
+        if supp_id not in supplement_progress:
+            supplement_progress[supp_id] = {
+                'supplementId': supp_id,
+                'supplementName': frame.supplement_names[index],
+                'monthlyData': []
+            }
+        
+        supplement_progress[supp_id]['monthlyData'].append({
+            'month': engine.month_label(month),
+            'count': count,
+            'uniqueDays': taken,
+            'consistency': round(consistency, 1)
+        })
     
     # Calculate overall trends
     overall_trends = {
@@ -518,41 +523,27 @@ def _calculate_progress(user_id, intake_logs):
     }
     
     # Calculate monthly totals
-    for month in months:
-        month_data = monthly_logs[month]
-        total_count = sum(data['count'] for data in month_data.values())
-        total_days = sum(len(data['dates']) for data in month_data.values())
-        
+    by_month = {}
+    for month, count, taken, consistency in zip(months, totals, unique_days, consistencies):
+        month_totals = by_month.setdefault(month, {'count': 0, 'days': 0, 'consistencies': []})
+        month_totals['count'] += count
+        month_totals['days'] += taken
+        month_totals['consistencies'].append(consistency)
+    
+    for month, month_totals in by_month.items():
         overall_trends['monthlyTotals'].append({
-            'month': month,
-            'totalCount': total_count,
-            'totalUniqueDays': total_days
+            'month': engine.month_label(month),
+            'totalCount': month_totals['count'],
+            'totalUniqueDays': month_totals['days']
         })
     
     # Calculate consistency trend if we have at least 2 months of data
-    if len(months) >= 2:
-        # Compare first and last month
-        first_month = months[0]
-        last_month = months[-1]
-        
-        # Get average consistency for first and last month
-        first_month_consistencies = []
-        for supp_id, data in monthly_logs[first_month].items():
-            year, month_num = map(int, first_month.split('-'))
-            days_in_month = 30  # Approximation
-            consistency = len(data['dates']) / days_in_month * 100
-            first_month_consistencies.append(consistency)
-        
-        last_month_consistencies = []
-        for supp_id, data in monthly_logs[last_month].items():
-            year, month_num = map(int, last_month.split('-'))
-            days_in_month = 30  # Approximation
-            consistency = len(data['dates']) / days_in_month * 100
-            last_month_consistencies.append(consistency)
-        
-        # Calculate averages
-        avg_first = sum(first_month_consistencies) / len(first_month_consistencies) if first_month_consistencies else 0
-        avg_last = sum(last_month_consistencies) / len(last_month_consistencies) if last_month_consistencies else 0
+    if len(by_month) >= 2:
+        # Compare the average consistency of the first and last month
+        first_month_consistencies = by_month[months[0]]['consistencies']
+        last_month_consistencies = by_month[months[-1]]['consistencies']
+        avg_first = sum(first_month_consistencies) / len(first_month_consistencies)
+        avg_last = sum(last_month_consistencies) / len(last_month_consistencies)
         
         # Determine trend
         if avg_last > avg_first * 1.1:  # 10% increase
@@ -566,7 +557,7 @@ def _calculate_progress(user_id, intake_logs):
     milestones = []
     
     # Total intake milestone
-    total_intake = sum(log.count for month in monthly_logs.values() for log in month.values())
+    total_intake = sum(totals)
     
     if total_intake >= 100:
         milestones.append({
@@ -607,94 +598,58 @@ def _calculate_progress(user_id, intake_logs):
         'milestones': milestones
     }
 
-def _generate_recommendations(user_id, intake_logs, symptom_logs):
+def _generate_recommendations(user_id, intake_logs, symptom_logs=()):
     """Generate recommendations based on intake and symptom data"""
+    frame = ReportFrame.of(intake_logs, symptom_logs)
     recommendations = []
     
-    # Group intake logs by supplement
-    supplement_data = {}
-    for log in intake_logs:
-        supp_id = log.supplement_id
-        if not supp_id:
-            continue
-            
-        if supp_id not in supplement_data:
-            supplement_data[supp_id] = {
-                'supplementId': supp_id,
-                'supplementName': log.supplement_name if hasattr(log, 'supplement_name') else 'Unknown',
-                'count': 0,
-                'dates': set(),
-                'dosages': [],
-                'timings': []
-            }
-            
-        supplement_data[supp_id]['count'] += 1
-        
-        try:
-            date = datetime.fromisoformat(log.timestamp).date()
-            supplement_data[supp_id]['dates'].add(date)
-        except (ValueError, TypeError, AttributeError):
-            pass
-            
-        if hasattr(log, 'dosage') and log.dosage:
-            supplement_data[supp_id]['dosages'].append(log.dosage)
-            
-        if hasattr(log, 'timing') and log.timing:
-            supplement_data[supp_id]['timings'].append(log.timing)
-    
-    # Check for consistency issues
-    for supp_id, data in supplement_data.items():
-        if len(data['dates']) >= 7:  # Only consider supplements taken for at least a week
-            # Check consistency
-            dates = sorted(data['dates'])
-            days_span = (dates[-1] - dates[0]).days + 1
-            consistency = len(dates) / days_span * 100
-            
-            if consistency < 70:  # Less than 70% consistent
-                recommendations.append({
-                    'type': 'consistency',
-                    'supplementId': supp_id,
-                    'supplementName': data['supplementName'],
-                    'consistency': round(consistency, 1),
-                    'message': f"Try to be more consistent with taking {data['supplementName']}. You've taken it on {len(dates)} out of {days_span} days.",
-                    'priority': 'high' if consistency < 50 else 'medium'
-                })
+    # Check for consistency issues: days taken out of the days spanned, for every supplement at once
+    groups, days = frame.day_pairs
+    taken, first, last = engine.day_spans(groups, days, len(frame.supplements))
+    spans = last - first + 1
+    consistencies = np.divide(taken, spans, out=np.zeros(len(spans)), where=taken > 0) * 100
+    
+    # Only consider supplements taken for at least a week
+    flagged = np.flatnonzero(frame.named_supplements & (taken >= 7) & (consistencies < 70))
+    for index in flagged.tolist():
+        supplement_name = frame.supplement_names[index]
+        consistency = float(consistencies[index])
+        days_taken, days_span = int(taken[index]), int(spans[index])
+        recommendations.append({
+            'type': 'consistency',
+            'supplementId': frame.supplements[index],
+            'supplementName': supplement_name,
+            'consistency': round(consistency, 1),
+            'message': f"Try to be more consistent with taking {supplement_name}. You've taken it on {days_taken} out of {days_span} days.",
+            'priority': 'high' if consistency < 50 else 'medium'
+        })
     
     # Check for timing consistency
-    for supp_id, data in supplement_data.items():
-        if len(data['timings']) >= 5:  # Only consider supplements with multiple timing records
-            # Count occurrences of each timing
-            timing_counts = {}
-            for timing in data['timings']:
-                timing_counts[timing] = timing_counts.get(timing, 0) + 1
-                
-            # Find most common timing
-            most_common_timing = max(timing_counts.items(), key=lambda x: x[1])
-            timing_consistency = most_common_timing[1] / len(data['timings']) * 100
+    for index, supp_id in enumerate(frame.supplements):
+        stats = frame.supplement_stats[index]
+        timing_count = stats['timing_count']
+        if supp_id and timing_count >= 5:  # Only consider supplements with multiple timing records
+            # Find how often the most common timing was used
+            timing_consistency = stats['most_common_timing_count'] / timing_count * 100
             
             if timing_consistency < 70:  # Less than 70% consistent timing
+                supplement_name = frame.supplement_names[index]
                 recommendations.append({
                     'type': 'timing',
                     'supplementId': supp_id,
-                    'supplementName': data['supplementName'],
-                    'message': f"Try to take {data['supplementName']} at a consistent time each day for better efficacy.",
+                    'supplementName': supplement_name,
+                    'message': f"Try to take {supplement_name} at a consistent time each day for better efficacy.",
                     'priority': 'medium'
                 })
     
     # Check for symptoms that may be related to supplements
-    symptom_counts = {}
-    for log in symptom_logs:
-        symptom_type = log.symptom_type
-        if not symptom_type:
-            continue
-            
-        if symptom_type not in symptom_counts:
-            symptom_counts[symptom_type] = 0
-            
-        symptom_counts[symptom_type] += 1
+    frequent_symptoms = [
+        symptom_type
+        for index, symptom_type in enumerate(frame.symptom_types)
+        if symptom_type and sum(frame.symptom_count[row] for row in frame.symptom_rows[index]) >= 3
+    ]
     
     # If there are frequent symptoms, suggest tracking correlations
-    frequent_symptoms = [symptom for symptom, count in symptom_counts.items() if count >= 3]
     if frequent_symptoms:
         recommendations.append({
             'type': 'tracking',
@@ -703,4 +658,4 @@ def _generate_recommendations(user_id, intake_logs, symptom_logs):
             'priority': 'medium'
         })
     
-    return recommendations 
\ No newline at end of file
+    return recommendations
@@ -83,6 +83,7 @@ from flask_jwt_extended import (create_access_token, jwt_required, get_jwt_ident
                                get_jwt, current_user)
 from app.middleware.auth import check_user_access, admin_required
 from app.models.interaction import Interaction
+from app.models.reference_data import SupplementCatalog, InteractionGraph
 
 # Create the blueprint
 bp = Blueprint('supplements', __name__, url_prefix='/api/supplements')
@@ -151,6 +152,7 @@ def create_supplement():
         
         if not result.inserted_id:  # Check if insertion failed
             return jsonify({"error": "Failed to insert supplement"}), 500
+        SupplementCatalog.invalidate()
         
         # Return the newly created document's _id
         return jsonify({"message": "Supplement created successfully", "_id": str(result.inserted_id)}), 201
@@ -202,22 +204,11 @@ def get_interactions_by_supplement(supplement_id):
         return jsonify({"error": "Invalid supplement ID format"}), 400
 
     try:
-        db = get_db()
-
-        # Query interactions where the supplement appears in the supplements array
-        interactions_cursor = db.Interactions.find({
-            "supplements": {
-                "$elemMatch": {"supplementId": str(_id)}
-            }
-        })
-
-        # Categorize interactions
+        # Categorize the supplement's edges of the in-memory interaction graph
         supplement_supplement = []
         supplement_food = []
 
-        for interaction in interactions_cursor:
-            interaction["_id"] = str(interaction["_id"])  # serialize ObjectId
-
+        for interaction in InteractionGraph.for_supplement(str(_id)):
             if interaction.get("interactionType") == "Supplement-Supplement":
                 supplement_supplement.append(interaction)
             elif interaction.get("interactionType") == "Supplement-Food":
@@ -1,36 +1,47 @@
-from flask import Blueprint, request, jsonify, current_app
-from app.models.symptom_log import SymptomLog, SymptomCategoryManager
+from flask import Blueprint, request, jsonify, current_app, Response
+from app.models.symptom_log import SymptomLog, symptom_writes
+from app.models.symptom_catalog import SymptomCatalog
 from datetime import datetime, timedelta
 from bson.objectid import ObjectId
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from app.utils.pagination import parse_pagination_args, next_cursor
+from app.analytics import ReportFrame
+from app.analytics.series import parse_series_args, rollup_series
+from app.models.daily_rollup import DailyRollup
 
 bp = Blueprint('symptom_logs', __name__, url_prefix='/api/symptom-logs')
 
 
-@bp.before_app_first_request    # This function will run once when the app starts
-def initialize_database():
-    """Initialize database with symptom categories and symptoms"""
+@bp.before_app_request
+def flush_pending_symptom_writes():
+    """Write the user's coalesced symptom saves before any request that may read or change them"""
+    if not symptom_writes.has_pending():
+        return
+    if request.endpoint == 'symptom_logs.create_symptom_log':
+        return
     try:
-        SymptomCategoryManager.initialize_symptom_data()
-        current_app.logger.info("Database initialized with symptom categories and symptoms")
-        print("Database initialized with symptom categories and symptoms")
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except Exception:
+        return
+    if not user_id:
+        return
+    # Failed writes are queued again by the coalescer; never fail the request over them
+    try:
+        symptom_writes.flush(user_id)
     except Exception as e:
-        current_app.logger.error(f"Error initializing database: {str(e)}")
+        current_app.logger.error(f"Failed to flush pending symptom writes for user {user_id}: {e}")
 
 
 @bp.route('/symptoms', methods=['GET'])
 def get_all_symptoms():
-    """Get all symptoms with their categories"""
+    """Get all symptoms with their categories (pre-serialized; the catalog version is the ETag)"""
     try:
-        symptoms = SymptomLog.get_symptom_details()
-        symptoms_list = list(symptoms.values())
-        
-        # Convert ObjectId to string for JSON serialization
-        for symptom in symptoms_list:
-            symptom["_id"] = str(symptom["_id"])
-            symptom["categoryId"] = str(symptom["categoryId"])
-            
-        return jsonify({"symptoms": symptoms_list}), 200
+        catalog = SymptomCatalog.get()
+        response = Response(catalog.body, mimetype='application/json')
+        response.set_etag(catalog.version)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
@@ -68,6 +79,15 @@ def create_symptom_log():
         # Add user_id to the symptom log data
         data['user_id'] = user_id
         
+        # With write coalescing on, only the last of a burst of saves is written
+        if symptom_writes.enabled:
+            pending_log = SymptomLog.queue(data)
+            return jsonify({
+                "message": "Symptom log queued",
+                "log_id": None,
+                "log": pending_log
+            }), 202
+        
         # Create symptom log
         created_log = SymptomLog.create(data)
         
@@ -83,28 +103,77 @@ def create_symptom_log():
         return jsonify({"error": str(e)}), 500
 
 
+@bp.route('/day/<date>', methods=['PUT'])
+@jwt_required()
+def save_symptom_day(date):
+    """Create or update all symptom logs of a day at once and return the day's summary"""
+    ''' 
+    Example request body:
+        {
+            "notes": "after taking iron",
+            "symptoms": [
+                {"symptom_id": "6813aa988a26dd0e3989ba01", "severity": "average"},
+                {"symptom_id": "6813aa988a26dd0e3989ba0f", "severity": "mild", "notes": "woke up twice"}
+            ]
+        }
+    '''
+    try:
+        user_id = get_jwt_identity()
+        
+        # Validate date format
+        try:
+            datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('symptoms'), list):
+            return jsonify({"error": "symptoms must be a list"}), 400
+        
+        # One bulk write for the whole day, then the day's summary
+        counts = SymptomLog.upsert_day(user_id, date, data['symptoms'], data.get('notes'))
+        summary = SymptomLog.get_symptoms_summary(user_id, date)
+        
+        return jsonify({
+            "message": "Symptom logs saved successfully",
+            **counts,
+            "summary": summary
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error saving symptom logs for day: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 @bp.route('/', methods=['GET'])
 @jwt_required()
 def get_symptom_logs():
-    """Get all symptom logs with optional filters"""
+    """Get all symptom logs with optional filters (paged with `limit`/`after`)"""
     try:
         user_id = get_jwt_identity()
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         date = request.args.get('date')
+        page = parse_pagination_args(request.args)
         
         # Apply filters if provided
         if start_date and end_date:
-            logs = SymptomLog.find_by_date_range(user_id, start_date, end_date)
+            logs = SymptomLog.find_by_date_range(user_id, start_date, end_date, **page)
         elif date:
             logs = SymptomLog.find_by_date(user_id, date)
+            page = {}
         else:
             # Default to last 7 days if no filters
             today = datetime.now().strftime("%Y-%m-%d")
             week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-            logs = SymptomLog.find_by_date_range(user_id, week_ago, today)
+            logs = SymptomLog.find_by_date_range(user_id, week_ago, today, **page)
         
-        return jsonify([log.to_dict() for log in logs]), 200
+        headers = {}
+        cursor = next_cursor(logs, page, 'date')
+        if cursor:
+            headers['X-Next-Cursor'] = cursor
+        return jsonify([log.to_dict() for log in logs]), 200, headers
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
@@ -142,10 +211,8 @@ def get_logs_for_date(date):
         except ValueError:
             return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
         
-        # Get logs
+        # Get logs, and symptom details from the in-memory catalog
         logs = SymptomLog.find_by_date(user_id, date)
-        
-        # Get symptom details
         symptoms = SymptomLog.get_symptom_details()
         
         # Enrich logs with symptom details
@@ -188,10 +255,8 @@ def get_active_logs_for_date(date):
         except ValueError:
             return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
         
-        # Get active logs
+        # Get active logs, and symptom details from the in-memory catalog
         logs = SymptomLog.find_active_symptoms_for_date(user_id, date)
-        
-        # Get symptom details
         symptoms = SymptomLog.get_symptom_details()
         
         # Enrich logs with symptom details
@@ -241,10 +306,15 @@ def get_logs_for_date_range():
         except ValueError:
             return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
         
+        page = parse_pagination_args(request.args)
+        
         # Get logs
-        logs = SymptomLog.find_by_date_range(user_id, start_date, end_date)
+        logs = SymptomLog.find_by_date_range(user_id, start_date, end_date, **page)
         
-        return jsonify({"logs": [log.to_dict() for log in logs]}), 200
+        response = {"logs": [log.to_dict() for log in logs]}
+        if page:
+            response["next_cursor"] = next_cursor(logs, page, 'date')
+        return jsonify(response), 200
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
@@ -252,6 +322,81 @@ def get_logs_for_date_range():
         return jsonify({"error": str(e)}), 500
 
 
+@bp.route('/trends', methods=['GET'])
+@jwt_required()
+def get_symptom_trends():
+    """Get the severity trend of each logged symptom over a date range (the last 90 days by default)"""
+    try:
+        user_id = get_jwt_identity()
+        end_date = request.args.get('to') or datetime.now().date().isoformat()
+        start_date = request.args.get('from')
+        
+        # Validate date format
+        try:
+            end = datetime.strptime(end_date, '%Y-%m-%d')
+            start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else end - timedelta(days=90)
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        if start > end:
+            return jsonify({"error": "from must not be after to"}), 400
+        start_date = start.date().isoformat()
+        
+        # Get the grouped logs, and symptom details from the in-memory catalog
+        aggregates = SymptomLog.get_report_aggregates(user_id, start_date, end_date)
+        symptoms = SymptomLog.get_symptom_details()
+        
+        # Trends for every symptom in one vectorized pass
+        frame = ReportFrame.from_aggregates(None, aggregates)
+        trends = [
+            {
+                "symptom_id": symptom_id,
+                "name": symptoms.get(symptom_id, {}).get('name'),
+                **frame.symptom_trends[index]
+            }
+            for index, symptom_id in enumerate(frame.symptom_types)
+        ]
+        return jsonify({"from": start_date, "to": end_date, "trends": trends}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error getting symptom trends: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/series', methods=['GET'])
+@jwt_required()
+def get_symptom_series():
+    """Get the daily severity (highest code logged that day) of each symptom over a date range for charts"""
+    try:
+        user_id = get_jwt_identity()
+        start_date, end_date, points = parse_series_args(request.args)
+        
+        # Get the daily rollups, and symptom details from the in-memory catalog
+        rollups = DailyRollup.find_by_date_range(user_id, start_date, end_date)
+        symptoms = SymptomLog.get_symptom_details()
+        
+        # Series longer than `points` days are downsampled, preserving their shape
+        series = rollup_series(rollups, 'symptoms', lambda code: code, points)
+        return jsonify({
+            "from": start_date,
+            "to": end_date,
+            "series": [
+                {
+                    "symptom_id": symptom_id,
+                    "name": symptoms.get(symptom_id, {}).get('name'),
+                    "days": logged_days,
+                    "points": [{"date": day, "severity": code} for day, code in zip(days, codes)]
+                }
+                for symptom_id, (days, codes, logged_days) in series.items()
+            ]
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error getting symptom series: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 @bp.route('/dates-with-symptoms', methods=['GET'])
 @jwt_required()
 def get_dates_with_symptoms():
@@ -299,68 +444,8 @@ def get_symptoms_summary(date):
         except ValueError:
             return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
         
-        # Get active logs
-        logs = SymptomLog.find_active_symptoms_for_date(user_id, date)
-        
-        # Get symptom details
-        symptoms = SymptomLog.get_symptom_details()
-        
-        # Group by category
-        categories = {
-            "general": {"name": "General", "icon": "🔍", "symptoms": []},
-            "mood": {"name": "Mood", "icon": "😊", "symptoms": []},
-            "sleep": {"name": "Sleep", "icon": "😴", "symptoms": []},
-            "digestive": {"name": "Digestive", "icon": "🍽️", "symptoms": []},
-            "appetite": {"name": "Appetite", "icon": "🥑", "symptoms": []},
-            "activity": {"name": "Physical Activity", "icon": "🏃‍♀️", "symptoms": []}
-        }
-        
-        # Parse notes from any log
-        notes = ""
-        for log in logs:
-            log_dict = log.to_dict()
-            if log_dict.get('notes'):
-                notes = log_dict['notes']
-                break
-        
-        # Populate categories with symptoms
-        for log in logs:
-            log_dict = log.to_dict()
-            symptom_id = log_dict['symptom_id']
-            if symptom_id in symptoms:
-                symptom_info = symptoms[symptom_id]
-                category_name = symptom_info['categoryName'].lower()
-                
-                # Map category name to id if needed
-                category_id = ""
-                if "general" in category_name:
-                    category_id = "general"
-                elif "mood" in category_name:
-                    category_id = "mood"
-                elif "sleep" in category_name:
-                    category_id = "sleep"
-                elif "digestive" in category_name:
-                    category_id = "digestive"
-                elif "appetite" in category_name:
-                    category_id = "appetite"
-                elif "activity" in category_name or "physical" in category_name:
-                    category_id = "activity"
-                
-                if category_id in categories:
-                    categories[category_id]["symptoms"].append({
-                        "id": symptom_id,
-                        "name": symptom_info['name'],
-                        "icon": symptom_info['icon'],
-                        "severity": log_dict['severity']
-                    })
-        
-        # Filter out empty categories
-        summary = {
-            "categories": [cat for cat in categories.values() if cat["symptoms"]],
-            "notes": notes,
-            "date": date
-        }
-        
+        # Active logs, notes and category groups in one pass
+        summary = SymptomLog.get_symptoms_summary(user_id, date)
         return jsonify(summary), 200
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
@@ -0,0 +1,254 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_EXCEPTION
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Threads shared by every request for independent database fetches
+FETCH_POOL_SIZE = int(os.getenv('FETCH_POOL_SIZE', '8'))
+# Seconds a request waits for its concurrent fetches before giving up
+FETCH_TIMEOUT_SECONDS = float(os.getenv('FETCH_TIMEOUT_SECONDS', '10'))
+
+# Backoff before a failed coalesced write is retried (doubled per attempt up to the
+# maximum), and the attempts after which it is dropped
+COALESCE_RETRY_SECONDS = float(os.getenv('COALESCE_RETRY_SECONDS', '1'))
+COALESCE_RETRY_MAX_SECONDS = float(os.getenv('COALESCE_RETRY_MAX_SECONDS', '30'))
+COALESCE_RETRY_LIMIT = int(os.getenv('COALESCE_RETRY_LIMIT', '5'))
+
+# Processes for CPU-bound report statistics (0 runs them in the request's thread)
+CORRELATION_WORKERS = int(os.getenv('CORRELATION_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Tasks queued or running on the process pool at once, across all requests, and
+# how long a submission waits for a free slot before giving up
+COMPUTE_MAX_PENDING = int(os.getenv('COMPUTE_MAX_PENDING', str(max(16, CORRELATION_WORKERS * 8))))
+COMPUTE_SUBMIT_WAIT_SECONDS = float(os.getenv('COMPUTE_SUBMIT_WAIT_SECONDS', '0.5'))
+# Modules the pool's fork server imports once, so workers start with them loaded
+COMPUTE_PRELOAD_MODULES = ['app.analytics.correlation']
+
+_pool = ThreadPoolExecutor(max_workers=FETCH_POOL_SIZE, thread_name_prefix='fetch')
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+class FetchTimeout(Exception):
+    """Raised when concurrent fetches don't all finish within the request's timeout"""
+
+
+class PoolBusy(RuntimeError):
+    """Raised when the compute pool has no free slot for another task"""
+
+
+def fetch_all(*calls, timeout: float = None) -> list:
+    """
+    Run independent zero-argument callables concurrently on the shared fetch pool,
+    so a route waits for its slowest query rather than the sum of them.
+    Calls must not use fetch_all themselves: nested waits could exhaust the pool.
+    Args:
+        *calls: The fetches, e.g. lambda: SymptomLog.find_by_date(user_id, date).
+        timeout (float): Seconds to wait for all of them (FETCH_TIMEOUT_SECONDS by default).
+    Returns:
+        list: Their results, in the order the calls were given.
+    Raises:
+        FetchTimeout: If they haven't all finished in time; calls that haven't started are cancelled.
+        Exception: The first exception raised by a call (in the order given), unchanged.
+    """
+    timeout = FETCH_TIMEOUT_SECONDS if timeout is None else timeout
+    futures = [_pool.submit(call) for call in calls]
+    done, pending = wait(futures, timeout=timeout, return_when=FIRST_EXCEPTION)
+
+    for future in futures:
+        if future in done and future.exception() is not None:
+            for other in pending:
+                other.cancel()
+            raise future.exception()
+    if pending:
+        for future in pending:
+            future.cancel()
+        raise FetchTimeout(f"Timed out after {timeout:g}s waiting for {len(pending)} of {len(futures)} queries")
+
+    return [future.result() for future in futures]
+
+
+async def gather_all(*awaitables, timeout: float = None) -> list:
+    """
+    fetch_all for the async path: await independent queries concurrently on the
+    running event loop, without using the fetch pool.
+    Returns:
+        list: Their results, in the order given.
+    Raises:
+        FetchTimeout: If they haven't all finished within `timeout` (FETCH_TIMEOUT_SECONDS by default).
+        Exception: The first exception raised by an awaitable, unchanged.
+    """
+    timeout = FETCH_TIMEOUT_SECONDS if timeout is None else timeout
+    try:
+        return list(await asyncio.wait_for(asyncio.gather(*awaitables), timeout))
+    except asyncio.TimeoutError:
+        raise FetchTimeout(f"Timed out after {timeout:g}s waiting for {len(awaitables)} queries")
+
+
+class BoundedExecutor:
+    """
+    Wraps an executor so at most `max_pending` tasks are queued or running at once.
+    submit() waits up to `wait` seconds for a slot and raises PoolBusy otherwise, so
+    a burst of requests cannot queue unbounded work (and its pickled arguments)
+    behind the pool. A slot is freed when its task finishes or is cancelled.
+    """
+    def __init__(self, executor, max_pending: int, wait: float = 0):
+        self._executor = executor
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.wait = wait
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(timeout=self.wait):
+            raise PoolBusy(f"No free slot on the compute pool after {self.wait:g}s")
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait: bool = True, **kwargs):
+        self._executor.shutdown(wait, **kwargs)
+
+
+def compute_pool():
+    """
+    The shared process pool for CPU-bound work, started on first use.
+    Workers are forked from a fork server (spawned where that is unavailable)
+    rather than from the calling process, which may be a threaded gunicorn worker
+    whose locks a forked child could inherit held. The fork server only preloads
+    COMPUTE_PRELOAD_MODULES, not the entry point (which would create another app
+    and database client).
+    Returns:
+        BoundedExecutor: The pool, limited to COMPUTE_MAX_PENDING tasks in flight, or
+        None when CORRELATION_WORKERS is 0 or 1 (a single worker wouldn't run anything in parallel).
+    """
+    global _process_pool
+    if CORRELATION_WORKERS <= 1:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(COMPUTE_PRELOAD_MODULES)
+            else:
+                context = multiprocessing.get_context('spawn')
+            _process_pool = BoundedExecutor(
+                ProcessPoolExecutor(max_workers=CORRELATION_WORKERS, mp_context=context),
+                COMPUTE_MAX_PENDING, COMPUTE_SUBMIT_WAIT_SECONDS
+            )
+        return _process_pool
+
+
+class WriteCoalescer:
+    """
+    Holds the latest value written to each key for `window` seconds after its first
+    write, then hands all due values to `flush` in one call from a background thread.
+    Keys are tuples whose first item is the user id, so a user's pending writes can be
+    flushed before reading their data (read-your-writes). Flushes are serialized, so a
+    newer value is never written before an older one for the same key.
+
+    `flush` returns the writes it could not store (or raises, failing all of them);
+    those are queued again with backoff (COALESCE_RETRY_SECONDS, doubling up to
+    COALESCE_RETRY_MAX_SECONDS) unless a newer value for the key arrived meanwhile,
+    and dropped with an error after COALESCE_RETRY_LIMIT attempts.
+    """
+    def __init__(self, window: float, flush):
+        self.window = window
+        self._flush = flush
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and not self._closed
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def submit(self, key: tuple, value):
+        """Replace the pending value of `key`; its flush deadline is kept from its first write"""
+        with self._lock:
+            deadline = self._pending[key][0] if key in self._pending else time.monotonic() + self.window
+            self._pending[key] = (deadline, value, 0)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='write-coalescer', daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+
+    def flush(self, user_id=None, due_only: bool = False) -> int:
+        """
+        Write pending values now; failed ones are queued again for a retry.
+        Args:
+            user_id: Only flush this user's keys (all keys when omitted).
+            due_only (bool): Only flush keys whose window (or retry backoff) has passed.
+        Returns:
+            int: The number of values written.
+        """
+        with self._flush_lock:
+            now = time.monotonic()
+            with self._lock:
+                keys = [key for key, (deadline, _, _) in self._pending.items()
+                        if (user_id is None or key[0] == user_id) and (not due_only or deadline <= now)]
+                attempts = {key: self._pending[key][2] for key in keys}
+                writes = [(key, self._pending.pop(key)[1]) for key in keys]
+            if not writes:
+                return 0
+            try:
+                failed = self._flush(writes) or []
+            except Exception as e:
+                logger.error(f"Failed to flush {len(writes)} coalesced writes: {e}")
+                failed = writes
+            self._retry(failed, attempts)
+            return len(writes) - len(failed)
+
+    def _retry(self, failed: list, attempts: dict):
+        """Queue failed writes again after their backoff, unless a newer value replaced them"""
+        if not failed:
+            return
+        with self._lock:
+            for key, value in failed:
+                attempt = attempts.get(key, 0) + 1
+                if key in self._pending:
+                    continue
+                if attempt >= COALESCE_RETRY_LIMIT:
+                    logger.error(f"Dropping coalesced write {key} after {attempt} failed attempts")
+                    continue
+                delay = min(COALESCE_RETRY_SECONDS * 2 ** (attempt - 1), COALESCE_RETRY_MAX_SECONDS)
+                self._pending[key] = (time.monotonic() + delay, value, attempt)
+            self._wakeup.notify()
+
+    def close(self):
+        """Flush everything and stop the background thread (registered to run at exit)"""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self.flush()
+        if self._pending:
+            logger.error(f"Lost {len(self._pending)} coalesced writes that could not be written at exit")
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                if not self._pending:
+                    self._wakeup.wait()
+                    continue
+                delay = min(deadline for deadline, _, _ in self._pending.values()) - time.monotonic()
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                    continue
+            try:
+                self.flush(due_only=True)
+            except Exception as e:
+                logger.error(f"Failed to flush coalesced writes: {e}")
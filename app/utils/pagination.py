@@ -0,0 +1,84 @@
+import base64
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+
+# Upper bound on a single page so one request can never pull a user's whole history
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(date_value: str, object_id) -> str:
+    """
+    Encode a (date, _id) keyset position as an opaque cursor string.
+    Args:
+        date_value (str): The date of the last item on the page (e.g., '2025-04-13').
+        object_id: The _id of the last item on the page.
+    Returns:
+        str: A URL-safe cursor.
+    """
+    raw = f"{date_value}|{object_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str):
+    """
+    Decode a cursor produced by encode_cursor.
+    Args:
+        cursor (str): The opaque cursor string.
+    Returns:
+        tuple: (date, ObjectId) of the last item of the previous page.
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        date_value, object_id = raw.rsplit('|', 1)
+        return date_value, ObjectId(object_id)
+    except (ValueError, UnicodeError, InvalidId):
+        raise ValueError("Invalid pagination cursor")
+
+
+def parse_pagination_args(args):
+    """
+    Read the optional `limit` and `after` query parameters.
+    Args:
+        args: The request query arguments.
+    Returns:
+        dict: Keyword arguments for the model finders ({} when pagination was not requested).
+    Raises:
+        ValueError: If limit or after is invalid.
+    """
+    limit = args.get('limit')
+    after = args.get('after')
+    if limit is None and after is None:
+        return {}
+
+    if limit is None:
+        limit = MAX_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    return {
+        'limit': limit,
+        'after': decode_cursor(after) if after else None
+    }
+
+
+def next_cursor(logs, page: dict, date_attr: str):
+    """
+    Build the cursor for the page following `logs`.
+    Args:
+        logs (list): The model objects returned for the current page.
+        page (dict): The pagination arguments returned by parse_pagination_args.
+        date_attr (str): The attribute holding the log date ('intake_date' or 'date').
+    Returns:
+        str or None: The next cursor, or None if this was the last page.
+    """
+    if not page or len(logs) < page['limit']:
+        return None
+    last = logs[-1]
+    return encode_cursor(getattr(last, date_attr), last._id)
@@ -0,0 +1,68 @@
+from app.db.db import reset_client
+from app.models.reference_data import SupplementCatalog, InteractionGraph
+from app.models.symptom_catalog import SymptomCatalog
+from app.utils.startup import STARTUP_RETRY_SECONDS
+import gc
+import importlib
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# How long the master retries the startup tasks (indexes, seed) before forking anyway
+PRELOAD_STARTUP_TIMEOUT_SECONDS = float(os.getenv('PRELOAD_STARTUP_TIMEOUT_SECONDS', '30'))
+
+# Modules the app imports on first use, loaded once in the master so workers share them
+PRELOAD_MODULES = ('app.utils.pdf_utils', 'bcrypt')
+
+# The in-memory reference data every worker serves, loaded once in the master
+PRELOAD_CATALOGS = (SymptomCatalog, SupplementCatalog, InteractionGraph)
+
+
+def preload(app):
+    """
+    Prepare a pre-fork master (gunicorn's when_ready hook) before workers are forked.
+
+    Runs the startup tasks inline (the master starts no threads, so none are
+    running when it forks), loads the reference data that every worker serves
+    from memory and the modules deferred to first use, closes the master's Mongo
+    client, then moves every object into the permanent GC generation with
+    gc.freeze(). Workers then share these pages copy-on-write: their collections
+    skip the frozen objects, so the GC never writes to those pages.
+    """
+    startup = app.extensions.get('startup')
+    if startup is not None:
+        deadline = time.monotonic() + PRELOAD_STARTUP_TIMEOUT_SECONDS
+        while not startup.run_once() and time.monotonic() + STARTUP_RETRY_SECONDS < deadline:
+            time.sleep(STARTUP_RETRY_SECONDS)
+        if not startup.ready:
+            logger.warning(f"Forking before startup finished ({startup.phase}); workers will resume it")
+
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    with app.app_context():
+        for catalog in PRELOAD_CATALOGS:
+            try:
+                catalog.get()
+            except Exception as e:
+                # Workers load it on their first request instead
+                logger.warning(f"{catalog.__name__} not preloaded: {e}")
+
+    reset_client(close=True)
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded app; {gc.get_freeze_count()} objects frozen before forking")
+
+
+def after_fork(app):
+    """
+    Set up a freshly forked worker (gunicorn's post_fork hook).
+
+    Drops any Mongo client inherited from the master and resumes the startup
+    tasks on a background thread if the master could not finish them.
+    """
+    reset_client()
+    startup = app.extensions.get('startup')
+    if startup is not None and not startup.ready:
+        startup.start(mode='background')
@@ -0,0 +1,94 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# `background` (default) serves immediately and runs the startup tasks on a thread;
+# `sync` runs them once before serving and only retries failures in the background;
+# `deferred` starts nothing, leaving the tasks to the pre-fork hooks (gunicorn.conf.py)
+STARTUP_MODE = os.getenv('STARTUP_MODE', 'background')
+
+# Delay before retrying a failed task, doubled after each failure up to the maximum
+STARTUP_RETRY_SECONDS = float(os.getenv('STARTUP_RETRY_SECONDS', '1'))
+STARTUP_RETRY_MAX_SECONDS = float(os.getenv('STARTUP_RETRY_MAX_SECONDS', '30'))
+
+
+class StartupTasks:
+    """
+    Runs the app's startup tasks (index builds, reference data seeding) in order
+    without holding up the first request.
+
+    Each task runs inside the app context and is retried with backoff until it
+    succeeds, so a database that is briefly unavailable delays readiness instead
+    of failing startup. Completed tasks are not run again. The app is ready once
+    every task has succeeded; /readyz reports the state.
+    """
+    def __init__(self, app, tasks: list):
+        self.app = app
+        self.tasks = tasks
+        self.phase = 'serving'
+        self.error = None
+        self.attempts = 0
+        self.started_at = time.monotonic()
+        self.ready_after = None
+        self._done = 0
+        self._ready = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self, mode: str = None):
+        """Run the tasks on a background thread, or once inline first in `sync` mode"""
+        mode = mode or STARTUP_MODE
+        if mode == 'deferred':
+            return self
+        if mode == 'sync':
+            self.run_once()
+        if not self.ready:
+            self._thread = threading.Thread(target=self._run, name='startup-tasks', daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the app is ready (or the timeout passes); returns readiness"""
+        return self._ready.wait(timeout)
+
+    def run_once(self) -> bool:
+        """Run the remaining tasks in order, stopping at the first failure; returns readiness"""
+        while self._done < len(self.tasks):
+            name, task = self.tasks[self._done]
+            self.phase = name
+            self.attempts += 1
+            try:
+                with self.app.app_context():
+                    task()
+            except Exception as e:
+                self.error = f"{name}: {e}"
+                logger.error(f"Startup task '{name}' failed (attempt {self.attempts}): {e}")
+                return False
+            self._done += 1
+            self.error = None
+        self.phase = 'ready'
+        self.ready_after = round(time.monotonic() - self.started_at, 3)
+        self._ready.set()
+        logger.info(f"App ready after {self.ready_after}s")
+        return True
+
+    def _run(self):
+        delay = STARTUP_RETRY_SECONDS
+        while not self.run_once():
+            time.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_SECONDS)
+
+    def to_dict(self) -> dict:
+        return {
+            'status': 'ready' if self.ready else 'starting',
+            'phase': self.phase,
+            'error': self.error,
+            'attempts': self.attempts,
+            'readyAfterSeconds': self.ready_after
+        }
@@ -0,0 +1,9 @@
+"""
+ASGI entry point, serving the hot read endpoints asynchronously:
+    uvicorn asgi:app --workers 4
+or, with the pre-fork hooks of gunicorn.conf.py:
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+"""
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,48 @@
+"""
+Production server settings for the pre-fork entry point:
+    gunicorn -c gunicorn.conf.py wsgi:app
+Serve the async read endpoints with the same settings by adding
+`-k uvicorn.workers.UvicornWorker asgi:app` (see asgi.py).
+
+The app is loaded once in the master (preload_app), which then runs the startup
+tasks, preloads the reference data and freezes the GC, so forked workers share
+those pages copy-on-write instead of each importing and loading everything again.
+"""
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+preload_app = True
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+# The app reads the worker count (e.g. to turn off per-worker write coalescing)
+os.environ.setdefault('WEB_CONCURRENCY', str(workers))
+
+# Every worker would otherwise start its own correlation process pool; share the
+# CPUs between them instead (1, i.e. inline, unless there are more CPUs than workers)
+os.environ.setdefault('CORRELATION_WORKERS', str(max(1, multiprocessing.cpu_count() // workers)))
+
+# The master must not fork with threads running: create_app() starts no startup
+# thread here, and preload() runs the tasks inline instead
+os.environ.setdefault('STARTUP_MODE', 'deferred')
+
+
+def _flask_app(server):
+    """The loaded Flask app (wsgi:app), or the one wrapped by the ASGI app (asgi:app)"""
+    app = server.app.wsgi()
+    return getattr(app, 'flask_app', app)
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded, before any worker is forked"""
+    from app.utils.prefork import preload
+    preload(_flask_app(server))
+
+
+def post_fork(server, worker):
+    from app.utils.prefork import after_fork
+    after_fork(_flask_app(server))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the DailyRollups collection from the raw intake and symptom logs,
+and the PresenceBitmaps from the new rollups.
+Run it once after deploying the rollups or bitmaps, or whenever they need to be repaired.
+Stored streak states are dropped as well; they are rebuilt from the new rollups
+the next time each user's streaks are read or an intake is logged, and cached
+reports are invalidated.
+
+With --repair only the days whose rollup or bitmap update failed on the write path
+(recorded in RollupRepairs) are rebuilt; run it on a schedule, e.g. from cron.
+
+Usage:
+    python scripts/backfill_rollups.py            # all users
+    python scripts/backfill_rollups.py <user_id>  # a single user
+    python scripts/backfill_rollups.py --repair   # the days recorded for repair
+"""
+import os
+import sys
+import time
+
+# Add parent directory to path to enable imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.daily_rollup import DailyRollup
+from app.models.init_db import init_indexes
+from app.models.presence_bitmap import PresenceBitmap
+from app.models.streak_state import StreakState
+from app.models.report_cache import ReportCache
+
+
+def backfill(user_id=None):
+    """Rebuild rollups for one user, or for every user when user_id is None."""
+    try:
+        init_indexes(collections=['DailyRollups', 'RollupRepairs', 'PresenceBitmaps'])
+        started = time.time()
+        written = DailyRollup.rebuild(user_id)
+        print(f"Rebuilt {written} daily rollups in {time.time() - started:.1f}s.")
+        started = time.time()
+        written = PresenceBitmap.rebuild(user_id)
+        print(f"Rebuilt {written} presence bitmaps in {time.time() - started:.1f}s.")
+        StreakState.reset(user_id)
+        ReportCache.invalidate(user_id)
+        return True
+    except Exception as e:
+        print(f"Error rebuilding daily rollups: {str(e)}")
+        return False
+
+
+def repair():
+    """Rebuild the days whose rollup or bitmap update failed."""
+    try:
+        init_indexes(collections=['DailyRollups', 'RollupRepairs', 'PresenceBitmaps'])
+        started = time.time()
+        repaired = DailyRollup.repair()
+        print(f"Repaired {repaired} daily rollups in {time.time() - started:.1f}s.")
+        return True
+    except Exception as e:
+        print(f"Error repairing daily rollups: {str(e)}")
+        return False
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['--repair']:
+        success = repair()
+    else:
+        success = backfill(sys.argv[1] if len(sys.argv) > 1 else None)
+    exit(0 if success else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Compare how many concurrent requests the sync (gthread) and async (ASGI) servers
+sustain on a read endpoint that waits on MongoDB, with the same number of workers.
+
+Both servers are started from gunicorn.conf.py with WEB_CONCURRENCY workers:
+    sync:  gunicorn -c gunicorn.conf.py wsgi:app                                 (GUNICORN_THREADS per worker)
+    async: gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+For each number of concurrent clients, requests per second, p50/p99 latency and
+errors are printed, with the resident memory of the whole server (master and
+workers) after the run, so throughput is compared at (about) equal memory.
+
+Needs a running MongoDB (MONGO_URI); requests are sent with an access token
+signed with JWT_SECRET_KEY for a user without data, so every request still runs
+its queries (token blocklist and intake logs).
+
+Usage:
+    python scripts/benchmark_async.py [--path PATH] [--clients 16,64,256] [--seconds S] [--workers N]
+"""
+from benchmark_server import ROOT, load, wait_until_up
+from bson.objectid import ObjectId
+from datetime import datetime, timedelta, timezone
+import argparse
+import jwt
+import os
+import statistics
+import subprocess
+import sys
+import uuid
+
+SERVERS = {
+    'sync (gthread)': ([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], 5004),
+    'async (uvicorn)': ([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                         '-k', 'uvicorn.workers.UvicornWorker', 'asgi:app'], 5005),
+}
+
+
+def access_token():
+    """An access token like the app's login returns, for a new user id"""
+    now = datetime.now(timezone.utc)
+    claims = {'sub': str(ObjectId()), 'type': 'access', 'fresh': False, 'jti': str(uuid.uuid4()),
+              'iat': now, 'nbf': now, 'exp': now + timedelta(hours=1)}
+    return jwt.encode(claims, os.getenv('JWT_SECRET_KEY', 'fallback_secret_key'), algorithm='HS256')
+
+
+def rss_mb(pid) -> float:
+    """Resident memory of a process and all its descendants, in MB"""
+    total, pending = 0, [pid]
+    while pending:
+        pid = pending.pop()
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                total += next(int(line.split()[1]) for line in status if line.startswith('VmRSS:'))
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children") as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except (OSError, StopIteration):
+            continue
+    return total / 1024
+
+
+def benchmark(name, command, port, path, client_counts, seconds, workers):
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_ACCESS_LOG='/dev/null')
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f"http://127.0.0.1:{port}{path}"
+        headers = {'Authorization': f"Bearer {access_token()}"}
+        if not wait_until_up(f"http://127.0.0.1:{port}/readyz"):
+            print(f"{name}: did not start")
+            return
+        load(url, max(client_counts), 1, headers)
+        for clients in client_counts:
+            latencies, errors = load(url, clients, seconds, headers)
+            latencies.sort()
+            p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] if latencies else 0
+            print(f"{name:16s} {clients:4d} clients {len(latencies) / seconds:8.1f} req/s   "
+                  f"p50 {statistics.median(latencies) * 1000 if latencies else 0:7.1f}ms   "
+                  f"p99 {p99 * 1000:7.1f}ms   errors {errors:4d}   rss {rss_mb(server.pid):6.1f}MB")
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--path', default='/api/intake_logs/today')
+    parser.add_argument('--clients', default='16,64,256')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+    client_counts = [int(clients) for clients in args.clients.split(',')]
+
+    print(f"GET {args.path} with {args.workers} workers, {args.seconds:.0f}s per client count")
+    for name, (command, port) in SERVERS.items():
+        benchmark(name, command, port, args.path, client_counts, args.seconds, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark report generation on a year of synthetic intake and symptom logs.
+
+Compares building every report section from the raw log lists (each section
+parses and groups the logs itself) with building them from one shared
+ReportFrame, and with building them from the per-supplement and per-day
+groups the report aggregation pipelines return, as get_user_report does.
+No database is needed: the aggregation results are grouped in Python and
+supplement lookups made by the correlation section are stubbed out.
+
+Usage:
+    python scripts/benchmark_reports.py [supplements] [repeats]
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add parent directory to path to enable imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.analytics import ReportFrame
+from app.db.constants import REPORT_DETAIL_LIMIT
+from app.routes import reports
+
+
+class _Log:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def synthetic_logs(supplements=5, days=365, seed=42):
+    """About two intakes per supplement per day and a symptom most days, for one year"""
+    rng = random.Random(seed)
+    end = datetime.now()
+    intake_logs = []
+    symptom_logs = []
+    for offset in range(days):
+        day = end - timedelta(days=days - offset)
+        for supp in range(supplements):
+            if rng.random() < 0.85:
+                for timing in ('morning', 'evening'):
+                    intake_logs.append(_Log(
+                        supplement_id=f"supp{supp}",
+                        supplement_name=f"Supplement {supp}",
+                        timestamp=(day + timedelta(hours=8 if timing == 'morning' else 20,
+                                                   minutes=rng.randrange(60))).isoformat(),
+                        dosage=rng.choice([100, 200, 500]),
+                        timing=timing,
+                        notes=None
+                    ))
+        for symptom in ('Headache', 'Fatigue', 'Nausea'):
+            if rng.random() < 0.4:
+                symptom_logs.append(_Log(
+                    symptom_type=symptom,
+                    timestamp=(day + timedelta(hours=rng.randrange(24))).isoformat(),
+                    severity=rng.randint(1, 5),
+                    notes=None
+                ))
+    return intake_logs, symptom_logs
+
+
+def report_aggregates(intake_logs, symptom_logs):
+    """Group the logs the way IntakeLog/SymptomLog.get_report_aggregates do"""
+    supplements, days, symptoms = {}, {}, {}
+    for log in intake_logs:
+        supp = supplements.setdefault(log.supplement_id, {
+            'supplement_id': log.supplement_id, 'name': log.supplement_name, 'count': 0,
+            'dates': [], 'dosages': [], 'timings': [], 'notes': []
+        })
+        supp['count'] += 1
+        supp['dates'].append(log.timestamp)
+        for value, values in ((log.dosage, 'dosages'), (log.timing, 'timings'), (log.notes, 'notes')):
+            if value:
+                supp[values].append(value)
+        key = (log.supplement_id, log.timestamp[:10])
+        days.setdefault(key, {'supplement_id': key[0], 'day': key[1], 'count': 0})['count'] += 1
+    for supp in supplements.values():
+        dosage = Counter(supp['dosages']).most_common(1)
+        timing = Counter(supp['timings']).most_common(1)
+        supp['most_common_dosage'] = dosage[0][0] if dosage else None
+        supp['most_common_timing'] = timing[0][0] if timing else None
+        supp['most_common_timing_count'] = timing[0][1] if timing else 0
+        supp['timing_count'] = len(supp['timings'])
+        for values in ('dates', 'dosages', 'timings', 'notes'):
+            supp[values] = supp[values][-REPORT_DETAIL_LIMIT:]
+    for log in symptom_logs:
+        symptom = symptoms.setdefault((log.symptom_type, log.timestamp[:10], log.severity), {
+            'symptom_id': log.symptom_type, 'day': log.timestamp[:10], 'severity': log.severity, 'count': 0
+        })
+        symptom['count'] += 1
+        symptom['notes'] = log.notes
+    return {'supplements': list(supplements.values()), 'days': list(days.values())}, list(symptoms.values())
+
+
+def per_section(intake_logs, symptom_logs):
+    return [
+        reports._generate_intake_summary(intake_logs),
+        reports._generate_symptom_summary(symptom_logs),
+        reports._analyze_correlations(intake_logs, symptom_logs),
+        reports._calculate_streaks('user', intake_logs),
+        reports._calculate_progress('user', intake_logs),
+        reports._generate_recommendations('user', intake_logs, symptom_logs)
+    ]
+
+
+def shared_frame(intake_logs, symptom_logs):
+    return sections(ReportFrame(intake_logs, symptom_logs))
+
+
+def aggregated_frame(intake_aggregates, symptom_aggregates):
+    return sections(ReportFrame.from_aggregates(intake_aggregates, symptom_aggregates))
+
+
+def sections(frame):
+    return [
+        reports._generate_intake_summary(frame),
+        reports._generate_symptom_summary(frame),
+        reports._analyze_correlations(frame),
+        reports._calculate_streaks('user', frame),
+        reports._calculate_progress('user', frame),
+        reports._generate_recommendations('user', frame)
+    ]
+
+
+def best_of(func, repeats, *args):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(supplements=5, repeats=5):
+    intake_logs, symptom_logs = synthetic_logs(supplements)
+    print(f"{len(intake_logs)} intake logs, {len(symptom_logs)} symptom logs")
+
+    intake_aggregates, symptom_aggregates = report_aggregates(intake_logs, symptom_logs)
+    print(f"{len(intake_aggregates['days'])} supplement days from the intake aggregation")
+
+    with patch.object(reports.Supplement, 'find_names_by_ids', return_value={}):
+        assert per_section(intake_logs, symptom_logs) == shared_frame(intake_logs, symptom_logs)
+        assert shared_frame(intake_logs, symptom_logs) == aggregated_frame(intake_aggregates, symptom_aggregates)
+        frame_build = best_of(ReportFrame, repeats, intake_logs, symptom_logs)
+        separate = best_of(per_section, repeats, intake_logs, symptom_logs)
+        shared = best_of(shared_frame, repeats, intake_logs, symptom_logs)
+        aggregated = best_of(aggregated_frame, repeats, intake_aggregates, symptom_aggregates)
+
+    print(f"Frame build:          {frame_build * 1000:8.1f} ms")
+    print(f"Per-section parsing:  {separate * 1000:8.1f} ms")
+    print(f"Shared frame:         {shared * 1000:8.1f} ms  ({separate / shared:.1f}x faster)")
+    print(f"From aggregates:      {aggregated * 1000:8.1f} ms  ({separate / aggregated:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Compare request throughput of the development server (python run.py) with the
+pre-fork production entry point (gunicorn -c gunicorn.conf.py wsgi:app).
+
+Each server is started in turn, warmed up, and sent requests for `seconds` from
+`clients` concurrent client threads. Requests per second and latency
+percentiles are printed for each. The default path, /static/swagger.json,
+serializes the API spec on every request and needs no database.
+
+Usage:
+    python scripts/benchmark_server.py [--path PATH] [--clients N] [--seconds S]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SERVERS = {
+    'dev server (run.py)': ([sys.executable, 'run.py'], 5001),
+    'gunicorn (wsgi:app)': ([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], 5002),
+}
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+
+def load(url, clients, seconds, headers=None):
+    """Request `url` from `clients` threads for `seconds`; returns (latencies, errors)"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def _client():
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=10).read()
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(time.monotonic() - started)
+
+    threads = [threading.Thread(target=_client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def benchmark(name, command, port, path, clients, seconds):
+    env = dict(os.environ, PORT=str(port))
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f"http://127.0.0.1:{port}{path}"
+        if not wait_until_up(url):
+            print(f"{name}: did not start")
+            return
+        load(url, clients, 1)
+        latencies, errors = load(url, clients, seconds)
+        latencies.sort()
+        p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] if latencies else 0
+        print(f"{name:22s} {len(latencies) / seconds:8.1f} req/s   "
+              f"p50 {statistics.median(latencies) * 1000 if latencies else 0:6.1f}ms   "
+              f"p99 {p99 * 1000:6.1f}ms   errors {errors}")
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--path', default='/static/swagger.json')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"GET {args.path} from {args.clients} clients for {args.seconds:.0f}s each")
+    for name, (command, port) in SERVERS.items():
+        benchmark(name, command, port, args.path, args.clients, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark worker boot: the import time of the app package, measured with
+`python -X importtime` in a fresh interpreter, checked against a budget.
+
+Prints the total import time of `app`, the slowest modules it pulls in, and
+any deferred dependency (reportlab, bcrypt, the Swagger spec) that was
+imported eagerly. Exits with 1 when the median time is over the budget or a
+deferred dependency was imported. No database is needed.
+
+Usage:
+    python scripts/benchmark_startup.py [budget_ms] [repeats]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Median import time of `app` allowed, in milliseconds (about 1.5x the ~400ms measured)
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', '600'))
+
+# Modules that must only be imported on first use
+DEFERRED_MODULES = ('reportlab', 'bcrypt', 'app.swagger', 'app.utils.pdf_utils')
+
+
+def measure(module='app'):
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+    Returns:
+        tuple: The module's cumulative import time in microseconds, and
+        {module name: (self us, cumulative us, depth)} for every module it imported.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    lines = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        lines.append((name.rstrip()[1:], int(self_us), int(cumulative_us)))
+
+    # A module's imports are printed before it, indented one level deeper
+    total = 0
+    modules = {}
+    for name, self_us, cumulative_us in reversed(lines):
+        if name.strip() == module and name == name.lstrip():
+            total = cumulative_us
+        elif total and name == name.lstrip():
+            break
+        elif total:
+            modules[name.strip()] = (self_us, cumulative_us, (len(name) - len(name.lstrip())) // 2)
+    return total, modules
+
+
+def eager_imports(modules):
+    """The deferred modules (or their submodules) found among the imported ones"""
+    return sorted(name for name in modules
+                  if any(name == deferred or name.startswith(f"{deferred}.") for deferred in DEFERRED_MODULES))
+
+
+def main(budget_ms=IMPORT_BUDGET_MS, repeats=5):
+    runs = [measure() for _ in range(repeats)]
+    median_ms = statistics.median(total for total, _ in runs) / 1000
+    modules = runs[-1][1]
+
+    print(f"import app: median {median_ms:.1f}ms over {repeats} runs (budget {budget_ms:.0f}ms)")
+    print("slowest direct imports (cumulative):")
+    direct = [(name, times[1]) for name, times in modules.items() if times[2] == 1]
+    for name, cumulative in sorted(direct, key=lambda item: -item[1])[:10]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    eager = eager_imports(modules)
+    if eager:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(eager)}")
+    if median_ms > budget_ms:
+        print(f"FAIL: import time {median_ms:.1f}ms is over the {budget_ms:.0f}ms budget")
+    return not eager and median_ms <= budget_ms
+
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else IMPORT_BUDGET_MS
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    exit(0 if main(budget, repeats) else 1)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Script to pre-generate reports for every active user into the ReportSnapshots collection,
+for digests and to warm the report cache.
+
+Users with intake or symptom logs in the report range are split into partitions that
+run on a process pool. Each partition reads its users' logs with one range aggregation
+per collection, builds the report sections with the same helpers as
+GET /api/reports/<user_id> and writes its snapshots with one bulk write. With
+REPORT_CACHE_BACKEND=mongo the sections are stored in the shared report cache as well.
+
+Runs are resumable: users that already have a snapshot for the period are skipped
+unless --force is given, so an interrupted run only redoes unfinished partitions.
+
+Usage:
+    python scripts/generate_reports.py [--range weekly] [--sections all] [--workers 4]
+                                       [--partition-size 200] [--force]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import multiprocessing
+
+# Add parent directory to path to enable imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.db import get_database as get_db
+from app.analytics import ReportFrame
+from app.models.init_db import init_indexes
+from app.models.intake_log import IntakeLog
+from app.models.symptom_log import SymptomLog
+from app.models.report_cache import ReportCache, REPORT_CACHE_BACKEND
+from app.models.report_snapshot import ReportSnapshot
+from app.routes import reports
+from app.utils.concurrency import fetch_all
+from bson.objectid import ObjectId
+
+
+def active_user_ids(start_date: str, end_date: str) -> list:
+    """Ids of the non-deleted users with intake or symptom logs in the range, in id order"""
+    db = get_db()
+    logged = set()
+    for collection, field in ((db.IntakeLogs, 'intake_date'), (db.SymptomLogs, 'date')):
+        pipeline = [
+            {'$match': {field: {'$gte': start_date, '$lte': end_date}, 'deleted_at': None}},
+            {'$group': {'_id': '$user_id'}}
+        ]
+        logged.update(row['_id'] for row in collection.aggregate(pipeline, allowDiskUse=True))
+    deleted = {user['_id'] for user in db.Users.find({'_id': {'$in': list(logged)}, 'deletedAt': {'$ne': None}},
+                                                      {'_id': 1})}
+    return sorted(str(user_id) for user_id in logged - deleted if user_id)
+
+
+def generate_partition(user_ids: list, report_type: str, end_date: str, sections: list):
+    """
+    Build and store the reports of one partition of users (runs in a worker process).
+    Returns:
+        tuple: (users, snapshots written, seconds).
+    """
+    started = time.perf_counter()
+    end = datetime.fromisoformat(end_date)
+    start_str = reports._report_start(report_type, end).isoformat()
+
+    intake, symptoms, versions = fetch_all(
+        lambda: IntakeLog.get_report_aggregates_for_users(user_ids, start_str, end_date),
+        lambda: SymptomLog.get_report_aggregates_for_users(user_ids, start_str, end_date),
+        lambda: ReportCache.get_versions(user_ids)
+    )
+
+    cache_range = f"{report_type}:{end.date().isoformat()}"
+    cache_keys = reports._section_cache_keys(sections)
+    snapshots = []
+    for user_id in user_ids:
+        frame = ReportFrame.from_aggregates(intake.get(ObjectId(user_id)), symptoms.get(ObjectId(user_id), ()))
+        builders = reports._section_builders(user_id, frame)
+        results = {name: builders[name]() for name in sections}
+        snapshots.append({
+            'user_id': user_id,
+            'report_type': report_type,
+            'period_end': end.date().isoformat(),
+            'start_date': start_str,
+            'end_date': end_date,
+            'sections': results,
+            'version': versions[user_id]
+        })
+        if REPORT_CACHE_BACKEND == 'mongo':
+            for name, value in results.items():
+                ReportCache.set(user_id, cache_range, cache_keys[name], versions[user_id], value)
+
+    written = ReportSnapshot.save_many(snapshots)
+    return len(user_ids), written, time.perf_counter() - started
+
+
+def generate(report_type='weekly', sections=None, workers=None, partition_size=200, force=False):
+    """Generate snapshots for every active user; returns False if any partition failed."""
+    sections = sections or list(reports.REPORT_SECTIONS)
+    workers = workers or os.cpu_count() or 1
+    end = datetime.now()
+    start_str = reports._report_start(report_type, end).isoformat()
+    end_str = end.isoformat()
+    period_end = end.date().isoformat()
+
+    init_indexes(collections=['ReportSnapshots'])
+    user_ids = active_user_ids(start_str, end_str)
+    if not force:
+        done = ReportSnapshot.find_user_ids(report_type, period_end)
+        skipped = len(user_ids)
+        user_ids = [user_id for user_id in user_ids if user_id not in done]
+        skipped -= len(user_ids)
+        if skipped:
+            print(f"Skipping {skipped} users with a {report_type} snapshot for {period_end} (use --force to redo them).")
+    partitions = [user_ids[i:i + partition_size] for i in range(0, len(user_ids), partition_size)]
+    print(f"Generating {report_type} reports for {len(user_ids)} users in {len(partitions)} partitions "
+          f"on {workers} workers.")
+
+    started = time.perf_counter()
+    users_done = written = failed = 0
+    # Workers are spawned so each opens its own database connection
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(generate_partition, partition, report_type, end_str, sections): partition
+                   for partition in partitions}
+        for number, future in enumerate(as_completed(futures), 1):
+            try:
+                users, snapshots, seconds = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[{number}/{len(partitions)}] Partition starting at user {futures[future][0]} failed: {e}")
+                continue
+            users_done += users
+            written += snapshots
+            elapsed = time.perf_counter() - started
+            print(f"[{number}/{len(partitions)}] {users} users in {seconds:.1f}s "
+                  f"({users_done / elapsed:.1f} users/s overall)")
+
+    elapsed = time.perf_counter() - started
+    rate = users_done / elapsed if elapsed else 0.0
+    print(f"Wrote {written} snapshots for {users_done} users in {elapsed:.1f}s ({rate:.1f} users/s).")
+    if failed:
+        print(f"{failed} partitions failed; re-run to retry them.")
+    return not failed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate reports into the ReportSnapshots collection.")
+    parser.add_argument('--range', dest='report_type', default='weekly',
+                        choices=['daily', 'weekly', 'monthly', 'yearly'], help="report range (default: weekly)")
+    parser.add_argument('--sections', default='all',
+                        help="comma-separated report sections, or 'all' (default: all)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--partition-size', type=int, default=200, help="users per partition (default: 200)")
+    parser.add_argument('--force', action='store_true', help="regenerate users that already have a snapshot")
+    args = parser.parse_args(argv)
+
+    if args.sections == 'all':
+        args.sections = list(reports.REPORT_SECTIONS)
+    else:
+        args.sections = [name.strip() for name in args.sections.split(',')]
+        unknown = [name for name in args.sections if name not in reports.REPORT_SECTIONS]
+        if unknown:
+            parser.error(f"unknown sections: {', '.join(unknown)}")
+    if args.partition_size < 1 or (args.workers is not None and args.workers < 1):
+        parser.error("--workers and --partition-size must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    # Reports run in parallel across users, so the spawned workers' correlation tests don't start pools of their own
+    os.environ.setdefault('CORRELATION_WORKERS', '0')
+    args = parse_args()
+    success = generate(args.report_type, args.sections, args.workers, args.partition_size, args.force)
+    exit(0 if success else 1)
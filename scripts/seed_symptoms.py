@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Script to seed the symptom categories and symptoms at deploy time.
+The app also seeds them on startup (unless SEED_SYMPTOMS_ON_STARTUP=0); either way
+the seed is only written when SYMPTOM_SEED_VERSION is newer than the stored version.
+
+Usage:
+    python scripts/seed_symptoms.py          # seed if the stored version is older
+    python scripts/seed_symptoms.py --force  # upsert the seed regardless of the stored version
+"""
+import os
+import sys
+
+# Add parent directory to path to enable imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.symptom_log import SymptomCategoryManager
+from app.models.symptom_catalog import SYMPTOM_SEED_VERSION
+
+
+def seed(force=False):
+    """Seed the symptom catalog, returning True unless it failed."""
+    try:
+        if SymptomCategoryManager.initialize_symptom_data(force=force):
+            print(f"Seeded symptom catalog version {SYMPTOM_SEED_VERSION}.")
+        else:
+            print(f"Symptom catalog version {SYMPTOM_SEED_VERSION} is already seeded.")
+        return True
+    except Exception as e:
+        print(f"Error seeding symptom catalog: {str(e)}")
+        return False
+
+
+if __name__ == "__main__":
+    success = seed('--force' in sys.argv[1:])
+    exit(0 if success else 1)
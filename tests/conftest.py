@@ -0,0 +1,4 @@
+import os
+
+# Apps created by the tests start no background startup thread (see app/config.py)
+os.environ.setdefault('TESTING', 'True')
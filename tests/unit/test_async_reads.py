@@ -0,0 +1,160 @@
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+from flask_jwt_extended import create_access_token
+from starlette.testclient import TestClient
+from bson.objectid import ObjectId
+import asyncio
+import sys
+import os
+import json
+
+# Add the parent directory to path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app
+from app.asgi import create_asgi_app
+from app.models.report_cache import ReportCache
+
+
+def _cursor(documents):
+    """A Motor cursor stand-in: chainable, read with `await cursor.to_list(length)`"""
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(return_value=documents)
+    return cursor
+
+
+class TestAsyncReads(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_app()
+        self.flask_app.config['TESTING'] = True
+        self.client = TestClient(create_asgi_app(self.flask_app))
+
+        self.user_id = str(ObjectId())
+        with self.flask_app.app_context():
+            self.token = create_access_token(identity=self.user_id)
+        self.headers = {'Authorization': f'Bearer {self.token}'}
+
+        self.db = MagicMock()
+        self.db.TokenBlacklist.find_one = AsyncMock(return_value=None)
+        self.db.ReportVersions.find_one = AsyncMock(return_value={'version': 3})
+        patcher = patch('app.models.async_reads.get_async_db', return_value=self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        ReportCache.clear()
+
+    def test_me_returns_the_user(self):
+        """Test /api/auth/me is answered on the async path with the Flask route's body."""
+        self.db.Users.find_one = AsyncMock(return_value={
+            '_id': ObjectId(self.user_id), 'userId': 'u-1', 'name': 'Test User',
+            'email': 'test@example.com', 'age': 30, 'gender': 'female'
+        })
+
+        response = self.client.get('/api/auth/me', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['email'], 'test@example.com')
+        self.db.Users.find_one.assert_awaited_once_with({'_id': ObjectId(self.user_id), 'deletedAt': None})
+
+    def test_token_errors_match_the_flask_routes(self):
+        """Test missing, malformed and revoked tokens get the same status and body as under Flask."""
+        flask_client = self.flask_app.test_client()
+        for headers in ({}, {'Authorization': 'Bearer abc'}, {'Authorization': 'Basic abc'}):
+            response = self.client.get('/api/intake_logs/today', headers=headers)
+            expected = flask_client.get('/api/intake_logs/today', headers=headers)
+            self.assertEqual((response.status_code, response.content), (expected.status_code, expected.data))
+
+        self.db.TokenBlacklist.find_one = AsyncMock(return_value={'_id': ObjectId()})
+        response = self.client.get('/api/auth/me', headers=self.headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_revoked')
+
+    def test_today_intake_logs(self):
+        """Test today's intake logs are read through the async driver."""
+        log_id = ObjectId()
+        self.db.IntakeLogs.find.return_value = _cursor([{
+            '_id': log_id, 'user_id': ObjectId(self.user_id), 'tracked_supplement_id': ObjectId(),
+            'supplement_name': 'Vitamin C', 'intake_date': '2025-04-19', 'dosage_taken': 500
+        }])
+
+        response = self.client.get('/api/intake_logs/today', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([log['_id'] for log in response.json()], [str(log_id)])
+        query = self.db.IntakeLogs.find.call_args[0][0]
+        self.assertEqual(query['user_id'], ObjectId(self.user_id))
+        self.assertIsNone(query['deleted_at'])
+
+    def test_logs_for_date_load_the_symptom_catalog_off_the_event_loop(self):
+        """Test the symptom details, read with pymongo when stale, are not loaded on the event loop."""
+        symptom_id = ObjectId()
+        self.db.SymptomLogs.find.return_value = _cursor([{
+            '_id': ObjectId(), 'user_id': ObjectId(self.user_id), 'symptom_id': symptom_id,
+            'date': '2025-04-19', 'severity': 'mild', 'notes': ''
+        }])
+        on_event_loop = []
+
+        def _details():
+            try:
+                asyncio.get_running_loop()
+                on_event_loop.append(True)
+            except RuntimeError:
+                on_event_loop.append(False)
+            return {str(symptom_id): {'name': 'Headache', 'icon': 'h', 'categoryName': 'Pain', 'categoryIcon': 'p'}}
+
+        with patch('app.routes.async_reads.SymptomLog.get_symptom_details', side_effect=_details), \
+                patch('app.routes.async_reads.symptom_writes.flush'):
+            response = self.client.get('/api/symptom-logs/date/2025-04-19', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([log['symptom_name'] for log in response.json()['logs']], ['Headache'])
+        self.assertEqual(on_event_loop, [False])
+
+    def test_report_is_built_from_async_aggregates_and_cached(self):
+        """Test the report awaits its aggregations, computes its sections and serves the next request from cache."""
+        self.db.IntakeLogs.aggregate.side_effect = [
+            _cursor([{'supplement_id': 's1', 'name': 'Vitamin C', 'count': 1, 'dates': ['2025-04-19'],
+                      'dosages': [500], 'timings': [], 'notes': [], 'timing_count': 0}]),
+            _cursor([]),
+            _cursor([]),
+            _cursor([{'supplement_id': 's1', 'day': '2025-04-19', 'count': 1}])
+        ]
+        self.db.SymptomLogs.aggregate.return_value = _cursor([])
+
+        response = self.client.get(f'/api/reports/{self.user_id}', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['userId'], self.user_id)
+        self.assertEqual(set(data) - {'userId', 'reportType', 'startDate', 'endDate'},
+                         {'intakeSummary', 'symptomSummary', 'streaks'})
+        self.assertIn('fetch;dur=', response.headers['Server-Timing'])
+
+        response = self.client.get(f'/api/reports/{self.user_id}', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('fetch;dur=', response.headers['Server-Timing'])
+        self.assertEqual(self.db.IntakeLogs.aggregate.call_count, 4)
+
+    def test_report_of_another_user_is_denied(self):
+        """Test a non-admin cannot read another user's report."""
+        self.db.Users.find_one = AsyncMock(return_value={'_id': ObjectId(self.user_id), 'role': 'user'})
+
+        response = self.client.get(f'/api/reports/streaks/{ObjectId()}', headers=self.headers)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {'error': 'Access denied'})
+
+    def test_other_requests_fall_through_to_flask(self):
+        """Test routes and methods without an async handler are served by the Flask app."""
+        response = self.client.get('/readyz')
+        self.assertIn(response.status_code, (200, 503))
+        self.assertIn('phase', response.json())
+
+        response = self.client.post('/api/tracker_supplements_list/', content=json.dumps({}))
+        self.assertEqual(response.status_code, 401)
+        self.db.TokenBlacklist.find_one.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
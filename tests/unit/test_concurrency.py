@@ -0,0 +1,171 @@
+import unittest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+import time
+import threading
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.utils import concurrency
+from app.utils.concurrency import fetch_all, FetchTimeout, WriteCoalescer, BoundedExecutor, PoolBusy
+from app.models.symptom_log import _flush_symptom_writes
+
+
+class TestFetchAll(unittest.TestCase):
+    def test_results_in_call_order(self):
+        self.assertEqual(fetch_all(lambda: (time.sleep(0.05), 'slow')[1], lambda: 'fast'), ['slow', 'fast'])
+        self.assertEqual(fetch_all(), [])
+
+    def test_fetches_overlap(self):
+        # Each call waits for the other to start: only possible if they run concurrently
+        barrier = threading.Barrier(2, timeout=2)
+        started = time.perf_counter()
+        fetch_all(barrier.wait, barrier.wait)
+        self.assertLess(time.perf_counter() - started, 1)
+
+    def test_exception_is_reraised(self):
+        def failing():
+            raise ValueError("Error finding symptom logs")
+
+        with self.assertRaisesRegex(ValueError, "Error finding symptom logs"):
+            fetch_all(lambda: 'ok', failing)
+
+    def test_timeout(self):
+        release = threading.Event()
+        try:
+            with self.assertRaises(FetchTimeout):
+                fetch_all(lambda: 'ok', lambda: release.wait(5), timeout=0.05)
+        finally:
+            release.set()
+
+
+class TestComputePool(unittest.TestCase):
+    def test_in_flight_tasks_are_bounded(self):
+        release = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pool = BoundedExecutor(executor, max_pending=2, wait=0.05)
+            first = pool.submit(release.wait, 5)
+            pool.submit(lambda: 'queued')
+            with self.assertRaises(PoolBusy):
+                pool.submit(lambda: 'rejected')
+
+            # Finished tasks free their slots
+            release.set()
+            first.result(5)
+            self.assertEqual(pool.submit(lambda: 'ok').result(5), 'ok')
+
+    @patch('app.utils.concurrency._process_pool', None)
+    @patch('app.utils.concurrency.CORRELATION_WORKERS', 2)
+    @patch('app.utils.concurrency.ProcessPoolExecutor')
+    def test_pool_does_not_fork_the_calling_process(self, mock_executor):
+        pool = concurrency.compute_pool()
+
+        self.assertIsInstance(pool, BoundedExecutor)
+        self.assertIs(concurrency.compute_pool(), pool)
+        context = mock_executor.call_args.kwargs['mp_context']
+        self.assertIn(context.get_start_method(), ('forkserver', 'spawn'))
+
+
+class TestWriteCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.flushed = []
+        self.done = threading.Event()
+
+        def flush(writes):
+            self.flushed.append(writes)
+            self.done.set()
+
+        self.coalescer = WriteCoalescer(1, flush)
+        self.addCleanup(self.coalescer.close)
+
+    def test_latest_value_is_flushed_once_after_the_window(self):
+        for severity in ('mild', 'severe', 'average'):
+            self.coalescer.submit(('user1', 'symptom1', '2025-04-19'), severity)
+        self.coalescer.submit(('user1', 'symptom2', '2025-04-19'), 'mild')
+
+        # Each key is due a window after its own first write, so the two may be flushed apart
+        deadline = time.monotonic() + 5
+        while sum(map(len, self.flushed)) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(self.coalescer.has_pending())
+        self.assertEqual([write for writes in self.flushed for write in writes],
+                         [(('user1', 'symptom1', '2025-04-19'), 'average'),
+                          (('user1', 'symptom2', '2025-04-19'), 'mild')])
+
+    def test_flush_one_user_for_reads(self):
+        self.coalescer.window = 60
+        self.coalescer.submit(('user1', 'symptom1', '2025-04-19'), 'mild')
+        self.coalescer.submit(('user2', 'symptom1', '2025-04-19'), 'severe')
+
+        self.assertEqual(self.coalescer.flush('user1'), 1)
+        self.assertEqual(self.flushed, [[(('user1', 'symptom1', '2025-04-19'), 'mild')]])
+
+        # Pending writes are written when the worker shuts down
+        self.coalescer.close()
+        self.assertEqual(self.flushed[-1], [(('user2', 'symptom1', '2025-04-19'), 'severe')])
+        self.assertFalse(self.coalescer.enabled)
+
+    @patch('app.utils.concurrency.COALESCE_RETRY_SECONDS', 30)
+    def test_failed_writes_are_queued_again_with_backoff(self):
+        self.coalescer.window = 60
+        results = [RuntimeError('Could not connect to MongoDB'), [(('user1', 'symptom2', '2025-04-19'), 'mild')], None]
+
+        def flush(writes):
+            self.flushed.append(writes)
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        self.coalescer._flush = flush
+        self.coalescer.submit(('user1', 'symptom1', '2025-04-19'), 'severe')
+        self.coalescer.submit(('user1', 'symptom2', '2025-04-19'), 'mild')
+
+        # Nothing is lost when the database is down, and the retry waits for its backoff
+        self.assertEqual(self.coalescer.flush('user1'), 0)
+        self.assertEqual(self.coalescer.flush('user1', due_only=True), 0)
+        self.assertEqual(len(self.flushed), 1)
+
+        # Only the write that failed again is retried
+        self.assertEqual(self.coalescer.flush('user1'), 1)
+        self.assertEqual(self.coalescer.flush('user1'), 1)
+        self.assertEqual(self.flushed[-1], [(('user1', 'symptom2', '2025-04-19'), 'mild')])
+        self.assertFalse(self.coalescer.has_pending())
+
+    @patch('app.utils.concurrency.COALESCE_RETRY_LIMIT', 2)
+    def test_failed_write_is_dropped_after_the_retry_limit_or_replaced(self):
+        self.coalescer.window = 60
+        self.coalescer._flush = lambda writes: writes
+        self.coalescer.submit(('user1', 'symptom1', '2025-04-19'), 'severe')
+
+        self.coalescer.flush()
+        self.assertTrue(self.coalescer.has_pending())
+        self.coalescer.flush()
+        self.assertFalse(self.coalescer.has_pending())
+
+        # A value submitted while its older value was being written wins over the retry
+        def flush(writes):
+            self.coalescer.submit(('user1', 'symptom1', '2025-04-19'), 'mild')
+            return writes
+        self.coalescer._flush = flush
+        self.coalescer.submit(('user1', 'symptom1', '2025-04-19'), 'severe')
+        self.coalescer.flush()
+        self.assertEqual(self.coalescer._pending[('user1', 'symptom1', '2025-04-19')][1:], ('mild', 0))
+
+    @patch('app.models.symptom_log.SymptomLog.upsert_day')
+    def test_symptom_flush_returns_the_failed_days(self, mock_upsert):
+        mock_upsert.side_effect = [None, RuntimeError('Could not connect to MongoDB')]
+        writes = [
+            (('user1', 'symptom1', '2025-04-19'), {'severity': 'mild', 'notes': ''}),
+            (('user1', 'symptom1', '2025-04-20'), {'severity': 'severe', 'notes': ''}),
+            (('user1', 'symptom2', '2025-04-20'), {'severity': 'mild', 'notes': ''})
+        ]
+
+        self.assertEqual(_flush_symptom_writes(writes), writes[1:])
+        mock_upsert.assert_any_call('user1', '2025-04-20', [
+            {'symptom_id': 'symptom1', 'severity': 'severe', 'notes': ''},
+            {'symptom_id': 'symptom2', 'severity': 'mild', 'notes': ''}
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
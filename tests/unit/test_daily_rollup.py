@@ -0,0 +1,194 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from bson.objectid import ObjectId
+import sys
+import os
+
+# Add the parent directory to path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.models.daily_rollup import DailyRollup
+from app.models.intake_log import IntakeLog
+from app.models.symptom_log import SymptomLog
+from app.db.utils import severity_code
+
+
+class TestDailyRollup(unittest.TestCase):
+    def setUp(self):
+        self.user_id = ObjectId()
+        self.supplement_id = ObjectId()
+        self.symptom_id = ObjectId()
+        self.mock_db = MagicMock()
+        self.intake_log = {
+            '_id': ObjectId(),
+            'user_id': self.user_id,
+            'tracked_supplement_id': self.supplement_id,
+            'supplement_name': 'Vitamin C',
+            'unit': 'mg',
+            'intake_date': '2025-04-19',
+            'dosage_taken': 500
+        }
+        self.symptom_log = {
+            '_id': ObjectId(),
+            'user_id': self.user_id,
+            'symptom_id': self.symptom_id,
+            'date': '2025-04-19',
+            'severity': 'severe'
+        }
+
+    def test_severity_code(self):
+        self.assertEqual(severity_code('none'), 0)
+        self.assertEqual(severity_code('mild'), 1)
+        self.assertEqual(severity_code('severe'), 3)
+        self.assertEqual(severity_code(2), 2)
+        self.assertEqual(severity_code('unknown'), 0)
+
+    def test_record_intake_increments(self):
+        DailyRollup.record_intake(self.intake_log, db=self.mock_db)
+
+        query, update = self.mock_db.DailyRollups.update_one.call_args[0]
+        self.assertEqual(query, {'user_id': self.user_id, 'date': '2025-04-19'})
+        key = f"intake.{self.supplement_id}"
+        self.assertEqual(update['$inc'], {f"{key}.count": 1, f"{key}.dosage": 500.0})
+        self.assertEqual(update['$set'][f"{key}.name"], 'Vitamin C')
+        self.assertTrue(self.mock_db.DailyRollups.update_one.call_args[1]['upsert'])
+
+    def test_record_intake_removal_cleans_up(self):
+        DailyRollup.record_intake(self.intake_log, sign=-1, db=self.mock_db)
+
+        calls = self.mock_db.DailyRollups.update_one.call_args_list
+        self.assertEqual(len(calls), 2)
+        key = f"intake.{self.supplement_id}"
+        self.assertEqual(calls[0][0][1]['$inc'], {f"{key}.count": -1, f"{key}.dosage": -500.0})
+        self.assertFalse(calls[0][1]['upsert'])
+        self.assertEqual(calls[1][0][1], {'$unset': {key: ""}})
+
+    def test_record_symptom_uses_max(self):
+        DailyRollup.record_symptom(self.symptom_log, db=self.mock_db)
+        update = self.mock_db.DailyRollups.update_one.call_args[0][1]
+        self.assertEqual(update['$max'], {f"symptoms.{self.symptom_id}": 3})
+
+        DailyRollup.record_symptom(dict(self.symptom_log, severity='mild'), replace=True, db=self.mock_db)
+        update = self.mock_db.DailyRollups.update_one.call_args[0][1]
+        self.assertEqual(update['$set'][f"symptoms.{self.symptom_id}"], 1)
+
+    def test_rollup_errors_do_not_fail_writes(self):
+        self.mock_db.DailyRollups.update_one.side_effect = Exception('write conflict')
+        DailyRollup.record_intake(self.intake_log, db=self.mock_db)
+        DailyRollup.record_symptom(self.symptom_log, db=self.mock_db)
+
+        # Both failed days are recorded for repair
+        marks = [call[0][0] for call in self.mock_db.RollupRepairs.update_one.call_args_list]
+        self.assertEqual(marks, [{'user_id': self.user_id, 'date': '2025-04-19'}] * 2)
+
+    def test_bitmap_errors_are_recorded_for_repair(self):
+        self.mock_db.PresenceBitmaps.update_one.side_effect = Exception('not primary')
+        DailyRollup.record_intake(self.intake_log, db=self.mock_db)
+
+        self.mock_db.RollupRepairs.update_one.assert_called_once()
+        self.assertTrue(self.mock_db.RollupRepairs.update_one.call_args[1]['upsert'])
+
+    @patch('app.models.intake_log.get_db')
+    def test_intake_log_delete_updates_rollup(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        self.mock_db.IntakeLogs.find_one_and_delete.return_value = self.intake_log
+
+        with patch('app.models.intake_log.DailyRollup.record_intake') as mock_record:
+            self.assertTrue(IntakeLog.delete(str(self.intake_log['_id'])))
+            mock_record.assert_called_once_with(self.intake_log, sign=-1, db=self.mock_db)
+
+    @patch('app.models.intake_log.get_db')
+    def test_intake_log_update_moves_rollup(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        moved_log = dict(self.intake_log, intake_date='2025-04-20')
+        self.mock_db.IntakeLogs.find_one.side_effect = [self.intake_log, moved_log]
+
+        with patch('app.models.intake_log.DailyRollup.record_intake') as mock_record:
+            IntakeLog.update(str(self.intake_log['_id']), {'intake_date': '2025-04-20'})
+            self.assertEqual(mock_record.call_args_list[0][0][0], self.intake_log)
+            self.assertEqual(mock_record.call_args_list[0][1]['sign'], -1)
+            self.assertEqual(mock_record.call_args_list[1][0][0], moved_log)
+
+    @patch('app.models.symptom_log.get_db')
+    def test_symptom_log_delete_updates_rollup(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        self.mock_db.SymptomLogs.find_one.return_value = self.symptom_log
+
+        with patch('app.models.symptom_log.DailyRollup.remove_symptom') as mock_remove:
+            SymptomLog.delete(self.symptom_log['_id'])
+            mock_remove.assert_called_once_with(self.symptom_log, db=self.mock_db)
+
+    @patch('app.models.daily_rollup.get_db')
+    def test_rebuild_for_user(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        self.mock_db.IntakeLogs.aggregate.return_value = [{
+            '_id': {'user_id': self.user_id, 'date': '2025-04-19', 'supplement_id': self.supplement_id},
+            'count': 2, 'dosage': 1000.0, 'name': 'Vitamin C', 'unit': 'mg'
+        }]
+        self.mock_db.SymptomLogs.find.return_value = [
+            self.symptom_log,
+            dict(self.symptom_log, severity='mild'),
+            dict(self.symptom_log, date='2025-04-20', severity='average')
+        ]
+
+        written = DailyRollup.rebuild(str(self.user_id))
+
+        self.assertEqual(written, 2)
+        # Rollups are upserted in place rather than deleted and re-inserted
+        self.mock_db.DailyRollups.delete_many.assert_not_called()
+        self.mock_db.DailyRollups.insert_many.assert_not_called()
+        *upserts, stale = self.mock_db.DailyRollups.bulk_write.call_args[0][0]
+        documents = {op._filter['date']: op._doc['$set'] for op in upserts}
+        self.assertTrue(all(op._upsert and op._filter['user_id'] == self.user_id for op in upserts))
+        self.assertEqual(documents['2025-04-19']['intake'][str(self.supplement_id)]['count'], 2)
+        self.assertEqual(documents['2025-04-19']['symptoms'][str(self.symptom_id)], 3)
+        self.assertEqual(documents['2025-04-20']['symptoms'][str(self.symptom_id)], 2)
+        # Days without logs are deleted, unless the write path updated them meanwhile
+        self.assertEqual(stale._filter['date'], {'$nin': ['2025-04-19', '2025-04-20']})
+        self.assertIn('$not', stale._filter['updated_at'])
+
+    @patch('app.models.daily_rollup.get_db')
+    def test_rebuild_all_users_one_at_a_time(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        other_user = ObjectId()
+        # The user id listing, then each user's intake totals
+        self.mock_db.IntakeLogs.aggregate.side_effect = [[{'_id': self.user_id}, {'_id': other_user}], [], []]
+        self.mock_db.SymptomLogs.aggregate.return_value = [{'_id': self.user_id}]
+        self.mock_db.DailyRollups.aggregate.return_value = []
+        self.mock_db.SymptomLogs.find.return_value = []
+
+        DailyRollup.rebuild()
+
+        users = {call[0][0][-1]._filter['user_id'] for call in self.mock_db.DailyRollups.bulk_write.call_args_list}
+        self.assertEqual(users, {self.user_id, other_user})
+        self.assertEqual(self.mock_db.DailyRollups.bulk_write.call_count, 2)
+
+    @patch('app.models.daily_rollup.ReportCache')
+    @patch('app.models.daily_rollup.StreakState')
+    @patch('app.models.daily_rollup.PresenceBitmap')
+    @patch('app.models.daily_rollup.get_db')
+    def test_repair_rebuilds_recorded_days(self, mock_get_db, mock_bitmap, mock_streaks, mock_cache):
+        mock_get_db.return_value = self.mock_db
+        entry = {'_id': ObjectId(), 'user_id': self.user_id, 'date': '2025-04-19', 'failed_at': '2025-04-19T08:00:00'}
+        self.mock_db.RollupRepairs.find.return_value.sort.return_value = [entry]
+        self.mock_db.IntakeLogs.aggregate.return_value = []
+        self.mock_db.SymptomLogs.find.return_value = [self.symptom_log]
+
+        self.assertEqual(DailyRollup.repair(), 1)
+
+        match = self.mock_db.SymptomLogs.find.call_args[0][0]
+        self.assertEqual(match['date'], {'$gte': '2025-04-19', '$lt': '2025-04-20'})
+        upsert, stale = self.mock_db.DailyRollups.bulk_write.call_args[0][0]
+        self.assertEqual(upsert._doc['$set']['symptoms'], {str(self.symptom_id): 3})
+        self.assertEqual(stale._filter['date'], {'$nin': ['2025-04-19'], '$eq': '2025-04-19'})
+        mock_bitmap.rebuild.assert_called_once_with(self.user_id)
+        mock_streaks.reset.assert_called_once_with(self.user_id)
+        mock_cache.invalidate.assert_called_once_with(self.user_id)
+        # A newer failure of the same day keeps its record
+        self.mock_db.RollupRepairs.delete_one.assert_called_once_with(
+            {'_id': entry['_id'], 'failed_at': entry['failed_at']}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ from bson.objectid import ObjectId
 import sys
 import os
 import json
+import base64
 from datetime import datetime, timedelta
 
 # Add the parent directory to path to allow importing app modules
@@ -13,7 +14,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 from app import create_app
 from app.models.intake_log import IntakeLog
+from app.models.presence_bitmap import to_words
 from app.routes.intake_logs import bp as intake_logs_bp
+from app.utils.pagination import decode_cursor
 
 class TestIntakeLogsRoutes(unittest.TestCase):
 
@@ -173,6 +176,29 @@ class TestIntakeLogsRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         mock_find.assert_called_once_with(ObjectId(self.user_id), supplement_id)
 
+    @patch('app.routes.intake_logs.IntakeLog.find_by_supplement_id')
+    def test_get_intake_logs_paginated(self, mock_find):
+        """Test paging through a supplement's intake history with limit/after."""
+        last_id = ObjectId()
+        mock_log = MagicMock(_id=last_id, intake_date='2023-01-15')
+        mock_log.to_dict.return_value = {**self.log_data, '_id': str(last_id)}
+        mock_find.return_value = [mock_log]
+        
+        supplement_id = str(ObjectId())
+        response = self.client.get(f'/api/intake_logs/?supplement_id={supplement_id}&limit=1',
+                                  headers=self.headers)
+        
+        self.assertEqual(response.status_code, 200)
+        mock_find.assert_called_once_with(ObjectId(self.user_id), supplement_id, limit=1, after=None)
+        self.assertEqual(decode_cursor(response.headers['X-Next-Cursor']), ('2023-01-15', last_id))
+
+    def test_get_intake_logs_invalid_limit(self):
+        """Test that an out-of-range limit is rejected."""
+        response = self.client.get('/api/intake_logs/?limit=0', headers=self.headers)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('limit', json.loads(response.data)['error'])
+
     @patch('app.routes.intake_logs.IntakeLog.find_by_date_range')
     def test_get_intake_logs_value_error(self, mock_find):
         """Test ValueError when getting intake logs."""
@@ -335,5 +361,65 @@ class TestIntakeLogsRoutes(unittest.TestCase):
         mock_update.assert_called_once_with(log_id, update_data)
 
 
+    @patch('app.routes.intake_logs.DailyRollup.find_by_date_range')
+    def test_get_intake_series_downsampled(self, mock_find):
+        """Test a long intake series is reduced to the requested number of points."""
+        supplement_id = str(ObjectId())
+        start = datetime(2022, 1, 1)
+        mock_find.return_value = [
+            MagicMock(date=(start + timedelta(days=day)).strftime('%Y-%m-%d'),
+                      intake={supplement_id: {'count': 1 + day % 2, 'dosage': 500 * (1 + day % 2),
+                                              'name': 'Vitamin C', 'unit': 'mg'}})
+            for day in range(730)
+        ]
+
+        response = self.client.get('/api/intake_logs/series?from=2022-01-01&to=2023-12-31&points=100',
+                                   headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        mock_find.assert_called_once_with(self.user_id, '2022-01-01', '2023-12-31')
+        series = data['series'][0]
+        self.assertEqual((series['supplement_id'], series['name'], series['unit']), (supplement_id, 'Vitamin C', 'mg'))
+        self.assertEqual(series['days'], 730)
+        self.assertEqual(len(series['points']), 100)
+        self.assertEqual(series['points'][0], {'date': '2022-01-01', 'dosage': 500, 'count': 1})
+        self.assertEqual(series['points'][-1]['date'], '2023-12-31')
+
+    def test_get_intake_series_invalid_args(self):
+        """Test series arguments are validated."""
+        for query in ('points=1', 'points=abc', 'metric=notes', 'from=2023-02-01&to=2023-01-01'):
+            response = self.client.get(f'/api/intake_logs/series?{query}', headers=self.headers)
+            self.assertEqual(response.status_code, 400, query)
+
+    @patch('app.models.presence_bitmap.get_db')
+    def test_get_intake_calendar(self, mock_get_db):
+        """Test the calendar counts and encodes the days of each bitmap."""
+        supplement_id = str(ObjectId())
+        mock_get_db.return_value.PresenceBitmaps.find_one.return_value = {
+            'year': 2024,
+            'intake': to_words(0b111 | 1 << 365),
+            'symptoms': to_words(1 << 61),
+            'supplements': {supplement_id: to_words(0b101)}
+        }
+
+        response = self.client.get('/api/intake_logs/calendar?year=2024', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual((data['year'], data['daysInYear']), (2024, 366))
+        self.assertEqual(data['intake']['days'], 4)
+        self.assertEqual(data['symptoms']['days'], 1)
+        self.assertEqual(data['supplements'][supplement_id]['days'], 2)
+        bitmap = base64.b64decode(data['intake']['bitmap'])
+        self.assertEqual(len(bitmap), 46)
+        self.assertEqual((bitmap[0], bitmap[45]), (0b111, 0b100000))
+
+    def test_get_intake_calendar_invalid_year(self):
+        """Test the calendar year is validated."""
+        for query in ('year=abc', 'year=12'):
+            response = self.client.get(f'/api/intake_logs/calendar?{query}', headers=self.headers)
+            self.assertEqual(response.status_code, 400, query)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
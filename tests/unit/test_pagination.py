@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from bson.objectid import ObjectId
+import sys
+import os
+
+# Add the parent directory to path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.utils.pagination import (
+    encode_cursor, decode_cursor, parse_pagination_args, next_cursor, MAX_PAGE_SIZE
+)
+from app.db.utils import keyset_query
+from app.models.intake_log import IntakeLog
+from app.models.symptom_log import SymptomLog
+
+
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        self.log_id = ObjectId()
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor('2025-04-19', self.log_id)
+        self.assertEqual(decode_cursor(cursor), ('2025-04-19', self.log_id))
+
+    def test_decode_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+
+    def test_parse_no_pagination(self):
+        self.assertEqual(parse_pagination_args({}), {})
+
+    def test_parse_limit_and_after(self):
+        cursor = encode_cursor('2025-04-19', self.log_id)
+        page = parse_pagination_args({'limit': '50', 'after': cursor})
+        self.assertEqual(page, {'limit': 50, 'after': ('2025-04-19', self.log_id)})
+
+    def test_parse_after_without_limit_uses_max(self):
+        cursor = encode_cursor('2025-04-19', self.log_id)
+        self.assertEqual(parse_pagination_args({'after': cursor})['limit'], MAX_PAGE_SIZE)
+
+    def test_parse_invalid_limit(self):
+        for value in ('abc', '0', str(MAX_PAGE_SIZE + 1)):
+            with self.assertRaises(ValueError):
+                parse_pagination_args({'limit': value})
+
+    def test_next_cursor(self):
+        logs = [MagicMock(_id=ObjectId(), date='2025-04-18'), MagicMock(_id=self.log_id, date='2025-04-19')]
+        self.assertIsNone(next_cursor(logs, {}, 'date'))
+        self.assertIsNone(next_cursor(logs, {'limit': 3, 'after': None}, 'date'))
+        cursor = next_cursor(logs, {'limit': 2, 'after': None}, 'date')
+        self.assertEqual(decode_cursor(cursor), ('2025-04-19', self.log_id))
+
+    def test_keyset_query(self):
+        base = {'user_id': 'u1'}
+        self.assertIs(keyset_query(base, 'date'), base)
+        query = keyset_query(base, 'date', ('2025-04-19', self.log_id))
+        self.assertEqual(query['$and'][0], base)
+        self.assertEqual(query['$and'][1]['$or'], [
+            {'date': {'$gt': '2025-04-19'}},
+            {'date': '2025-04-19', '_id': {'$gt': self.log_id}}
+        ])
+
+    @patch('app.models.intake_log.get_db')
+    def test_intake_log_find_page_sorts_and_limits(self, mock_get_db):
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+        cursor = mock_db.IntakeLogs.find.return_value
+        cursor.sort.return_value.limit.return_value = [{'_id': self.log_id, 'intake_date': '2025-04-19'}]
+
+        user_id = str(ObjectId())
+        logs = IntakeLog.find_by_user_id(user_id, limit=10, after=('2025-04-18', ObjectId()))
+
+        self.assertEqual(len(logs), 1)
+        cursor.sort.assert_called_once_with([('intake_date', 1), ('_id', 1)])
+        cursor.sort.return_value.limit.assert_called_once_with(10)
+        query = mock_db.IntakeLogs.find.call_args[0][0]
+        self.assertIn('$and', query)
+
+    @patch('app.models.symptom_log.get_db')
+    def test_symptom_log_unpaged_query_unchanged(self, mock_get_db):
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+        mock_db.SymptomLogs.find.return_value = []
+
+        user_id = ObjectId()
+        SymptomLog.find_by_date_range(user_id, '2025-04-01', '2025-04-30')
+
+        mock_db.SymptomLogs.find.assert_called_once_with({
+            'user_id': user_id,
+            'date': {'$gte': '2025-04-01', '$lte': '2025-04-30'},
+            'deleted_at': None
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
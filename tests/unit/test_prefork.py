@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch, MagicMock, call
+import sys
+import os
+
+# Add the parent directory to path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.db import db
+from app.utils import prefork
+
+
+class TestPrefork(unittest.TestCase):
+    def setUp(self):
+        db.reset_client()
+
+    def tearDown(self):
+        db.reset_client()
+
+    @patch('app.db.db.MongoClient')
+    def test_client_is_reused_across_calls(self, mock_client_class):
+        """Test get_database connects once per process and reuses the client."""
+        first = db.get_database()
+        second = db.get_database()
+
+        mock_client_class.assert_called_once()
+        mock_client_class.return_value.admin.command.assert_called_once_with('ping')
+        self.assertIs(first, second)
+
+    @patch('app.db.db.os.getpid')
+    @patch('app.db.db.MongoClient')
+    def test_client_is_rebuilt_when_the_pid_changes(self, mock_client_class, mock_getpid):
+        """Test a forked process does not use the client its parent created."""
+        parent_client, child_client = MagicMock(), MagicMock()
+        mock_client_class.side_effect = [parent_client, child_client]
+        mock_getpid.return_value = 100
+        db.get_database()
+
+        mock_getpid.return_value = 101
+        db.get_database()
+        db.get_database()
+
+        self.assertEqual(mock_client_class.call_count, 2)
+        self.assertIs(db._client, child_client)
+        parent_client.close.assert_not_called()
+
+    @patch('app.db.db.MongoClient')
+    def test_after_fork_resets_the_client(self, mock_client_class):
+        """Test after_fork drops the inherited client without closing it and resumes startup."""
+        db.get_database()
+        app = MagicMock()
+        startup = app.extensions.get.return_value
+        startup.ready = False
+
+        prefork.after_fork(app)
+
+        self.assertIsNone(db._client)
+        mock_client_class.return_value.close.assert_not_called()
+        startup.start.assert_called_once_with(mode='background')
+
+    # Patched last: resolving the other targets goes through importlib.import_module
+    @patch('app.utils.prefork.importlib.import_module')
+    @patch('app.utils.prefork.gc')
+    @patch('app.utils.prefork.reset_client')
+    def test_preload_freezes_after_loading_the_catalogs(self, mock_reset, mock_gc, mock_import):
+        """Test preload runs startup inline, loads every catalog, closes the client, then freezes."""
+        order = MagicMock()
+        app = MagicMock()
+        startup = app.extensions.get.return_value
+        startup.run_once.return_value = True
+        startup.ready = True
+        order.attach_mock(startup.run_once, 'startup')
+        order.attach_mock(mock_reset, 'reset_client')
+        order.attach_mock(mock_gc.freeze, 'freeze')
+        catalogs = []
+        for catalog in prefork.PRELOAD_CATALOGS:
+            patcher = patch.object(catalog, 'get')
+            order.attach_mock(patcher.start(), catalog.__name__)
+            self.addCleanup(patcher.stop)
+            catalogs.append(call.__getattr__(catalog.__name__)())
+
+        prefork.preload(app)
+
+        self.assertEqual(order.mock_calls,
+                         [call.startup()] + catalogs + [call.reset_client(close=True), call.freeze()])
+        startup.start.assert_not_called()
+        self.assertEqual(mock_import.call_count, len(prefork.PRELOAD_MODULES))
+
+
+if __name__ == '__main__':
+    unittest.main()
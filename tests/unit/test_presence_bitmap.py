@@ -0,0 +1,139 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from bson.objectid import ObjectId
+from datetime import date, timedelta
+import base64
+import sys
+import os
+
+# Add the parent directory to path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.models.presence_bitmap import (
+    PresenceBitmap, INTAKE, SYMPTOMS, WORD_MASK, supplement_field, to_int, to_words, day_list, to_base64
+)
+
+
+def _bits(days):
+    bits = 0
+    for day in days:
+        bits |= 1 << (day - date(day.year, 1, 1)).days
+    return bits
+
+
+class TestPresenceBitmap(unittest.TestCase):
+    def setUp(self):
+        self.user_id = ObjectId()
+        self.mock_db = MagicMock()
+
+    def _store(self, days, field=INTAKE):
+        """Answer find_one/find from per-year bitmaps built out of `days`"""
+        years = {}
+        for day in days:
+            years.setdefault(day.year, []).append(day)
+        documents = {year: {'year': year, field: to_words(_bits(year_days))} for year, year_days in years.items()}
+
+        def _find_one(query, projection=None):
+            return documents.get(query['year'])
+
+        def _find(query, projection=None):
+            cursor = MagicMock()
+            if 'year' in query:
+                cursor.sort.return_value = [documents[year] for year in sorted(documents, reverse=True)
+                                            if year < query['year']['$lt']]
+            else:
+                cursor.sort.return_value = [documents[year] for year in sorted(documents)]
+            return cursor
+
+        self.mock_db.PresenceBitmaps.find_one.side_effect = _find_one
+        self.mock_db.PresenceBitmaps.find.side_effect = _find
+
+    def test_words_round_trip(self):
+        bits = _bits([date(2024, 1, 1), date(2024, 3, 1), date(2024, 12, 31)])
+        words = to_words(bits)
+        self.assertEqual(sorted(words), ['w0', 'w1', 'w2', 'w3', 'w4', 'w5'])
+        self.assertTrue(all(0 <= int(word) <= WORD_MASK for word in words.values()))
+        self.assertEqual(to_int(words), bits)
+        self.assertEqual(day_list(bits, 2024), ['2024-01-01', '2024-03-01', '2024-12-31'])
+        encoded = base64.b64decode(to_base64(bits))
+        self.assertEqual(int.from_bytes(encoded, 'little'), bits)
+        self.assertEqual(to_int(None), 0)
+
+    def test_record_sets_and_clears_bits(self):
+        supplement_id = ObjectId()
+        PresenceBitmap.record(self.user_id, '2024-03-01', {INTAKE: True, supplement_field(supplement_id): False},
+                              db=self.mock_db)
+
+        query, update = self.mock_db.PresenceBitmaps.update_one.call_args[0]
+        self.assertEqual(query, {'user_id': self.user_id, 'year': 2024})
+        self.assertTrue(self.mock_db.PresenceBitmaps.update_one.call_args[1]['upsert'])
+        # 2024-03-01 is day 60 of the year: word 0, bit 60
+        self.assertEqual(update['$bit'], {
+            'intake.w0': {'or': 1 << 60},
+            f'supplements.{supplement_id}.w0': {'and': WORD_MASK ^ (1 << 60)}
+        })
+
+        PresenceBitmap.record(self.user_id, date(2024, 12, 31), {SYMPTOMS: True}, db=self.mock_db)
+        update = self.mock_db.PresenceBitmaps.update_one.call_args[0][1]
+        # Day 365 is word 5, bit 60
+        self.assertEqual(update['$bit'], {'symptoms.w5': {'or': 1 << 60}})
+
+    def test_walk_across_years(self):
+        run = [date(2023, 12, 29) + timedelta(days=offset) for offset in range(6)]
+        self._store(run + [date(2023, 12, 20)])
+
+        self.assertEqual(PresenceBitmap.walk(self.user_id, date(2024, 1, 2), -1, db=self.mock_db), run[0])
+        self.assertEqual(PresenceBitmap.walk(self.user_id, date(2023, 12, 30), 1, db=self.mock_db), run[-1])
+        self.assertEqual(PresenceBitmap.walk(self.user_id, date(2023, 12, 20), 1, db=self.mock_db),
+                         date(2023, 12, 20))
+        self.assertIsNone(PresenceBitmap.walk(self.user_id, date(2024, 1, 10), -1, db=self.mock_db))
+        self.assertTrue(PresenceBitmap.has_day(self.user_id, date(2024, 1, 1), db=self.mock_db))
+        self.assertFalse(PresenceBitmap.has_day(self.user_id, date(2023, 12, 21), db=self.mock_db))
+
+    def test_latest_before(self):
+        self._store([date(2022, 6, 1), date(2023, 12, 31), date(2024, 1, 5)])
+
+        self.assertEqual(PresenceBitmap.latest_before(self.user_id, date(2024, 1, 5), db=self.mock_db),
+                         date(2023, 12, 31))
+        self.assertEqual(PresenceBitmap.latest_before(self.user_id, date(2024, 2, 1), db=self.mock_db),
+                         date(2024, 1, 5))
+        self.assertIsNone(PresenceBitmap.latest_before(self.user_id, date(2022, 6, 1), db=self.mock_db))
+
+    def test_runs_join_across_years(self):
+        days = [date(2023, 12, 30), date(2023, 12, 31), date(2024, 1, 1), date(2024, 3, 1),
+                date(2024, 3, 2), date(2024, 12, 31)]
+        self._store(days)
+
+        self.assertEqual(list(PresenceBitmap.runs(self.user_id, db=self.mock_db)), [
+            (date(2023, 12, 30), date(2024, 1, 1)),
+            (date(2024, 3, 1), date(2024, 3, 2)),
+            (date(2024, 12, 31), date(2024, 12, 31))
+        ])
+
+    @patch('app.models.presence_bitmap.get_db')
+    def test_rebuild_writes_each_user_in_place(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        other_user = ObjectId()
+        self.mock_db.DailyRollups.find.return_value.sort.return_value = [
+            {'user_id': self.user_id, 'date': '2024-01-01', 'intake': {'s1': {'count': 1}}, 'symptoms': {}},
+            {'user_id': self.user_id, 'date': '2025-01-02', 'intake': {}, 'symptoms': {'x': 2}},
+            {'user_id': other_user, 'date': '2025-01-01', 'intake': {}, 'symptoms': {'x': 0}}
+        ]
+
+        self.assertEqual(PresenceBitmap.rebuild(), 3)
+
+        # One bulk write per user, and no delete before the new bitmaps are written
+        writes = [call[0][0] for call in self.mock_db.PresenceBitmaps.bulk_write.call_args_list]
+        self.assertEqual([[op._filter for op in ops] for ops in writes], [
+            [{'user_id': self.user_id, 'year': 2024}, {'user_id': self.user_id, 'year': 2025}],
+            [{'user_id': other_user, 'year': 2025}]
+        ])
+        self.assertEqual(to_int(writes[0][0]._doc['supplements']['s1']), 1)
+        self.assertEqual(to_int(writes[0][1]._doc[SYMPTOMS]), 2)
+        self.assertEqual(to_int(writes[1][0]._doc[SYMPTOMS]), 0)
+        stale = self.mock_db.PresenceBitmaps.delete_many.call_args[0][0]
+        self.assertIn('$not', stale['updated_at'])
+
+
+if __name__ == '__main__':
+    unittest.main()
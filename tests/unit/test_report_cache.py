@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from bson.objectid import ObjectId
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.models import report_cache
+from app.models.report_cache import ReportCache, _LRUCache
+from app.models.intake_log import IntakeLog
+from app.models.symptom_log import SymptomLog
+
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        ReportCache.clear()
+        self.user_id = ObjectId()
+        self.mock_db = MagicMock()
+
+    def tearDown(self):
+        ReportCache.clear()
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = _LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # 'b' is now the least recently used
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c'), cache.evictions), (1, 3, 1))
+
+    def test_get_or_compute_counts_hits_and_misses(self):
+        compute = MagicMock(return_value={'currentStreak': 3})
+
+        for _ in range(3):
+            self.assertEqual(ReportCache.get_or_compute(self.user_id, 'weekly', 'streaks', 0, compute),
+                             {'currentStreak': 3})
+        ReportCache.get_or_compute(self.user_id, 'weekly', 'streaks', 1, compute)
+
+        self.assertEqual(compute.call_count, 2)
+        stats = ReportCache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (2, 2, 2))
+        self.assertEqual(stats['hitRate'], 0.5)
+
+    @patch('app.models.report_cache.get_db')
+    def test_shared_backend(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        self.mock_db.ReportCache.find_one.return_value = {'_id': 'key', 'value': ['from another worker']}
+        compute = MagicMock()
+
+        with patch.object(report_cache, 'REPORT_CACHE_BACKEND', 'mongo'):
+            value = ReportCache.get_or_compute(self.user_id, 'weekly', 'progress', 4, compute)
+            self.assertEqual(value, ['from another worker'])
+            compute.assert_not_called()
+
+            self.mock_db.ReportCache.find_one.return_value = None
+            ReportCache.get_or_compute(self.user_id, 'weekly', 'symptomSummary', 4, lambda: [])
+            stored = self.mock_db.ReportCache.replace_one.call_args[0][1]
+            self.assertEqual(stored['_id'], f"{self.user_id}:weekly:symptomSummary:4")
+            self.assertEqual(stored['value'], [])
+
+        self.assertEqual(ReportCache.stats()['sharedHits'], 1)
+
+    @patch('app.models.report_cache.get_db')
+    def test_versions(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        self.mock_db.ReportVersions.find_one.return_value = None
+        self.assertEqual(ReportCache.get_version(str(self.user_id)), 0)
+
+        ReportCache.bump_version(str(self.user_id))
+        self.mock_db.ReportVersions.update_one.assert_called_once_with(
+            {'user_id': self.user_id}, {'$inc': {'version': 1}}, upsert=True
+        )
+
+        # Write paths must not fail because the version could not be bumped
+        self.mock_db.ReportVersions.update_one.side_effect = Exception("write failed")
+        ReportCache.bump_version(self.user_id)
+
+    @patch('app.models.intake_log.get_db')
+    def test_intake_delete_bumps_version(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        self.mock_db.IntakeLogs.find_one_and_delete.return_value = {
+            '_id': ObjectId(), 'user_id': self.user_id, 'tracked_supplement_id': ObjectId(),
+            'intake_date': '2025-04-19'
+        }
+
+        with patch('app.models.intake_log.DailyRollup.record_intake'), \
+                patch('app.models.intake_log.StreakState.record_day'), \
+                patch('app.models.intake_log.ReportCache.bump_version') as mock_bump:
+            IntakeLog.delete(str(ObjectId()))
+            mock_bump.assert_called_once_with(self.user_id, db=self.mock_db)
+
+    @patch('app.models.symptom_log.get_db')
+    def test_symptom_update_bumps_version(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        log = {'_id': ObjectId(), 'user_id': self.user_id, 'symptom_id': ObjectId(),
+               'date': '2025-04-19', 'severity': 'mild'}
+        self.mock_db.SymptomLogs.find_one.return_value = log
+
+        with patch('app.models.symptom_log.DailyRollup.record_symptom'), \
+                patch('app.models.symptom_log.ReportCache.bump_version') as mock_bump:
+            SymptomLog.update(log['_id'], {'notes': 'better today'})
+            mock_bump.assert_called_once_with(self.user_id, db=self.mock_db)
+
+
+if __name__ == '__main__':
+    unittest.main()
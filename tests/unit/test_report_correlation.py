@@ -0,0 +1,138 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import numpy as np
+import threading
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.analytics import ReportFrame, correlation
+from app.routes import reports as reports_module
+from app.utils.concurrency import BoundedExecutor
+
+
+class DummyIntakeLog:
+    def __init__(self, supp_id, supp_name, timestamp):
+        self.supplement_id = supp_id
+        self.supplement_name = supp_name
+        self.timestamp = timestamp
+        self.dosage = None
+        self.timing = None
+        self.notes = None
+
+class DummySymptomLog:
+    def __init__(self, symptom_type, timestamp, severity=None):
+        self.symptom_type = symptom_type
+        self.timestamp = timestamp
+        self.severity = severity
+        self.notes = None
+
+
+class TestCorrelationEngine(unittest.TestCase):
+    def test_day_matrices(self):
+        frame = ReportFrame.of(
+            [DummyIntakeLog('s1', 'Vitamin C', '2025-04-01T08:00:00'),
+             DummyIntakeLog('s1', 'Vitamin C', '2025-04-03T08:00:00'),
+             DummyIntakeLog('s2', 'Zinc', '2025-04-02T08:00:00')],
+            [DummySymptomLog('Headache', '2025-04-02T10:00:00', 'mild'),
+             DummySymptomLog('Headache', '2025-04-02T18:00:00', 'severe'),
+             DummySymptomLog('Fatigue', '2025-04-04T10:00:00', 'none')]
+        )
+        intake, severity = correlation.day_matrices(frame)
+        np.testing.assert_array_equal(intake, [[1, 0], [0, 1], [1, 0], [0, 0]])
+        # The highest severity of the day, as its ordinal code
+        np.testing.assert_array_equal(severity, [[0, 0], [3, 0], [0, 0], [0, 0]])
+
+    def test_lagged_exposure(self):
+        intake = np.array([[1], [0], [0], [0], [1], [0]], dtype=bool)
+        np.testing.assert_array_equal(correlation.lagged_exposure(intake, 0)[:, 0], [1, 0, 0, 0, 1, 0])
+        np.testing.assert_array_equal(correlation.lagged_exposure(intake, 2)[:, 0], [1, 1, 1, 0, 1, 1])
+        np.testing.assert_array_equal(correlation.lagged_exposure(intake, 10)[:, 0], [1, 1, 1, 1, 1, 1])
+
+    def test_pair_statistics(self):
+        exposure = np.array([[1, 1], [1, 0], [0, 1], [0, 0], [1, 1], [0, 0]], dtype=bool)
+        severity = np.array([[2], [3], [0], [0], [1], [0]])
+        stats = correlation.pair_statistics(exposure, severity)
+
+        # First supplement: exposed exactly on the symptom days
+        self.assertEqual(stats['both'][0, 0], 3)
+        self.assertAlmostEqual(stats['phi'][0, 0], 1.0)
+        self.assertAlmostEqual(stats['chiSquare'][0, 0], 6.0)
+        self.assertAlmostEqual(stats['chiSquarePValue'][0, 0], 0.0143, places=4)
+        self.assertAlmostEqual(stats['oddsRatio'][0, 0], 49.0)
+        self.assertAlmostEqual(stats['severityCorrelation'][0, 0],
+                               np.corrcoef(exposure[:, 0], severity[:, 0])[0, 1])
+        # Second supplement: 2 of its 3 days are symptom days
+        self.assertEqual(stats['exposedDays'][1, 0], 3)
+        self.assertEqual(stats['symptomDays'][1, 0], 3)
+        self.assertAlmostEqual(stats['phi'][1, 0], 1 / 3)
+
+    def test_pair_statistics_undefined(self):
+        # A symptom that never occurred has no correlation
+        stats = correlation.pair_statistics(np.array([[1], [0]], dtype=bool), np.zeros((2, 1), dtype=int))
+        self.assertTrue(np.isnan(stats['phi'][0, 0]))
+        self.assertTrue(np.isnan(stats['chiSquarePValue'][0, 0]))
+
+    def test_permutation_p_values(self):
+        rng = np.random.default_rng(1)
+        outcome = rng.random((120, 2)) < 0.3
+        exposure = np.column_stack((outcome[:, 0], rng.random(120) < 0.5))
+
+        p_values, permutations = correlation.permutation_p_values(exposure, outcome, permutations=300,
+                                                                  time_budget=10)
+        self.assertEqual(permutations, 300)
+        self.assertLess(p_values[0, 0], 0.01)
+        self.assertGreater(p_values[1, 1], 0.01)
+        # Chunks are seeded, so a pool gives the same result as running them here
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            pooled, _ = correlation.permutation_p_values(exposure, outcome, permutations=300,
+                                                         time_budget=10, pool=pool)
+        np.testing.assert_array_equal(p_values, pooled)
+
+    def test_permutation_saturated_pool(self):
+        rng = np.random.default_rng(1)
+        outcome = rng.random((120, 2)) < 0.3
+        exposure = np.column_stack((outcome[:, 0], rng.random(120) < 0.5))
+
+        # A pool with room for two chunks runs those and drops the rest instead of queueing them
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            release = threading.Event()
+            pool = BoundedExecutor(executor, max_pending=3)
+            pool.submit(release.wait, 5)
+            try:
+                p_values, permutations = correlation.permutation_p_values(exposure, outcome, permutations=300,
+                                                                          time_budget=10, pool=pool)
+            finally:
+                release.set()
+        self.assertEqual(permutations, 2 * correlation.PERMUTATION_CHUNK)
+        self.assertLess(p_values[0, 0], 0.01)
+
+    def test_permutation_time_budget(self):
+        outcome = np.ones((10, 1), dtype=bool)
+        p_values, permutations = correlation.permutation_p_values(outcome, outcome, permutations=300,
+                                                                  time_budget=-1)
+        self.assertIsNone(p_values)
+        self.assertEqual(permutations, 0)
+
+    @patch('app.routes.reports.Supplement.find_names_by_ids', return_value={})
+    def test_analyze_correlations_statistics(self, mock_names):
+        intake_logs, symptom_logs = [], []
+        for day in range(1, 29):
+            if day % 2:
+                intake_logs.append(DummyIntakeLog('s1', 'Vitamin C', f'2025-04-{day:02d}T08:00:00'))
+                symptom_logs.append(DummySymptomLog('Headache', f'2025-04-{day:02d}T10:00:00', 'mild'))
+
+        with patch('app.routes.reports.compute_pool', return_value=None):
+            result = reports_module._analyze_correlations(intake_logs, symptom_logs, lag_days=0)
+
+        self.assertEqual(len(result), 1)
+        stats = result[0]['statistics']
+        self.assertEqual(stats['days'], 27)
+        self.assertEqual(stats['exposedSymptomDays'], 14)
+        self.assertEqual(stats['phi'], 1.0)
+        self.assertEqual(stats['permutations'], correlation.CORRELATION_PERMUTATIONS)
+        self.assertLess(stats['pValue'], 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from datetime import date
+import numpy as np
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.analytics import engine
+
+
+def _days(*iso_dates):
+    return np.array([date.fromisoformat(d).toordinal() for d in iso_dates], dtype=np.int64)
+
+
+class TestReportEngine(unittest.TestCase):
+    def test_month_numbers_and_labels(self):
+        months = engine.month_numbers(_days('1970-01-31', '2025-04-19', '2024-12-01'))
+        self.assertEqual([engine.month_label(m) for m in months.tolist()], ['1970-01', '2025-04', '2024-12'])
+        self.assertEqual(engine.iso_days(_days('2025-04-19', '2000-02-29')), ['2025-04-19', '2000-02-29'])
+
+    def test_runs_split_on_gaps_and_groups(self):
+        groups = np.array([0, 0, 0, 1, 1], dtype=np.int64)
+        days = _days('2025-04-01', '2025-04-02', '2025-04-04', '2025-04-05', '2025-04-06')
+        run_group, first, last = engine.runs(groups, days)
+        self.assertEqual(run_group.tolist(), [0, 0, 1])
+        self.assertEqual((last - first + 1).tolist(), [2, 1, 2])
+
+    def test_streaks(self):
+        today = date(2025, 4, 6).toordinal()
+        groups = np.array([0, 0, 0, 1, 1, 1, 2], dtype=np.int64)
+        days = _days('2025-04-01', '2025-04-02', '2025-04-03',
+                     '2025-04-05', '2025-04-06', '2025-04-07',
+                     '2025-04-06')
+        current, longest = engine.streaks(groups, days, 4, today)
+        # Group 0 stopped before today; group 1's run continues past it; group 3 has no days
+        self.assertEqual(current.tolist(), [0, 2, 1, 0])
+        self.assertEqual(longest.tolist(), [3, 3, 1, 0])
+
+        empty = np.zeros(0, dtype=np.int64)
+        current, longest = engine.streaks(empty, empty, 1, today)
+        self.assertEqual((current.tolist(), longest.tolist()), ([0], [0]))
+
+    def test_day_spans(self):
+        groups = np.array([0, 0, 2], dtype=np.int64)
+        days = _days('2025-04-01', '2025-04-10', '2025-04-05')
+        count, first, last = engine.day_spans(groups, days, 3)
+        self.assertEqual(count.tolist(), [2, 0, 1])
+        self.assertEqual((last - first + 1)[[0, 2]].tolist(), [10, 1])
+
+    def test_monthly_totals(self):
+        # Logs in log order: supplement 1 appears before supplement 0 in April
+        groups = np.array([1, 0, 1, 0, 0], dtype=np.int64)
+        days = _days('2025-04-02', '2025-04-03', '2025-04-02', '2025-03-30', '2025-04-03')
+        weights = np.array([1, 1, 1, 2, 1], dtype=np.float64)
+
+        months, supplements, totals, unique_days = engine.monthly_totals(groups, days, weights)
+
+        self.assertEqual([engine.month_label(m) for m in months.tolist()], ['2025-03', '2025-04', '2025-04'])
+        self.assertEqual(supplements.tolist(), [0, 1, 0])
+        self.assertEqual(totals.tolist(), [2.0, 2.0, 2.0])
+        self.assertEqual(unique_days.tolist(), [1, 1, 1])
+
+
+    def test_lttb_keeps_ends_and_peaks(self):
+        x = np.arange(1000)
+        y = np.zeros(1000)
+        y[[137, 512, 880]] = [5.0, -4.0, 9.0]
+
+        kept = engine.lttb(x, y, 50)
+
+        self.assertEqual(len(kept), 50)
+        self.assertEqual((kept[0], kept[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(kept) > 0))
+        # Spikes form the largest triangles in their buckets
+        for spike in (137, 512, 880):
+            self.assertIn(spike, kept.tolist())
+        # Short series are returned whole
+        self.assertEqual(engine.lttb(x[:10], y[:10], 50).tolist(), list(range(10)))
+
+if __name__ == '__main__':
+    unittest.main()
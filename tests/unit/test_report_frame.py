@@ -0,0 +1,295 @@
+import unittest
+import json
+import random
+from unittest.mock import patch, MagicMock
+from collections import Counter
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+import numpy as np
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.analytics import ReportFrame
+from app.models.intake_log import IntakeLog, UNSET_VALUES
+from app.models.symptom_log import SymptomLog
+from app.routes import reports as reports_module
+
+
+# Same dummy log shapes as test_reports_helpers.py
+class DummyIntakeLog:
+    def __init__(self, supp_id, supp_name, timestamp, dosage=None, timing=None, notes=None):
+        self.supplement_id = supp_id
+        self.supplement_name = supp_name
+        self.timestamp = timestamp
+        self.dosage = dosage
+        self.timing = timing
+        self.notes = notes
+
+class DummySymptomLog:
+    def __init__(self, symptom_type, timestamp, severity=None, notes=None):
+        self.symptom_type = symptom_type
+        self.timestamp = timestamp
+        self.severity = severity
+        self.notes = notes
+
+
+def _aggregate(intake_docs, symptom_docs):
+    """What the get_report_aggregates pipelines return for these documents (in _id order)"""
+    supplements, days = {}, {}
+    for doc in intake_docs:
+        supp = supplements.setdefault(doc['tracked_supplement_id'], {
+            'supplement_id': doc['tracked_supplement_id'], 'name': doc.get('supplement_name'),
+            'count': 0, 'dates': [], 'dosages': [], 'timings': [], 'notes': []
+        })
+        supp['count'] += 1
+        supp['dates'].append(doc['intake_date'])
+        for field, values in (('dosage_taken', 'dosages'), ('timing', 'timings'), ('notes', 'notes')):
+            if doc.get(field) not in (None, '', 0, False):
+                supp[values].append(doc[field])
+        day = days.setdefault((doc['tracked_supplement_id'], doc['intake_date'][:10]), {
+            'supplement_id': doc['tracked_supplement_id'], 'day': doc['intake_date'][:10], 'count': 0
+        })
+        day['count'] += 1
+    for supp in supplements.values():
+        dosage = Counter(supp['dosages']).most_common(1)
+        timing = Counter(supp['timings']).most_common(1)
+        supp['most_common_dosage'] = dosage[0][0] if dosage else None
+        supp['most_common_timing'] = timing[0][0] if timing else None
+        supp['most_common_timing_count'] = timing[0][1] if timing else 0
+        supp['timing_count'] = len(supp['timings'])
+
+    symptoms = {}
+    for doc in symptom_docs:
+        symptom = symptoms.setdefault((doc['symptom_id'], doc['date'][:10], doc.get('severity')), {
+            'symptom_id': doc['symptom_id'], 'day': doc['date'][:10], 'severity': doc.get('severity'), 'count': 0
+        })
+        symptom['count'] += 1
+        symptom['notes'] = doc.get('notes')
+    return ({'supplements': list(supplements.values()), 'days': list(days.values())},
+            list(symptoms.values()))
+
+
+class TestReportFrame(unittest.TestCase):
+    def setUp(self):
+        self.today = datetime.now()
+        self.yesterday = self.today - timedelta(days=1)
+        self.intake_logs = [
+            DummyIntakeLog('suppA', 'Vitamin A', self.today.isoformat(), dosage=100, timing='morning'),
+            DummyIntakeLog('suppA', 'Vitamin A', self.yesterday.isoformat(), dosage=100, timing='morning'),
+            DummyIntakeLog('suppB', 'Vitamin B', 'not a date', dosage=200, timing='evening'),
+        ]
+        self.symptom_logs = [
+            DummySymptomLog('Headache', self.today.isoformat(), severity=5),
+            DummySymptomLog('Headache', self.yesterday.isoformat(), severity=4),
+        ]
+
+    def test_groups_logs_once(self):
+        frame = ReportFrame(self.intake_logs, self.symptom_logs)
+
+        self.assertEqual(frame.supplements, ['suppA', 'suppB'])
+        self.assertEqual(frame.intake_rows, [[0, 1], [2]])
+        self.assertEqual(frame.intake_day[0], self.today.date().toordinal())
+        # Unparsable timestamps keep their row but have no day
+        self.assertIsNone(frame.intake_day[2])
+        self.assertEqual(frame.supplement_days[1], [])
+        self.assertEqual(frame.intake_days, sorted({self.yesterday.date().toordinal(),
+                                                    self.today.date().toordinal()}))
+        self.assertEqual(frame.symptom_types, ['Headache'])
+        self.assertEqual(frame.symptom_code, [5, 4])
+
+    def test_model_attributes(self):
+        supplement_id = ObjectId()
+        symptom_id = ObjectId()
+        intake = IntakeLog({'tracked_supplement_id': supplement_id, 'supplement_name': 'Zinc',
+                            'intake_date': '2025-04-19', 'dosage_taken': 15})
+        symptom = SymptomLog({'symptom_id': symptom_id, 'date': '2025-04-19', 'severity': 'severe'})
+
+        frame = ReportFrame([intake], [symptom])
+
+        self.assertEqual(frame.supplements, [str(supplement_id)])
+        self.assertEqual(frame.intake_dosage, [15])
+        self.assertEqual(ReportFrame.as_date(frame.intake_day[0]).isoformat(), '2025-04-19')
+        self.assertEqual(frame.symptom_types, [str(symptom_id)])
+        self.assertEqual(frame.symptom_code, [3])
+        self.assertEqual(frame.dated_intake[1].tolist(), frame.intake_day)
+
+    def test_sections_accept_frame(self):
+        frame = ReportFrame(self.intake_logs, self.symptom_logs)
+        self.assertIs(ReportFrame.of(frame), frame)
+        self.assertIs(ReportFrame.of((), frame), frame)
+
+        with patch('app.routes.reports.Supplement.find_names_by_ids', return_value={}):
+            self.assertEqual(reports_module._generate_intake_summary(frame),
+                             reports_module._generate_intake_summary(self.intake_logs))
+            self.assertEqual(reports_module._generate_symptom_summary(frame),
+                             reports_module._generate_symptom_summary(self.symptom_logs))
+            self.assertEqual(reports_module._analyze_correlations(frame),
+                             reports_module._analyze_correlations(self.intake_logs, self.symptom_logs))
+            self.assertEqual(reports_module._calculate_streaks('user123', frame),
+                             reports_module._calculate_streaks('user123', self.intake_logs))
+            self.assertEqual(reports_module._generate_recommendations('user123', frame),
+                             reports_module._generate_recommendations('user123', self.intake_logs,
+                                                                      self.symptom_logs))
+
+    def test_from_aggregates_matches_logs(self):
+        rng = random.Random(7)
+        supplement_ids = [ObjectId() for _ in range(3)]
+        symptom_ids = [ObjectId() for _ in range(2)]
+        intake_docs, symptom_docs = [], []
+        for offset in range(60):
+            day = (self.today - timedelta(days=offset)).date().isoformat()
+            for supp_index, supp_id in enumerate(supplement_ids):
+                for _ in range(rng.randrange(3)):
+                    intake_docs.append({'tracked_supplement_id': supp_id, 'supplement_name': f"Supp {supp_index}",
+                                        'intake_date': f"{day}T0{rng.randrange(10)}:00:00",
+                                        'dosage_taken': rng.choice([0, 100, 200]),
+                                        'timing': rng.choice(['morning', 'evening', None]),
+                                        'notes': rng.choice(['', 'ok'])})
+            for symptom_id in symptom_ids:
+                if rng.random() < 0.5:
+                    symptom_docs.append({'symptom_id': symptom_id, 'date': day,
+                                         'severity': rng.choice(['mild', 'average', 'severe']), 'notes': ''})
+        rng.shuffle(intake_docs)
+
+        intake_logs = [DummyIntakeLog(doc['tracked_supplement_id'], doc['supplement_name'], doc['intake_date'],
+                                      doc['dosage_taken'], doc['timing'], doc['notes']) for doc in intake_docs]
+        logs_frame = ReportFrame(intake_logs, [SymptomLog(doc) for doc in symptom_docs])
+        aggregate_frame = ReportFrame.from_aggregates(*_aggregate(intake_docs, symptom_docs))
+
+        self.assertEqual(aggregate_frame.supplements, logs_frame.supplements)
+        self.assertEqual(aggregate_frame.supplement_days, logs_frame.supplement_days)
+        with patch('app.routes.reports.Supplement.find_names_by_ids', return_value={}):
+            for section in (reports_module._generate_intake_summary, reports_module._generate_symptom_summary,
+                            reports_module._analyze_correlations):
+                self.assertEqual(section(aggregate_frame), section(logs_frame))
+            for section in (reports_module._calculate_streaks, reports_module._calculate_progress,
+                            reports_module._generate_recommendations):
+                self.assertEqual(section('user123', aggregate_frame), section('user123', logs_frame))
+
+    def test_from_aggregates_tolerates_day_rows_of_unknown_supplements(self):
+        """Test a supplement first logged between the aggregations' reads doesn't fail the report."""
+        known, new = ObjectId(), ObjectId()
+        intake_aggregates = {
+            'supplements': [{'supplement_id': known, 'name': 'Zinc', 'count': 1, 'dates': ['2025-04-19'],
+                             'dosages': [15], 'timings': [], 'timing_count': 0, 'notes': [],
+                             'most_common_dosage': 15, 'most_common_timing': None, 'most_common_timing_count': 0}],
+            'days': [{'supplement_id': known, 'day': '2025-04-19', 'count': 1},
+                     {'supplement_id': new, 'day': '2025-04-19', 'count': 2},
+                     {'supplement_id': new, 'day': '2025-04-20', 'count': 1}]
+        }
+
+        frame = ReportFrame.from_aggregates(intake_aggregates)
+
+        self.assertEqual(frame.supplements, [str(known), str(new)])
+        self.assertEqual(frame.supplement_stats[0]['most_common_dosage'], 15)
+        self.assertEqual(frame.supplement_stats[1]['count'], 3)
+        self.assertIsNone(frame.supplement_stats[1]['most_common_dosage'])
+        with patch('app.routes.reports.Supplement.find_names_by_ids', return_value={}):
+            summary = reports_module._generate_intake_summary(frame)
+        self.assertEqual(len(summary), 2)
+
+    @patch('app.models.intake_log.get_db')
+    def test_intake_report_aggregates(self, mock_get_db):
+        user_id, supplement_id = ObjectId(), ObjectId()
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+        days = [{'supplement_id': supplement_id, 'day': '2025-04-19', 'count': 1},
+                {'supplement_id': supplement_id, 'day': '2025-04-20', 'count': 1}]
+        mock_db.IntakeLogs.aggregate.side_effect = [
+            iter([{'user_id': user_id, 'supplement_id': supplement_id, 'name': 'Zinc', 'count': 2,
+                   'dates': ['2025-04-19', '2025-04-20'], 'dosages': [15, 15], 'timings': [], 'notes': []}]),
+            iter([{'_id': {'user_id': user_id, 'supplement_id': supplement_id}, 'value': 15, 'count': 2}]),
+            iter([]),
+            iter(days)
+        ]
+
+        aggregates = IntakeLog.get_report_aggregates(str(user_id), '2025-04-01', '2025-04-30', detail_limit=50)
+
+        supplement = aggregates['supplements'][0]
+        self.assertEqual(supplement['most_common_dosage'], 15)
+        self.assertIsNone(supplement['most_common_timing'])
+        self.assertEqual(supplement['most_common_timing_count'], 0)
+        # Day rows come from their own, streamed aggregation
+        self.assertEqual(list(aggregates['days']), days)
+        # Each part is its own aggregation, so no single result document holds them all
+        pipelines = [call[0][0] for call in mock_db.IntakeLogs.aggregate.call_args_list]
+        self.assertEqual(len(pipelines), 4)
+        self.assertFalse(any('$facet' in stage for pipeline in pipelines for stage in pipeline))
+        self.assertEqual(pipelines[0][-1]['$project']['dates'], {'$slice': ['$dates', -50]})
+        self.assertEqual(pipelines[1][0]['$match']['dosage_taken'], {'$nin': UNSET_VALUES})
+        self.assertEqual(pipelines[2][0]['$match']['timing'], {'$nin': UNSET_VALUES})
+        for pipeline in pipelines:
+            self.assertEqual(pipeline[0]['$match']['user_id'], user_id)
+
+        mock_db.IntakeLogs.aggregate.side_effect = [iter([]), iter([]), iter([]), iter([])]
+        aggregates = IntakeLog.get_report_aggregates(str(ObjectId()), '2025-04-01', '2025-04-30')
+        self.assertEqual(aggregates['supplements'], [])
+        self.assertEqual(list(aggregates['days']), [])
+
+    @patch('app.models.intake_log.get_db')
+    def test_intake_report_aggregates_for_users(self, mock_get_db):
+        first_user, second_user, supplement_id = ObjectId(), ObjectId(), ObjectId()
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+        mock_db.IntakeLogs.aggregate.side_effect = [
+            iter([{'user_id': user_id, 'supplement_id': supplement_id, 'name': 'Zinc', 'count': 1}
+                  for user_id in (first_user, second_user)]),
+            iter([]),
+            iter([{'_id': {'user_id': second_user, 'supplement_id': supplement_id}, 'value': 'morning', 'count': 1}]),
+            iter([{'user_id': second_user, 'supplement_id': supplement_id, 'day': '2025-04-19', 'count': 1}])
+        ]
+
+        aggregates = IntakeLog.get_report_aggregates_for_users(
+            [str(first_user), str(second_user)], '2025-04-01', '2025-04-30'
+        )
+
+        pipeline = mock_db.IntakeLogs.aggregate.call_args_list[0][0][0]
+        self.assertEqual(pipeline[0]['$match']['user_id'], {'$in': [first_user, second_user]})
+        self.assertEqual(aggregates[first_user]['days'], [])
+        self.assertIsNone(aggregates[first_user]['supplements'][0]['most_common_timing'])
+        self.assertEqual(aggregates[second_user]['supplements'][0]['most_common_timing'], 'morning')
+        self.assertEqual(len(aggregates[second_user]['days']), 1)
+
+    @patch('app.models.symptom_log.get_db')
+    def test_symptom_report_aggregates_group_per_day_and_severity(self, mock_get_db):
+        user_id = ObjectId()
+        mock_db = MagicMock()
+        mock_get_db.return_value = mock_db
+
+        SymptomLog.get_report_aggregates(str(user_id), '2025-04-01', '2025-04-30')
+
+        pipeline = mock_db.SymptomLogs.aggregate.call_args[0][0]
+        group = next(stage['$group'] for stage in pipeline if '$group' in stage)
+        self.assertEqual(set(group['_id']), {'user_id', 'symptom_id', 'day', 'severity'})
+        # Nothing per log is collected into a group
+        self.assertNotIn('$push', json.dumps(pipeline, default=str))
+        self.assertEqual(pipeline[0]['$match']['user_id'], user_id)
+
+    def test_labelled_severity_trend(self):
+        logs = [DummySymptomLog('Fatigue', (self.today + timedelta(days=i)).isoformat(), severity=label)
+                for i, label in enumerate(['mild', 'mild', 'severe', 'severe'])]
+        summary = reports_module._generate_symptom_summary(logs)
+        self.assertEqual(summary[0]['trend'], 'increasing')
+        self.assertEqual(summary[0]['averageSeverity'], 2.0)
+        self.assertEqual(summary[0]['slopePerWeek'], 5.6)
+
+    def test_symptom_trends(self):
+        codes = {'Fatigue': [3, 2, 2, 1, 0], 'Nausea': [1, 2, 1, 2, 1], 'Headache': [2, 3]}
+        logs = [DummySymptomLog(symptom, (self.today + timedelta(days=2 * i)).isoformat(), severity=code)
+                for symptom, values in codes.items() for i, code in enumerate(values)]
+        frame = ReportFrame(symptom_logs=logs)
+        trends = dict(zip(frame.symptom_types, frame.symptom_trends))
+
+        for symptom, values in codes.items():
+            slope = np.polyfit(np.arange(len(values)) * 2, values, 1)[0]
+            self.assertAlmostEqual(trends[symptom]['slopePerWeek'], round(slope * 7, 3))
+        self.assertEqual(trends['Fatigue']['trend'], 'decreasing')
+        self.assertEqual(trends['Nausea']['trend'], 'stable')
+        self.assertIsNone(trends['Headache']['trend'])
+        # Rolling 7-day averages cover the logs 0, 2, 4 and 6 days back
+        fatigue = [point['severity'] for point in trends['Fatigue']['rollingAverage']]
+        self.assertEqual(fatigue, [3.0, 2.5, 2.33, 2.0, 1.25])
+
+
+if __name__ == '__main__':
+    unittest.main()
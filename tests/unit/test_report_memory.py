@@ -0,0 +1,115 @@
+import unittest
+import json
+import tracemalloc
+from datetime import date, timedelta
+from unittest.mock import patch
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.analytics import ReportFrame
+from app.db.constants import REPORT_DETAIL_LIMIT
+from app.routes import reports as reports_module
+
+YEARS = 5
+SUPPLEMENTS = 6
+SYMPTOMS = 4
+
+
+def _days(years):
+    first = date(2020, 1, 1)
+    return [(first + timedelta(days=offset)).isoformat() for offset in range(365 * years)]
+
+
+def _intake_aggregates(years, logs_per_day):
+    """Streamed aggregation results for a user taking every supplement `logs_per_day` times a day"""
+    days = _days(years)
+    supplements = [
+        {
+            'supplement_id': f'supp{index}', 'name': f'Supplement {index}', 'count': len(days) * logs_per_day,
+            # The pipeline keeps only the most recent per-log values
+            'dates': days[-REPORT_DETAIL_LIMIT:], 'dosages': [500] * REPORT_DETAIL_LIMIT,
+            'timings': ['morning'] * REPORT_DETAIL_LIMIT, 'notes': [],
+            'timing_count': len(days) * logs_per_day, 'most_common_dosage': 500,
+            'most_common_timing': 'morning', 'most_common_timing_count': len(days) * logs_per_day
+        }
+        for index in range(SUPPLEMENTS)
+    ]
+    day_rows = (
+        {'supplement_id': f'supp{index}', 'day': day, 'count': logs_per_day}
+        for day_index, day in enumerate(days)
+        for index in range(SUPPLEMENTS)
+        if (day_index + index) % 3
+    )
+    return {'supplements': supplements, 'days': day_rows}
+
+
+def _symptom_aggregates(years, logs_per_day):
+    """Streamed aggregation results for a user logging symptoms, with notes, `logs_per_day` times a day"""
+    days = _days(years)
+    return (
+        {'symptom_id': f'symptom{index}', 'day': day, 'severity': ['mild', 'average', 'severe'][day_index % 3],
+         'count': logs_per_day, 'notes': f'Note for {day}: ' + 'x' * 200}
+        for day_index, day in enumerate(days)
+        for index in range(SYMPTOMS)
+        if (day_index * (index + 1)) % 5 == 0
+    )
+
+
+def _report(intake_aggregates, symptom_aggregates):
+    frame = ReportFrame.from_aggregates(intake_aggregates, symptom_aggregates)
+    return json.dumps({
+        'intakeSummary': reports_module._generate_intake_summary(frame),
+        'symptomSummary': reports_module._generate_symptom_summary(frame),
+        'correlations': reports_module._analyze_correlations(frame),
+        'streaks': reports_module._calculate_streaks('user', frame),
+        'progress': reports_module._calculate_progress('user', frame),
+        'recommendations': reports_module._generate_recommendations('user', frame)
+    })
+
+
+@patch('app.routes.reports.compute_pool', return_value=None)
+@patch('app.routes.reports.Supplement.find_names_by_ids', return_value={})
+class TestReportMemory(unittest.TestCase):
+    def _peak(self, logs_per_day):
+        intake, symptoms = _intake_aggregates(YEARS, logs_per_day), _symptom_aggregates(YEARS, logs_per_day)
+        tracemalloc.start()
+        try:
+            report = _report(intake, symptoms)
+            return tracemalloc.get_traced_memory()[1], report
+        finally:
+            tracemalloc.stop()
+
+    def test_peak_memory_independent_of_log_count(self, mock_names, mock_pool):
+        peak, report = self._peak(logs_per_day=1)
+        busy_peak, busy_report = self._peak(logs_per_day=20)
+
+        # Five years of daily rows stay well within a fixed budget, however many intake and
+        # symptom logs a day has
+        self.assertLess(peak, 32 * 1024 * 1024)
+        self.assertLess(busy_peak, peak * 1.1)
+
+        # Per-log lists are capped; counts still cover every log
+        report = json.loads(report)
+        for section in ('intakeSummary', 'symptomSummary'):
+            for entry in report[section]:
+                self.assertLessEqual(len(entry['dates']), REPORT_DETAIL_LIMIT)
+        for entry in report['symptomSummary']:
+            self.assertLessEqual(len(entry['notes']), REPORT_DETAIL_LIMIT)
+        self.assertEqual(report['intakeSummary'][0]['count'], 365 * YEARS)
+        symptom_days = len(range(0, 365 * YEARS, 5))
+        self.assertEqual(report['symptomSummary'][0]['count'], symptom_days)
+        self.assertEqual(json.loads(busy_report)['symptomSummary'][0]['count'], 20 * symptom_days)
+        self.assertTrue(report['correlations'])
+        for correlation in report['correlations']:
+            self.assertLessEqual(len(correlation['details']), REPORT_DETAIL_LIMIT)
+            self.assertGreater(correlation['occurrences'], len(correlation['details']))
+
+    def test_symptom_notes_are_kept_for_the_listed_rows_only(self, mock_names, mock_pool):
+        frame = ReportFrame.from_aggregates(None, _symptom_aggregates(YEARS, logs_per_day=1))
+
+        kept = [notes for notes in frame.symptom_notes if notes is not None]
+        self.assertEqual(len(kept), SYMPTOMS * REPORT_DETAIL_LIMIT)
+        self.assertTrue(frame.symptom_notes[frame.symptom_rows[0][-1]].startswith(f'Note for {_days(YEARS)[-5]}'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import importlib.util
+from unittest.mock import patch, MagicMock
+from bson.objectid import ObjectId
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.models.report_snapshot import ReportSnapshot
+from app.models.report_cache import ReportCache
+
+_script = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../scripts/generate_reports.py'))
+_spec = importlib.util.spec_from_file_location('generate_reports', _script)
+generate_reports = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(generate_reports)
+
+
+class TestReportSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.mock_db = MagicMock()
+        self.user_id = ObjectId()
+
+    @patch('app.models.report_snapshot.get_db')
+    def test_save_many_upserts_in_one_bulk_write(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        self.mock_db.ReportSnapshots.bulk_write.return_value = MagicMock(upserted_count=1, modified_count=1)
+
+        written = ReportSnapshot.save_many([
+            {'user_id': str(self.user_id), 'report_type': 'weekly', 'period_end': '2025-04-20',
+             'sections': {'streaks': {}}, 'version': 3},
+            {'user_id': ObjectId(), 'report_type': 'weekly', 'period_end': '2025-04-20', 'sections': {}, 'version': 0}
+        ])
+
+        self.assertEqual(written, 2)
+        operations = self.mock_db.ReportSnapshots.bulk_write.call_args[0][0]
+        self.assertEqual(len(operations), 2)
+        self.assertEqual(operations[0]._filter,
+                         {'report_type': 'weekly', 'period_end': '2025-04-20', 'user_id': self.user_id})
+        self.assertEqual(operations[0]._doc['version'], 3)
+        self.assertIn('generated_at', operations[0]._doc)
+        self.assertFalse(self.mock_db.ReportSnapshots.bulk_write.call_args[1]['ordered'])
+
+        self.assertEqual(ReportSnapshot.save_many([]), 0)
+
+    @patch('app.models.report_snapshot.get_db')
+    def test_find_user_ids(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        self.mock_db.ReportSnapshots.find.return_value = [{'user_id': self.user_id}]
+        self.assertEqual(ReportSnapshot.find_user_ids('weekly', '2025-04-20'), {str(self.user_id)})
+
+    @patch('app.models.report_cache.get_db')
+    def test_get_versions(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        other = str(ObjectId())
+        self.mock_db.ReportVersions.find.return_value = [{'user_id': self.user_id, 'version': 4}]
+        self.assertEqual(ReportCache.get_versions([str(self.user_id), other]), {str(self.user_id): 4, other: 0})
+
+
+class TestGenerateReports(unittest.TestCase):
+    @patch.object(generate_reports.ReportSnapshot, 'save_many', side_effect=lambda snapshots: len(snapshots))
+    @patch.object(generate_reports.ReportCache, 'get_versions')
+    @patch.object(generate_reports.SymptomLog, 'get_report_aggregates_for_users')
+    @patch.object(generate_reports.IntakeLog, 'get_report_aggregates_for_users')
+    def test_generate_partition(self, mock_intake, mock_symptoms, mock_versions, mock_save):
+        active, idle = ObjectId(), ObjectId()
+        supplement_id = ObjectId()
+        mock_intake.return_value = {active: {
+            'supplements': [{'user_id': active, 'supplement_id': supplement_id, 'name': 'Zinc', 'count': 2,
+                             'dates': ['2025-04-19', '2025-04-20'], 'dosages': [], 'timings': [], 'notes': [],
+                             'timing_count': 0, 'most_common_dosage': None, 'most_common_timing': None,
+                             'most_common_timing_count': 0}],
+            'days': [{'user_id': active, 'supplement_id': supplement_id, 'day': day, 'count': 1}
+                     for day in ('2025-04-19', '2025-04-20')]
+        }}
+        mock_symptoms.return_value = {}
+        mock_versions.return_value = {str(active): 2, str(idle): 0}
+
+        users, written, _ = generate_reports.generate_partition(
+            [str(active), str(idle)], 'weekly', '2025-04-20T12:00:00', ['intakeSummary', 'streaks']
+        )
+
+        self.assertEqual((users, written), (2, 2))
+        # One range query per collection for the whole partition
+        mock_intake.assert_called_once_with([str(active), str(idle)], '2025-04-13T12:00:00', '2025-04-20T12:00:00')
+        snapshots = mock_save.call_args[0][0]
+        self.assertEqual(snapshots[0]['version'], 2)
+        self.assertEqual(snapshots[0]['period_end'], '2025-04-20')
+        self.assertEqual(snapshots[0]['sections']['intakeSummary'][0]['uniqueDays'], 2)
+        self.assertEqual(snapshots[0]['sections']['streaks']['longestStreak'], 2)
+        self.assertEqual(snapshots[1]['sections']['intakeSummary'], [])
+
+    def test_parse_args(self):
+        args = generate_reports.parse_args(['--range', 'monthly', '--sections', 'streaks,progress', '--workers', '2'])
+        self.assertEqual((args.report_type, args.sections, args.workers), ('monthly', ['streaks', 'progress'], 2))
+        with patch('sys.stderr'), self.assertRaises(SystemExit):
+            generate_reports.parse_args(['--sections', 'unknown'])
+
+
+if __name__ == '__main__':
+    unittest.main()
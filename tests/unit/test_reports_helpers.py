@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from datetime import datetime, timedelta
 from bson.objectid import ObjectId
 import sys, os
@@ -85,12 +85,47 @@ class TestReportHelperFunctions(unittest.TestCase):
         self.assertEqual(progress['overallTrends']['totalSupplements'], 0)
         self.assertIsInstance(progress['overallTrends']['monthlyTotals'], list)
 
+    def test_progress_from_rollups(self):
+        day = self.today.date().isoformat()
+        rollup = MagicMock(date=day, intake={
+            'suppA': {'count': 2, 'dosage': 200, 'name': 'Vitamin A'},
+            'suppB': {'count': 0, 'dosage': 0, 'name': 'Vitamin B'}
+        })
+        entries = reports_module._rollup_intake_logs([rollup])
+        # Supplements with no intake left that day are skipped
+        self.assertEqual([e.supplement_id for e in entries], ['suppA'])
+
+        progress = reports_module._calculate_progress('user123', entries)
+        monthly = progress['supplementProgress'][0]['monthlyData'][0]
+        self.assertEqual(monthly['count'], 2)
+        self.assertEqual(monthly['uniqueDays'], 1)
+
     def test_analyze_correlations(self):
         # Correlation function expects both lists
         correlations = reports_module._analyze_correlations(self.intake_logs, self.symptom_logs)
         # As we used same dates, should find at least one correlation
         self.assertIsInstance(correlations, list)
 
+    def test_analyze_correlations_window(self):
+        with patch('app.routes.reports.Supplement.find_names_by_ids') as mock_names:
+            mock_names.return_value = {'suppA': 'Vitamin A (catalog)'}
+            correlations = reports_module._analyze_correlations(
+                self.intake_logs, self.symptom_logs, lag_days=2, min_occurrences=1
+            )
+            # One batched name lookup for every reported supplement
+            mock_names.assert_called_once_with({'suppA', 'suppB'})
+
+        pairs = {(c['supplementId'], c['symptomType']): c for c in correlations}
+        # suppA was taken yesterday and today: headaches on both days fall in the window
+        headache = pairs[('suppA', 'Headache')]
+        self.assertEqual(headache['occurrences'], 3)
+        self.assertEqual(sorted(d['daysDifference'] for d in headache['details']), [0, 0, 1])
+        self.assertEqual(headache['supplementName'], 'Vitamin A (catalog)')
+        # Names missing from the catalog fall back to the name on the logs
+        self.assertEqual(pairs[('suppB', 'Headache')]['supplementName'], 'Vitamin B')
+        self.assertEqual(pairs[('suppB', 'Headache')]['occurrences'], 2)
+        self.assertNotIn(('suppA', 'Nausea'), pairs)
+
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -37,6 +37,35 @@ class DummySymptomLog:
         self.severity = severity
         self.notes = notes
 
+def _report_aggregates(intake_logs, symptom_logs):
+    """Shape dummy logs like the IntakeLog/SymptomLog.get_report_aggregates results"""
+    supplements, days, symptoms = {}, {}, {}
+    for log in intake_logs:
+        supp = supplements.setdefault(log.supplement_id, {
+            'supplement_id': log.supplement_id, 'name': log.supplement_name, 'count': 0,
+            'dates': [], 'dosages': [], 'timings': [], 'notes': []
+        })
+        supp['count'] += 1
+        supp['dates'].append(log.timestamp)
+        supp['dosages'] += [log.dosage] if log.dosage else []
+        supp['timings'] += [log.timing] if log.timing else []
+        supp['notes'] += [log.notes] if log.notes else []
+        supp['most_common_dosage'] = supp['dosages'][0] if supp['dosages'] else None
+        supp['most_common_timing'] = supp['timings'][0] if supp['timings'] else None
+        supp['most_common_timing_count'] = len(supp['timings'])
+        supp['timing_count'] = len(supp['timings'])
+        day = days.setdefault((log.supplement_id, log.timestamp[:10]), {
+            'supplement_id': log.supplement_id, 'day': log.timestamp[:10], 'count': 0
+        })
+        day['count'] += 1
+    for log in symptom_logs:
+        symptom = symptoms.setdefault((log.symptom_type, log.timestamp[:10], log.severity), {
+            'symptom_id': log.symptom_type, 'day': log.timestamp[:10], 'severity': log.severity, 'count': 0
+        })
+        symptom['count'] += 1
+        symptom['notes'] = log.notes
+    return {'supplements': list(supplements.values()), 'days': list(days.values())}, list(symptoms.values())
+
 
 class TestReportsRoutes(unittest.TestCase):
 
@@ -85,36 +114,42 @@ class TestReportsRoutes(unittest.TestCase):
             DummySymptomLog('Nausea', self.two_days_ago.isoformat(), severity=2),
         ]
 
+        self.intake_aggregates, self.symptom_aggregates = _report_aggregates(self.intake_logs, self.symptom_logs)
+
         # Mock auth middleware to bypass access checks for simplicity in tests
         self.auth_patcher = patch('app.routes.reports.check_user_access', lambda f: f)
         self.auth_mock = self.auth_patcher.start()
 
+        # Start every test with an empty report cache at data version 0
+        self.version_patcher = patch('app.routes.reports.ReportCache.get_version', return_value=0)
+        self.mock_version = self.version_patcher.start()
+        reports_module.ReportCache.clear()
+
     def tearDown(self):
         """Clean up after tests."""
+        self.version_patcher.stop()
         self.auth_patcher.stop()
         self.app_context.pop()
 
     @patch('app.middleware.auth.User.find_by_id')
-    @patch('app.routes.reports.IntakeLog.find_by_date_range')
-    @patch('app.routes.reports.SymptomLog.find_by_date_range')
-    @patch('app.routes.reports.Supplement.find_by_id')
+    @patch('app.routes.reports.IntakeLog.get_report_aggregates')
+    @patch('app.routes.reports.SymptomLog.get_report_aggregates')
+    @patch('app.routes.reports.Supplement.find_names_by_ids')
     def test_get_user_report_weekly(self, mock_supp_find, mock_symptom_find, mock_intake_find, mock_auth_find):
         """Test getting a weekly report."""
         # Configure mocks
         mock_auth_find.return_value = MagicMock(role='admin')
-        mock_intake_find.return_value = self.intake_logs
-        mock_symptom_find.return_value = self.symptom_logs
+        mock_intake_find.return_value = self.intake_aggregates
+        mock_symptom_find.return_value = self.symptom_aggregates
         
-        # Mock the Supplement.find_by_id - needed for the correlation analysis
-        mock_supp = MagicMock()
-        mock_supp.name = "Vitamin A"
-        mock_supp_find.return_value = mock_supp
+        # Mock the batched supplement name lookup - needed for the correlation analysis
+        mock_supp_find.return_value = {'suppA': 'Vitamin A'}
 
         # Skip the actual test if we're getting an error - just focus on coverage
         try:
             # Make request
             response = self.client.get(
-                f'/api/reports/{self.user_id}?range=weekly',
+                f'/api/reports/{self.user_id}?range=weekly&sections=all',
                 headers=self.admin_headers
             )
             
@@ -145,26 +180,115 @@ class TestReportsRoutes(unittest.TestCase):
             print(f"Exception in test_get_user_report_weekly: {str(e)}")
 
     @patch('app.middleware.auth.User.find_by_id')
-    @patch('app.routes.reports.IntakeLog.find_by_date_range')
-    @patch('app.routes.reports.SymptomLog.find_by_date_range')
-    @patch('app.routes.reports.Supplement.find_by_id')
+    @patch('app.routes.reports.IntakeLog.get_report_aggregates')
+    @patch('app.routes.reports.SymptomLog.get_report_aggregates')
+    @patch('app.routes.reports.Supplement.find_names_by_ids')
+    def test_get_user_report_correlation_params(self, mock_names, mock_symptom_find, mock_intake_find, mock_auth_find):
+        """Test the correlation window and threshold query parameters."""
+        mock_auth_find.return_value = MagicMock(role='admin')
+        mock_intake_find.return_value = self.intake_aggregates
+        mock_symptom_find.return_value = self.symptom_aggregates
+        mock_names.return_value = {}
+
+        response = self.client.get(
+            f'/api/reports/{self.user_id}?lag_days=0&min_occurrences=1&sections=correlations',
+            headers=self.admin_headers
+        )
+        self.assertEqual(response.status_code, 200)
+        correlations = json.loads(response.data)['correlations']
+        # Same-day matches only: suppA/Headache on two days, suppB/Nausea on one
+        pairs = {(c['supplementId'], c['symptomType']): c['occurrences'] for c in correlations}
+        self.assertEqual(pairs, {('suppA', 'Headache'): 2, ('suppB', 'Nausea'): 1})
+        self.assertEqual(correlations[0]['supplementName'], 'Vitamin A')
+        mock_names.assert_called_once()
+
+        for query in ('lag_days=-1', 'lag_days=31', 'lag_days=abc', 'min_occurrences=0'):
+            response = self.client.get(f'/api/reports/{self.user_id}?{query}', headers=self.admin_headers)
+            self.assertEqual(response.status_code, 400, query)
+
+    @patch('app.middleware.auth.User.find_by_id')
+    @patch('app.routes.reports.IntakeLog.get_report_aggregates')
+    @patch('app.routes.reports.SymptomLog.get_report_aggregates')
+    @patch('app.routes.reports.Supplement.find_names_by_ids')
+    def test_get_user_report_cached(self, mock_names, mock_symptom_find, mock_intake_find, mock_auth_find):
+        """Test that repeated reports are served from the cache until the data version changes."""
+        mock_auth_find.return_value = MagicMock(role='admin')
+        mock_intake_find.return_value = self.intake_aggregates
+        mock_symptom_find.return_value = self.symptom_aggregates
+        mock_names.return_value = {}
+
+        first = self.client.get(f'/api/reports/{self.user_id}?sections=all', headers=self.admin_headers)
+        second = self.client.get(f'/api/reports/{self.user_id}?sections=all', headers=self.admin_headers)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(json.loads(first.data)['intakeSummary'], json.loads(second.data)['intakeSummary'])
+        mock_intake_find.assert_called_once()
+
+        # A different correlation window only recomputes the correlations
+        self.client.get(f'/api/reports/{self.user_id}?lag_days=0&sections=all', headers=self.admin_headers)
+        self.assertEqual(mock_intake_find.call_count, 2)
+        self.assertEqual(reports_module.ReportCache.stats()['misses'], 7)
+
+        # A write bumps the data version, so every section is rebuilt
+        self.mock_version.return_value = 1
+        self.client.get(f'/api/reports/{self.user_id}?sections=all', headers=self.admin_headers)
+        self.assertEqual(mock_intake_find.call_count, 3)
+        self.assertEqual(reports_module.ReportCache.stats()['misses'], 13)
+
+    @patch('app.middleware.auth.User.find_by_id')
+    @patch('app.routes.reports.IntakeLog.get_report_aggregates')
+    @patch('app.routes.reports.SymptomLog.get_report_aggregates')
+    def test_get_user_report_sections(self, mock_symptom_find, mock_intake_find, mock_auth_find):
+        """Test that only the requested sections are fetched and computed."""
+        mock_auth_find.return_value = MagicMock(role='admin')
+        mock_intake_find.return_value = self.intake_aggregates
+        mock_symptom_find.return_value = self.symptom_aggregates
+
+        response = self.client.get(f'/api/reports/{self.user_id}?sections=intakeSummary,streaks',
+                                   headers=self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertIn('intakeSummary', data)
+        self.assertIn('streaks', data)
+        self.assertNotIn('symptomSummary', data)
+        self.assertNotIn('correlations', data)
+        # No symptom section was requested, so symptom logs are never queried
+        mock_symptom_find.assert_not_called()
+        timing = response.headers['Server-Timing']
+        self.assertIn('fetch;dur=', timing)
+        self.assertIn('intakeSummary;dur=', timing)
+
+        # The default is the lightweight set of sections; cached ones are marked in Server-Timing
+        response = self.client.get(f'/api/reports/{self.user_id}', headers=self.admin_headers)
+        data = json.loads(response.data)
+        self.assertTrue({'intakeSummary', 'symptomSummary', 'streaks'} <= set(data))
+        self.assertNotIn('progress', data)
+        self.assertIn('streaks;desc="cached";dur=0', response.headers['Server-Timing'])
+        mock_intake_find.assert_called_once()
+        mock_symptom_find.assert_called_once()
+
+        response = self.client.get(f'/api/reports/{self.user_id}?sections=intakeSummary,bogus',
+                                   headers=self.admin_headers)
+        self.assertEqual(response.status_code, 400)
+
+    @patch('app.middleware.auth.User.find_by_id')
+    @patch('app.routes.reports.IntakeLog.get_report_aggregates')
+    @patch('app.routes.reports.SymptomLog.get_report_aggregates')
+    @patch('app.routes.reports.Supplement.find_names_by_ids')
     def test_get_user_report_daily(self, mock_supp_find, mock_symptom_find, mock_intake_find, mock_auth_find):
         """Test getting a daily report."""
         # Configure mocks
         mock_auth_find.return_value = MagicMock(role='admin')
-        mock_intake_find.return_value = self.intake_logs
-        mock_symptom_find.return_value = self.symptom_logs
+        mock_intake_find.return_value = self.intake_aggregates
+        mock_symptom_find.return_value = self.symptom_aggregates
         
-        # Mock the Supplement.find_by_id - needed for the correlation analysis
-        mock_supp = MagicMock()
-        mock_supp.name = "Vitamin A"
-        mock_supp_find.return_value = mock_supp
+        # Mock the batched supplement name lookup - needed for the correlation analysis
+        mock_supp_find.return_value = {'suppA': 'Vitamin A'}
 
         # Skip the actual test if we're getting an error - just focus on coverage
         try:
             # Make request
             response = self.client.get(
-                f'/api/reports/{self.user_id}?range=daily',
+                f'/api/reports/{self.user_id}?range=daily&sections=all',
                 headers=self.admin_headers
             )
             
@@ -181,26 +305,24 @@ class TestReportsRoutes(unittest.TestCase):
             print(f"Exception in test_get_user_report_daily: {str(e)}")
 
     @patch('app.middleware.auth.User.find_by_id')
-    @patch('app.routes.reports.IntakeLog.find_by_date_range')
-    @patch('app.routes.reports.SymptomLog.find_by_date_range')
-    @patch('app.routes.reports.Supplement.find_by_id')
+    @patch('app.routes.reports.IntakeLog.get_report_aggregates')
+    @patch('app.routes.reports.SymptomLog.get_report_aggregates')
+    @patch('app.routes.reports.Supplement.find_names_by_ids')
     def test_get_user_report_monthly(self, mock_supp_find, mock_symptom_find, mock_intake_find, mock_auth_find):
         """Test getting a monthly report."""
         # Configure mocks
         mock_auth_find.return_value = MagicMock(role='admin')
-        mock_intake_find.return_value = self.intake_logs
-        mock_symptom_find.return_value = self.symptom_logs
+        mock_intake_find.return_value = self.intake_aggregates
+        mock_symptom_find.return_value = self.symptom_aggregates
         
-        # Mock the Supplement.find_by_id - needed for the correlation analysis
-        mock_supp = MagicMock()
-        mock_supp.name = "Vitamin A"
-        mock_supp_find.return_value = mock_supp
+        # Mock the batched supplement name lookup - needed for the correlation analysis
+        mock_supp_find.return_value = {'suppA': 'Vitamin A'}
 
         # Skip the actual test if we're getting an error - just focus on coverage
         try:
             # Make request
             response = self.client.get(
-                f'/api/reports/{self.user_id}?range=monthly',
+                f'/api/reports/{self.user_id}?range=monthly&sections=all',
                 headers=self.admin_headers
             )
             
@@ -217,26 +339,24 @@ class TestReportsRoutes(unittest.TestCase):
             print(f"Exception in test_get_user_report_monthly: {str(e)}")
 
     @patch('app.middleware.auth.User.find_by_id')
-    @patch('app.routes.reports.IntakeLog.find_by_date_range')
-    @patch('app.routes.reports.SymptomLog.find_by_date_range')
-    @patch('app.routes.reports.Supplement.find_by_id')
+    @patch('app.routes.reports.IntakeLog.get_report_aggregates')
+    @patch('app.routes.reports.SymptomLog.get_report_aggregates')
+    @patch('app.routes.reports.Supplement.find_names_by_ids')
     def test_get_user_report_yearly(self, mock_supp_find, mock_symptom_find, mock_intake_find, mock_auth_find):
         """Test getting a yearly report."""
         # Configure mocks
         mock_auth_find.return_value = MagicMock(role='admin')
-        mock_intake_find.return_value = self.intake_logs
-        mock_symptom_find.return_value = self.symptom_logs
+        mock_intake_find.return_value = self.intake_aggregates
+        mock_symptom_find.return_value = self.symptom_aggregates
         
-        # Mock the Supplement.find_by_id - needed for the correlation analysis
-        mock_supp = MagicMock()
-        mock_supp.name = "Vitamin A"
-        mock_supp_find.return_value = mock_supp
+        # Mock the batched supplement name lookup - needed for the correlation analysis
+        mock_supp_find.return_value = {'suppA': 'Vitamin A'}
 
         # Skip the actual test if we're getting an error - just focus on coverage
         try:
             # Make request
             response = self.client.get(
-                f'/api/reports/{self.user_id}?range=yearly',
+                f'/api/reports/{self.user_id}?range=yearly&sections=all',
                 headers=self.admin_headers
             )
             
@@ -0,0 +1,149 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import subprocess
+import threading
+import time
+import json
+import sys
+import os
+
+# Add the parent directory to path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app import create_app
+from app.models.init_db import ensure_indexes, init_indexes
+
+
+class TestStartup(unittest.TestCase):
+    @patch('app.config.TESTING', False)
+    @patch('app.models.symptom_log.SymptomCategoryManager.initialize_symptom_data')
+    @patch('app.init_indexes')
+    def test_cold_start_serves_before_indexes_are_built(self, mock_indexes, mock_seed):
+        """Test create_app returns while the index build is still running, and /readyz follows it."""
+        release = threading.Event()
+        mock_indexes.side_effect = lambda: release.wait(10)
+
+        started = time.monotonic()
+        app = create_app()
+        self.assertLess(time.monotonic() - started, 1.0)
+
+        client = app.test_client()
+        response = client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(json.loads(response.data)['phase'], 'indexes')
+
+        release.set()
+        self.assertTrue(app.extensions['startup'].wait(5))
+        response = client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual((data['status'], data['phase'], data['attempts']), ('ready', 'ready', 2))
+        mock_seed.assert_called_once_with()
+
+    @patch('app.config.TESTING', False)
+    @patch('app.utils.startup.STARTUP_RETRY_SECONDS', 0.01)
+    @patch('app.models.symptom_log.SymptomCategoryManager.initialize_symptom_data')
+    @patch('app.init_indexes')
+    def test_startup_retries_until_the_database_is_reachable(self, mock_indexes, mock_seed):
+        """Test a failing task is retried and completed tasks are not run again."""
+        mock_indexes.side_effect = [RuntimeError('Could not connect to MongoDB'), None]
+        mock_seed.side_effect = [RuntimeError('Could not connect to MongoDB'), None]
+
+        app = create_app()
+
+        self.assertTrue(app.extensions['startup'].wait(5))
+        self.assertEqual(mock_indexes.call_count, 2)
+        self.assertEqual(mock_seed.call_count, 2)
+        data = app.extensions['startup'].to_dict()
+        self.assertEqual((data['attempts'], data['error']), (4, None))
+
+    def test_ensure_indexes_skips_existing_indexes(self):
+        """Test only the indexes whose keys are missing are created."""
+        mock_db = MagicMock()
+        collection = mock_db.__getitem__.return_value
+        collection.index_information.return_value = {
+            '_id_': {'key': [('_id', 1)]},
+            'userId_1': {'key': [('userId', 1.0)], 'unique': True},
+            'user_id_1_date_1': {'key': [('user_id', 1), ('date', 1)], 'unique': True}
+        }
+
+        counts = ensure_indexes(mock_db, [
+            ('Users', 'userId', {'unique': True}),
+            ('Users', 'email', {'unique': True}),
+            ('DailyRollups', [('user_id', 1), ('date', 1)], {'unique': True}),
+            ('DailyRollups', [('user_id', 1), ('date', -1)], {})
+        ])
+
+        self.assertEqual(counts, {'created': 2, 'updated': 0, 'skipped': 2, 'failed': 0})
+        self.assertEqual(collection.index_information.call_count, 2)
+        collection.create_index.assert_any_call([('email', 1)], unique=True)
+        collection.create_index.assert_any_call([('user_id', 1), ('date', -1)])
+
+    @patch('app.init_indexes')
+    def test_test_apps_start_no_startup_thread(self, mock_indexes):
+        """Test create_app leaves the startup tasks to the test when TESTING is set."""
+        app = create_app()
+
+        self.assertIsNone(app.extensions['startup']._thread)
+        self.assertFalse(app.extensions['startup'].ready)
+        mock_indexes.assert_not_called()
+
+    def test_ensure_indexes_compares_index_options(self):
+        """Test an index whose keys exist with other options is not recreated, and a changed TTL is updated in place."""
+        mock_db = MagicMock()
+        collection = mock_db.__getitem__.return_value
+        collection.index_information.return_value = {
+            'email_1': {'key': [('email', 1)]},
+            'created_at_1': {'key': [('created_at', 1)], 'expireAfterSeconds': 3600},
+            'user_symptom_date_active': {'key': [('user_id', 1), ('symptom_id', 1), ('date', 1)], 'unique': True,
+                                         'partialFilterExpression': {'deleted_at': {'$type': 'null'}}}
+        }
+
+        counts = ensure_indexes(mock_db, [
+            ('Users', 'email', {'unique': True}),
+            ('ReportCache', 'created_at', {'expireAfterSeconds': 86400}),
+            ('SymptomLogs', [('user_id', 1), ('symptom_id', 1), ('date', 1)], {
+                'unique': True,
+                'partialFilterExpression': {'deleted_at': {'$type': 'null'}},
+                'name': 'user_symptom_date_active'
+            })
+        ])
+
+        self.assertEqual(counts, {'created': 0, 'updated': 1, 'skipped': 1, 'failed': 1})
+        collection.create_index.assert_not_called()
+        mock_db.command.assert_called_once_with('collMod', 'ReportCache', index={
+            'keyPattern': {'created_at': 1}, 'expireAfterSeconds': 86400
+        })
+
+    @patch('app.config.TESTING', False)
+    @patch('app.utils.startup.STARTUP_RETRY_SECONDS', 10)
+    @patch('app.models.symptom_log.SymptomCategoryManager.initialize_symptom_data')
+    def test_failed_index_keeps_the_app_not_ready(self, mock_seed):
+        """Test an index that can't be built is reported on /readyz instead of the app turning ready."""
+        # app.models re-exports the init_db function under the module's name, so patch the module itself
+        with patch.object(sys.modules['app.models.init_db'], 'ensure_indexes',
+                          return_value={'created': 3, 'updated': 0, 'skipped': 0, 'failed': 1}):
+            with self.assertRaises(RuntimeError):
+                init_indexes()
+            with patch('app.init_indexes', init_indexes):
+                app = create_app()
+                self.assertFalse(app.extensions['startup'].wait(0.5))
+
+        response = app.test_client().get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        data = json.loads(response.data)
+        self.assertEqual(data['phase'], 'indexes')
+        self.assertIn('could not be built', data['error'])
+        mock_seed.assert_not_called()
+
+    def test_import_defers_heavy_dependencies(self):
+        """Test importing the app does not load the PDF, password hashing or Swagger modules."""
+        code = ("import sys, app; print(','.join(sorted(name for name in sys.modules "
+                "if name.split('.')[0] in ('reportlab', 'bcrypt') or name in ('app.swagger', 'app.utils.pdf_utils'))))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+        self.assertEqual(result.stdout.strip(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from bson.objectid import ObjectId
+from datetime import date, timedelta
+import random
+import sys
+import os
+
+# Add the parent directory to path to allow importing app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from app.models.streak_state import StreakState, _RunTracker
+from app.models.intake_log import IntakeLog
+
+
+def _full_state(days):
+    tracker = _RunTracker()
+    for day in sorted(days):
+        tracker.add(day)
+    return tracker.state()
+
+
+class TestStreakState(unittest.TestCase):
+    def setUp(self):
+        self.user_id = ObjectId()
+        self.supplement_id = ObjectId()
+        self.days = set()
+        self.mock_db = MagicMock()
+
+        # Answer the rollup lookups from an in-memory set of intake days
+        def _walk(db, user_id, day, step, supplement_id=None):
+            reached = None
+            while day in self.days:
+                reached, day = day, day + timedelta(days=step)
+            return reached
+
+        def _latest_before(db, user_id, day, supplement_id=None):
+            return max((d for d in self.days if d < day), default=None)
+
+        patches = [
+            patch.object(StreakState, '_has_intake', lambda db, uid, day, sid=None: day in self.days),
+            patch.object(StreakState, '_walk', _walk),
+            patch.object(StreakState, '_latest_before', _latest_before),
+            patch.object(StreakState, '_scan', lambda db, uid, sid=None: _full_state(self.days)),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _apply(self, state, day, present):
+        if present:
+            self.days.add(day)
+        else:
+            self.days.discard(day)
+        return StreakState._next_state(self.mock_db, self.user_id, state, day)
+
+    def test_run_tracker(self):
+        start = date(2025, 4, 1)
+        state = _full_state([start, start + timedelta(days=1), start + timedelta(days=2),
+                             start + timedelta(days=5)])
+        self.assertEqual(state['lastDay'], '2025-04-06')
+        self.assertEqual(state['currentRun'], 1)
+        self.assertEqual(state['longestRun'], 3)
+        self.assertEqual((state['longestStart'], state['longestEnd']), ('2025-04-01', '2025-04-03'))
+        self.assertIsNone(_full_state([]))
+
+    def test_consecutive_days_extend_run(self):
+        state = None
+        start = date(2025, 4, 1)
+        for offset in range(4):
+            state = self._apply(state, start + timedelta(days=offset), True)
+        self.assertEqual(state['currentRun'], 4)
+        self.assertEqual(state['longestRun'], 4)
+
+        # A gap starts a new run but keeps the longest one
+        state = self._apply(state, start + timedelta(days=6), True)
+        self.assertEqual(state['currentRun'], 1)
+        self.assertEqual(state['longestRun'], 4)
+
+    def test_backfilled_day_joins_runs(self):
+        start = date(2025, 4, 1)
+        state = None
+        for offset in (0, 1, 3, 4, 5):
+            state = self._apply(state, start + timedelta(days=offset), True)
+        self.assertEqual(state['currentRun'], 3)
+
+        state = self._apply(state, start + timedelta(days=2), True)
+        self.assertEqual(state, _full_state(self.days))
+        self.assertEqual(state['currentRun'], 6)
+
+    def test_incremental_matches_full_recompute(self):
+        rng = random.Random(7)
+        start = date(2025, 1, 1)
+        state = None
+        for _ in range(400):
+            day = start + timedelta(days=rng.randrange(40))
+            state = self._apply(state, day, rng.random() < 0.7)
+            expected = _full_state(self.days)
+            if expected is None:
+                self.assertIsNone(state)
+                continue
+            for key in ('lastDay', 'currentRun', 'longestRun'):
+                self.assertEqual(state[key], expected[key], key)
+
+    def test_to_report(self):
+        today = date(2025, 4, 19)
+        streaks = StreakState({
+            'user_id': self.user_id,
+            'overall': {'lastDay': '2025-04-19', 'currentRun': 3, 'longestRun': 5},
+            'supplements': {
+                str(self.supplement_id): {'name': 'Vitamin C', 'lastDay': '2025-04-17',
+                                          'currentRun': 2, 'longestRun': 2}
+            }
+        }).to_report(today)
+
+        self.assertEqual(streaks['currentStreak'], 3)
+        self.assertEqual(streaks['longestStreak'], 5)
+        supplement = streaks['supplementStreaks'][0]
+        self.assertEqual(supplement['supplementName'], 'Vitamin C')
+        # The supplement's last run ended before today, so it is not current
+        self.assertEqual(supplement['currentStreak'], 0)
+        self.assertEqual(supplement['longestStreak'], 2)
+
+    def test_rebuild_from_rollups(self):
+        key = str(self.supplement_id)
+        cursor = MagicMock()
+        cursor.sort.return_value = [
+            {'date': '2025-04-17', 'intake': {key: {'count': 1, 'name': 'Vitamin C'}}},
+            {'date': '2025-04-18', 'intake': {key: {'count': 2, 'name': 'Vitamin C'}}},
+            {'date': '2025-04-19', 'intake': {key: {'count': 0}}, 'other': 1},
+        ]
+        self.mock_db.DailyRollups.find.return_value = cursor
+
+        state = StreakState.rebuild(self.user_id, db=self.mock_db)
+
+        self.assertEqual(state.overall['longestRun'], 3)
+        self.assertEqual(state.supplements[key]['longestRun'], 2)
+        self.assertEqual(state.supplements[key]['name'], 'Vitamin C')
+        self.mock_db.StreakStates.replace_one.assert_called_once()
+        self.mock_db.IntakeLogs.aggregate.assert_not_called()
+
+    def test_rebuild_without_rollups_reads_the_intake_logs(self):
+        """Test a user whose logs predate the rollups still gets their streaks."""
+        key = str(self.supplement_id)
+        self.mock_db.DailyRollups.find.return_value.sort.return_value = []
+        self.mock_db.IntakeLogs.aggregate.return_value = [
+            {'_id': {'day': day, 'supplement_id': self.supplement_id}, 'count': 1, 'name': 'Vitamin C'}
+            for day in ('2025-04-17', '2025-04-18', '2025-04-19')
+        ]
+
+        state = StreakState.rebuild(self.user_id, db=self.mock_db)
+
+        self.assertEqual(state.overall['longestRun'], 3)
+        self.assertEqual(state.overall['lastDay'], '2025-04-19')
+        self.assertEqual(state.supplements[key]['name'], 'Vitamin C')
+        pipeline = self.mock_db.IntakeLogs.aggregate.call_args[0][0]
+        self.assertEqual(pipeline[0]['$match'], {'user_id': self.user_id, 'deleted_at': None})
+
+    def test_record_day_retries_on_concurrent_write(self):
+        self.days.add(date(2025, 4, 19))
+        self.mock_db.StreakStates.find_one.return_value = {'_id': ObjectId(), 'user_id': self.user_id,
+                                                           'overall': None, 'supplements': {}, 'version': 4}
+        self.mock_db.StreakStates.update_one.side_effect = [MagicMock(modified_count=0),
+                                                            MagicMock(modified_count=1)]
+
+        StreakState.record_day(self.user_id, '2025-04-19', self.supplement_id, 'Vitamin C', db=self.mock_db)
+
+        self.assertEqual(self.mock_db.StreakStates.update_one.call_count, 2)
+        query, update = self.mock_db.StreakStates.update_one.call_args[0]
+        self.assertEqual(query['version'], 4)
+        self.assertEqual(update['$set']['overall']['currentRun'], 1)
+        self.assertEqual(update['$set'][f"supplements.{self.supplement_id}"]['name'], 'Vitamin C')
+
+    @patch('app.models.intake_log.get_db')
+    def test_intake_log_delete_updates_streaks(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        log = {'_id': ObjectId(), 'user_id': self.user_id, 'tracked_supplement_id': self.supplement_id,
+               'supplement_name': 'Vitamin C', 'intake_date': '2025-04-19', 'dosage_taken': 500}
+        self.mock_db.IntakeLogs.find_one_and_delete.return_value = log
+
+        with patch('app.models.intake_log.DailyRollup.record_intake'), \
+                patch('app.models.intake_log.StreakState.record_day') as mock_record:
+            IntakeLog.delete(str(log['_id']))
+            mock_record.assert_called_once_with(self.user_id, '2025-04-19', self.supplement_id,
+                                                'Vitamin C', db=self.mock_db)
+
+
+
+class TestStreakStateScan(unittest.TestCase):
+    def setUp(self):
+        self.user_id = ObjectId()
+        self.supplement_id = ObjectId()
+        self.mock_db = MagicMock()
+
+    def test_scan_reads_the_bitmap_runs(self):
+        """Test losing the longest run finds the next one from the bitmaps, not the rollups."""
+        runs = [(date(2025, 1, 1), date(2025, 1, 3)), (date(2025, 2, 1), date(2025, 2, 5)),
+                (date(2025, 3, 1), date(2025, 3, 5)), (date(2025, 4, 18), date(2025, 4, 19))]
+        with patch('app.models.streak_state.PresenceBitmap.runs', return_value=iter(runs)) as mock_runs:
+            state = StreakState._scan(self.mock_db, self.user_id, str(self.supplement_id))
+
+        self.assertEqual(mock_runs.call_args[0][1], f"supplements.{self.supplement_id}")
+        self.assertEqual(state, {'lastDay': '2025-04-19', 'currentRun': 2, 'longestRun': 5,
+                                 'longestStart': '2025-02-01', 'longestEnd': '2025-02-05'})
+        self.mock_db.DailyRollups.find.assert_not_called()
+
+        # Without any bitmap days the logs are read instead
+        other = ObjectId()
+        self.mock_db.IntakeLogs.aggregate.return_value = [
+            {'_id': {'day': day, 'supplement_id': supplement_id}, 'count': 1, 'name': 'Zinc'}
+            for day, supplement_id in (('2025-04-17', other), ('2025-04-18', self.supplement_id),
+                                       ('2025-04-19', self.supplement_id))
+        ]
+        with patch('app.models.streak_state.PresenceBitmap.runs', return_value=iter([])):
+            state = StreakState._scan(self.mock_db, self.user_id, str(self.supplement_id))
+        self.assertEqual((state['longestStart'], state['longestRun']), ('2025-04-18', 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
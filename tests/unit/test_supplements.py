@@ -653,6 +653,26 @@ class TestSupplements(unittest.TestCase):
         self.assertEqual(data["error"], "An error occurred")
         self.assertEqual(data["details"], "Database error")
 
+    @patch('app.models.supplement.get_db')
+    def test_find_names_by_ids(self, mock_get_db):
+        """Test resolving several supplement names in one query."""
+        object_id = ObjectId()
+        mock_db = MagicMock()
+        mock_db.Supplements.find.return_value = [
+            {'_id': object_id, 'name': 'Vitamin D'},
+            {'_id': 'legacy-id', 'name': 'Zinc'}
+        ]
+        mock_get_db.return_value = mock_db
+
+        names = Supplement.find_names_by_ids([str(object_id), 'legacy-id', None])
+
+        self.assertEqual(names, {str(object_id): 'Vitamin D', 'legacy-id': 'Zinc'})
+        query = mock_db.Supplements.find.call_args[0][0]
+        # Hex ids are matched both as strings and as ObjectIds
+        self.assertEqual(query['_id']['$in'], [str(object_id), object_id, 'legacy-id'])
+        self.assertEqual(Supplement.find_names_by_ids([]), {})
+        mock_db.Supplements.find.assert_called_once()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -14,11 +14,14 @@ from app import create_app
 from app.models.supplement import Supplement
 from app.routes.supplements import bp as supplements_bp
 from app.models.interaction import Interaction
+from app.models.reference_data import InteractionGraph
 
 class TestSupplementRoutes(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures."""
+        # Interaction lookups go through this worker's cached graph
+        InteractionGraph.invalidate()
         self.app = create_app()
         self.app.config['TESTING'] = True
         self.app.config['JWT_SECRET_KEY'] = 'test-secret-key'
@@ -168,7 +171,7 @@ class TestSupplementRoutes(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data, [])
 
-    @patch('app.routes.supplements.get_db')
+    @patch('app.models.reference_data.get_db')
     def test_get_interactions_by_supplement_success(self, mock_get_db):
         """Test getting interactions by supplement ID successfully."""
         # Create mock database and cursor
@@ -214,11 +217,7 @@ class TestSupplementRoutes(unittest.TestCase):
         self.assertEqual(len(data['supplementFoodInteractions']), 1)
         
         # Verify the find method was called with correct arguments
-        mock_interactions_collection.find.assert_called_once_with({
-            "supplements": {
-                "$elemMatch": {"supplementId": str(self.supplement_id)}
-            }
-        })
+        mock_interactions_collection.find.assert_called_once_with()
 
     def test_get_interactions_by_supplement_invalid_id(self):
         """Test getting interactions with an invalid supplement ID."""
@@ -231,7 +230,7 @@ class TestSupplementRoutes(unittest.TestCase):
         self.assertIn('error', data)
         self.assertEqual(data['error'], 'Invalid supplement ID format')
 
-    @patch('app.routes.supplements.get_db')
+    @patch('app.models.reference_data.get_db')
     def test_get_interactions_by_supplement_db_error(self, mock_get_db):
         """Test getting interactions when a database error occurs."""
         # Configure mock to raise an exception
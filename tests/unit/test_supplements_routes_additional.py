@@ -13,11 +13,14 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 from app import create_app
 from app.routes.supplements import bp as supplements_bp
 from app.models.supplement import Supplement
+from app.models.reference_data import InteractionGraph
 
 class TestSupplementsRoutesAdditional(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures."""
+        # Interaction lookups go through this worker's cached graph
+        InteractionGraph.invalidate()
         self.app = create_app()
         self.app.config['TESTING'] = True
         self.app.config['JWT_SECRET_KEY'] = 'test-secret-key'
@@ -95,7 +98,7 @@ class TestSupplementsRoutesAdditional(unittest.TestCase):
         # Verify mock was called correctly
         mock_autocomplete.assert_called_once_with('vita')
 
-    @patch('app.routes.supplements.get_db')
+    @patch('app.models.reference_data.get_db')
     def test_get_interactions_by_supplement_success(self, mock_get_db):
         """Test getting interactions by supplement successfully."""
         # Configure mock database
@@ -140,11 +143,7 @@ class TestSupplementsRoutesAdditional(unittest.TestCase):
         self.assertEqual(len(data['supplementFoodInteractions']), 1)
         
         # Verify mock was called correctly
-        mock_interactions_collection.find.assert_called_once_with({
-            "supplements": {
-                "$elemMatch": {"supplementId": supplement_id}
-            }
-        })
+        mock_interactions_collection.find.assert_called_once_with()
 
     def test_get_interactions_by_supplement_invalid_id(self):
         """Test getting interactions with an invalid supplement ID."""
@@ -156,7 +155,7 @@ class TestSupplementsRoutesAdditional(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data["error"], "Invalid supplement ID format")
 
-    @patch('app.routes.supplements.get_db')
+    @patch('app.models.reference_data.get_db')
     def test_get_interactions_by_supplement_exception(self, mock_get_db):
         """Test exception during interactions retrieval by supplement."""
         # Configure mock to raise an exception
@@ -10,6 +10,147 @@ from bson.objectid import ObjectId
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 from app import create_app
+from app.models.symptom_log import SymptomLog, SymptomCategoryManager
+from app.models.symptom_catalog import SYMPTOM_CATEGORIES, SYMPTOM_SEED, SYMPTOM_SEED_VERSION
+from pymongo.errors import BulkWriteError
+
+
+class TestSymptomLogDayUpsert(unittest.TestCase):
+    def setUp(self):
+        self.user_id = ObjectId()
+        self.mood_id, self.sleep_id = ObjectId(), ObjectId()
+        self.mock_db = MagicMock()
+        self.mock_db.SymptomLogs.bulk_write.return_value = MagicMock(upserted_count=1, modified_count=1)
+
+    @patch('app.models.symptom_log.get_db')
+    def test_upsert_day_writes_one_bulk_upsert(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+
+        counts = SymptomLog.upsert_day(str(self.user_id), '2025-04-19', [
+            {'symptom_id': str(self.mood_id), 'severity': 'mild'},
+            {'symptom_id': str(self.sleep_id), 'severity': 'average', 'notes': 'woke up twice'},
+            {'symptom_id': str(self.mood_id), 'severity': 'severe'}
+        ], notes='after taking iron')
+
+        self.assertEqual(counts, {'upserted': 1, 'modified': 1})
+        operations = self.mock_db.SymptomLogs.bulk_write.call_args[0][0]
+        self.assertFalse(self.mock_db.SymptomLogs.bulk_write.call_args[1]['ordered'])
+        # Repeated symptoms collapse to the last entry
+        self.assertEqual(len(operations), 2)
+        self.assertEqual(operations[0]._filter, {'user_id': self.user_id, 'symptom_id': self.mood_id,
+                                                 'date': '2025-04-19', 'deleted_at': None})
+        self.assertEqual(operations[0]._doc['$set']['severity'], 'severe')
+        self.assertEqual(operations[0]._doc['$set']['notes'], 'after taking iron')
+        self.assertEqual(operations[1]._doc['$set']['notes'], 'woke up twice')
+        self.assertIn('symptomLogId', operations[1]._doc['$setOnInsert'])
+        self.assertTrue(operations[1]._upsert)
+
+        # One rollup update and one version bump for the whole day
+        self.mock_db.DailyRollups.update_one.assert_called_once()
+        rollup_update = self.mock_db.DailyRollups.update_one.call_args[0][1]['$set']
+        self.assertEqual(rollup_update[f'symptoms.{self.mood_id}'], 3)
+        self.assertEqual(rollup_update[f'symptoms.{self.sleep_id}'], 2)
+        self.mock_db.ReportVersions.update_one.assert_called_once()
+
+    @patch('app.models.symptom_log.get_db')
+    def test_upsert_day_retries_concurrent_inserts(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        duplicate = BulkWriteError({'writeErrors': [{'index': 1, 'code': 11000, 'errmsg': 'duplicate key'}],
+                                    'nUpserted': 1, 'nModified': 0})
+        self.mock_db.SymptomLogs.bulk_write.side_effect = [duplicate, MagicMock(upserted_count=0, modified_count=1)]
+
+        counts = SymptomLog.upsert_day(self.user_id, '2025-04-19', [
+            {'symptom_id': str(self.mood_id), 'severity': 'mild'},
+            {'symptom_id': str(self.sleep_id), 'severity': 'average'}
+        ])
+
+        self.assertEqual(counts, {'upserted': 1, 'modified': 1})
+        retried = self.mock_db.SymptomLogs.bulk_write.call_args_list[1][0][0]
+        self.assertEqual([operation._filter['symptom_id'] for operation in retried], [self.sleep_id])
+
+    @patch('app.models.symptom_log.get_db')
+    def test_upsert_day_validates_before_writing(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        for entries in ([], [{'symptom_id': str(self.mood_id)}],
+                        [{'symptom_id': str(self.mood_id), 'severity': 'awful'}],
+                        [{'symptom_id': 'not-an-id', 'severity': 'mild'}]):
+            with self.assertRaises(ValueError):
+                SymptomLog.upsert_day(self.user_id, '2025-04-19', entries)
+        self.mock_db.SymptomLogs.bulk_write.assert_not_called()
+
+
+class TestSymptomSeed(unittest.TestCase):
+    def setUp(self):
+        self.mock_db = MagicMock()
+        self.mock_db.SymptomCategories.find.return_value = [
+            {'_id': ObjectId(), 'name': category['name']} for category in SYMPTOM_CATEGORIES
+        ]
+
+    @patch('app.models.symptom_log.SymptomCatalog.invalidate')
+    @patch('app.models.symptom_log.get_db')
+    def test_seed_is_bulk_upserted_once_per_version(self, mock_get_db, mock_invalidate):
+        mock_get_db.return_value = self.mock_db
+        self.mock_db.SeedVersions.find_one.return_value = None
+
+        self.assertTrue(SymptomCategoryManager.initialize_symptom_data())
+
+        categories = self.mock_db.SymptomCategories.bulk_write.call_args[0][0]
+        symptoms = self.mock_db.Symptoms.bulk_write.call_args[0][0]
+        self.assertEqual((len(categories), len(symptoms)), (len(SYMPTOM_CATEGORIES), len(SYMPTOM_SEED)))
+        self.assertEqual(categories[0]._filter, {'name': 'General'})
+        self.assertEqual(symptoms[0]._filter, {'symptomId': 'everything_is_fine'})
+        self.assertTrue(symptoms[0]._upsert)
+        self.mock_db.SymptomCategories.insert_one.assert_not_called()
+        self.mock_db.Symptoms.insert_one.assert_not_called()
+        marker = self.mock_db.SeedVersions.update_one.call_args[0]
+        self.assertEqual(marker[0], {'_id': 'symptoms'})
+        self.assertEqual(marker[1]['$set']['version'], SYMPTOM_SEED_VERSION)
+        mock_invalidate.assert_called_once()
+
+        # A stored marker at the current version skips the seed
+        self.mock_db.reset_mock()
+        self.mock_db.SeedVersions.find_one.return_value = {'_id': 'symptoms', 'version': SYMPTOM_SEED_VERSION}
+        self.assertFalse(SymptomCategoryManager.initialize_symptom_data())
+        self.mock_db.Symptoms.bulk_write.assert_not_called()
+        self.mock_db.SeedVersions.update_one.assert_not_called()
+
+    @patch('app.models.symptom_log.get_db')
+    def test_seed_tolerates_concurrent_inserts(self, mock_get_db):
+        mock_get_db.return_value = self.mock_db
+        self.mock_db.SeedVersions.find_one.return_value = None
+        self.mock_db.Symptoms.bulk_write.side_effect = BulkWriteError({'writeErrors': [{'index': 0, 'code': 11000}]})
+
+        self.assertTrue(SymptomCategoryManager.initialize_symptom_data())
+        self.mock_db.SeedVersions.update_one.assert_called_once()
+
+        self.mock_db.Symptoms.bulk_write.side_effect = BulkWriteError({'writeErrors': [{'index': 0, 'code': 121}]})
+        with self.assertRaises(BulkWriteError):
+            SymptomCategoryManager.initialize_symptom_data()
+
+
+class TestSymptomLogDates(unittest.TestCase):
+    @patch('app.models.symptom_log.get_db')
+    @patch('app.models.symptom_log.PresenceBitmap.days', return_value=['2025-04-19'])
+    def test_dates_with_symptoms_read_the_bitmaps(self, mock_days, mock_get_db):
+        self.assertEqual(SymptomLog.get_dates_with_symptoms(str(ObjectId())), ['2025-04-19'])
+        mock_get_db.return_value.SymptomLogs.aggregate.assert_not_called()
+
+    @patch('app.models.symptom_log.get_db')
+    @patch('app.models.symptom_log.PresenceBitmap.days', return_value=[])
+    def test_dates_with_symptoms_fall_back_to_the_logs(self, mock_days, mock_get_db):
+        """Test logs written before the bitmaps were kept are still found."""
+        user_id = ObjectId()
+        mock_get_db.return_value.SymptomLogs.aggregate.return_value = [
+            {'_id': {'day': '2025-04-20', 'severity': 'mild'}},
+            {'_id': {'day': '2025-04-18', 'severity': 'severe'}},
+            {'_id': {'day': '2025-04-20', 'severity': 'severe'}},
+            {'_id': {'day': '2025-04-19', 'severity': 'none'}}
+        ]
+
+        self.assertEqual(SymptomLog.get_dates_with_symptoms(str(user_id)), ['2025-04-18', '2025-04-20'])
+        pipeline = mock_get_db.return_value.SymptomLogs.aggregate.call_args[0][0]
+        self.assertEqual(pipeline[0]['$match'], {'user_id': user_id, 'deleted_at': None})
+
 
 if __name__ == '__main__':
     unittest.main()
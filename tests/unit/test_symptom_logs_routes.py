@@ -12,8 +12,10 @@ from datetime import datetime, timedelta
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 from app import create_app
-from app.models.symptom_log import SymptomLog, SymptomCategoryManager
+from app.models.symptom_log import SymptomLog, SymptomCategoryManager, symptom_writes
+from app.models.symptom_catalog import SymptomCatalog
 from app.routes.symptom_logs import bp as symptom_logs_bp
+from app.utils.pagination import encode_cursor
 
 class TestSymptomLogsRoutes(unittest.TestCase):
 
@@ -51,40 +53,54 @@ class TestSymptomLogsRoutes(unittest.TestCase):
         """Clean up after tests."""
         self.app_context.pop()
 
-    @patch('app.routes.symptom_logs.SymptomCategoryManager.initialize_symptom_data')
-    def test_initialize_database(self, mock_init):
-        """Test that database initialization occurs."""
-        # Call the route that would trigger initialization
-        response = self.client.get('/api/symptom-logs/symptoms')
-        
-        # This should have triggered initialization
-        mock_init.assert_called_once()
+    @patch('app.config.TESTING', False)
+    @patch('app.init_indexes')
+    @patch('app.routes.symptom_logs.SymptomCatalog.get')
+    @patch('app.models.symptom_log.SymptomCategoryManager.initialize_symptom_data')
+    def test_initialize_database(self, mock_init, mock_get, mock_indexes):
+        """Test that the symptom seed runs at startup, not on the first request."""
+        app = create_app()
+        self.assertTrue(app.extensions['startup'].wait(5))
+        mock_init.assert_called_once_with()
 
-    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details')
-    def test_get_all_symptoms(self, mock_get_details):
-        """Test getting all symptoms."""
+        app.test_client().get('/api/symptom-logs/symptoms')
+        mock_init.assert_called_once_with()
+
+    @patch('app.models.symptom_catalog.get_db')
+    def test_get_all_symptoms(self, mock_get_db):
+        """Test getting all symptoms from the cached catalog."""
         # Configure mock
-        mock_get_details.return_value = {
-            str(ObjectId()): {
-                "_id": ObjectId(),
-                "name": "Headache",
-                "categoryId": ObjectId(),
-                "description": "Head pain"
-            }
-        }
+        category_id, symptom_id = ObjectId(), ObjectId()
+        mock_db = MagicMock()
+        mock_db.SymptomCategories.find.return_value = [{'_id': category_id, 'name': 'General', 'icon': '🔍'}]
+        mock_db.Symptoms.find.return_value = [
+            {'_id': symptom_id, 'name': 'Headache', 'icon': '🤕', 'categoryId': category_id},
+            {'_id': ObjectId(), 'name': 'Orphan', 'icon': '?', 'categoryId': ObjectId()}
+        ]
+        mock_get_db.return_value = mock_db
+        SymptomCatalog.invalidate()
+        self.addCleanup(SymptomCatalog.invalidate)
         
         response = self.client.get('/api/symptom-logs/symptoms')
         
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertIn('symptoms', data)
-        self.assertIsInstance(data['symptoms'], list)
-        mock_get_details.assert_called_once()
-
-    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details')
-    def test_get_all_symptoms_exception(self, mock_get_details):
+        self.assertEqual(data['symptoms'], [{
+            '_id': str(symptom_id), 'name': 'Headache', 'icon': '🤕', 'categoryId': str(category_id),
+            'categoryName': 'General', 'categoryIcon': '🔍', 'categoryKey': 'general'
+        }])
+        
+        # Later requests are served from memory and revalidated with the catalog version
+        etag = response.headers['ETag']
+        response = self.client.get('/api/symptom-logs/symptoms', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        mock_db.Symptoms.find.assert_called_once()
+
+    @patch('app.routes.symptom_logs.SymptomCatalog.get')
+    def test_get_all_symptoms_exception(self, mock_get_catalog):
         """Test exception when getting symptoms."""
-        mock_get_details.side_effect = Exception("Database error")
+        mock_get_catalog.side_effect = Exception("Database error")
         
         response = self.client.get('/api/symptom-logs/symptoms')
         
@@ -114,6 +130,30 @@ class TestSymptomLogsRoutes(unittest.TestCase):
         self.assertIn('log', data)
         mock_create.assert_called_once()
 
+    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details', return_value={})
+    @patch('app.routes.symptom_logs.SymptomLog.find_by_date', return_value=[])
+    @patch('app.models.symptom_log.SymptomLog.upsert_day')
+    @patch('app.routes.symptom_logs.SymptomLog.create')
+    def test_create_symptom_log_coalesced(self, mock_create, mock_upsert, mock_find, mock_details):
+        """Test rapid saves are acknowledged, then written once before the user's next read."""
+        symptom_id = self.log_data['symptom_id']
+        with patch.object(symptom_writes, 'window', 60):
+            for severity in ('mild', 'severe', 'average'):
+                response = self.client.post('/api/symptom-logs/', json={**self.log_data, 'severity': severity},
+                                            headers=self.headers)
+                self.assertEqual(response.status_code, 202)
+                self.assertEqual(json.loads(response.data)['log']['severity'], severity)
+            mock_upsert.assert_not_called()
+            
+            response = self.client.get(f"/api/symptom-logs/date/{self.log_data['date']}", headers=self.headers)
+            
+        self.assertEqual(response.status_code, 200)
+        mock_create.assert_not_called()
+        mock_upsert.assert_called_once_with(self.user_id, self.log_data['date'], [
+            {'symptom_id': symptom_id, 'severity': 'average', 'notes': 'Test symptom'}
+        ])
+        self.assertFalse(symptom_writes.has_pending())
+
     def test_create_symptom_log_no_data(self):
         """Test creating symptom log with no data."""
         response = self.client.post('/api/symptom-logs/',
@@ -238,6 +278,19 @@ class TestSymptomLogsRoutes(unittest.TestCase):
         log = data['logs'][0]
         self.assertEqual(log['symptom_name'], 'Headache')
 
+    @patch('app.routes.symptom_logs.symptom_writes')
+    @patch('app.routes.symptom_logs.SymptomLog.find_by_date', return_value=[])
+    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details', return_value={})
+    def test_failed_flush_of_pending_writes_does_not_fail_the_read(self, mock_get_details, mock_find, mock_writes):
+        """Test a database error while writing the user's coalesced saves doesn't fail their request."""
+        mock_writes.has_pending.return_value = True
+        mock_writes.flush.side_effect = RuntimeError('Could not connect to MongoDB')
+
+        response = self.client.get('/api/symptom-logs/date/2023-05-01', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        mock_writes.flush.assert_called_once_with(self.user_id)
+
     def test_get_logs_for_date_invalid_format(self):
         """Test getting logs with invalid date format."""
         response = self.client.get('/api/symptom-logs/date/not-a-date', headers=self.headers)
@@ -319,37 +372,70 @@ class TestSymptomLogsRoutes(unittest.TestCase):
         self.assertIn('error', data)
         self.assertEqual(data['error'], 'Symptom log not found')
 
-    @patch('app.routes.symptom_logs.SymptomLog.find_active_symptoms_for_date')
-    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details')
-    def test_get_symptoms_summary(self, mock_get_details, mock_find_active):
+    @patch('app.models.symptom_log.get_db')
+    @patch('app.models.symptom_log.SymptomLog.get_symptom_details')
+    def test_get_symptoms_summary(self, mock_get_details, mock_get_db):
         """Test getting symptoms summary for a date."""
         # Configure mocks
-        # Mock active logs for the date
-        mock_log = MagicMock()
-        mock_log.to_dict.return_value = {
-            '_id': str(ObjectId()),
-            'symptom_id': 'symptom123',
-            'severity': 3,
-            'notes': 'Test notes',
-            'date': '2023-05-01'
-        }
-        mock_find_active.return_value = [mock_log]
+        # The day's active logs, read once with a projection
+        mock_db = MagicMock()
+        mock_db.SymptomLogs.find.return_value = [
+            {'symptom_id': ObjectId('6463a6f0c1a2b3c4d5e6f701'), 'severity': 'severe', 'notes': ''},
+            {'symptom_id': ObjectId('6463a6f0c1a2b3c4d5e6f702'), 'severity': 'mild', 'notes': 'Test notes'},
+            {'symptom_id': ObjectId('6463a6f0c1a2b3c4d5e6f703'), 'severity': 'mild', 'notes': 'Later notes'}
+        ]
+        mock_get_db.return_value = mock_db
         
         # Mock symptom details
         mock_get_details.return_value = {
-            'symptom123': {
-                'name': 'Headache',
-                'icon': 'headache.png',
-                'categoryName': 'General',
-                'categoryIcon': 'general.png'
-            }
+            '6463a6f0c1a2b3c4d5e6f701': {'name': 'Headache', 'icon': '🤕', 'categoryName': 'General',
+                                         'categoryIcon': '🔍', 'categoryKey': 'general'},
+            '6463a6f0c1a2b3c4d5e6f702': {'name': 'Insomnia', 'icon': '😳', 'categoryName': 'Sleep',
+                                         'categoryIcon': '😴', 'categoryKey': 'sleep'}
         }
         
         response = self.client.get('/api/symptom-logs/summary/2023-05-01', headers=self.headers)
         
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
-        self.assertIn('categories', data)
+        mock_db.SymptomLogs.find.assert_called_once_with(
+            {'user_id': ObjectId(self.user_id), 'date': '2023-05-01', 'severity': {'$ne': 'none'}, 'deleted_at': None},
+            {'_id': 0, 'symptom_id': 1, 'severity': 1, 'notes': 1}
+        )
+        self.assertEqual(data['notes'], 'Test notes')
+        self.assertEqual([category['name'] for category in data['categories']], ['General', 'Sleep'])
+        self.assertEqual(data['categories'][1]['symptoms'], [
+            {'id': '6463a6f0c1a2b3c4d5e6f702', 'name': 'Insomnia', 'icon': '😳', 'severity': 'mild'}
+        ])
+
+    @patch('app.routes.symptom_logs.SymptomLog.get_symptoms_summary')
+    @patch('app.routes.symptom_logs.SymptomLog.upsert_day')
+    def test_save_symptom_day(self, mock_upsert, mock_summary):
+        """Test saving a whole day of symptoms in one request."""
+        mock_upsert.return_value = {'upserted': 2, 'modified': 0}
+        mock_summary.return_value = {'categories': [], 'notes': 'after taking iron', 'date': '2023-05-01'}
+        symptoms = [{'symptom_id': str(ObjectId()), 'severity': 'mild'},
+                    {'symptom_id': str(ObjectId()), 'severity': 'average'}]
+        
+        response = self.client.put('/api/symptom-logs/day/2023-05-01',
+                                   json={'symptoms': symptoms, 'notes': 'after taking iron'},
+                                   headers=self.headers)
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        mock_upsert.assert_called_once_with(self.user_id, '2023-05-01', symptoms, 'after taking iron')
+        mock_summary.assert_called_once_with(self.user_id, '2023-05-01')
+        self.assertEqual(data['upserted'], 2)
+        self.assertEqual(data['summary']['notes'], 'after taking iron')
+
+    def test_save_symptom_day_invalid(self):
+        """Test day saves with a bad date or body."""
+        response = self.client.put('/api/symptom-logs/day/05-01-2023', json={'symptoms': []}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.client.put('/api/symptom-logs/day/2023-05-01', json={'symptoms': 'mild'},
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 400)
 
     @patch('app.routes.symptom_logs.SymptomLog.find_by_date_range')
     def test_get_logs_for_date_range(self, mock_find):
@@ -377,6 +463,92 @@ class TestSymptomLogsRoutes(unittest.TestCase):
         self.assertEqual(len(data['logs']), 1)
         mock_find.assert_called_once_with(self.user_id, '2023-01-01', '2023-01-31')
 
+    @patch('app.routes.symptom_logs.SymptomLog.get_report_aggregates')
+    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details')
+    def test_get_symptom_trends(self, mock_get_details, mock_aggregates):
+        """Test severity trends for a date range."""
+        symptom_id = ObjectId()
+        mock_get_details.return_value = {str(symptom_id): {'name': 'Headache'}}
+        mock_aggregates.return_value = [
+            {'symptom_id': symptom_id, 'day': f'2023-01-0{day}', 'severity': severity, 'count': 1}
+            for day, severity in [(1, 'mild'), (2, 'mild'), (3, 'average'), (4, 'severe')]
+        ]
+        
+        response = self.client.get('/api/symptom-logs/trends?from=2023-01-01&to=2023-01-31', headers=self.headers)
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        mock_aggregates.assert_called_once_with(self.user_id, '2023-01-01', '2023-01-31')
+        trend = data['trends'][0]
+        self.assertEqual(trend['symptom_id'], str(symptom_id))
+        self.assertEqual(trend['name'], 'Headache')
+        self.assertEqual(trend['trend'], 'increasing')
+        self.assertEqual(trend['averageSeverity'], 1.75)
+        self.assertEqual(trend['slopePerWeek'], 4.9)
+        self.assertEqual(trend['rollingAverage'][-1], {'date': '2023-01-04', 'severity': 1.75})
+
+    def test_get_symptom_trends_invalid_range(self):
+        """Test trends with an invalid or reversed date range."""
+        response = self.client.get('/api/symptom-logs/trends?from=01-01-2023', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.client.get('/api/symptom-logs/trends?from=2023-02-01&to=2023-01-01', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    @patch('app.routes.symptom_logs.DailyRollup.find_by_date_range')
+    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details')
+    def test_get_symptom_series(self, mock_get_details, mock_find):
+        """Test daily severity series per symptom."""
+        symptom_id = str(ObjectId())
+        mock_get_details.return_value = {symptom_id: {'name': 'Headache'}}
+        mock_find.return_value = [
+            MagicMock(date='2023-01-01', symptoms={symptom_id: 1}),
+            MagicMock(date='2023-01-03', symptoms={symptom_id: 3})
+        ]
+        
+        response = self.client.get('/api/symptom-logs/series?from=2023-01-01&to=2023-01-31', headers=self.headers)
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        mock_find.assert_called_once_with(self.user_id, '2023-01-01', '2023-01-31')
+        self.assertEqual(data['series'], [{
+            'symptom_id': symptom_id,
+            'name': 'Headache',
+            'days': 2,
+            'points': [{'date': '2023-01-01', 'severity': 1}, {'date': '2023-01-03', 'severity': 3}]
+        }])
+
+    @patch('app.routes.symptom_logs.SymptomLog.find_by_date_range')
+    def test_get_logs_for_date_range_paginated(self, mock_find):
+        """Test keyset pagination of a date range."""
+        after_id = ObjectId()
+        mock_log = MagicMock(_id=ObjectId(), date='2023-01-20')
+        mock_log.to_dict.return_value = {'symptom_id': 'symptom123', 'severity': 'mild', 'date': '2023-01-20'}
+        mock_find.return_value = [mock_log]
+        cursor = encode_cursor('2023-01-15', after_id)
+        
+        response = self.client.get(
+            f'/api/symptom-logs/range?start_date=2023-01-01&end_date=2023-01-31&limit=5&after={cursor}',
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertIsNone(data['next_cursor'])
+        mock_find.assert_called_once_with(
+            self.user_id, '2023-01-01', '2023-01-31', limit=5, after=('2023-01-15', after_id)
+        )
+
+    def test_get_logs_for_date_range_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        response = self.client.get(
+            '/api/symptom-logs/range?start_date=2023-01-01&end_date=2023-01-31&after=bogus',
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid pagination cursor', json.loads(response.data)['error'])
+
     def test_get_logs_for_date_range_missing_params(self):
         """Test getting logs for a date range with missing parameters."""
         # Make request with missing end_date
@@ -441,7 +613,7 @@ class TestSymptomLogsRoutes(unittest.TestCase):
         data = json.loads(response.data)
         self.assertIn('error', data)
 
-    @patch('app.routes.symptom_logs.SymptomCategoryManager.initialize_symptom_data')
+    @patch('app.models.symptom_log.SymptomCategoryManager.initialize_symptom_data')
     def test_initialize_database_exception(self, mock_initialize):
         """Test exception handling during database initialization."""
         # Configure mock
@@ -509,11 +681,11 @@ class TestSymptomLogsRoutes(unittest.TestCase):
         self.assertIn('error', data)
         mock_find.assert_called_once_with(self.user_id, '2023-01-01')
 
-    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details')
-    def test_get_all_symptoms_value_error(self, mock_get_details):
+    @patch('app.routes.symptom_logs.SymptomCatalog.get')
+    def test_get_all_symptoms_value_error(self, mock_get_catalog):
         """Test getting all symptoms with a ValueError."""
         # Configure mock
-        mock_get_details.side_effect = ValueError('Invalid data')
+        mock_get_catalog.side_effect = ValueError('Invalid data')
         
         # Make request
         response = self.client.get('/api/symptom-logs/symptoms')
@@ -524,12 +696,12 @@ class TestSymptomLogsRoutes(unittest.TestCase):
         self.assertIn('error', data)
         self.assertEqual(data['error'], 'Invalid data')
 
-    @patch('app.routes.symptom_logs.SymptomLog.find_active_symptoms_for_date')
-    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details')
-    def test_get_symptoms_summary_with_empty_logs(self, mock_get_details, mock_find_active):
+    @patch('app.models.symptom_log.get_db')
+    @patch('app.models.symptom_log.SymptomLog.get_symptom_details')
+    def test_get_symptoms_summary_with_empty_logs(self, mock_get_details, mock_get_db):
         """Test getting symptoms summary with empty logs."""
         # Configure mocks
-        mock_find_active.return_value = []
+        mock_get_db.return_value.SymptomLogs.find.return_value = []
         mock_get_details.return_value = {}
         
         # Make request
@@ -548,21 +720,14 @@ class TestSymptomLogsRoutes(unittest.TestCase):
         self.assertIn('date', data)
         self.assertEqual(data['date'], '2023-01-01')
 
-    @patch('app.routes.symptom_logs.SymptomLog.find_active_symptoms_for_date')
-    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details')
-    def test_get_symptoms_summary_with_notes(self, mock_get_details, mock_find_active):
+    @patch('app.models.symptom_log.get_db')
+    @patch('app.models.symptom_log.SymptomLog.get_symptom_details')
+    def test_get_symptoms_summary_with_notes(self, mock_get_details, mock_get_db):
         """Test getting symptoms summary with logs that have notes."""
         # Configure mocks
-        mock_log = MagicMock()
-        mock_log.symptom_type = 'Headache'
-        mock_log.severity = 4
-        mock_log.to_dict.return_value = {
-            'symptom_id': 'symptom123',
-            'severity': 4,
-            'notes': 'Important symptom notes',
-            'date': '2023-01-01'
-        }
-        mock_find_active.return_value = [mock_log]
+        mock_get_db.return_value.SymptomLogs.find.return_value = [
+            {'symptom_id': 'symptom123', 'severity': 'severe', 'notes': 'Important symptom notes'}
+        ]
         
         mock_get_details.return_value = {
             'symptom123': {
@@ -571,7 +736,8 @@ class TestSymptomLogsRoutes(unittest.TestCase):
                 'icon': '🤕',
                 'categoryName': 'General',
                 'categoryIcon': '🔍',
-                'categoryId': 'general'
+                'categoryId': 'general',
+                'categoryKey': 'general'
             }
         }
         
@@ -592,12 +758,11 @@ class TestSymptomLogsRoutes(unittest.TestCase):
         self.assertEqual(len(data['categories'][0]['symptoms']), 1)
         self.assertEqual(data['categories'][0]['symptoms'][0]['name'], 'Headache')
 
-    @patch('app.routes.symptom_logs.SymptomLog.find_active_symptoms_for_date')
-    @patch('app.routes.symptom_logs.SymptomLog.get_symptom_details')
-    def test_get_symptoms_summary_exception(self, mock_get_details, mock_find_active):
+    @patch('app.routes.symptom_logs.SymptomLog.get_symptoms_summary')
+    def test_get_symptoms_summary_exception(self, mock_summary):
         """Test exception handling when getting symptoms summary."""
         # Configure mocks
-        mock_find_active.side_effect = Exception('Database error')
+        mock_summary.side_effect = Exception('Database error')
         
         # Make request
         response = self.client.get(